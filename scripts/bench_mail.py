@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+邮件发送链路本地压测脚本
+
+启动本地 SMTP 接收端（src/mailer/smtp_sink.py，可注入延迟和失败），
+用 SQLite 内存库中的合成报告和 N 个合成收件人驱动完整的 _send_report_core_logic
+（分批、批次清单、并发会话、限速、重试、投递日志和黑名单），
+输出批次/秒、DATA 字节数、连接数、重试和退信情况。无需真实邮箱服务、数据库和 Redis。
+
+--batch-limit 和 --rate 可传逗号分隔的多个值，按组合依次压测，用于调整
+MAIL_BATCH_LIMIT / MAIL_RATE_LIMIT_PER_SEC。
+
+用法:
+    python scripts/bench_mail.py --recipients 1000
+    python scripts/bench_mail.py --recipients 10000 --batch-limit 50,100,200 --rate 5,20
+    python scripts/bench_mail.py --latency-ms 200 --data-fail-rate 0.02 --soft-bounce-rate 0.01
+    python scripts/bench_mail.py --concurrency 1 --no-reuse
+"""
+
+import argparse
+import functools
+import logging
+import os
+import sys
+import time
+from datetime import date
+from typing import Dict, List
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 压测不依赖真实服务，未配置时填充占位值以通过配置校验
+for _key in ("DATABASE_URL", "REDIS_URL", "PROVIDER_DEEPSEEK_API_KEY",
+             "PROVIDER_QWEN_API_KEY", "SMTP_USER", "SMTP_PASS"):
+    os.environ.setdefault(_key, "bench-placeholder")
+
+from loguru import logger
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.config.settings import settings
+from src.mailer import retry_handler
+from src.mailer.smtp_sink import SMTPSink
+from src.models.delivery import DeliveryLog, DeliverySummary, RecipientType, ReportRecipient
+from src.models.report import Report
+from src.tasks import mail_tasks
+
+REPORT_DATE = date(2025, 1, 1)
+_TABLES = [Report.__table__, ReportRecipient.__table__, DeliveryLog.__table__, DeliverySummary.__table__]
+
+
+def make_session(recipients: int, body_kb: int, attachment_kb: int) -> Session:
+    """创建包含合成报告和收件人的 SQLite 内存库"""
+    engine = create_engine("sqlite://")
+    for table in _TABLES:
+        table.create(engine)
+    db = sessionmaker(bind=engine)()
+
+    paragraph = "<p>中国人民银行宣布下调存款准备金率0.5个百分点，释放长期资金约1万亿元。</p>\n"
+    db.add(Report(
+        report_date=REPORT_DATE,
+        html_body=paragraph * max(1, body_kb * 1024 // len(paragraph.encode("utf-8"))),
+        html_attachment=paragraph * max(1, attachment_kb * 1024 // len(paragraph.encode("utf-8"))),
+    ))
+    db.add_all(
+        ReportRecipient(email=f"user{i:05d}@bench.test", type=RecipientType.RECIPIENT)
+        for i in range(recipients)
+    )
+    db.commit()
+    return db
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_once(args, batch_limit: int, rate: float) -> Dict:
+    """按一组参数压测一次并返回汇总指标"""
+    db = make_session(args.recipients, args.body_kb, args.attachment_kb)
+    mail_tasks.get_db = lambda: iter([db])
+
+    settings.MAIL_BATCH_LIMIT = batch_limit
+    settings.MAIL_RATE_LIMIT_PER_SEC = rate
+
+    with SMTPSink(
+        latency_ms=args.latency_ms,
+        latency_jitter=args.latency_jitter,
+        data_fail_rate=args.data_fail_rate,
+        soft_bounce_rate=args.soft_bounce_rate,
+        hard_bounce_rate=args.hard_bounce_rate,
+        seed=args.seed,
+    ) as sink:
+        settings.SMTP_HOST = sink.hostname
+        settings.SMTP_PORT = sink.port
+
+        started = time.perf_counter()
+        result = mail_tasks._send_report_core_logic(REPORT_DATE.isoformat())
+        elapsed = time.perf_counter() - started
+        stats = sink.stats
+
+    if result["status"] != "success":
+        raise RuntimeError(f"发送失败: {result}")
+
+    blacklisted = db.query(ReportRecipient).filter(ReportRecipient.enabled.is_(False)).count()
+    return {
+        "batch_limit": batch_limit,
+        "rate": rate,
+        "elapsed": elapsed,
+        "result": result,
+        "stats": stats,
+        "blacklisted": blacklisted,
+        "batch_ms": [r["elapsed_ms"] for r in result["results"]],
+    }
+
+
+def print_report(args, runs: List[Dict]) -> None:
+    """打印压测报告"""
+    print("=" * 110)
+    print("邮件发送链路本地压测结果")
+    print("=" * 110)
+    print(f"收件人: {args.recipients}  并发会话: {args.concurrency}  "
+          f"连接复用: {'关' if args.no_reuse else '开'}  正文: {args.body_kb}KB  附件: {args.attachment_kb}KB")
+    print(f"接收端: 延迟 {args.latency_ms:.0f}ms (±{args.latency_jitter:.0%})  "
+          f"421={args.data_fail_rate:.1%}  451={args.soft_bounce_rate:.1%}  550={args.hard_bounce_rate:.1%}")
+    print("-" * 110)
+    print(f"{'批大小':>6} {'限速/s':>7} {'批次':>6} {'耗时s':>8} {'批次/s':>8} {'收件人/s':>9} "
+          f"{'MB':>7} {'连接':>5} {'DATA':>6} {'421':>5} {'451':>5} {'550':>5} "
+          f"{'失败批':>6} {'拉黑':>5} {'批p50ms':>8} {'批p95ms':>8}")
+    for run in runs:
+        result, stats, elapsed = run["result"], run["stats"], run["elapsed"]
+        batches = result["total_batches"]
+        print(
+            f"{run['batch_limit']:>6} {run['rate']:>7g} {batches:>6} {elapsed:>8.2f} "
+            f"{batches / elapsed:>8.2f} {stats.recipients / elapsed:>9.1f} "
+            f"{stats.bytes_received / 1024 / 1024:>7.2f} {stats.connections:>5} "
+            f"{stats.messages + stats.data_failures:>6} {stats.data_failures:>5} "
+            f"{stats.soft_refusals:>5} {stats.hard_refusals:>5} {result['failed_batches']:>6} "
+            f"{run['blacklisted']:>5} {percentile(run['batch_ms'], 50):>8.0f} "
+            f"{percentile(run['batch_ms'], 95):>8.0f}"
+        )
+    print("-" * 110)
+    print("DATA=DATA 事务数（含 421 和软退信重发）  连接=接收端建立的 SMTP 连接数  MB=DATA 阶段字节数")
+    print("=" * 110)
+
+
+def _parse_list(value: str, cast) -> List:
+    return [cast(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="邮件发送链路本地压测（本地 SMTP 接收端）")
+    parser.add_argument("--recipients", type=int, default=1000, help="合成收件人数")
+    parser.add_argument("--batch-limit", type=str, default=str(settings.MAIL_BATCH_LIMIT),
+                        help="每批收件人数（逗号分隔多个值）")
+    parser.add_argument("--rate", type=str, default="50", help="发送限速 封/秒（逗号分隔多个值）")
+    parser.add_argument("--concurrency", type=int, default=settings.MAIL_SMTP_CONCURRENCY, help="并发 SMTP 会话数")
+    parser.add_argument("--no-reuse", action="store_true", help="每批新建连接（关闭会话复用）")
+    parser.add_argument("--body-kb", type=int, default=30, help="正文大小（KB）")
+    parser.add_argument("--attachment-kb", type=int, default=200, help="附件大小（KB）")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="接收端 DATA 应答延迟（毫秒）")
+    parser.add_argument("--latency-jitter", type=float, default=0.5, help="延迟抖动比例")
+    parser.add_argument("--data-fail-rate", type=float, default=0.0, help="DATA 返回 421 的概率")
+    parser.add_argument("--soft-bounce-rate", type=float, default=0.0, help="收件人返回 451 的概率")
+    parser.add_argument("--hard-bounce-rate", type=float, default=0.0, help="收件人返回 550 的概率")
+    parser.add_argument("--retry-delay", type=float, default=0.1, help="重试基础退避（秒，生产为 2 秒）")
+    parser.add_argument("--log-flush-batches", type=int, default=settings.MAIL_LOG_FLUSH_BATCHES,
+                        help="投递日志批量写入粒度")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--verbose", action="store_true", help="输出发送链路日志")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="ERROR")
+        logging.getLogger("mail.log").setLevel(logging.ERROR)  # aiosmtpd 的弃用告警
+
+    # 本地接收端：明文连接，本进程内令牌桶
+    settings.SMTP_USE_TLS = False
+    settings.MAIL_RATE_LIMIT_BACKEND = "local"
+    settings.MAIL_SMTP_CONCURRENCY = args.concurrency
+    settings.MAIL_SMTP_REUSE_CONNECTION = not args.no_reuse
+    settings.MAIL_LOG_FLUSH_BATCHES = args.log_flush_batches
+    mail_tasks.send_with_retry = functools.partial(retry_handler.send_with_retry, base_delay=args.retry_delay)
+
+    runs = [
+        run_once(args, batch_limit, rate)
+        for batch_limit in _parse_list(args.batch_limit, int)
+        for rate in _parse_list(args.rate, float)
+    ]
+    print_report(args, runs)
+
+
+if __name__ == "__main__":
+    main()
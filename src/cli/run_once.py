@@ -41,7 +41,7 @@ logger.add(
     "--force",
     is_flag=True,
     default=False,
-    help="跳过时间窗口等限制（主要用于 send）",
+    help="跳过时间窗口等限制（主要用于 send；send 时忽略已成功批次，重新发送全部收件人）",
 )
 def run_once(step: str, date: str, force: bool):
     """
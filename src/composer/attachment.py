@@ -0,0 +1,154 @@
+"""
+报告附件打包模块
+
+附件 HTML 由模板 generate() 流式产出，边渲染边写入缓冲区：
+- html: UTF-8 原文（与旧版一致，存入 Report.html_attachment）
+- gzip: daily-report-YYYY-MM-DD.html.gz，压缩字节存入 Report.attachment_data
+- zip:  daily-report-YYYY-MM-DD.zip（内含同名 .html），压缩字节存入 Report.attachment_data
+
+压缩格式下不再保存完整 HTML 字符串，降低构建内存、数据库体积和 SMTP 传输量。
+"""
+
+import gzip
+import io
+import zipfile
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, Optional
+
+from loguru import logger
+
+from src.config.settings import settings
+
+ATTACHMENT_FORMAT_HTML = "html"
+ATTACHMENT_FORMAT_GZIP = "gzip"
+ATTACHMENT_FORMAT_ZIP = "zip"
+
+ATTACHMENT_FORMATS = (ATTACHMENT_FORMAT_HTML, ATTACHMENT_FORMAT_GZIP, ATTACHMENT_FORMAT_ZIP)
+COMPRESSED_FORMATS = (ATTACHMENT_FORMAT_GZIP, ATTACHMENT_FORMAT_ZIP)
+
+# 模板 generate() 产出的片段很小，攒够该字节数再写入压缩流
+_WRITE_BUFFER_BYTES = 64 * 1024
+
+
+@dataclass
+class AttachmentFile:
+    """打包后的附件"""
+    filename: str
+    content: bytes
+    format: str = ATTACHMENT_FORMAT_HTML
+
+    @property
+    def compressed(self) -> bool:
+        return self.format in COMPRESSED_FORMATS
+
+
+def resolve_format(fmt: Optional[str] = None) -> str:
+    """规范化附件格式（None=使用 settings.ATTACHMENT_FORMAT，非法值回退为 html）"""
+    fmt = (fmt or settings.ATTACHMENT_FORMAT or ATTACHMENT_FORMAT_HTML).lower()
+    if fmt not in ATTACHMENT_FORMATS:
+        logger.warning(f"⚠️ 未知的附件格式: {fmt}，使用 html")
+        return ATTACHMENT_FORMAT_HTML
+    return fmt
+
+
+def html_filename(report_date: date) -> str:
+    """附件 HTML 文件名"""
+    return f"daily-report-{report_date.isoformat()}.html"
+
+
+def attachment_filename(report_date: date, fmt: str) -> str:
+    """按格式生成附件文件名"""
+    if fmt == ATTACHMENT_FORMAT_GZIP:
+        return html_filename(report_date) + ".gz"
+    if fmt == ATTACHMENT_FORMAT_ZIP:
+        return f"daily-report-{report_date.isoformat()}.zip"
+    return html_filename(report_date)
+
+
+def _write_chunks(stream, chunks: Iterable[str]) -> None:
+    """把文本片段编码后分批写入二进制流"""
+    pending = []
+    size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= _WRITE_BUFFER_BYTES:
+            stream.write("".join(pending).encode("utf-8"))
+            pending = []
+            size = 0
+    if pending:
+        stream.write("".join(pending).encode("utf-8"))
+
+
+def pack_attachment(chunks: Iterable[str], report_date: date, fmt: Optional[str] = None) -> AttachmentFile:
+    """
+    将流式产出的 HTML 片段打包为附件
+
+    Args:
+        chunks: HTML 文本片段（如 template.generate() 的结果）
+        report_date: 报告日期（用于文件名）
+        fmt: 附件格式 html/gzip/zip（None=使用配置）
+
+    Returns:
+        AttachmentFile
+    """
+    fmt = resolve_format(fmt)
+    buffer = io.BytesIO()
+    level = settings.ATTACHMENT_COMPRESS_LEVEL
+
+    if fmt == ATTACHMENT_FORMAT_GZIP:
+        # mtime 固定为 0，相同内容压缩结果一致
+        with gzip.GzipFile(filename=html_filename(report_date), mode="wb", fileobj=buffer,
+                           compresslevel=level, mtime=0) as gz:
+            _write_chunks(gz, chunks)
+    elif fmt == ATTACHMENT_FORMAT_ZIP:
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=level) as zf:
+            with zf.open(html_filename(report_date), "w") as entry:
+                _write_chunks(entry, chunks)
+    else:
+        _write_chunks(buffer, chunks)
+
+    return AttachmentFile(
+        filename=attachment_filename(report_date, fmt),
+        content=buffer.getvalue(),
+        format=fmt,
+    )
+
+
+def unpack_attachment(content: bytes, fmt: str) -> str:
+    """将附件字节还原为 HTML 字符串"""
+    if fmt == ATTACHMENT_FORMAT_GZIP:
+        return gzip.decompress(content).decode("utf-8")
+    if fmt == ATTACHMENT_FORMAT_ZIP:
+        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            return zf.read(zf.namelist()[0]).decode("utf-8")
+    return content.decode("utf-8")
+
+
+def get_report_attachment(report) -> Optional[AttachmentFile]:
+    """
+    读取报告已保存的附件（用于邮件发送）
+
+    压缩格式直接返回保存的压缩字节；html 格式返回 html_attachment 的 UTF-8 编码。
+
+    Returns:
+        AttachmentFile，报告没有附件时返回 None
+    """
+    fmt = getattr(report, "attachment_format", None)
+    data = getattr(report, "attachment_data", None)
+    if fmt in COMPRESSED_FORMATS and data:
+        return AttachmentFile(attachment_filename(report.report_date, fmt), bytes(data), fmt)
+
+    if not report.html_attachment:
+        return None
+    return AttachmentFile(html_filename(report.report_date), report.html_attachment.encode("utf-8"))
+
+
+def get_report_attachment_html(report) -> Optional[str]:
+    """读取报告附件的 HTML 原文（用于网页下载，压缩格式自动解压）"""
+    fmt = getattr(report, "attachment_format", None)
+    data = getattr(report, "attachment_data", None)
+    if fmt in COMPRESSED_FORMATS and data:
+        return unpack_attachment(bytes(data), fmt)
+    return report.html_attachment or None
@@ -7,16 +7,53 @@
 import asyncio
 import os
 from datetime import date, datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+from markupsafe import Markup
 from loguru import logger
 
+from src.composer.attachment import AttachmentFile, pack_attachment
 from src.composer.llm_report_generator import generate_section_report_with_llm
+from src.composer.scorer import ScoredSections
 from src.config.settings import settings
+from src.nlp.provider_router import ConcurrencyController
 from src.utils.time_utils import get_local_now, to_local
 
 
+# 默认模板目录
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
+# 按模板目录缓存的 Jinja2 环境
+_template_envs: Dict[str, Environment] = {}
+
+
+def get_template_env(template_dir: Optional[str] = None) -> Environment:
+    """
+    获取缓存的 Jinja2 环境（每个模板目录只创建一次）
+
+    环境内部缓存已编译的模板，模板文件修改后按 mtime 自动重新加载；
+    字节码缓存写入系统临时目录，新进程首次渲染时免去模板编译。
+
+    Args:
+        template_dir: 模板目录（None=默认模板目录）
+
+    Returns:
+        Jinja2 环境
+    """
+    template_dir = template_dir or TEMPLATE_DIR
+    env = _template_envs.get(template_dir)
+    if env is None:
+        env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(["html", "xml"]),
+            bytecode_cache=FileSystemBytecodeCache(),
+        )
+        register_filters(env)
+        _template_envs[template_dir] = env
+    return env
+
+
 def _limit_attachment_items(
     sections: Dict[str, Dict[str, List[Dict]]],
     max_items: int
@@ -31,15 +68,22 @@ def _limit_attachment_items(
     Returns:
         截断后的分区字典
     """
-    # 收集所有条目并按评分排序
-    all_items = []
-    for region, layers in sections.items():
-        for layer, items in layers.items():
-            for item in items:
-                all_items.append((region, layer, item))
+    if isinstance(sections, ScoredSections):
+        # section_and_sort 已给出全局顺序，直接取前缀
+        all_items = [
+            (item.get("region", "未知"), item.get("layer", "未知"), item)
+            for item in sections.ordered
+        ]
+    else:
+        # 收集所有条目并按评分排序
+        all_items = []
+        for region, layers in sections.items():
+            for layer, items in layers.items():
+                for item in items:
+                    all_items.append((region, layer, item))
 
-    # 按评分降序排序
-    all_items.sort(key=lambda x: x[2].get("score", 0), reverse=True)
+        # 按评分降序排序
+        all_items.sort(key=lambda x: x[2].get("score", 0), reverse=True)
 
     # 截断
     limited_items = all_items[:max_items]
@@ -60,6 +104,93 @@ def _limit_attachment_items(
     return limited_sections
 
 
+def limit_attachment_sections(
+    sections_full: Dict[str, Dict[str, List[Dict]]],
+) -> Dict[str, Dict[str, List[Dict]]]:
+    """
+    附件条目超过 ATTACHMENT_MAX_ITEMS 时按评分截断
+
+    Args:
+        sections_full: 全量分区字典
+
+    Returns:
+        附件实际展示的分区字典（未超限时原样返回）
+    """
+    total_items = sum(
+        len(items)
+        for layers in sections_full.values()
+        for items in layers.values()
+    )
+
+    max_items = settings.ATTACHMENT_MAX_ITEMS
+    if total_items <= max_items:
+        return sections_full
+
+    logger.warning(
+        f"⚠️ 附件内容过多 ({total_items} 条)，超过限制 ({max_items} 条)，将按评分截断"
+    )
+    # 截断到前 N 条（按评分排序）
+    return _limit_attachment_items(sections_full, max_items)
+
+
+def _render_section_fragments(
+    template_name: str,
+    sections: Dict[str, Dict[str, List[Dict]]],
+    template_dir: Optional[str] = None,
+    section_reports: Dict[str, Dict[str, str]] = None,
+) -> Dict[str, Dict[str, Markup]]:
+    """按分区逐个渲染片段模板"""
+    template = get_template_env(template_dir).get_template(template_name)
+    section_reports = section_reports or {}
+
+    fragments: Dict[str, Dict[str, Markup]] = {}
+    for region, layers in sections.items():
+        fragments[region] = {}
+        for layer, items in layers.items():
+            fragments[region][layer] = Markup(template.render(
+                layer=layer,
+                items=items,
+                section_report=section_reports.get(region, {}).get(layer),
+            ))
+    return fragments
+
+
+def render_email_sections(
+    sections_topn: Dict[str, Dict[str, List[Dict]]],
+    section_reports: Dict[str, Dict[str, str]] = None,
+    template_dir: Optional[str] = None,
+) -> Dict[str, Dict[str, Markup]]:
+    """
+    渲染邮件正文的分区片段（分区报告 + TopN 卡片）
+
+    Args:
+        sections_topn: TopN 分区字典
+        section_reports: 分区报告字典
+        template_dir: 模板目录（None=默认模板目录）
+
+    Returns:
+        分区片段字典 {region: {layer: html}}
+    """
+    return _render_section_fragments("email_section.html", sections_topn, template_dir, section_reports)
+
+
+def render_attachment_sections(
+    sections_full: Dict[str, Dict[str, List[Dict]]],
+    template_dir: Optional[str] = None,
+) -> Dict[str, Dict[str, Markup]]:
+    """
+    渲染附件的分区片段
+
+    Args:
+        sections_full: 附件展示的分区字典（已按 ATTACHMENT_MAX_ITEMS 截断）
+        template_dir: 模板目录（None=默认模板目录）
+
+    Returns:
+        分区片段字典 {region: {layer: html}}
+    """
+    return _render_section_fragments("attachment_section.html", sections_full, template_dir)
+
+
 def generate_section_reports(
     sections: Dict[str, Dict[str, List[Dict]]],
     use_llm: bool = None
@@ -93,49 +224,83 @@ def _generate_section_reports_with_llm(sections: Dict[str, Dict[str, List[Dict]]
     """
     使用 LLM 生成所有分区的报告
 
+    所有分区（及其子块）在同一个事件循环中并发生成，只启动一次事件循环。
+
     Args:
         sections: 分区字典
 
     Returns:
         分区报告字典
     """
-    section_reports = {}
+    coro = _generate_all_section_reports(sections, settings.REPORT_LLM_DEADLINE_SEC)
 
-    # 对每个分区调用 LLM
-    for region, layers in sections.items():
-        section_reports[region] = {}
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # 没有运行中的事件循环，直接使用 asyncio.run
+        return asyncio.run(coro)
+
+    # 已经在事件循环中，在独立线程里运行新的事件循环
+    import concurrent.futures
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+async def _generate_all_section_reports(
+    sections: Dict[str, Dict[str, List[Dict]]],
+    deadline_sec: float,
+) -> Dict[str, Dict[str, str]]:
+    """
+    并发生成全部分区报告，受并发控制器限流和总时限约束
+
+    到达总时限仍未完成的分区被取消，不写入结果（模板中该分区仅展示事实观点卡片）。
+
+    Args:
+        sections: 分区字典
+        deadline_sec: 总时限（秒）
+
+    Returns:
+        分区报告字典
+    """
+    limiter = ConcurrencyController(max_inflight=settings.REPORT_LLM_MAX_INFLIGHT)
 
+    tasks = {}
+    for region, layers in sections.items():
         for layer, items in layers.items():
             if not items:
                 continue
-
             logger.info(f"生成【{region}-{layer}】报告，共 {len(items)} 条事实观点")
+            task = asyncio.create_task(generate_section_report_with_llm(region, layer, items, limiter=limiter))
+            tasks[task] = (region, layer)
+
+    section_reports: Dict[str, Dict[str, str]] = {region: {} for region in sections}
+    if not tasks:
+        return section_reports
+
+    done, pending = await asyncio.wait(tasks, timeout=deadline_sec)
+
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        timed_out = [f"{region}-{layer}" for task, (region, layer) in tasks.items() if task in pending]
+        logger.warning(
+            f"⏰ 分区报告生成超过总时限 {deadline_sec}s，{len(pending)} 个分区改为仅展示卡片: {timed_out}"
+        )
+
+    for task in done:
+        region, layer = tasks[task]
+        try:
+            report = task.result()
+        except Exception as e:
+            logger.error(f"【{region}-{layer}】报告生成异常: {e}", exc_info=True)
+            continue
 
-            try:
-                # 调用 LLM（使用 asyncio.run）
-                try:
-                    # 尝试获取现有事件循环
-                    loop = asyncio.get_running_loop()
-                    # 如果已经在事件循环中，使用 ThreadPoolExecutor
-                    import concurrent.futures
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        future = executor.submit(
-                            asyncio.run,
-                            generate_section_report_with_llm(region, layer, items)
-                        )
-                        report = future.result()
-                except RuntimeError:
-                    # 没有运行中的事件循环，直接使用 asyncio.run
-                    report = asyncio.run(generate_section_report_with_llm(region, layer, items))
-
-                if report:
-                    section_reports[region][layer] = report
-                    logger.success(f"【{region}-{layer}】报告生成成功，长度: {len(report)} 字符")
-                else:
-                    logger.warning(f"【{region}-{layer}】报告生成失败")
-
-            except Exception as e:
-                logger.error(f"【{region}-{layer}】报告生成异常: {e}", exc_info=True)
+        if report:
+            section_reports[region][layer] = report
+            logger.success(f"【{region}-{layer}】报告生成成功，长度: {len(report)} 字符")
+        else:
+            logger.warning(f"【{region}-{layer}】报告生成失败")
 
     return section_reports
 
@@ -145,6 +310,7 @@ def build_email_body(
     sections_topn: Dict[str, Dict[str, List[Dict]]],
     section_reports: Dict[str, Dict[str, str]] = None,
     template_path: Optional[str] = None,
+    section_html: Dict[str, Dict[str, str]] = None,
 ) -> str:
     """
     生成邮件正文 HTML
@@ -154,28 +320,19 @@ def build_email_body(
         sections_topn: TopN 分区字典（用于展示卡片）
         section_reports: 分区报告字典（LLM 生成的分析报告）
         template_path: 模板路径（可选）
+        section_html: 已渲染的分区片段（增量构建时传入，None=全部重新渲染）
 
     Returns:
         HTML 字符串
     """
     logger.info("开始生成邮件正文 HTML")
 
-    # 设置模板路径
-    if template_path is None:
-        template_dir = os.path.join(
-            os.path.dirname(__file__), "templates"
-        )
-    else:
-        template_dir = os.path.dirname(template_path)
-
-    # 初始化 Jinja2 环境
-    env = Environment(
-        loader=FileSystemLoader(template_dir),
-        autoescape=select_autoescape(["html", "xml"])
-    )
+    # 加载模板（环境与已编译模板均已缓存）
+    template_dir = os.path.dirname(template_path) if template_path else None
+    template = get_template_env(template_dir).get_template("email_body.html")
 
-    # 加载模板
-    template = env.get_template("email_body.html")
+    if section_html is None:
+        section_html = render_email_sections(sections_topn, section_reports, template_dir)
 
     # 格式化日期
     date_str = report_date.strftime("%Y年%m月%d日")
@@ -184,17 +341,56 @@ def build_email_body(
     html = template.render(
         report_date=date_str,
         sections=sections_topn,
-        section_reports=section_reports or {},
+        section_html=section_html,
     )
 
     logger.success("邮件正文 HTML 生成完成")
     return html
 
 
+def _render_attachment_chunks(
+    report_date: date,
+    sections_full: Dict[str, Dict[str, List[Dict]]],
+    template_path: Optional[str] = None,
+    section_html: Dict[str, Dict[str, str]] = None,
+) -> Iterator[str]:
+    """
+    流式渲染附件 HTML（template.generate()，逐段产出）
+
+    section_html 中没有的分区在模板中 include 分区片段模板，随附件逐段生成，
+    不预先渲染成完整字符串。
+
+    Args:
+        report_date: 报告日期
+        sections_full: 全量分区字典
+        template_path: 模板路径（可选）
+        section_html: 可复用的分区片段（增量构建时传入未变化分区的缓存，None=全部流式渲染）
+
+    Returns:
+        HTML 片段迭代器
+    """
+    # 检查总条目数，如果超过限制，进行截断
+    sections_full = limit_attachment_sections(sections_full)
+
+    # 加载模板（环境与已编译模板均已缓存）
+    template_dir = os.path.dirname(template_path) if template_path else None
+    template = get_template_env(template_dir).get_template("attachment.html")
+
+    # 格式化日期
+    date_str = report_date.strftime("%Y年%m月%d日")
+
+    return template.generate(
+        report_date=date_str,
+        sections_full=sections_full,
+        section_html=section_html or {},
+    )
+
+
 def build_attachment(
     report_date: date,
     sections_full: Dict[str, Dict[str, List[Dict]]],
     template_path: Optional[str] = None,
+    section_html: Dict[str, Dict[str, str]] = None,
 ) -> str:
     """
     生成附件 HTML
@@ -203,55 +399,75 @@ def build_attachment(
         report_date: 报告日期
         sections_full: 全量分区字典
         template_path: 模板路径（可选）
+        section_html: 可复用的分区片段（可选，缺失的分区流式渲染）
 
     Returns:
         HTML 字符串
     """
     logger.info("开始生成附件 HTML")
+    html = "".join(_render_attachment_chunks(report_date, sections_full, template_path, section_html))
+    logger.success("附件 HTML 生成完成")
+    return html
 
-    # 检查总条目数，如果超过限制，进行截断
-    total_items = sum(
-        len(items)
-        for layers in sections_full.values()
-        for items in layers.values()
-    )
 
-    max_items = settings.ATTACHMENT_MAX_ITEMS
-    if total_items > max_items:
-        logger.warning(
-            f"⚠️ 附件内容过多 ({total_items} 条)，超过限制 ({max_items} 条)，将按评分截断"
-        )
-        # 截断到前 N 条（按评分排序）
-        sections_full = _limit_attachment_items(sections_full, max_items)
+def build_attachment_file(
+    report_date: date,
+    sections_full: Dict[str, Dict[str, List[Dict]]],
+    fmt: Optional[str] = None,
+    template_path: Optional[str] = None,
+    section_html: Dict[str, Dict[str, str]] = None,
+) -> AttachmentFile:
+    """
+    生成附件文件（流式渲染，边渲染边写入 html/gzip/zip 缓冲区）
 
-    # 设置模板路径
-    if template_path is None:
-        template_dir = os.path.join(
-            os.path.dirname(__file__), "templates"
-        )
-    else:
-        template_dir = os.path.dirname(template_path)
+    Args:
+        report_date: 报告日期
+        sections_full: 全量分区字典
+        fmt: 附件格式 html/gzip/zip（None=使用 settings.ATTACHMENT_FORMAT）
+        template_path: 模板路径（可选）
+        section_html: 可复用的分区片段（增量构建时传入，None=全部流式渲染）
 
-    # 初始化 Jinja2 环境
-    env = Environment(
-        loader=FileSystemLoader(template_dir),
-        autoescape=select_autoescape(["html", "xml"])
+    Returns:
+        AttachmentFile
+    """
+    logger.info("开始生成附件")
+    attachment = pack_attachment(
+        _render_attachment_chunks(report_date, sections_full, template_path, section_html),
+        report_date,
+        fmt,
     )
+    logger.success(f"附件生成完成: {attachment.filename} ({len(attachment.content) / 1024:.1f} KB)")
+    return attachment
 
-    # 加载模板
-    template = env.get_template("attachment.html")
 
-    # 格式化日期
-    date_str = report_date.strftime("%Y年%m月%d日")
+def build_flash_body(
+    generated_at: datetime,
+    sections: Dict[str, Dict[str, List[Dict]]],
+    total_items: int,
+    template_path: Optional[str] = None,
+) -> str:
+    """
+    生成快讯邮件 HTML（仅包含水位之后新增的条目）
 
-    # 渲染模板
-    html = template.render(
-        report_date=date_str,
-        sections_full=sections_full,
-    )
+    Args:
+        generated_at: 生成时间
+        sections: 本次展示的分区字典
+        total_items: 本次新增条目总数（展示条目可能被截断）
+        template_path: 模板路径（可选）
 
-    logger.success("附件 HTML 生成完成")
-    return html
+    Returns:
+        HTML 字符串
+    """
+    template_dir = os.path.dirname(template_path) if template_path else None
+    template = get_template_env(template_dir).get_template("flash_body.html")
+
+    shown_items = sum(len(items) for layers in sections.values() for items in layers.values())
+    return template.render(
+        generated_at=format_datetime(generated_at),
+        sections=sections,
+        total_items=total_items,
+        shown_items=shown_items,
+    )
 
 
 def build_metadata(
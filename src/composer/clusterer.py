@@ -0,0 +1,112 @@
+"""
+跨文章事实聚类模块
+
+同一事件（如央行公告）常被多家媒体报道，抽取后成为多条近似重复的事实。
+本模块在 filter_items 与 section_and_sort 之间将它们聚为一簇：
+每簇只保留评分最高的代表项，并在代表项上记录佐证来源数，供评分使用。
+
+聚类基于 merger 的事实归一化 + SimHash 分段索引，整体近似线性时间。
+"""
+
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from src.composer.vector_scorer import ScoreWeights, score_items
+from src.config.settings import settings
+from src.nlp.merger import normalize_fact
+from src.nlp.simhash_index import SimhashBandIndex, compute_simhashes
+
+
+def cluster_items(
+    items: List[Dict],
+    max_distance: Optional[int] = None,
+    weights: ScoreWeights = None,
+) -> List[Dict]:
+    """
+    跨文章聚类近似重复的事实
+
+    采用领头者聚类：按评分从高到低遍历，每项只与已有簇的代表项比较，
+    命中则并入该簇，否则自成一簇。代表项因此总是簇内评分最高的项，
+    也避免了传递合并导致簇的语义漂移。
+
+    代表项上附加的字段：
+        - cluster_size: 簇内条目数
+        - corroboration_count: 簇内独立来源数（含代表项自身来源）
+        - corroborating_sources: 其他佐证来源名称列表
+        - cluster_item_ids: 被合并条目的 ID 列表
+
+    Args:
+        items: filter_items 返回的项列表
+        max_distance: SimHash 汉明距离阈值（None=使用配置）
+        weights: 评分权重（用于选择代表项，None=默认权重）
+
+    Returns:
+        聚类后的代表项列表（按评分降序）
+    """
+    if not items:
+        return []
+
+    if max_distance is None:
+        max_distance = settings.REPORT_CLUSTER_MAX_DISTANCE
+
+    # 先按基础评分排序，使每簇第一个出现的项即为代表项
+    base_scores = score_items(items, weights).total.tolist()
+    order = sorted(range(len(items)), key=lambda i: base_scores[i], reverse=True)
+
+    norms = [normalize_fact(items[i].get("fact", "")) for i in order]
+    fingerprints = compute_simhashes(norms)
+
+    index = SimhashBandIndex(max_distance=max_distance)
+    cluster_by_norm: Dict[str, int] = {}
+    clusters: List[List[Dict]] = []
+
+    for norm, fingerprint, i in zip(norms, fingerprints, order):
+        item = items[i]
+
+        # 归一化后完全相同的直接命中，否则查询 SimHash 索引
+        cluster_id = cluster_by_norm.get(norm)
+        if cluster_id is None:
+            cluster_id = index.find_similar(fingerprint)
+
+        if cluster_id is None:
+            cluster_id = len(clusters)
+            clusters.append([item])
+            index.add(cluster_id, fingerprint)
+            cluster_by_norm[norm] = cluster_id
+        else:
+            clusters[cluster_id].append(item)
+
+    representatives = [_build_representative(members) for members in clusters]
+
+    merged = len(items) - len(representatives)
+    if merged:
+        multi = sum(1 for members in clusters if len(members) > 1)
+        logger.info(
+            f"跨文章聚类完成: {len(items)} 条 -> {len(representatives)} 簇 "
+            f"(合并 {merged} 条，{multi} 簇有多条报道)"
+        )
+    else:
+        logger.info(f"跨文章聚类完成: {len(items)} 条，未发现重复报道")
+
+    return representatives
+
+
+def _build_representative(members: List[Dict]) -> Dict:
+    """以簇内第一项（评分最高）为代表，附加佐证信息"""
+    representative = members[0]
+
+    source_names: Dict = {}
+    for member in members:
+        source_key = member.get("source_id", member.get("source_name"))
+        source_names.setdefault(source_key, member.get("source_name", ""))
+
+    representative_source = representative.get("source_id", representative.get("source_name"))
+    representative["cluster_size"] = len(members)
+    representative["corroboration_count"] = len(source_names)
+    representative["corroborating_sources"] = [
+        name for key, name in source_names.items() if key != representative_source
+    ]
+    representative["cluster_item_ids"] = [member.get("id") for member in members[1:]]
+
+    return representative
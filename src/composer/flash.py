@@ -0,0 +1,106 @@
+"""
+快讯增量报告模块
+
+每次快讯只读取尚未被任何快讯覆盖的物化评分行（flash_report_id 为空），
+复用向量化评分和分区排序，只渲染评分最高的若干条，不重新查询或渲染全天数据。
+"""
+
+from datetime import date
+from typing import Dict, List, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from src.composer.scorer import section_and_sort
+from src.composer.vector_scorer import ScoreWeights
+from src.config.settings import settings
+from src.models.extraction import DailyItemScore
+
+
+def get_unflashed_item_ids(db: Session, report_date: date) -> List[int]:
+    """
+    读取当天尚未进入任何快讯的抽取项 ID
+
+    不使用 ID 水位：并行抽取时 ID 在 flush 时分配、在 commit 时才可见，
+    较小的 ID 可能晚于较大的 ID 提交，按"未覆盖"读取不会漏掉这些条目。
+
+    Args:
+        db: 数据库会话
+        report_date: 当天日期
+
+    Returns:
+        抽取项 ID 列表（升序）
+    """
+    rows = (
+        db.query(DailyItemScore.item_id)
+        .filter(
+            DailyItemScore.report_date == report_date,
+            DailyItemScore.flash_report_id.is_(None),
+        )
+        .order_by(DailyItemScore.item_id)
+        .all()
+    )
+    return [row.item_id for row in rows]
+
+
+def mark_items_flashed(db: Session, item_ids: List[int], flash_id: int) -> int:
+    """
+    标记抽取项已进入快讯（调用方提交事务）
+
+    Args:
+        db: 数据库会话
+        item_ids: 本次快讯读取的抽取项 ID
+        flash_id: 快讯 ID
+
+    Returns:
+        标记的行数
+    """
+    if not item_ids:
+        return 0
+    return (
+        db.query(DailyItemScore)
+        .filter(
+            DailyItemScore.item_id.in_(item_ids),
+            DailyItemScore.flash_report_id.is_(None),
+        )
+        .update({DailyItemScore.flash_report_id: flash_id}, synchronize_session=False)
+    )
+
+
+def select_flash_items(
+    items: List[Dict],
+    weights: ScoreWeights = None,
+    max_items: int = None,
+    min_score: float = None,
+) -> Tuple[Dict[str, Dict[str, List[Dict]]], int]:
+    """
+    评分并选出快讯展示的条目
+
+    Args:
+        items: 新增抽取项
+        weights: 评分权重（None=默认权重）
+        max_items: 最多展示条数（None=settings.FLASH_REPORT_MAX_ITEMS）
+        min_score: 最低评分（None=settings.FLASH_REPORT_MIN_SCORE）
+
+    Returns:
+        (按分区分组的展示条目, 展示条数)；分区按其最高分条目的先后排列
+    """
+    if max_items is None:
+        max_items = settings.FLASH_REPORT_MAX_ITEMS
+    if min_score is None:
+        min_score = settings.FLASH_REPORT_MIN_SCORE
+
+    if not items:
+        return {}, 0
+
+    ordered = section_and_sort(items, weights=weights).ordered
+    selected = [item for item in ordered if item["score"] >= min_score][:max_items]
+
+    sections: Dict[str, Dict[str, List[Dict]]] = {}
+    for item in selected:
+        region = item.get("region", "未知")
+        layer = item.get("layer", "未知")
+        sections.setdefault(region, {}).setdefault(layer, []).append(item)
+
+    logger.info(f"快讯选取: {len(items)} 条新增 -> 展示 {len(selected)} 条")
+    return sections, len(selected)
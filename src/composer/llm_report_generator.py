@@ -4,14 +4,16 @@ LLM 报告生成器模块
 使用 LLM 生成总览报告和分区报告。
 """
 
+import asyncio
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from loguru import logger
 
 from src.config.settings import settings
 from src.nlp.chunking import estimate_tokens, detect_language
-from src.nlp.provider_router import get_provider_router
+from src.nlp.provider_router import ConcurrencyController, get_provider_router
+from src.utils.usage_recorder import TASK_KIND_REPORT, get_usage_recorder
 
 
 # 分区报告 Prompt 模板
@@ -148,7 +150,8 @@ def chunk_items_by_tokens(
 async def generate_section_report_with_llm(
     region: str,
     layer: str,
-    items: List[Dict]
+    items: List[Dict],
+    limiter: Optional[ConcurrencyController] = None,
 ) -> str:
     """
     使用 LLM 生成分区报告（处理该分区的全部数据）
@@ -157,6 +160,7 @@ async def generate_section_report_with_llm(
         region: 区域（国内/国外）
         layer: 层级（政治/经济/金融大模型技术/金融科技）
         items: 该分区的所有事实观点列表（已按评分排序）
+        limiter: 并发控制器（多个分区并发生成时共享，None=不限制）
 
     Returns:
         生成的分区报告
@@ -189,24 +193,26 @@ async def generate_section_report_with_llm(
         logger.warning(
             f"【{region}-{layer}】输入超过 token 限制 ({estimated_tokens} > {target_tokens})，进行分块处理"
         )
-        return await _generate_section_report_with_chunking(region, layer, items)
+        return await _generate_section_report_with_chunking(region, layer, items, limiter)
 
     # 单次调用
-    return await _call_llm_for_report(prompt)
+    return await _call_llm_for_report(prompt, limiter)
 
 
 async def _generate_section_report_with_chunking(
     region: str,
     layer: str,
-    items: List[Dict]
+    items: List[Dict],
+    limiter: Optional[ConcurrencyController] = None,
 ) -> str:
     """
-    分块生成分区报告
+    分块生成分区报告（各子报告并发生成，再汇总）
 
     Args:
         region: 区域
         layer: 层级
         items: 所有事实观点
+        limiter: 并发控制器
 
     Returns:
         生成的报告
@@ -220,23 +226,21 @@ async def _generate_section_report_with_chunking(
     # 获取层级特殊指令
     layer_instruction = LAYER_INSTRUCTIONS.get(layer, LAYER_INSTRUCTIONS["未知"])
 
-    # 对每块生成子报告
-    sub_reports = []
-    for i, chunk in enumerate(chunks, 1):
-        logger.info(f"【{region}-{layer}】生成子报告 {i}/{len(chunks)}")
-
-        chunk_text = format_items_for_llm(chunk)
-        chunk_prompt = SECTION_REPORT_PROMPT.format(
+    # 并发生成各块子报告（结果保持分块顺序）
+    chunk_prompts = [
+        SECTION_REPORT_PROMPT.format(
             region=region,
             layer=layer,
             count=len(chunk),
-            items_text=chunk_text,
+            items_text=format_items_for_llm(chunk),
             layer_instruction=layer_instruction
         )
-
-        chunk_report = await _call_llm_for_report(chunk_prompt)
-        if chunk_report:
-            sub_reports.append(chunk_report)
+        for chunk in chunks
+    ]
+    chunk_reports = await asyncio.gather(
+        *(_call_llm_for_report(chunk_prompt, limiter) for chunk_prompt in chunk_prompts)
+    )
+    sub_reports = [report for report in chunk_reports if report]
 
     # 合并子报告
     if not sub_reports:
@@ -256,16 +260,17 @@ async def _generate_section_report_with_chunking(
 请生成汇总报告（150-250字，保留关键趋势和重要事件）：
 """
 
-    final_report = await _call_llm_for_report(merge_prompt)
+    final_report = await _call_llm_for_report(merge_prompt, limiter)
     return final_report if final_report else sub_reports[0]
 
 
-async def _call_llm_for_report(prompt: str) -> str:
+async def _call_llm_for_report(prompt: str, limiter: Optional[ConcurrencyController] = None) -> str:
     """
     调用 LLM 生成报告
 
     Args:
         prompt: 提示词
+        limiter: 并发控制器（None=直接调用）
 
     Returns:
         生成的报告文本
@@ -278,10 +283,17 @@ async def _call_llm_for_report(prompt: str) -> str:
     ]
 
     try:
-        response, provider_name = await router.call_with_fallback(
-            messages=messages,
-            timeout=settings.LLM_TIMEOUT_SEC
-        )
+        if limiter is not None:
+            response, provider_name = await limiter.call(
+                router,
+                messages=messages,
+                timeout=settings.LLM_TIMEOUT_SEC,
+            )
+        else:
+            response, provider_name = await router.call_with_fallback(
+                messages=messages,
+                timeout=settings.LLM_TIMEOUT_SEC
+            )
 
         content = response.get("content", "")
 
@@ -289,45 +301,20 @@ async def _call_llm_for_report(prompt: str) -> str:
             logger.error("LLM 返回内容为空")
             return "今日金融情报报告生成失败,请查看详细内容。"
 
-        # 记录 token 使用情况和成本
-        usage = response.get("usage", {})
-        model = response.get("model", "unknown")
+        # 记录 token 使用情况（仅写入内存缓冲，由用量记录器批量落库）
+        usage = response.get("usage", {}) or {}
         prompt_tokens = usage.get("prompt_tokens", 0)
         completion_tokens = usage.get("completion_tokens", 0)
 
         if prompt_tokens > 0 or completion_tokens > 0:
             try:
-                from src.db.session import SessionLocal
-                from src.utils.cost_calculator import calculate_cost
-                from src.models.delivery import ProviderUsage
-
-                cost = calculate_cost(
+                get_usage_recorder().record(
                     provider=provider_name,
-                    model=model,
+                    model=response.get("model", "unknown"),
                     prompt_tokens=prompt_tokens,
                     completion_tokens=completion_tokens,
+                    task_kind=TASK_KIND_REPORT,
                 )
-
-                # 记录到数据库
-                db = SessionLocal()
-                try:
-                    usage_record = ProviderUsage(
-                        provider_name=provider_name,
-                        model_name=model,
-                        prompt_tokens=prompt_tokens,
-                        completion_tokens=completion_tokens,
-                        total_tokens=prompt_tokens + completion_tokens,
-                        cost=cost,
-                    )
-                    db.add(usage_record)
-                    db.commit()
-                    logger.debug(
-                        f"报告生成成本记录: {provider_name}/{model}, "
-                        f"tokens={prompt_tokens + completion_tokens}, cost=¥{cost:.6f}"
-                    )
-                finally:
-                    db.close()
-
             except Exception as log_error:
                 logger.error(f"记录报告生成成本失败: {log_error}")
 
@@ -2,25 +2,243 @@
 评分器模块
 
 用于对抽取的事实和观点进行过滤、评分和排序。
+
+抽取项写入时同步维护每日评分物化表（daily_item_scores），
+报告构建只需按日期单表读取窄列，不再连表加载整篇文章。
 """
 
-from datetime import datetime, timedelta
-from typing import Dict, List
+import math
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Dict, Iterable, List
 
 from loguru import logger
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from src.config.settings import settings
 from src.models.article import Article, ProcessingStatus
-from src.models.extraction import ExtractionItem, Layer, Region
+from src.models.extraction import DailyItemScore, ExtractionItem, Layer, Region
 from src.models.source import Source
+from src.composer.vector_scorer import ScoreWeights, load_score_weights, score_items
 from src.utils.time_utils import get_local_now, to_local
 
 
+def _enum_value(value) -> str:
+    """枚举转字符串（兼容已是字符串的值）"""
+    return value.value if hasattr(value, 'value') else str(value)
+
+
+def build_score_row(
+    item: ExtractionItem,
+    article: Article,
+    source: Source,
+    weights: ScoreWeights = None,
+) -> Dict:
+    """
+    由抽取项、文章和来源构造物化表行
+
+    Args:
+        item: 抽取项（需已分配 ID）
+        article: 所属文章
+        source: 文章来源
+        weights: 评分权重（None=默认权重）
+
+    Returns:
+        daily_item_scores 行字典
+    """
+    row = {
+        "item_id": item.id,
+        "article_id": article.id,
+        "source_id": source.id,
+        "report_date": article.fetched_at.date(),
+        "region": _enum_value(item.region),
+        "layer": _enum_value(item.layer),
+        "confidence": float(item.confidence),
+        "finance_relevance": float(getattr(item, 'finance_relevance', 1.0) or 1.0),
+        "source_weight": float(getattr(source, 'weight', 1.0) or 1.0),
+        "content_len": article.content_len or 0,
+        "published_at": article.published_at,
+        "fact": item.fact,
+        "opinion": item.opinion or "",
+        "evidence_span": item.evidence_span or "",
+        "article_title": article.title,
+        "article_url": article.url,
+        "source_name": source.name,
+    }
+    row["base_score"] = calculate_base_score(row, weights)
+    return row
+
+
+def sync_item_scores(
+    db: Session,
+    article: Article,
+    items: Iterable[ExtractionItem],
+    source: Source = None,
+    weights: ScoreWeights = None,
+) -> int:
+    """
+    增量维护物化表：为一篇文章新写入的抽取项插入（或更新）评分行
+
+    抽取项需已 flush 以获得 ID；由调用方负责提交事务。
+
+    Args:
+        db: 数据库会话
+        article: 文章
+        items: 该文章新写入的抽取项
+        source: 文章来源（None=使用 article.source）
+        weights: 评分权重（None=从系统设置读取）
+
+    Returns:
+        写入的行数
+    """
+    items = list(items)
+    if not items:
+        return 0
+    source = source or article.source
+    weights = weights or load_score_weights(db)
+    rows = [build_score_row(item, article, source, weights) for item in items]
+
+    existing = {
+        row.item_id: row
+        for row in db.query(DailyItemScore).filter(
+            DailyItemScore.item_id.in_([r["item_id"] for r in rows])
+        )
+    }
+    for values in rows:
+        current = existing.get(values["item_id"])
+        if current is None:
+            db.add(DailyItemScore(**values))
+        else:
+            for key, value in values.items():
+                setattr(current, key, value)
+
+    logger.debug(f"物化评分表写入 {len(rows)} 行: article_id={article.id}")
+    return len(rows)
+
+
+def _source_items_query(db: Session, report_date: date, *columns):
+    """当日已完成文章的抽取项（物化表的源数据，按文章采集时间归属日期）"""
+    day_start = datetime.combine(report_date, datetime.min.time())
+    day_end = day_start + timedelta(days=1)
+    return (
+        db.query(*columns)
+        .select_from(ExtractionItem)
+        .join(Article, ExtractionItem.article_id == Article.id)
+        .join(Source, Article.source_id == Source.id)
+        .filter(
+            Article.fetched_at >= day_start,
+            Article.fetched_at < day_end,
+            Article.processing_status == ProcessingStatus.DONE,
+        )
+    )
+
+
+def refresh_daily_scores(db: Session, report_date: date, weights: ScoreWeights = None) -> int:
+    """
+    按日期从源表全量重建物化表（回填历史数据或来源信息变更后使用）
+
+    只投影构造评分行所需的列，不加载文章正文。
+
+    Args:
+        db: 数据库会话
+        report_date: 报告日期
+        weights: 评分权重（None=从系统设置读取）
+
+    Returns:
+        重建的行数
+    """
+    weights = weights or load_score_weights(db)
+
+    results = (
+        _source_items_query(
+            db,
+            report_date,
+            ExtractionItem.id,
+            ExtractionItem.fact,
+            ExtractionItem.opinion,
+            ExtractionItem.region,
+            ExtractionItem.layer,
+            ExtractionItem.evidence_span,
+            ExtractionItem.confidence,
+            ExtractionItem.finance_relevance,
+            Article.id.label("article_id"),
+            Article.title,
+            Article.url,
+            Article.published_at,
+            Article.fetched_at,
+            Article.content_len,
+            Source.id.label("source_id"),
+            Source.name,
+        )
+        .yield_per(settings.REPORT_QUERY_BATCH_SIZE)
+    )
+
+    db.query(DailyItemScore).filter(DailyItemScore.report_date == report_date).delete(
+        synchronize_session=False
+    )
+
+    count = 0
+    for r in results:
+        item = SimpleNamespace(
+            id=r.id, fact=r.fact, opinion=r.opinion, region=r.region, layer=r.layer,
+            evidence_span=r.evidence_span, confidence=r.confidence, finance_relevance=r.finance_relevance,
+        )
+        article = SimpleNamespace(
+            id=r.article_id, title=r.title, url=r.url, published_at=r.published_at,
+            fetched_at=r.fetched_at, content_len=r.content_len,
+        )
+        source = SimpleNamespace(id=r.source_id, name=r.name)
+        db.add(DailyItemScore(**build_score_row(item, article, source, weights)))
+        count += 1
+
+    db.commit()
+    logger.info(f"物化评分表重建完成: {report_date}, {count} 行")
+    return count
+
+
+# filter_items 读取的列（标签即项字典的键）
+_ITEM_COLUMNS = (
+    DailyItemScore.item_id.label("id"),
+    DailyItemScore.article_id,
+    DailyItemScore.article_title,
+    DailyItemScore.article_url,
+    DailyItemScore.fact,
+    DailyItemScore.opinion,
+    DailyItemScore.region,
+    DailyItemScore.layer,
+    DailyItemScore.evidence_span,
+    DailyItemScore.confidence,
+    DailyItemScore.finance_relevance,
+    DailyItemScore.source_id,
+    DailyItemScore.source_name,
+    DailyItemScore.source_weight,
+    DailyItemScore.published_at,
+    DailyItemScore.content_len,
+    DailyItemScore.base_score,
+)
+
+
+def _rows_to_items(query) -> List[Dict]:
+    """将列投影查询结果转为抽取项字典"""
+    items = []
+    for row in query:
+        item = dict(row._mapping)
+        item["opinion"] = item["opinion"] or ""
+        item["evidence_span"] = item["evidence_span"] or ""
+        items.append(item)
+    return items
+
+
 def filter_items(db: Session, report_date: datetime.date) -> List[Dict]:
     """
     过滤抽取项
 
+    从每日评分物化表按日期读取所需列，置信度和正文长度在数据库中过滤，
+    结果按 REPORT_QUERY_BATCH_SIZE 分批流式读取，不加载 ORM 实体和文章正文。
+    当日物化行数与源表抽取项数不一致时（历史数据未回填，或上线当天只有部分文章
+    经 sync_item_scores 写入），先从源表重建一次。
+
     Args:
         db: 数据库会话
         report_date: 报告日期
@@ -30,78 +248,126 @@ def filter_items(db: Session, report_date: datetime.date) -> List[Dict]:
     """
     logger.info(f"开始过滤 {report_date} 的抽取项")
 
-    # 查询当日的抽取项
+    materialized = (
+        db.query(func.count(DailyItemScore.id))
+        .filter(DailyItemScore.report_date == report_date)
+        .scalar()
+    )
+    expected = _source_items_query(db, report_date, func.count(ExtractionItem.id)).scalar()
+    if materialized != expected:
+        logger.info(f"物化评分表中 {report_date} 有 {materialized} 行，源表有 {expected} 条抽取项，从源表重建")
+        refresh_daily_scores(db, report_date)
+
+    # 只选择需要的列，过滤在数据库端完成，结果按批流式读取
     query = (
-        db.query(ExtractionItem, Article, Source)
-        .join(Article, ExtractionItem.article_id == Article.id)
-        .join(Source, Article.source_id == Source.id)
+        db.query(*_ITEM_COLUMNS)
         .filter(
-            # 日期过滤：使用抓取日期而非发布日期
-            Article.fetched_at >= report_date,
-            Article.fetched_at < datetime.combine(
-                report_date + timedelta(days=1), datetime.min.time()
-            ),
-            # 处理状态过滤
-            Article.processing_status == ProcessingStatus.DONE,
+            DailyItemScore.report_date == report_date,
             # 置信度过滤
-            ExtractionItem.confidence >= settings.CONFIDENCE_THRESHOLD,
-            # 金融相关性过滤（如果字段存在）
-            # 注意：为了兼容历史数据，我们允许 finance_relevance 为 NULL
+            DailyItemScore.confidence >= settings.CONFIDENCE_THRESHOLD,
+            # 内容长度过滤
+            DailyItemScore.content_len >= settings.MIN_CONTENT_LEN,
         )
+        .order_by(DailyItemScore.base_score.desc())
+        .yield_per(settings.REPORT_QUERY_BATCH_SIZE)
     )
 
-    results = query.all()
-
-    filtered_items = []
-    for item, article, source in results:
-        # 内容长度过滤
-        if article.content_len < settings.MIN_CONTENT_LEN:
-            logger.debug(f"过滤短文章: {article.id}, 长度: {article.content_len}")
-            continue
-
-        # 转换为字典
-        filtered_items.append({
-            "id": item.id,
-            "article_id": article.id,
-            "article_title": article.title,
-            "article_url": article.url,
-            "fact": item.fact,
-            "opinion": item.opinion or "",
-            "region": item.region.value if hasattr(item.region, 'value') else str(item.region),
-            "layer": item.layer.value if hasattr(item.layer, 'value') else str(item.layer),
-            "evidence_span": item.evidence_span or "",
-            "confidence": float(item.confidence),
-            "finance_relevance": float(getattr(item, 'finance_relevance', 1.0) or 1.0),
-            "source_id": source.id,
-            "source_name": source.name,
-            "source_weight": float(getattr(source, 'weight', 1.0) or 1.0),
-            "published_at": article.published_at,
-            "content_len": article.content_len,
-        })
+    filtered_items = _rows_to_items(query)
 
     logger.info(f"过滤完成: {len(filtered_items)} 条")
     return filtered_items
 
 
-def calculate_score(item: Dict, current_time: datetime = None) -> float:
+def filter_items_by_ids(db: Session, item_ids: List[int]) -> List[Dict]:
+    """
+    按抽取项 ID 读取并过滤物化评分行（快讯增量报告用）
+
+    只读取给定的新增项，不扫描全天数据。
+
+    Args:
+        db: 数据库会话
+        item_ids: 抽取项 ID 列表
+
+    Returns:
+        过滤后的项列表（字典格式）
+    """
+    if not item_ids:
+        return []
+
+    query = (
+        db.query(*_ITEM_COLUMNS)
+        .filter(
+            DailyItemScore.item_id.in_(item_ids),
+            DailyItemScore.confidence >= settings.CONFIDENCE_THRESHOLD,
+            DailyItemScore.content_len >= settings.MIN_CONTENT_LEN,
+        )
+        .yield_per(settings.REPORT_QUERY_BATCH_SIZE)
+    )
+
+    filtered_items = _rows_to_items(query)
+
+    logger.info(f"新增抽取项: {len(item_ids)} 条，过滤后 {len(filtered_items)} 条")
+    return filtered_items
+
+
+def calculate_base_score(item: Dict, weights: ScoreWeights = None) -> float:
+    """
+    计算与时间无关的静态评分（写入物化表，作为读取时的预排序键）
+
+    base_score = 置信度权重 * 置信度 + 来源权重 * 来源权威 + 金融相关性权重 * 金融相关性
+
+    Args:
+        item: 抽取项字典
+        weights: 评分权重（None=默认权重）
+
+    Returns:
+        静态评分
     """
-    计算项的综合评分
+    if weights is None:
+        weights = ScoreWeights()
+
+    # 1. 置信度
+    confidence_score = item.get("confidence", 0.5)
+
+    # 2. 权威性：来源权重
+    authority_score = min(1.0, item.get("source_weight", 1.0))
 
-    评分公式：
+    # 3. 金融相关性
+    finance_relevance_score = item.get("finance_relevance", 1.0)
+
+    return (
+        weights.confidence * confidence_score +
+        weights.authority * authority_score +
+        weights.finance_relevance * finance_relevance_score
+    )
+
+
+def calculate_score(item: Dict, current_time: datetime = None, weights: ScoreWeights = None) -> float:
+    """
+    计算项的综合评分（单项版本，批量评分见 vector_scorer.score_items，两者结果一致）
+
+    评分公式（默认权重）：
     score = 0.4 * 置信度 + 0.1 * 新近度 + 0.2 * 来源权威 + 0.3 * 金融相关性
+    经跨文章聚类的项再加多来源佐证加成（按来源数对数增长，上限为佐证权重），
+    总分截断到 1.0
+
+    静态部分按传入权重现场计算，不使用物化表中按写入时权重算出的 base_score。
 
     Args:
         item: 抽取项字典
         current_time: 当前时间（用于计算新近度）
+        weights: 评分权重（None=默认权重）
 
     Returns:
         综合评分（0-1之间）
     """
     if current_time is None:
         current_time = get_local_now()
+    if weights is None:
+        weights = ScoreWeights()
 
-    # 1. 置信度
-    confidence_score = item.get("confidence", 0.5)
+    # 1. 静态部分：置信度、来源权威、金融相关性
+    base_score = calculate_base_score(item, weights)
 
     # 2. 新近度：发布时间距今的小时数（越近越高）
     # 金融日报场景下，数据都是昨天一天的，新近度用于区分同一天内的不同时段
@@ -114,32 +380,44 @@ def calculate_score(item: Dict, current_time: datetime = None) -> float:
     else:
         recency_score = 0.5
 
-    # 3. 权威性：来源权重
-    authority_score = min(1.0, item.get("source_weight", 1.0))
+    score = base_score + weights.recency * recency_score
 
-    # 4. 金融相关性（新增）
-    finance_relevance_score = item.get("finance_relevance", 1.0)
-
-    # 综合评分（权重：置信40%、新近10%、来源20%、金融30%）
-    score = (
-        0.4 * confidence_score +
-        0.1 * recency_score +
-        0.2 * authority_score +
-        0.3 * finance_relevance_score
-    )
+    # 3. 多来源佐证（仅聚类后的代表项带有 corroboration_count）
+    corroboration_count = item.get("corroboration_count", 1)
+    if corroboration_count > 1:
+        cap = max(2, settings.REPORT_CORROBORATION_CAP)
+        corroboration_score = min(1.0, math.log(corroboration_count) / math.log(cap))
+        score = min(1.0, score + weights.corroboration * corroboration_score)
 
     return score
 
 
-def section_and_sort(items: List[Dict]) -> Dict[str, Dict[str, List[Dict]]]:
+class ScoredSections(dict):
+    """
+    分区结果：{region: {layer: [items 按评分降序]}}
+
+    在普通分区字典之外保留全局评分降序列表 ordered，
+    供附件截断和全量排序直接使用，无需再次展平排序。
+    """
+
+    def __init__(self, *args, ordered: List[Dict] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ordered: List[Dict] = ordered if ordered is not None else []
+
+
+def section_and_sort(items: List[Dict], weights: ScoreWeights = None) -> Dict[str, Dict[str, List[Dict]]]:
     """
     分区并排序
 
+    全部项由向量化评分器一次性评分，只做一次全局排序，再按序线性分发到各分区，
+    各分区内自然有序；全局顺序保存在返回值的 ordered 属性中。
+
     Args:
         items: 抽取项列表
+        weights: 评分权重（None=默认权重，见 vector_scorer.load_score_weights）
 
     Returns:
-        分区后的字典结构：
+        分区后的字典结构（ScoredSections）：
         {
             "国内": {
                 "政治": [item1, item2, ...],
@@ -150,34 +428,24 @@ def section_and_sort(items: List[Dict]) -> Dict[str, Dict[str, List[Dict]]]:
         }
     """
     if not items:
-        return {}
+        return ScoredSections()
 
     logger.info("开始分区和排序")
 
-    # 计算每项的评分
-    for item in items:
-        item["score"] = calculate_score(item)
-
-    # 分区
-    sections: Dict[str, Dict[str, List[Dict]]] = {}
+    # 向量化计算全部项的评分
+    scores = score_items(items, weights).total.tolist()
+    for item, score in zip(items, scores):
+        item["score"] = score
 
+    # 分区（区域/层级顺序保持与输入中首次出现的顺序一致）
+    sections = ScoredSections()
     for item in items:
-        region = item.get("region", "未知")
-        layer = item.get("layer", "未知")
-
-        # 确保分区存在
-        if region not in sections:
-            sections[region] = {}
+        sections.setdefault(item.get("region", "未知"), {}).setdefault(item.get("layer", "未知"), [])
 
-        if layer not in sections[region]:
-            sections[region][layer] = []
-
-        sections[region][layer].append(item)
-
-    # 对每个分区内的项按评分降序排序
-    for region in sections:
-        for layer in sections[region]:
-            sections[region][layer].sort(key=lambda x: x["score"], reverse=True)
+    # 一次全局排序（稳定），按序分发后每个分区内即为评分降序
+    sections.ordered = sorted(items, key=lambda x: x["score"], reverse=True)
+    for item in sections.ordered:
+        sections[item.get("region", "未知")][item.get("layer", "未知")].append(item)
 
     logger.info(f"分区完成，共 {len(sections)} 个区域")
     for region, layers in sections.items():
@@ -228,6 +496,10 @@ def get_all_items_sorted(sections: Dict[str, Dict[str, List[Dict]]]) -> List[Dic
     Returns:
         排序后的所有项列表
     """
+    # section_and_sort 的结果已带全局顺序
+    if isinstance(sections, ScoredSections):
+        return list(sections.ordered)
+
     all_items = []
 
     for region, layers in sections.items():
@@ -0,0 +1,231 @@
+"""
+报告分区增量构建模块
+
+对每个分区（区域 × 层级）的输入条目计算指纹，与 report_section_cache 中保存的指纹比较：
+- 指纹未变：直接复用缓存的 LLM 分区报告和已渲染的正文/附件片段
+- 指纹变化或缓存缺失：只对这些分区调用 LLM 并重新渲染片段，再写回缓存
+
+附件中只有未变化分区复用缓存片段；重新生成的分区在附件流式渲染时逐段生成，
+写回缓存的附件片段逐个渲染、flush 后即释放，不在内存中拼出整份附件。
+
+同一天因补充抽取或后台手动触发而重复构建报告时，只有受影响的分区产生耗时和 token 开销。
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from markupsafe import Markup
+from sqlalchemy.orm import Session
+
+from src.composer.builder import (
+    generate_section_reports,
+    get_template_env,
+    limit_attachment_sections,
+    render_attachment_sections,
+    render_email_sections,
+)
+from src.config.settings import settings
+from src.models.report import ReportSectionCache
+
+# 参与指纹计算的条目字段：LLM 输入和片段模板用到的全部内容字段。
+# 不含 score —— 其中的新近度分量随构建时间变化，排序变化已体现在条目顺序上。
+_FINGERPRINT_KEYS = (
+    "id",
+    "article_url",
+    "article_title",
+    "fact",
+    "opinion",
+    "region",
+    "layer",
+    "confidence",
+    "source_name",
+    "published_at",
+    "corroboration_count",
+    "corroborating_sources",
+)
+
+# 分区片段模板（模板修改后指纹随之变化，缓存自动失效）
+_SECTION_TEMPLATES = ("email_section.html", "attachment_section.html")
+
+
+@dataclass
+class SectionBuild:
+    """分区构建结果"""
+    section_reports: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    email_html: Dict[str, Dict[str, Markup]] = field(default_factory=dict)
+    attachment_html: Dict[str, Dict[str, Markup]] = field(default_factory=dict)
+    reused: List[str] = field(default_factory=list)
+    rebuilt: List[str] = field(default_factory=list)
+
+
+def _template_signature() -> str:
+    """分区片段模板源码的摘要"""
+    env = get_template_env()
+    digest = hashlib.sha256()
+    for name in _SECTION_TEMPLATES:
+        source, _, _ = env.loader.get_source(env, name)
+        digest.update(source.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def section_fingerprint(
+    items: List[Dict],
+    topn_count: int,
+    attachment_count: int,
+    use_llm: bool,
+    template_signature: str = "",
+) -> str:
+    """
+    计算分区输入指纹
+
+    Args:
+        items: 分区全量条目（已排序）
+        topn_count: 邮件正文展示的条目数（TopN 为全量条目的前缀）
+        attachment_count: 附件展示的条目数（附件截断后仍为全量条目的前缀）
+        use_llm: 是否生成 LLM 分区报告
+        template_signature: 片段模板摘要
+
+    Returns:
+        SHA-256 十六进制字符串
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([topn_count, attachment_count, use_llm, template_signature]).encode("utf-8"))
+    for item in items:
+        values = [item.get(key) for key in _FINGERPRINT_KEYS]
+        digest.update(json.dumps(values, ensure_ascii=False, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_section_cache(db: Session, report_date: date) -> Dict[Tuple[str, str], ReportSectionCache]:
+    """读取指定日期的分区缓存 {(region, layer): row}"""
+    rows = db.query(ReportSectionCache).filter(ReportSectionCache.report_date == report_date).all()
+    return {(row.region, row.layer): row for row in rows}
+
+
+def build_sections_incremental(
+    db: Session,
+    report_date: date,
+    sections: Dict[str, Dict[str, List[Dict]]],
+    sections_topn: Dict[str, Dict[str, List[Dict]]],
+    use_llm: Optional[bool] = None,
+    full_rebuild: bool = False,
+) -> SectionBuild:
+    """
+    增量生成分区报告和分区片段
+
+    缓存行在调用方的事务中更新（随报告一起提交）。
+
+    Args:
+        db: 数据库会话
+        report_date: 报告日期
+        sections: 全量分区字典
+        sections_topn: TopN 分区字典
+        use_llm: 是否使用 LLM 生成分区报告（None=使用配置默认值）
+        full_rebuild: 忽略缓存，全部重新生成
+
+    Returns:
+        SectionBuild
+    """
+    if use_llm is None:
+        use_llm = settings.REPORT_USE_LLM_SECTIONS
+
+    attachment_sections = limit_attachment_sections(sections)
+    signature = _template_signature()
+    cached = load_section_cache(db, report_date)
+
+    result = SectionBuild()
+    fingerprints: Dict[Tuple[str, str], str] = {}
+    changed: Dict[str, Dict[str, List[Dict]]] = {}
+
+    for region, layers in sections.items():
+        for layer, items in layers.items():
+            topn_items = sections_topn.get(region, {}).get(layer, [])
+            # 附件截断后不再包含的分区为 None（附件中不展示该分区）
+            attachment_items = attachment_sections.get(region, {}).get(layer)
+            fingerprint = section_fingerprint(
+                items,
+                len(topn_items),
+                -1 if attachment_items is None else len(attachment_items),
+                use_llm,
+                signature,
+            )
+            fingerprints[(region, layer)] = fingerprint
+
+            row = cached.get((region, layer))
+            if full_rebuild or row is None or row.fingerprint != fingerprint:
+                changed.setdefault(region, {})[layer] = items
+                result.rebuilt.append(f"{region}-{layer}")
+                continue
+            if use_llm and items and not row.llm_summary:
+                # 上次 LLM 未生成成功（超时/失败）的分区不复用，本次重试
+                changed.setdefault(region, {})[layer] = items
+                result.rebuilt.append(f"{region}-{layer}")
+                continue
+
+            if row.llm_summary:
+                result.section_reports.setdefault(region, {})[layer] = row.llm_summary
+            result.email_html.setdefault(region, {})[layer] = Markup(row.email_html or "")
+            if attachment_items is not None and row.attachment_html is not None:
+                result.attachment_html.setdefault(region, {})[layer] = Markup(row.attachment_html or "")
+            result.reused.append(f"{region}-{layer}")
+
+    logger.info(f"分区增量构建: 复用 {len(result.reused)} 个，重新生成 {len(result.rebuilt)} 个")
+
+    if changed:
+        new_reports = generate_section_reports(changed, use_llm=use_llm)
+        changed_topn = {
+            region: {layer: sections_topn.get(region, {}).get(layer, []) for layer in layers}
+            for region, layers in changed.items()
+        }
+        changed_attachment = {
+            region: {
+                layer: attachment_sections[region][layer]
+                for layer in layers
+                if layer in attachment_sections.get(region, {})
+            }
+            for region, layers in changed.items()
+        }
+        new_email_html = render_email_sections(changed_topn, new_reports)
+
+        for region, layers in changed.items():
+            for layer, items in layers.items():
+                summary = new_reports.get(region, {}).get(layer)
+                email_html = new_email_html[region][layer]
+
+                if summary:
+                    result.section_reports.setdefault(region, {})[layer] = summary
+                result.email_html.setdefault(region, {})[layer] = email_html
+
+                values = dict(
+                    fingerprint=fingerprints[(region, layer)],
+                    item_count=len(items),
+                    llm_summary=summary,
+                    email_html=str(email_html),
+                    attachment_html=None,
+                )
+                row = cached.get((region, layer))
+                if row is None:
+                    row = ReportSectionCache(report_date=report_date, region=region, layer=layer, **values)
+                    db.add(row)
+                else:
+                    for key, value in values.items():
+                        setattr(row, key, value)
+
+                # 附件片段不放入构建结果（附件中由流式渲染生成），逐个写入缓存后立即释放
+                attachment_items = changed_attachment.get(region, {}).get(layer)
+                if attachment_items is not None:
+                    fragment = render_attachment_sections({region: {layer: attachment_items}})[region][layer]
+                    row.attachment_html = str(fragment)
+                    db.flush()
+                    db.expire(row, ["attachment_html"])
+
+    # 清理已不存在的分区
+    for key, row in cached.items():
+        if key not in fingerprints:
+            db.delete(row)
+
+    return result
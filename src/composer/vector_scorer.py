@@ -0,0 +1,221 @@
+"""
+向量化评分模块
+
+对一天的全部抽取项一次性计算评分：置信度、新近度、来源权威、金融相关性、
+多来源佐证各分量都以 NumPy 数组计算，替代逐项调用 calculate_score。
+
+权重从 SystemSetting（key=score_weights）读取，缺省时使用 ScoreWeights 的默认权重
+（scorer.calculate_base_score / calculate_score 也以 ScoreWeights 为准）。
+"""
+
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+from src.utils.time_utils import get_local_now, to_local_naive
+
+# SystemSetting 中保存评分权重的键
+SCORE_WEIGHTS_KEY = "score_weights"
+
+# 评分分量名称（与 ScoreWeights 字段一一对应）
+COMPONENTS = ("confidence", "recency", "authority", "finance_relevance", "corroboration")
+
+
+@dataclass
+class ScoreWeights:
+    """评分权重"""
+    confidence: float = 0.4
+    recency: float = 0.1
+    authority: float = 0.2
+    finance_relevance: float = 0.3
+    corroboration: float = None  # None=使用 settings.REPORT_CORROBORATION_WEIGHT
+
+    def __post_init__(self):
+        if self.corroboration is None:
+            self.corroboration = settings.REPORT_CORROBORATION_WEIGHT
+
+    def validate(self) -> None:
+        """
+        校验权重（管理后台保存前调用）
+
+        Raises:
+            ValueError: 存在非数值或负数权重，或除佐证外的权重全为 0（所有项同分，无法排序）
+        """
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if not isinstance(value, (int, float)) or value != value:
+                raise ValueError(f"评分权重 {f.name} 必须是数值")
+            if value < 0:
+                raise ValueError(f"评分权重 {f.name} 不能为负数")
+        if self.confidence + self.recency + self.authority + self.finance_relevance <= 0:
+            raise ValueError("置信度、新近度、来源权威、金融相关性的权重不能全为 0")
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "ScoreWeights":
+        """由配置字典构造（忽略未知键和非法值，缺失项使用默认值；整体无效时使用默认权重）"""
+        weights = cls()
+        if not isinstance(data, dict):
+            return weights
+        for f in fields(cls):
+            value = data.get(f.name)
+            if value is None:
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                logger.warning(f"评分权重 {f.name} 非法: {value!r}，使用默认值")
+                continue
+            if value < 0:
+                logger.warning(f"评分权重 {f.name} 不能为负: {value}，使用默认值")
+                continue
+            setattr(weights, f.name, value)
+        try:
+            weights.validate()
+        except ValueError as e:
+            logger.warning(f"评分权重无效: {e}，使用默认权重")
+            return cls()
+        return weights
+
+    def to_dict(self) -> Dict[str, float]:
+        return asdict(self)
+
+
+def load_score_weights(db: Session) -> ScoreWeights:
+    """
+    从 SystemSetting 读取评分权重
+
+    Args:
+        db: 数据库会话
+
+    Returns:
+        评分权重（读取失败时返回默认权重）
+    """
+    from src.models.system import SystemSetting
+
+    try:
+        setting = db.query(SystemSetting).filter(SystemSetting.key == SCORE_WEIGHTS_KEY).first()
+    except Exception as e:
+        logger.warning(f"读取评分权重失败，使用默认权重: {e}")
+        return ScoreWeights()
+
+    weights = ScoreWeights.from_dict(setting.value_json if setting else None)
+    logger.info(f"评分权重: {weights.to_dict()}")
+    return weights
+
+
+class ScoreResult:
+    """一批项的评分结果：总分数组 + 各分量数组"""
+
+    def __init__(self, total: np.ndarray, components: Dict[str, np.ndarray], weights: ScoreWeights):
+        self.total = total
+        self.components = components
+        self.weights = weights
+
+    def __len__(self) -> int:
+        return len(self.total)
+
+    def breakdown(self, index: int) -> Dict[str, float]:
+        """
+        第 index 项的评分分解（调试用）
+
+        Returns:
+            {分量: 原始值, 分量_weighted: 加权贡献, ..., "total": 总分}
+        """
+        result = {}
+        for name in COMPONENTS:
+            value = float(self.components[name][index])
+            result[name] = value
+            result[f"{name}_weighted"] = value * getattr(self.weights, name)
+        result["total"] = float(self.total[index])
+        return result
+
+
+# 本地时间（无时区）的秒数基准；直接做 datetime 减法远快于 np.array(..., dtype="datetime64")
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _local_seconds(dt: Optional[datetime]) -> float:
+    """本地时间秒数（无时区的时间按本地时间处理，与 to_local 一致；缺失为 NaN）"""
+    if dt is None:
+        return np.nan
+    if dt.tzinfo is not None:
+        dt = to_local_naive(dt)
+    return (dt - _EPOCH).total_seconds()
+
+
+def _published_hours_ago(items: List[Dict], current_time: datetime) -> np.ndarray:
+    """发布时间距 current_time 的小时数（缺失为 NaN）"""
+    published = np.fromiter(
+        (_local_seconds(item.get("published_at")) for item in items), dtype=np.float64, count=len(items)
+    )
+    return (_local_seconds(current_time) - published) / 3600
+
+
+def score_items(
+    items: List[Dict],
+    weights: ScoreWeights = None,
+    current_time: datetime = None,
+) -> ScoreResult:
+    """
+    向量化计算一批项的综合评分
+
+    score = Σ 权重 × 分量；有多来源佐证（corroboration_count > 1）的项再加佐证加成并截断到 1.0。
+    默认权重下结果与 calculate_score 一致。
+
+    Args:
+        items: 抽取项列表
+        weights: 评分权重（None=默认权重）
+        current_time: 当前时间（None=当前本地时间，整批共用）
+
+    Returns:
+        ScoreResult
+    """
+    if weights is None:
+        weights = ScoreWeights()
+    if current_time is None:
+        current_time = get_local_now()
+
+    n = len(items)
+
+    def column(key: str, default: float) -> np.ndarray:
+        return np.fromiter((item.get(key, default) for item in items), dtype=np.float64, count=n)
+
+    confidence = column("confidence", 0.5)
+    authority = np.minimum(1.0, column("source_weight", 1.0))
+    finance_relevance = column("finance_relevance", 1.0)
+    corroboration_count = column("corroboration_count", 1)
+
+    # 新近度：24 小时内线性衰减，缺失发布时间取 0.5
+    hours_ago = _published_hours_ago(items, current_time)
+    recency = np.where(np.isnan(hours_ago), 0.5, np.maximum(0.0, 1 - hours_ago / 24))
+
+    # 多来源佐证：按来源数对数增长，REPORT_CORROBORATION_CAP 个来源时满额
+    cap = max(2, settings.REPORT_CORROBORATION_CAP)
+    corroborated = corroboration_count > 1
+    corroboration = np.where(
+        corroborated,
+        np.minimum(1.0, np.log(np.maximum(corroboration_count, 1)) / np.log(cap)),
+        0.0,
+    )
+
+    total = (
+        weights.confidence * confidence
+        + weights.recency * recency
+        + weights.authority * authority
+        + weights.finance_relevance * finance_relevance
+    )
+    total = np.where(corroborated, np.minimum(1.0, total + weights.corroboration * corroboration), total)
+
+    components = {
+        "confidence": confidence,
+        "recency": recency,
+        "authority": authority,
+        "finance_relevance": finance_relevance,
+        "corroboration": corroboration,
+    }
+    return ScoreResult(total, components, weights)
@@ -20,6 +20,22 @@ class Settings(BaseSettings):
 
     # 数据库
     DATABASE_URL: str
+    DB_POOL_CLASS: str = "queue"  # 连接池: queue=进程内 QueuePool | null=每次新建连接（经 PgBouncer 事务池连接时使用）
+    DB_PROCESS_ROLE: str = "auto"  # 进程类型（决定连接池大小）: auto=按启动命令判断 | web | crawl | extract | report | mail | worker | beat
+    DB_POOL_SIZES: dict = {  # 各进程类型（每个进程）的常驻连接数
+        "web": 8,
+        "crawl": 4,
+        "extract": 4,
+        "report": 2,
+        "mail": 2,
+        "worker": 3,  # 监听多个队列的 worker
+        "beat": 1,
+    }
+    DB_MAX_OVERFLOW: int = 5  # 高峰时允许超出常驻连接数的临时连接数
+    DB_POOL_TIMEOUT: float = 10.0  # 连接池耗尽时取连接的最长等待（秒）
+    DB_POOL_RECYCLE: int = 1800  # 连接最长复用时间（秒），应小于 PgBouncer/防火墙的空闲断开时间
+    DB_POOL_PRE_PING: bool = True  # 取连接时先检查有效性
+    DB_APPLICATION_NAME: str = "finrep"  # 连接的 application_name 前缀（后接进程类型）
 
     # Redis
     REDIS_URL: str
@@ -79,16 +95,45 @@ class Settings(BaseSettings):
     LLM_MAX_CHUNKS_PER_ARTICLE: int = 8
     LLM_LONGFORM_STRATEGY: str = "summary_then_extract"
     LLM_ALLOW_PARALLEL_ARTICLE_PROCESSING: bool = False
+    USAGE_FLUSH_BATCH_SIZE: int = 50  # 用量记录缓冲达到该条数即批量写库
+    USAGE_FLUSH_INTERVAL_SEC: float = 5.0  # 用量记录后台定时刷写间隔（秒）
+
+    # LLM 日预算（人民币元，0 表示不限制）
+    LLM_DAILY_BUDGET_SOFT: float = 0.0  # 软限制：只用最便宜模型、跳过低优先级队列项
+    LLM_DAILY_BUDGET_HARD: float = 0.0  # 硬限制：停止新的抽取调用
+    LLM_BUDGET_MIN_PRIORITY: int = 1  # 达到软限制后，仅处理优先级 >= 该值的队列项
+    LLM_BUDGET_OUTPUT_RATIO: float = 0.3  # 预估调用成本时假设的输出 token 占比
+
+    # LLM 级联抽取（先用便宜模型，仅对模糊分块升级到最强模型）
+    LLM_CASCADE_ENABLED: bool = False
+    LLM_CASCADE_MARGIN: float = 0.1  # 置信度/金融相关性落在阈值 ±该值内视为模糊
+    LLM_CASCADE_EMPTY_SOURCE_WEIGHT: float = 1.5  # 源权重 >= 该值且便宜模型返回空结果时也升级
 
     # 报告配置
     REPORT_TOPN: int = 5
     CONFIDENCE_THRESHOLD: float = 0.6
     MIN_CONTENT_LEN: int = 120
     ATTACHMENT_MAX_ITEMS: int = 500  # 附件最多包含的事实观点数量，防止邮件过大
+    ATTACHMENT_FORMAT: str = "html"  # 附件格式：html（原文）/ gzip（.html.gz）/ zip（.zip），压缩格式只保存压缩字节
+    ATTACHMENT_COMPRESS_LEVEL: int = 6  # gzip/zip 压缩级别（1-9）
     REPORT_USE_LLM_SECTIONS: bool = False  # 是否使用 LLM 生成分区报告（False=仅展示卡片）
     REPORT_LLM_MODEL_LIMIT: int = 64000  # LLM 模型输入限制（token，DeepSeek/Qwen 64K 上下文）
     REPORT_LLM_BUDGET: float = 0.7  # 可用预算比例（70%，即约 44800 tokens）
     REPORT_SECTION_MAX_ITEMS_PER_CHUNK: int = 20  # 每次 LLM 调用最多处理的事实观点数（分块用）
+    REPORT_LLM_MAX_INFLIGHT: int = 4  # 分区报告并发生成时同时在途的 LLM 调用数上限
+    REPORT_LLM_DEADLINE_SEC: int = 300  # 分区报告生成总时限（秒），超时未完成的分区仅展示卡片
+    REPORT_QUERY_BATCH_SIZE: int = 1000  # 报告构建读取抽取项时每批流式读取的行数
+    REPORT_INCREMENTAL_ENABLED: bool = True  # 重复构建同一天报告时，仅重新生成输入指纹变化的分区（LLM 报告与 HTML 片段）
+    REPORT_CLUSTER_ENABLED: bool = True  # 是否在分区排序前跨文章聚类近似重复的事实
+    REPORT_CLUSTER_MAX_DISTANCE: int = 3  # 聚类的 SimHash 汉明距离阈值（与事实去重一致）
+    REPORT_CORROBORATION_WEIGHT: float = 0.1  # 多来源佐证的评分加成上限
+    REPORT_CORROBORATION_CAP: int = 8  # 达到满额加成所需的独立来源数
+
+    # 日内快讯（仅包含上次快讯之后新增的抽取项）
+    FLASH_REPORT_ENABLED: bool = False  # 是否按间隔自动生成并发送快讯
+    FLASH_REPORT_INTERVAL_MIN: int = 60  # 快讯间隔（分钟）
+    FLASH_REPORT_MAX_ITEMS: int = 20  # 每期快讯最多展示条数（按评分）
+    FLASH_REPORT_MIN_SCORE: float = 0.0  # 快讯展示的最低评分
 
     # JWT 配置
     JWT_SECRET_KEY: str = "dev-secret-key"
@@ -119,10 +164,16 @@ class Settings(BaseSettings):
     # 邮件配置
     SMTP_HOST: str = "smtp.163.com"
     SMTP_PORT: int = 465
+    SMTP_USE_TLS: bool = True  # SSL 直连（465 端口）
     SMTP_USER: str
     SMTP_PASS: str
     MAIL_BATCH_LIMIT: int = 50
     MAIL_RATE_LIMIT_PER_SEC: float = 1.0
+    MAIL_SMTP_REUSE_CONNECTION: bool = True  # 所有批次复用同一个已认证 SMTP 连接
+    MAIL_SMTP_CONCURRENCY: int = 3  # 并发 SMTP 会话数（共享同一个发送限速）
+    MAIL_RATE_LIMIT_BACKEND: str = "local"  # 发送限速: local=进程内令牌桶 | redis=多 worker 共享
+    MAIL_LOG_FLUSH_BATCHES: int = 20  # 投递日志每累计多少批批量写入一次（1=逐批提交）
+    MAIL_LOG_FLUSH_INTERVAL_SEC: float = 5.0  # 投递日志最长写入间隔（秒）
     # 注：串行执行模式下无需时间窗口限制，任务完成即发送
 
 
@@ -0,0 +1,74 @@
+"""
+异步数据库会话管理（Web 应用使用）
+
+Web 路由均为 async def，在其中执行同步 SQLAlchemy 查询会阻塞事件循环：
+一个慢查询会让同一 worker 上的所有请求一起等待。读多的路由改用本模块的
+异步引擎（PostgreSQL 使用 asyncpg 驱动），Celery 任务仍使用 src/db/session.py 的同步会话。
+"""
+from typing import AsyncIterator
+
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.config.settings import settings
+from src.db.pool import build_engine_kwargs
+
+# 同步驱动 -> 异步驱动
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> URL:
+    """
+    把同步连接串转换为异步驱动的连接串
+
+    postgresql://、postgresql+psycopg2:// -> postgresql+asyncpg://；
+    sqlite:// -> sqlite+aiosqlite://（测试使用）
+
+    Args:
+        url: 数据库连接串
+
+    Returns:
+        异步驱动的连接串
+    """
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"不支持的异步数据库类型: {parsed.get_backend_name()}")
+
+    parsed = parsed.set(drivername=driver)
+    if driver == "postgresql+asyncpg" and settings.DB_POOL_CLASS == "null":
+        # 经 PgBouncer 事务池连接时关闭 SQLAlchemy 侧的预处理语句缓存
+        parsed = parsed.update_query_dict({"prepared_statement_cache_size": "0"})
+    return parsed
+
+
+# 创建异步引擎（连接池参数与同步引擎共用配置，见 src/db/pool.py）
+async_engine = create_async_engine(
+    to_async_url(settings.DATABASE_URL),
+    echo=False,
+    **build_engine_kwargs(settings.DATABASE_URL, is_async=True),
+)
+
+# 异步会话工厂（提交后不过期，模板渲染时可直接读取属性，避免隐式 IO）
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    FastAPI依赖注入用的异步数据库会话生成器
+
+    用法:
+        @app.get("/")
+        async def read_root(db: AsyncSession = Depends(get_async_db)):
+            result = await db.execute(select(Report))
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    """关闭异步引擎的连接池（Web 应用退出时调用）"""
+    await async_engine.dispose()
@@ -0,0 +1,38 @@
+"""add chunk_index and task_kind to provider_usage
+
+Revision ID: a1c2e3f4b5d6
+Revises: playwright_parser_config
+Create Date: 2025-11-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c2e3f4b5d6'
+down_revision: Union[str, None] = 'playwright_parser_config'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """为 provider_usage 增加分块索引与任务类型，支持按文章/来源归因费用"""
+    op.add_column(
+        'provider_usage',
+        sa.Column('chunk_index', sa.Integer(), nullable=True, comment='分块索引(从0开始)')
+    )
+    op.add_column(
+        'provider_usage',
+        sa.Column('task_kind', sa.String(length=20), nullable=True, comment='任务类型:extract/report')
+    )
+    op.create_index('idx_provider_usage_task_kind', 'provider_usage', ['task_kind'])
+
+
+def downgrade() -> None:
+    """移除分块索引与任务类型"""
+    op.drop_index('idx_provider_usage_task_kind', table_name='provider_usage')
+    op.drop_column('provider_usage', 'task_kind')
+    op.drop_column('provider_usage', 'chunk_index')
@@ -0,0 +1,80 @@
+"""add daily_item_scores materialized scoring table
+
+Revision ID: b7d8e9f0a1c2
+Revises: a1c2e3f4b5d6
+Create Date: 2025-11-21 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d8e9f0a1c2'
+down_revision: Union[str, None] = 'a1c2e3f4b5d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """创建每日评分物化表，并回填已完成处理的历史抽取项"""
+    op.create_table(
+        'daily_item_scores',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('item_id', sa.Integer(), sa.ForeignKey('extraction_items.id', ondelete='CASCADE'),
+                  nullable=False, unique=True, comment='抽取项ID'),
+        sa.Column('article_id', sa.Integer(), nullable=False, comment='文章ID'),
+        sa.Column('source_id', sa.Integer(), nullable=False, comment='信息源ID'),
+        sa.Column('report_date', sa.Date(), nullable=False, comment='归属日期(文章采集日期)'),
+        sa.Column('region', sa.String(length=20), nullable=False, comment='区域'),
+        sa.Column('layer', sa.String(length=50), nullable=False, comment='层级'),
+        sa.Column('base_score', sa.Float(), nullable=False, comment='静态评分(不含新近度)'),
+        sa.Column('confidence', sa.Float(), nullable=False, comment='置信度'),
+        sa.Column('finance_relevance', sa.Float(), nullable=False, comment='金融相关性评分(0-1)'),
+        sa.Column('source_weight', sa.Float(), nullable=False, comment='来源权重'),
+        sa.Column('content_len', sa.Integer(), nullable=False, comment='文章正文长度'),
+        sa.Column('published_at', sa.DateTime(), nullable=True, comment='文章发布时间'),
+        sa.Column('fact', sa.Text(), nullable=False, comment='事实描述'),
+        sa.Column('opinion', sa.Text(), nullable=True, comment='观点描述'),
+        sa.Column('evidence_span', sa.Text(), nullable=True, comment='证据片段'),
+        sa.Column('article_title', sa.String(length=500), nullable=False, comment='文章标题'),
+        sa.Column('article_url', sa.String(length=1000), nullable=False, comment='文章URL'),
+        sa.Column('source_name', sa.String(length=200), nullable=False, comment='信息源名称'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('idx_daily_item_scores_date_score', 'daily_item_scores', ['report_date', 'base_score'])
+    op.create_index('idx_daily_item_scores_date_section', 'daily_item_scores', ['report_date', 'region', 'layer'])
+    op.create_index('idx_daily_item_scores_article_id', 'daily_item_scores', ['article_id'])
+
+    # 回填：与 scorer.calculate_base_score 保持一致（sources 表暂无权重列，来源权重按 1.0 计）
+    op.execute(
+        """
+        INSERT INTO daily_item_scores (
+            item_id, article_id, source_id, report_date, region, layer,
+            base_score, confidence, finance_relevance, source_weight, content_len,
+            published_at, fact, opinion, evidence_span,
+            article_title, article_url, source_name, created_at, updated_at
+        )
+        SELECT
+            ei.id, a.id, s.id, CAST(a.fetched_at AS DATE), CAST(ei.region AS VARCHAR), CAST(ei.layer AS VARCHAR),
+            0.4 * ei.confidence + 0.2 * 1.0 + 0.3 * COALESCE(NULLIF(ei.finance_relevance, 0), 1.0),
+            ei.confidence, COALESCE(NULLIF(ei.finance_relevance, 0), 1.0), 1.0, COALESCE(a.content_len, 0),
+            a.published_at, ei.fact, ei.opinion, ei.evidence_span,
+            a.title, a.url, s.name, NOW(), NOW()
+        FROM extraction_items ei
+        JOIN articles a ON ei.article_id = a.id
+        JOIN sources s ON a.source_id = s.id
+        WHERE a.processing_status = 'done'
+        """
+    )
+
+
+def downgrade() -> None:
+    """删除每日评分物化表"""
+    op.drop_index('idx_daily_item_scores_article_id', table_name='daily_item_scores')
+    op.drop_index('idx_daily_item_scores_date_section', table_name='daily_item_scores')
+    op.drop_index('idx_daily_item_scores_date_score', table_name='daily_item_scores')
+    op.drop_table('daily_item_scores')
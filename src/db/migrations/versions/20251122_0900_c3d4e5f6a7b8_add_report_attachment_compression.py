@@ -0,0 +1,52 @@
+"""add compressed attachment columns to reports
+
+Revision ID: c3d4e5f6a7b8
+Revises: b7d8e9f0a1c2
+Create Date: 2025-11-22 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d4e5f6a7b8'
+down_revision: Union[str, None] = 'b7d8e9f0a1c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """新增附件格式与压缩字节列；压缩格式不再保存附件 HTML 原文"""
+    op.add_column(
+        'reports',
+        sa.Column('attachment_format', sa.String(length=10), nullable=False, server_default='html',
+                  comment='附件格式: html/gzip/zip'),
+    )
+    op.add_column(
+        'reports',
+        sa.Column('attachment_data', sa.LargeBinary(), nullable=True, comment='压缩附件字节（gzip/zip 格式）'),
+    )
+    op.alter_column(
+        'reports', 'html_attachment',
+        existing_type=sa.Text(),
+        nullable=True,
+        comment='附件HTML（html 格式）',
+        existing_comment='附件HTML',
+    )
+
+
+def downgrade() -> None:
+    """删除压缩附件列（压缩格式的报告附件 HTML 回填为空字符串）"""
+    op.execute("UPDATE reports SET html_attachment = '' WHERE html_attachment IS NULL")
+    op.alter_column(
+        'reports', 'html_attachment',
+        existing_type=sa.Text(),
+        nullable=False,
+        comment='附件HTML',
+        existing_comment='附件HTML（html 格式）',
+    )
+    op.drop_column('reports', 'attachment_data')
+    op.drop_column('reports', 'attachment_format')
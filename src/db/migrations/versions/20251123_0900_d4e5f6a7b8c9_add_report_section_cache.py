@@ -0,0 +1,42 @@
+"""add report_section_cache for incremental report rebuilds
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2025-11-23 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e5f6a7b8c9'
+down_revision: Union[str, None] = 'c3d4e5f6a7b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """创建报告分区缓存表"""
+    op.create_table(
+        'report_section_cache',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('report_date', sa.Date(), nullable=False, comment='报告日期'),
+        sa.Column('region', sa.String(length=20), nullable=False, comment='区域'),
+        sa.Column('layer', sa.String(length=50), nullable=False, comment='层级'),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False, comment='分区输入指纹(SHA-256)'),
+        sa.Column('item_count', sa.Integer(), nullable=True, comment='分区条目数'),
+        sa.Column('llm_summary', sa.Text(), nullable=True, comment='LLM 分区报告'),
+        sa.Column('email_html', sa.Text(), nullable=True, comment='邮件正文分区片段HTML'),
+        sa.Column('attachment_html', sa.Text(), nullable=True, comment='附件分区片段HTML'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('report_date', 'region', 'layer', name='uq_report_section_cache_section'),
+    )
+
+
+def downgrade() -> None:
+    """删除报告分区缓存表"""
+    op.drop_table('report_section_cache')
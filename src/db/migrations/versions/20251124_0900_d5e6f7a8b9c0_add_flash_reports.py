@@ -0,0 +1,45 @@
+"""add flash_reports for intraday incremental reports
+
+Revision ID: d5e6f7a8b9c0
+Revises: d4e5f6a7b8c9
+Create Date: 2025-11-24 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e6f7a8b9c0'
+down_revision: Union[str, None] = 'd4e5f6a7b8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """创建快讯增量报告表"""
+    op.create_table(
+        'flash_reports',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('report_date', sa.Date(), nullable=False, comment='报告日期'),
+        sa.Column('since_item_id', sa.Integer(), nullable=False, comment='起始水位(不含)'),
+        sa.Column('until_item_id', sa.Integer(), nullable=False, comment='结束水位(含)'),
+        sa.Column('item_count', sa.Integer(), nullable=True, comment='新增条目数'),
+        sa.Column('html_body', sa.Text(), nullable=True, comment='快讯邮件HTML'),
+        sa.Column('sent_batches', sa.Integer(), nullable=True, comment='发送成功批次数'),
+        sa.Column('failed_batches', sa.Integer(), nullable=True, comment='发送失败批次数'),
+        sa.Column('build_ms', sa.Integer(), nullable=True, comment='构建耗时(毫秒)'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('idx_flash_reports_until_item_id', 'flash_reports', ['until_item_id'])
+    op.create_index('idx_flash_reports_date', 'flash_reports', ['report_date'])
+
+
+def downgrade() -> None:
+    """删除快讯增量报告表"""
+    op.drop_index('idx_flash_reports_date', table_name='flash_reports')
+    op.drop_index('idx_flash_reports_until_item_id', table_name='flash_reports')
+    op.drop_table('flash_reports')
@@ -0,0 +1,41 @@
+"""add pending status and send_round to delivery_log for resumable sending
+
+Revision ID: f6a7b8c9d0e1
+Revises: d5e6f7a8b9c0
+Create Date: 2025-11-25 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a7b8c9d0e1'
+down_revision: Union[str, None] = 'd5e6f7a8b9c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """新增 pending 投递状态、发送轮次列和清单查询索引"""
+    # ALTER TYPE ... ADD VALUE 不能在事务块内执行（PostgreSQL < 12）
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE deliverystatus ADD VALUE IF NOT EXISTS 'pending' BEFORE 'ok'")
+
+    op.add_column(
+        'delivery_log',
+        sa.Column('send_round', sa.Integer(), nullable=False, server_default='1',
+                  comment='发送轮次（强制重发时递增）'),
+    )
+    op.create_index(
+        'idx_delivery_log_report_round', 'delivery_log', ['report_id', 'send_round', 'batch_no']
+    )
+
+
+def downgrade() -> None:
+    """删除发送轮次列；未发送的清单行删除（枚举值 pending 保留，PostgreSQL 不支持删除枚举值）"""
+    op.execute("DELETE FROM delivery_log WHERE status = 'pending'")
+    op.drop_index('idx_delivery_log_report_round', table_name='delivery_log')
+    op.drop_column('delivery_log', 'send_round')
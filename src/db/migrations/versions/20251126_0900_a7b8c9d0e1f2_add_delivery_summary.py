@@ -0,0 +1,48 @@
+"""add delivery_summary materialized per report
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2025-11-26 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7b8c9d0e1f2'
+down_revision: Union[str, None] = 'f6a7b8c9d0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """创建投递汇总表"""
+    op.create_table(
+        'delivery_summary',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('report_id', sa.Integer(), sa.ForeignKey('reports.id'), nullable=False, comment='报告ID'),
+        sa.Column('send_round', sa.Integer(), nullable=False, comment='汇总的发送轮次'),
+        sa.Column('total_batches', sa.Integer(), nullable=False, comment='批次数'),
+        sa.Column('ok_batches', sa.Integer(), nullable=False, comment='成功批次数'),
+        sa.Column('partial_batches', sa.Integer(), nullable=False, comment='部分送达批次数'),
+        sa.Column('failed_batches', sa.Integer(), nullable=False, comment='失败批次数'),
+        sa.Column('pending_batches', sa.Integer(), nullable=False, comment='未发送批次数'),
+        sa.Column('total_recipients', sa.Integer(), nullable=False, comment='收件人数'),
+        sa.Column('refused_recipients', sa.Integer(), nullable=False, comment='被拒收件人数'),
+        sa.Column('total_duration_ms', sa.Integer(), nullable=False, comment='批次耗时合计(毫秒)'),
+        sa.Column('max_duration_ms', sa.Integer(), nullable=False, comment='最慢批次耗时(毫秒)'),
+        sa.Column('first_sent_at', sa.DateTime(), nullable=True, comment='首个批次发送时间'),
+        sa.Column('last_sent_at', sa.DateTime(), nullable=True, comment='最后批次发送时间'),
+        sa.Column('last_error', sa.Text(), nullable=True, comment='最近一次失败信息'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.UniqueConstraint('report_id', name='uq_delivery_summary_report_id'),
+    )
+
+
+def downgrade() -> None:
+    """删除投递汇总表"""
+    op.drop_table('delivery_summary')
@@ -0,0 +1,60 @@
+"""add composite and partial indexes for hot queries
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2025-11-27 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c9d0e1f2a3'
+down_revision: Union[str, None] = 'a7b8c9d0e1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    按热点查询调整索引
+
+    - 物化评分表重建：processing_status = 'done' 且 fetched_at 区间 → (processing_status, fetched_at)
+    - 抽取批处理：status = 'queued' 按 priority 排序 → priority 部分索引；按日期过滤 → articles.created_at
+    - 今日完成抽取数：status = 'done' 且 processing_finished_at >= 今日 → (status, processing_finished_at)
+    - 删除被上述复合索引覆盖的单列索引，以及与唯一约束重复的 url / article_id 索引
+    """
+    op.create_index('idx_articles_status_fetched_at', 'articles', ['processing_status', 'fetched_at'], unique=False)
+    op.create_index('idx_articles_created_at', 'articles', ['created_at'], unique=False)
+    op.drop_index('idx_articles_processing_status', table_name='articles')
+    op.drop_index('idx_articles_url', table_name='articles')
+
+    op.create_index(
+        'idx_extraction_queue_queued_priority', 'extraction_queue', ['priority'], unique=False,
+        postgresql_where=sa.text("status = 'queued'"),
+        sqlite_where=sa.text("status = 'queued'"),
+    )
+    op.create_index(
+        'idx_extraction_queue_status_finished_at', 'extraction_queue',
+        ['status', 'processing_finished_at'], unique=False,
+    )
+    op.drop_index('idx_extraction_queue_status', table_name='extraction_queue')
+    op.drop_index('idx_extraction_queue_priority', table_name='extraction_queue')
+    op.drop_index('idx_extraction_queue_article_id', table_name='extraction_queue')
+
+
+def downgrade() -> None:
+    """恢复原有单列索引"""
+    op.create_index('idx_extraction_queue_article_id', 'extraction_queue', ['article_id'], unique=False)
+    op.create_index('idx_extraction_queue_priority', 'extraction_queue', ['priority'], unique=False)
+    op.create_index('idx_extraction_queue_status', 'extraction_queue', ['status'], unique=False)
+    op.drop_index('idx_extraction_queue_status_finished_at', table_name='extraction_queue')
+    op.drop_index('idx_extraction_queue_queued_priority', table_name='extraction_queue')
+
+    op.create_index('idx_articles_url', 'articles', ['url'], unique=False)
+    op.create_index('idx_articles_processing_status', 'articles', ['processing_status'], unique=False)
+    op.drop_index('idx_articles_created_at', table_name='articles')
+    op.drop_index('idx_articles_status_fetched_at', table_name='articles')
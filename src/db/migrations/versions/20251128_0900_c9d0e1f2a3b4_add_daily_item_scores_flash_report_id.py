@@ -0,0 +1,54 @@
+"""track which flash report covered each daily item score
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2025-11-28 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9d0e1f2a3b4'
+down_revision: Union[str, None] = 'b8c9d0e1f2a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    物化评分行记录所属快讯，快讯改为读取未覆盖的行（不再依赖抽取项 ID 水位）
+
+    已有快讯按其 (since_item_id, until_item_id] 区间回填。
+    """
+    op.add_column(
+        'daily_item_scores',
+        sa.Column('flash_report_id', sa.Integer(), nullable=True, comment='已包含该项的快讯ID(空=尚未进入快讯)'),
+    )
+    op.execute(
+        """
+        UPDATE daily_item_scores
+        SET flash_report_id = (
+            SELECT f.id FROM flash_reports f
+            WHERE daily_item_scores.item_id > f.since_item_id
+              AND daily_item_scores.item_id <= f.until_item_id
+            ORDER BY f.id
+            LIMIT 1
+        )
+        WHERE item_id <= (SELECT max(until_item_id) FROM flash_reports)
+        """
+    )
+    op.create_index(
+        'idx_daily_item_scores_unflashed', 'daily_item_scores', ['report_date'], unique=False,
+        postgresql_where=sa.text('flash_report_id IS NULL'),
+        sqlite_where=sa.text('flash_report_id IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    """删除快讯覆盖标记"""
+    op.drop_index('idx_daily_item_scores_unflashed', table_name='daily_item_scores')
+    op.drop_column('daily_item_scores', 'flash_report_id')
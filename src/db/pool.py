@@ -0,0 +1,217 @@
+"""
+数据库连接池配置与统计
+
+- 按进程类型（web / crawl / extract / worker / beat）取连接池大小
+- QueuePool / AsyncAdaptedQueuePool 记录每次取连接的等待时间和超时次数，供 /admin/status 展示
+- 同步引擎（Celery、Web 写操作）与异步引擎（Web 读路由，asyncpg）共用同一套配置
+- DB_POOL_CLASS=null 时退回 NullPool（经 PgBouncer 事务池连接时使用，由 PgBouncer 复用连接）
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from src.config.settings import settings
+
+# 未在 DB_POOL_SIZES 中配置的进程类型使用的连接池大小
+DEFAULT_POOL_SIZE = 5
+
+
+class PoolStats:
+    """连接池取连接统计（进程内，线程安全）"""
+
+    def __init__(self, window: int = 1000):
+        """
+        Args:
+            window: 计算延迟百分位数保留的最近取连接次数
+        """
+        self._lock = threading.Lock()
+        self._waits_ms = deque(maxlen=window)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait_ms = 0.0
+
+    def record(self, wait_ms: float, timed_out: bool = False):
+        """记录一次取连接"""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self._waits_ms.append(wait_ms)
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def percentile(self, pct: float) -> float:
+        """最近取连接等待时间的百分位数（毫秒）"""
+        with self._lock:
+            ordered = sorted(self._waits_ms)
+        if not ordered:
+            return 0.0
+        index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+        return ordered[index]
+
+    def reset(self):
+        with self._lock:
+            self._waits_ms.clear()
+            self.checkouts = 0
+            self.timeouts = 0
+            self.max_wait_ms = 0.0
+
+
+class _TimedCheckoutMixin:
+    """记录取连接等待时间（含超时）的连接池混入类"""
+
+    def __init__(self, *args, **kwargs):
+        self.stats = PoolStats()
+        super().__init__(*args, **kwargs)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        self.stats.record((time.perf_counter() - start) * 1000)
+        return conn
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    """记录取连接等待时间的 QueuePool（同步引擎）"""
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    """记录取连接等待时间的 AsyncAdaptedQueuePool（异步引擎）"""
+
+
+def detect_process_role(argv: Optional[List[str]] = None) -> str:
+    """
+    按启动命令判断进程类型
+
+    - celery ... worker -Q crawl → crawl（只监听一个队列时取队列名）
+    - celery ... worker → worker
+    - celery ... beat → beat
+    - 其他（uvicorn、脚本）→ web
+
+    Args:
+        argv: 命令行参数（默认 sys.argv）
+
+    Returns:
+        进程类型
+    """
+    argv = sys.argv if argv is None else argv
+    if "worker" in argv:
+        queues = _option_value(argv, ("-Q", "--queues"))
+        names = [name for name in (queues or "").split(",") if name]
+        return names[0] if len(names) == 1 else "worker"
+    if "beat" in argv:
+        return "beat"
+    return "web"
+
+
+def get_process_role() -> str:
+    """当前进程类型（DB_PROCESS_ROLE=auto 时按启动命令判断）"""
+    if settings.DB_PROCESS_ROLE and settings.DB_PROCESS_ROLE != "auto":
+        return settings.DB_PROCESS_ROLE
+    return detect_process_role()
+
+
+def build_engine_kwargs(url: str, role: str = None, is_async: bool = False) -> Dict:
+    """
+    按配置生成 create_engine / create_async_engine 的连接池参数
+
+    Args:
+        url: 数据库连接串
+        role: 进程类型（None=get_process_role()）
+        is_async: 是否用于异步引擎（asyncpg）
+
+    Returns:
+        引擎关键字参数
+    """
+    role = role or get_process_role()
+    kwargs = {"pool_pre_ping": settings.DB_POOL_PRE_PING}  # 取连接时检查有效性（数据库重启、空闲断开后自动重连）
+    if make_url(url).get_backend_name() == "postgresql":
+        # 按进程类型区分连接（pg_stat_activity.application_name，PgBouncer 同样支持该启动参数）
+        application_name = f"{settings.DB_APPLICATION_NAME}-{role}"
+        if is_async:
+            kwargs["connect_args"] = {"server_settings": {"application_name": application_name}}
+            if settings.DB_POOL_CLASS == "null":
+                # PgBouncer 事务池模式不支持 asyncpg 的命名预处理语句缓存
+                kwargs["connect_args"]["statement_cache_size"] = 0
+        else:
+            kwargs["connect_args"] = {"application_name": application_name}
+
+    if settings.DB_POOL_CLASS == "null":
+        kwargs["poolclass"] = NullPool
+        return kwargs
+
+    kwargs.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZES.get(role, DEFAULT_POOL_SIZE),
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return kwargs
+
+
+def get_pool_status(engine) -> Dict:
+    """
+    当前进程连接池状态
+
+    Args:
+        engine: 数据库引擎
+
+    Returns:
+        连接池状态字典（NullPool 时只返回类型）
+    """
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__, "role": get_process_role()}
+    if not isinstance(pool, QueuePool):
+        return status
+
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    checked_out = pool.checkedout()
+    status.update(
+        pool_size=pool.size(),
+        max_overflow=pool._max_overflow,
+        checked_out=checked_out,
+        checked_in=pool.checkedin(),
+        overflow=max(pool.overflow(), 0),
+        saturation=round(checked_out / capacity * 100, 1) if capacity else 0.0,
+    )
+
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        status.update(
+            checkouts=stats.checkouts,
+            timeouts=stats.timeouts,
+            wait_p50_ms=round(stats.percentile(50), 2),
+            wait_p95_ms=round(stats.percentile(95), 2),
+            wait_max_ms=round(stats.max_wait_ms, 2),
+        )
+    return status
+
+
+def _option_value(argv: List[str], names) -> Optional[str]:
+    """读取命令行选项的值（支持 -Q crawl、--queues=crawl、-Qcrawl）"""
+    for i, arg in enumerate(argv):
+        for name in names:
+            if arg == name and i + 1 < len(argv):
+                return argv[i + 1]
+            if name.startswith("--") and arg.startswith(name + "="):
+                return arg[len(name) + 1:]
+            if not name.startswith("--") and arg.startswith(name) and len(arg) > len(name):
+                return arg[len(name):]
+    return None
@@ -3,18 +3,17 @@
 """
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy.pool import NullPool
 from contextlib import contextmanager
 from loguru import logger
 from src.config.settings import settings
+from src.db.pool import build_engine_kwargs
 
 
-# 创建引擎
+# 创建引擎（连接池按进程类型配置，见 src/db/pool.py）
 engine = create_engine(
     settings.DATABASE_URL,
     echo=False,  # 生产环境设为False
-    pool_pre_ping=True,  # 自动检查连接有效性
-    poolclass=NullPool,  # 开发环境可使用NullPool,生产环境建议使用默认的QueuePool
+    **build_engine_kwargs(settings.DATABASE_URL),
 )
 
 # 创建会话工厂
@@ -61,6 +60,16 @@ def get_db():
         db.close()
 
 
+def reset_engine_pool():
+    """
+    丢弃从父进程继承的连接池（Celery prefork 子进程启动时调用）
+
+    fork 出的子进程不能复用父进程已打开的连接，只丢弃引用、不关闭，
+    避免关掉父进程仍在使用的连接。
+    """
+    engine.dispose(close=False)
+
+
 def init_db():
     """
     初始化数据库
@@ -2,12 +2,15 @@
 分批与节流模块
 
 实现收件人分批和发送频率控制。
+发送限速为异步令牌桶，可在多个并发 SMTP 会话间共享；
+MAIL_RATE_LIMIT_BACKEND=redis 时通过 Redis 在多个 worker 间共享同一个限速。
 """
 
 import asyncio
 import time
 from typing import List, Dict
 
+import redis
 from loguru import logger
 
 from src.config.settings import settings
@@ -79,20 +82,24 @@ class RateLimiter:
 
     实现：
     - 控制每秒最多发送 N 封邮件
-    - 使用令牌桶算法
-    - 支持异步调用
+    - 使用令牌桶算法（桶容量 burst，默认 1 即严格等间隔）
+    - 支持异步调用，多个并发协程共享时按到达顺序依次放行
     """
 
-    def __init__(self, rate_per_sec: float = None):
+    def __init__(self, rate_per_sec: float = None, burst: int = 1):
         """
         初始化频率限制器
 
         Args:
             rate_per_sec: 每秒允许发送的邮件数（例如 1.0 表示每秒1封）
+            burst: 令牌桶容量（允许的瞬时突发数）
         """
         self.rate = rate_per_sec or settings.MAIL_RATE_LIMIT_PER_SEC
         self.interval = 1.0 / self.rate  # 每封邮件的间隔时间（秒）
-        self.last_call = 0.0
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
 
         logger.info(f"初始化频率限制器: {self.rate} 封/秒（间隔 {self.interval:.2f} 秒）")
 
@@ -101,23 +108,110 @@ class RateLimiter:
         等待直到允许发送下一封邮件
 
         实现：
-        - 计算距离上次发送的时间
-        - 如果间隔不足，则等待
-        - 记录当前时间作为新的发送时间
+        - 按经过时间补充令牌（不超过桶容量）
+        - 令牌不足时等待补足
+        - 持锁等待，保证并发调用者按顺序取得令牌
         """
-        current_time = time.time()
-        elapsed = current_time - self.last_call
+        async with self._lock:
+            self._refill()
 
-        if elapsed < self.interval:
-            wait_time = self.interval - elapsed
-            logger.debug(f"频率限制: 等待 {wait_time:.2f} 秒...")
-            await asyncio.sleep(wait_time)
+            if self.tokens < 1:
+                wait_time = (1 - self.tokens) * self.interval
+                logger.debug(f"频率限制: 等待 {wait_time:.2f} 秒...")
+                await asyncio.sleep(wait_time)
+                self._refill()
 
-        self.last_call = time.time()
+            self.tokens = max(0.0, self.tokens - 1)
+
+    def _refill(self):
+        """按经过时间补充令牌"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
 
     def reset(self):
         """重置限制器（用于测试）"""
-        self.last_call = 0.0
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+
+# 原子预约下一个发送时隙（GCRA）：返回需要等待的毫秒数
+# KEYS[1]=时隙键，ARGV[1]=间隔(毫秒)，ARGV[2]=键过期(毫秒)
+_RESERVE_SLOT_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local next_slot = tonumber(redis.call('GET', KEYS[1]) or '0')
+local slot = math.max(next_slot, now)
+redis.call('SET', KEYS[1], slot + tonumber(ARGV[1]), 'PX', tonumber(ARGV[2]))
+return slot - now
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    跨 worker 共享的发送频率限制器
+
+    在 Redis 中原子预约发送时隙（以 Redis 服务器时间为准），
+    多个进程/worker 共同遵守同一个每秒发送上限。
+    预约在线程池中执行，不阻塞并行 SMTP 会话共享的事件循环。
+    Redis 不可用时退回进程内令牌桶。
+    """
+
+    KEY = "mail_rate_limit:next_slot"
+
+    def __init__(self, rate_per_sec: float = None, redis_client=None):
+        """
+        初始化频率限制器
+
+        Args:
+            rate_per_sec: 每秒允许发送的邮件数
+            redis_client: Redis 客户端（默认按 REDIS_URL 创建）
+        """
+        super().__init__(rate_per_sec)
+        self._redis = redis_client
+        self._script = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self._redis
+
+    def _reserve_slot(self) -> float:
+        """预约下一个发送时隙，返回需要等待的秒数"""
+        if self._script is None:
+            self._script = self.redis.register_script(_RESERVE_SLOT_SCRIPT)
+        interval_ms = max(1, int(self.interval * 1000))
+        wait_ms = self._script(keys=[self.KEY], args=[interval_ms, interval_ms * 10 + 60000])
+        return int(wait_ms) / 1000
+
+    async def throttle(self):
+        """等待到预约的发送时隙（Redis 不可用时使用进程内令牌桶）"""
+        try:
+            wait_time = await asyncio.to_thread(self._reserve_slot)
+        except Exception as e:
+            logger.warning(f"Redis 发送限速不可用，退回进程内限速: {e}")
+            await super().throttle()
+            return
+
+        if wait_time > 0:
+            logger.debug(f"频率限制: 等待 {wait_time:.2f} 秒...")
+            await asyncio.sleep(wait_time)
+
+
+def get_rate_limiter(rate_per_sec: float = None) -> RateLimiter:
+    """
+    按 MAIL_RATE_LIMIT_BACKEND 创建发送频率限制器
+
+    Args:
+        rate_per_sec: 每秒允许发送的邮件数
+
+    Returns:
+        local: 进程内令牌桶；redis: 跨 worker 共享的限速器
+    """
+    if settings.MAIL_RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimiter(rate_per_sec)
+    return RateLimiter(rate_per_sec)
 
 
 def validate_email(email: str) -> bool:
@@ -0,0 +1,249 @@
+"""
+投递日志缓冲写入模块
+
+发送循环中只把批次结果和需要拉黑的邮箱放入内存缓冲，
+每累计 MAIL_LOG_FLUSH_BATCHES 个批次或间隔 MAIL_LOG_FLUSH_INTERVAL_SEC 秒批量写入一次，
+发送结束时写入剩余部分并物化投递汇总（delivery_summary）。
+
+缓冲意味着检查点按刷新粒度推进：进程被强制终止时，最多有一次刷新窗口内的批次
+在续发时被重新发送；MAIL_LOG_FLUSH_BATCHES=1 时退回逐批提交。
+"""
+
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from loguru import logger
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+from src.mailer.retry_handler import add_to_blacklist_bulk
+from src.models.delivery import DeliveryLog, DeliveryStatus, DeliverySummary
+from src.utils.time_utils import get_local_now_naive, to_local_naive
+
+
+class DeliveryRecorder:
+    """投递日志缓冲写入器（单份报告一次发送）"""
+
+    def __init__(
+        self,
+        db: Session,
+        report_id: int,
+        flush_batches: int = None,
+        flush_interval_sec: float = None,
+    ):
+        """
+        初始化写入器
+
+        Args:
+            db: 数据库会话
+            report_id: 报告ID
+            flush_batches: 累计多少个批次刷新一次（None=settings.MAIL_LOG_FLUSH_BATCHES）
+            flush_interval_sec: 最长刷新间隔（秒）（None=settings.MAIL_LOG_FLUSH_INTERVAL_SEC）
+        """
+        self.db = db
+        self.report_id = report_id
+        self.flush_batches = max(1, flush_batches or settings.MAIL_LOG_FLUSH_BATCHES)
+        self.flush_interval_sec = (
+            settings.MAIL_LOG_FLUSH_INTERVAL_SEC if flush_interval_sec is None else flush_interval_sec
+        )
+
+        self._updates: List[Dict] = []  # 批次清单行的更新（按主键）
+        self._inserts: List[Dict] = []  # 没有清单行时新增的日志
+        self._blacklist: Set[str] = set()  # 待加入黑名单的邮箱
+        self._last_flush = time.monotonic()
+        self.flush_count = 0
+
+    @property
+    def pending(self) -> int:
+        """缓冲中尚未写入的批次数"""
+        return len(self._updates) + len(self._inserts)
+
+    def record(
+        self,
+        batch_num: int,
+        batch_data: dict,
+        result: dict,
+        log: Optional[DeliveryLog] = None,
+    ):
+        """
+        缓冲一个批次的发送结果，达到刷新条件时批量写入
+
+        Args:
+            batch_num: 批次编号
+            batch_data: 批次数据（to, bcc）
+            result: 发送结果
+            log: 批次清单行（提供时按主键更新，否则新增一行）
+        """
+        recipients_snapshot = {
+            "to": batch_data.get("to", []),
+            "bcc": batch_data.get("bcc", []),
+        }
+        if result.get("refused"):
+            # 逐个记录被拒收件人及原因
+            recipients_snapshot["refused"] = result["refused"]
+
+        values = {
+            "recipients_snapshot": recipients_snapshot,
+            "status": DeliveryStatus(result.get("status", "failed")),
+            "message_id": result.get("message_id"),
+            "error_message": result.get("error"),
+            "sent_at": _parse_sent_at(result),
+            "duration_ms": result.get("elapsed_ms", 0),
+        }
+
+        if log is not None and log.id is not None:
+            self._updates.append({"id": log.id, **values})
+        else:
+            self._inserts.append({
+                "report_id": self.report_id,
+                "batch_no": batch_num,
+                "created_at": get_local_now_naive(),
+                **values,
+            })
+
+        if self.pending >= self.flush_batches or time.monotonic() - self._last_flush >= self.flush_interval_sec:
+            self.flush()
+
+    def blacklist(self, emails: List[str]):
+        """缓冲需要加入黑名单的邮箱（随下一次刷新批量更新）"""
+        self._blacklist.update(emails)
+
+    def flush(self):
+        """
+        把缓冲的日志和黑名单批量写入数据库（一次提交）
+
+        写入失败时回滚并把本次的行放回缓冲，下一次刷新时重试，
+        避免已被接受的批次在清单中停留为 pending、续发时被重复发送。
+
+        Returns:
+            是否写入成功（缓冲为空时视为成功）
+        """
+        self._last_flush = time.monotonic()
+        if not (self._updates or self._inserts or self._blacklist):
+            return True
+
+        updates, inserts, blacklist = self._updates, self._inserts, self._blacklist
+        self._updates, self._inserts, self._blacklist = [], [], set()
+
+        try:
+            if updates:
+                self.db.execute(update(DeliveryLog), updates)
+            if inserts:
+                self.db.execute(insert(DeliveryLog), inserts)
+            if blacklist:
+                add_to_blacklist_bulk(self.db, sorted(blacklist), commit=False)
+            self.db.commit()
+            self.flush_count += 1
+            logger.debug(f"投递日志批量写入: 更新 {len(updates)} 行, 新增 {len(inserts)} 行, 拉黑 {len(blacklist)} 个")
+            return True
+        except Exception as e:
+            logger.error(f"批量写入投递日志失败({len(updates) + len(inserts)} 个批次)，将在下次刷新时重试: {e}")
+            self.db.rollback()
+            self._updates = updates + self._updates
+            self._inserts = inserts + self._inserts
+            self._blacklist = blacklist | self._blacklist
+            return False
+
+    def close(self) -> Optional[DeliverySummary]:
+        """
+        写入剩余缓冲并物化投递汇总
+
+        Raises:
+            RuntimeError: 剩余缓冲仍无法写入（发送结果未落库，不能当作发送完成）
+        """
+        if not self.flush():
+            raise RuntimeError(f"投递日志写入失败: 报告 {self.report_id} 有 {self.pending} 个批次的发送结果未落库")
+        try:
+            summary = refresh_delivery_summary(self.db, self.report_id)
+            self.db.commit()
+            return summary
+        except Exception as e:
+            logger.error(f"物化投递汇总失败: {e}")
+            self.db.rollback()
+            return None
+
+
+def refresh_delivery_summary(db: Session, report_id: int) -> Optional[DeliverySummary]:
+    """
+    按最近一轮投递日志重新计算并保存报告的投递汇总（不提交）
+
+    Args:
+        db: 数据库会话
+        report_id: 报告ID
+
+    Returns:
+        汇总行（没有投递日志时返回 None）
+    """
+    latest_round = (
+        db.query(func.max(DeliveryLog.send_round))
+        .filter(DeliveryLog.report_id == report_id)
+        .scalar()
+    )
+    if latest_round is None:
+        return None
+
+    rows = (
+        db.query(
+            DeliveryLog.batch_no,
+            DeliveryLog.status,
+            DeliveryLog.recipients_snapshot,
+            DeliveryLog.duration_ms,
+            DeliveryLog.sent_at,
+            DeliveryLog.error_message,
+        )
+        .filter(DeliveryLog.report_id == report_id, DeliveryLog.send_round == latest_round)
+        .order_by(DeliveryLog.batch_no, DeliveryLog.id)
+        .all()
+    )
+    # 同一批次有多行时以最新一行为准
+    latest_rows = list({row.batch_no: row for row in rows}.values())
+
+    counts = {status: 0 for status in DeliveryStatus}
+    total_recipients = refused_recipients = 0
+    durations, sent_times = [], []
+    last_error = None
+
+    for row in latest_rows:
+        counts[DeliveryStatus(row.status)] += 1
+        snapshot = row.recipients_snapshot or {}
+        if row.status in (DeliveryStatus.OK, DeliveryStatus.PARTIAL):
+            total_recipients += len(snapshot.get("to", [])) + len(snapshot.get("bcc", []))
+            refused_recipients += len(snapshot.get("refused", {}))
+            sent_times.append(row.sent_at)
+        durations.append(row.duration_ms or 0)
+        if row.status != DeliveryStatus.OK and row.error_message:
+            last_error = row.error_message
+
+    summary = db.query(DeliverySummary).filter(DeliverySummary.report_id == report_id).first()
+    if summary is None:
+        summary = DeliverySummary(report_id=report_id)
+        db.add(summary)
+
+    summary.send_round = latest_round
+    summary.total_batches = len(latest_rows)
+    summary.ok_batches = counts[DeliveryStatus.OK]
+    summary.partial_batches = counts[DeliveryStatus.PARTIAL]
+    summary.failed_batches = counts[DeliveryStatus.FAILED]
+    summary.pending_batches = counts[DeliveryStatus.PENDING]
+    summary.total_recipients = total_recipients
+    summary.refused_recipients = refused_recipients
+    summary.total_duration_ms = sum(durations)
+    summary.max_duration_ms = max(durations, default=0)
+    summary.first_sent_at = min(sent_times, default=None)
+    summary.last_sent_at = max(sent_times, default=None)
+    summary.last_error = last_error
+
+    return summary
+
+
+def _parse_sent_at(result: dict) -> datetime:
+    """解析发送结果中的发送时间（本地无时区时间）"""
+    sent_at_str = result.get("sent_at")
+    if sent_at_str:
+        try:
+            return to_local_naive(datetime.fromisoformat(sent_at_str))
+        except ValueError:
+            pass
+    return get_local_now_naive()
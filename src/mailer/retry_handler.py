@@ -9,9 +9,10 @@
 
 import asyncio
 import re
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from loguru import logger
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
 from src.db.session import get_db
@@ -32,6 +33,9 @@ async def send_with_retry(
     - 第2次重试：等待 4 秒
     - 第3次重试：等待 8 秒
 
+    整批失败（连接、认证等）时重试整批；服务器只拒收部分收件人时，
+    只对临时拒收（4xx）的收件人重发，邮件头不变。
+
     Args:
         smtp_client: SMTP 客户端实例
         email_data: 邮件数据字典，包含:
@@ -40,14 +44,19 @@ async def send_with_retry(
             - html_body: str
             - bcc: Optional[List[str]]
             - attachments: Optional[List[tuple]]
+            - prepared: Optional[PreparedMessage]（预先编码的邮件模板）
         max_retries: 最大重试次数
         base_delay: 基础延迟时间（秒）
 
     Returns:
-        发送结果字典（同 smtp_client.send_email）
+        发送结果字典（同 smtp_client.send_email）；有收件人被拒时
+        status 为 partial（部分送达）或 failed（全部被拒），refused 为合并后的被拒收件人
     """
     last_error = None
     attempt = 0
+    recipients = None  # 本次尝试的信封收件人（None=整批）
+    refused: Dict[str, str] = {}  # 被拒收件人 -> 拒绝原因（跨多次尝试合并）
+    delivered = None  # 最近一次至少送达部分收件人的结果
 
     while attempt <= max_retries:
         try:
@@ -57,17 +66,39 @@ async def send_with_retry(
                 subject=email_data['subject'],
                 html_body=email_data['html_body'],
                 bcc=email_data.get('bcc'),
-                attachments=email_data.get('attachments')
+                attachments=email_data.get('attachments'),
+                prepared=email_data.get('prepared'),
+                recipients=recipients,
             )
 
-            # 如果成功，直接返回
-            if result['status'] == 'ok':
+            # 整批成功，直接返回
+            if result['status'] == 'ok' and not refused:
                 if attempt > 0:
                     logger.info(f"✅ 重试成功: 第 {attempt} 次重试后成功发送")
                 return result
 
-            # 如果返回失败状态，记录错误
-            last_error = result.get('error', 'Unknown error')
+            if result['status'] != 'failed' or result.get('refused'):
+                # 收件人级别的结果：更新被拒列表
+                attempted = recipients or email_data['to'] + (email_data.get('bcc') or [])
+                result_refused = result.get('refused') or {}
+                for address in attempted:
+                    if address in result_refused:
+                        refused[address] = result_refused[address]
+                    else:
+                        refused.pop(address, None)
+                if result['status'] != 'failed':
+                    delivered = result
+
+                # 只重发临时拒收的收件人
+                recipients = [a for a, reason in refused.items() if is_soft_refusal(reason)]
+                if not recipients or attempt >= max_retries:
+                    return _merge_recipient_results(result, delivered, refused)
+
+                last_error = f"{len(recipients)} 个收件人被临时拒收"
+                logger.warning(f"⚠️ {last_error}，稍后只重发这些收件人")
+            else:
+                # 如果返回失败状态，记录错误
+                last_error = result.get('error', 'Unknown error')
 
         except Exception as e:
             last_error = str(e)
@@ -83,6 +114,10 @@ async def send_with_retry(
             # 已达到最大重试次数
             break
 
+    # 之前的尝试已送达部分收件人
+    if delivered is not None:
+        return _merge_recipient_results(delivered, delivered, refused)
+
     # 所有重试都失败
     logger.error(f"❌ 发送失败，已重试 {max_retries} 次")
 
@@ -93,9 +128,98 @@ async def send_with_retry(
         "retries": attempt,
         "to_count": len(email_data['to']),
         "bcc_count": len(email_data.get('bcc', [])),
+        **({"refused": dict(refused)} if refused else {}),
     }
 
 
+def _merge_recipient_results(result: Dict, delivered: Optional[Dict], refused: Dict[str, str]) -> Dict:
+    """
+    合并多次尝试的收件人级别结果
+
+    Args:
+        result: 最后一次发送结果
+        delivered: 最近一次至少送达部分收件人的结果（None=没有送达任何收件人）
+        refused: 合并后的被拒收件人
+
+    Returns:
+        发送结果字典
+    """
+    merged = dict(delivered or result)
+    merged.pop('refused', None)
+
+    if not refused:
+        merged['status'] = 'ok'
+        merged['error'] = None
+        return merged
+
+    merged['status'] = 'partial' if delivered is not None else 'failed'
+    merged['refused'] = dict(refused)
+    merged['error'] = "; ".join(f"{address}: {reason}" for address, reason in refused.items())
+    logger.warning(f"⚠️ {len(refused)} 个收件人被拒收: {merged['error'][:200]}")
+    return merged
+
+
+# 硬退信特征关键词（收件人地址本身的问题）
+HARD_BOUNCE_PATTERNS = [
+    r'user (not found|unknown|does not exist)',
+    r'no such (user|recipient|mailbox)',
+    r'recipient (rejected|not found)',
+    r'mailbox (unavailable|disabled|does not exist)',
+    r'invalid (recipient|mailbox|address)',
+    r'domain (not found|does not exist)',
+    r'undeliverable',
+    r'permanent (error|failure)',
+]
+
+# RCPT 阶段表示收件人地址无效的应答码
+HARD_RCPT_CODES = {550, 551, 553}
+
+# 应答码 + 可选的增强状态码（如 "550 5.1.1 User unknown"）
+_REPLY_PATTERN = re.compile(r'\s*(\d{3})(?:[\s-]+(\d)\.(\d{1,3})\.(\d{1,3}))?')
+
+
+def is_soft_refusal(reason: str) -> bool:
+    """
+    收件人是否被临时拒收（4xx，可只对该收件人重发）
+
+    Args:
+        reason: 拒绝原因（"应答码 信息"）
+
+    Returns:
+        是否为临时拒收
+    """
+    match = _REPLY_PATTERN.match(reason or '')
+    return bool(match) and match.group(1).startswith('4')
+
+
+def is_hard_refusal(reason: str) -> bool:
+    """
+    收件人是否因地址本身无效被永久拒收（可加入黑名单）
+
+    只看单个收件人的 RCPT 应答：550/551/553 且增强状态码为地址类（5.1.x / 5.2.1），
+    或没有增强状态码但信息表明地址无效。策略类拒绝（5.7.x，如反垃圾、未认证）不算。
+
+    Args:
+        reason: 拒绝原因（"应答码 信息"）
+
+    Returns:
+        是否为硬退信
+    """
+    match = _REPLY_PATTERN.match(reason or '')
+    if not match:
+        return False
+
+    code = int(match.group(1))
+    status_class, subject, detail = match.group(2, 3, 4)
+    if status_class:
+        return status_class == '5' and (subject == '1' or (subject, detail) == ('2', '1'))
+
+    if code not in HARD_RCPT_CODES:
+        return False
+    reason_lower = reason.lower()
+    return any(re.search(pattern, reason_lower) for pattern in HARD_BOUNCE_PATTERNS)
+
+
 def is_hard_bounce(error_message: str) -> bool:
     """
     检测是否为硬退信（永久性失败）
@@ -123,15 +247,7 @@ def is_hard_bounce(error_message: str) -> bool:
     error_lower = error_message.lower()
 
     # 硬退信特征关键词
-    hard_bounce_patterns = [
-        r'user (not found|unknown|does not exist)',
-        r'no such (user|recipient|mailbox)',
-        r'recipient (rejected|not found)',
-        r'mailbox (unavailable|disabled|does not exist)',
-        r'invalid (recipient|mailbox|address)',
-        r'domain (not found|does not exist)',
-        r'undeliverable',
-        r'permanent (error|failure)',
+    hard_bounce_patterns = HARD_BOUNCE_PATTERNS + [
         r'5[0-9]{2}',  # 5xx SMTP 错误码（永久性错误）
     ]
 
@@ -181,6 +297,42 @@ def add_to_blacklist(db: Session, email: str, reason: str = "hard_bounce"):
         db.rollback()
 
 
+def add_to_blacklist_bulk(
+    db: Session,
+    emails: List[str],
+    reason: str = "hard_bounce",
+    commit: bool = True
+) -> int:
+    """
+    批量将邮箱加入黑名单（单条 UPDATE）
+
+    Args:
+        db: 数据库会话
+        emails: 邮箱列表
+        reason: 加入黑名单的原因
+        commit: 是否提交（False 时由调用方统一提交）
+
+    Returns:
+        实际被禁用的收件人数
+    """
+    from src.models.delivery import ReportRecipient
+
+    if not emails:
+        return 0
+
+    disabled = db.execute(
+        update(ReportRecipient)
+        .where(ReportRecipient.email.in_(emails), ReportRecipient.enabled.is_(True))
+        .values(enabled=False)
+    ).rowcount
+    if commit:
+        db.commit()
+
+    if disabled:
+        logger.warning(f"🚫 {disabled} 个邮箱已加入黑名单 (原因: {reason})")
+    return disabled
+
+
 def remove_from_blacklist(db: Session, email: str):
     """
     将邮箱从黑名单移除
@@ -239,31 +391,42 @@ def get_blacklist(db: Session) -> list[str]:
 async def handle_send_failure(
     db: Session,
     email_batch: Dict,
-    error_message: str
-):
+    error_message: str,
+    refused: Optional[Dict[str, str]] = None,
+    apply_blacklist: bool = True
+) -> List[str]:
     """
     处理发送失败情况
 
-    - 检测硬退信
-    - 自动加入黑名单
-    - 记录日志
+    - 只处理服务器逐个拒收的收件人（RCPT 应答），不按整批错误信息拉黑
+    - 地址无效的硬退信加入黑名单
+    - 其他情况（整批失败、临时拒收、策略拒绝）只记录日志
 
     Args:
         db: 数据库会话
         email_batch: 邮件批次信息（包含 to 和 bcc）
         error_message: 错误信息
+        refused: 被拒收件人 -> 拒绝原因（send_with_retry 结果中的 refused）
+        apply_blacklist: 是否立即写入黑名单（False 时只返回，由调用方批量写入）
+
+    Returns:
+        需要加入黑名单的邮箱列表
     """
-    # 检测硬退信
-    if is_hard_bounce(error_message):
-        # 将所有收件人加入黑名单
-        all_recipients = email_batch['to'] + email_batch.get('bcc', [])
+    refused = refused or {}
+    hard = [email for email, reason in refused.items() if is_hard_refusal(reason)]
 
-        for email in all_recipients:
-            add_to_blacklist(db, email, reason=f"hard_bounce: {error_message[:50]}")
+    if apply_blacklist:
+        for email in hard:
+            add_to_blacklist(db, email, reason=f"hard_bounce: {refused[email][:50]}")
 
-        logger.warning(
-            f"🚫 检测到硬退信，已将 {len(all_recipients)} 个邮箱加入黑名单"
-        )
-    else:
-        # 软退信，记录日志即可
-        logger.warning(f"⚠️ 软退信（可重试）: {error_message[:100]}")
+    if hard:
+        logger.warning(f"🚫 检测到硬退信，{len(hard)} 个被拒收的邮箱加入黑名单")
+
+    if len(refused) > len(hard):
+        logger.warning(f"⚠️ {len(refused) - len(hard)} 个收件人被拒收（非地址问题，不加入黑名单）")
+    elif not refused:
+        # 整批失败（连接、认证、服务器错误等），与具体收件人无关
+        batch_size = len(email_batch['to']) + len(email_batch.get('bcc', []))
+        logger.warning(f"⚠️ 批次发送失败（{batch_size} 个收件人，不加入黑名单）: {error_message[:100]}")
+
+    return hard
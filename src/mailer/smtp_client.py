@@ -2,15 +2,21 @@
 SMTP 客户端模块
 
 实现异步邮件发送，支持 SSL/TLS、附件、UTF-8 编码。
+会话模式下一次报告的所有批次复用同一个已认证连接。
+同一封报告的正文和附件只编码一次（PreparedMessage），各批次只替换 To/Message-ID/Date。
 """
 
 import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from datetime import datetime
+from email.message import Message
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.header import Header
+from email.policy import compat32
 from email.utils import formataddr
-from typing import Optional
+from typing import Optional, Union
 
 import aiosmtplib
 from loguru import logger
@@ -19,6 +25,62 @@ from src.config.settings import settings
 from src.utils.time_utils import get_local_now
 
 
+# 服务器即将关闭连接（会话模式下重连后重发）
+SMTP_SERVICE_NOT_AVAILABLE = 421
+
+# 二进制附件的 MIME 子类型（按扩展名）
+_BINARY_SUBTYPES = {
+    '.gz': 'gzip',
+    '.zip': 'zip',
+}
+
+
+# 邮件序列化策略（与 aiosmtplib.send_message 一致，使用 CRLF 换行）
+_SMTP_POLICY = compat32.clone(linesep='\r\n')
+
+
+def _binary_subtype(filename: str) -> str:
+    """按扩展名确定二进制附件的 application/* 子类型"""
+    for suffix, subtype in _BINARY_SUBTYPES.items():
+        if filename.endswith(suffix):
+            return subtype
+    return 'octet-stream'
+
+
+def _format_date() -> str:
+    """邮件 Date 头（北京时间）"""
+    return get_local_now().strftime('%a, %d %b %Y %H:%M:%S +0800')
+
+
+@dataclass(frozen=True)
+class PreparedMessage:
+    """
+    预先序列化的邮件模板
+
+    content 为已编码的邮件主体（From/Subject/MIME 头 + 正文和附件各部分），
+    每个批次只需在前面拼接 To/Message-ID/Date 三个邮件头。
+    """
+    content: bytes
+
+    def render(self, to: list[str], message_id: str) -> bytes:
+        """
+        生成某个批次的完整邮件字节
+
+        Args:
+            to: 收件人列表（To 字段）
+            message_id: 邮件 ID
+
+        Returns:
+            可直接用于 SMTP DATA 的邮件字节
+        """
+        headers = Message()
+        headers['To'] = ', '.join(to)
+        headers['Message-ID'] = f"<{message_id}>"
+        headers['Date'] = _format_date()
+        # 只保留邮件头（去掉头部结束的空行）
+        return headers.as_bytes(policy=_SMTP_POLICY)[:-2] + self.content
+
+
 class SMTPClient:
     """
     SMTP 客户端
@@ -30,6 +92,8 @@ class SMTPClient:
     - HTML 附件
     - UTF-8 编码
     - 密送（BCC）
+    - 会话模式（async with client.session()）：块内所有发送复用同一个已认证连接，
+      连接断开或服务器返回 421 时自动重连并重发一次
     """
 
     def __init__(
@@ -38,7 +102,8 @@ class SMTPClient:
         port: int = None,
         user: str = None,
         password: str = None,
-        from_name: str = "金融情报系统"
+        from_name: str = "金融情报系统",
+        use_tls: bool = None,
     ):
         """
         初始化 SMTP 客户端
@@ -49,12 +114,19 @@ class SMTPClient:
             user: 发件人邮箱
             password: 授权码或密码
             from_name: 发件人昵称
+            use_tls: 是否使用 SSL 直连（None=使用 settings.SMTP_USE_TLS）
         """
         self.host = host or settings.SMTP_HOST
         self.port = port or settings.SMTP_PORT
         self.user = user or settings.SMTP_USER
         self.password = password or settings.SMTP_PASS
         self.from_name = from_name
+        self.use_tls = settings.SMTP_USE_TLS if use_tls is None else use_tls
+
+        # 会话模式状态
+        self._session_active = False
+        self._session_smtp: Optional[aiosmtplib.SMTP] = None
+        self.connect_count = 0  # 建立连接并登录的次数
 
         logger.info(f"初始化 SMTP 客户端: {self.host}:{self.port}")
 
@@ -64,7 +136,9 @@ class SMTPClient:
         subject: str,
         html_body: str,
         bcc: Optional[list[str]] = None,
-        attachments: Optional[list[tuple[str, bytes]]] = None
+        attachments: Optional[list[tuple[str, bytes]]] = None,
+        prepared: Optional[PreparedMessage] = None,
+        recipients: Optional[list[str]] = None,
     ) -> dict:
         """
         发送邮件
@@ -75,47 +149,75 @@ class SMTPClient:
             html_body: HTML 邮件正文
             bcc: 密送列表（不显示在邮件头）
             attachments: 附件列表，格式 [(filename, bytes_content), ...]
+            prepared: 预先编码的邮件模板（由 prepare_message 生成；
+                      提供时忽略 subject/html_body/attachments）
+            recipients: 信封收件人（None=To+BCC；只重发部分收件人时使用，邮件头不变）
 
         Returns:
             发送结果字典:
             {
                 "message_id": str,      # 邮件唯一ID
-                "status": "ok"|"failed", # 发送状态
+                "status": "ok"|"partial"|"failed", # 发送状态（partial=部分收件人被拒）
                 "error": str|None,       # 错误信息
                 "sent_at": str,          # 发送时间
                 "to_count": int,         # 收件人数量
-                "bcc_count": int         # 密送数量
+                "bcc_count": int,        # 密送数量
+                "refused": dict          # 被拒收件人 -> "应答码 信息"（仅有拒收时）
             }
         """
         try:
             # 生成唯一邮件 ID
             message_id = self._generate_message_id()
 
-            # 创建邮件
-            msg = self._build_message(
-                to=to,
-                subject=subject,
-                html_body=html_body,
-                bcc=bcc,
-                attachments=attachments,
-                message_id=message_id
-            )
-
-            # 发送邮件
-            await self._send_smtp(msg, to, bcc)
+            # 创建邮件（有模板时只生成本批次的邮件头）
+            if prepared is not None:
+                msg = prepared.render(to, message_id)
+            else:
+                msg = self._build_message(
+                    to=to,
+                    subject=subject,
+                    html_body=html_body,
+                    bcc=bcc,
+                    attachments=attachments,
+                    message_id=message_id
+                )
+
+            # 发送邮件（返回被拒收的收件人）
+            refused = await self._send_smtp(msg, to, bcc, recipients=recipients)
+
+            if refused:
+                logger.warning(f"⚠️ 邮件部分送达: {message_id} | {len(refused)} 个收件人被拒收")
+            else:
+                logger.success(
+                    f"✅ 邮件发送成功: {message_id} | "
+                    f"To: {len(to)}, BCC: {len(bcc) if bcc else 0}"
+                )
+
+            result = {
+                "message_id": message_id,
+                "status": "partial" if refused else "ok",
+                "error": None,
+                "sent_at": get_local_now().isoformat(),
+                "to_count": len(to),
+                "bcc_count": len(bcc) if bcc else 0,
+            }
+            if refused:
+                result["refused"] = refused
+            return result
 
-            logger.success(
-                f"✅ 邮件发送成功: {message_id} | "
-                f"To: {len(to)}, BCC: {len(bcc) if bcc else 0}"
-            )
+        except aiosmtplib.SMTPRecipientsRefused as e:
+            # 全部收件人被拒收
+            refused = {r.recipient: f"{r.code} {r.message}" for r in e.recipients}
+            logger.error(f"❌ 邮件发送失败: 全部 {len(refused)} 个收件人被拒收")
 
             return {
                 "message_id": message_id,
-                "status": "ok",
-                "error": None,
-                "sent_at": get_local_now().isoformat(),
+                "status": "failed",
+                "error": str(e),
+                "sent_at": get_local_now().isoformat(),
                 "to_count": len(to),
                 "bcc_count": len(bcc) if bcc else 0,
+                "refused": refused,
             }
 
         except Exception as e:
@@ -135,6 +237,26 @@ class SMTPClient:
         """生成唯一的邮件 ID"""
         return f"{uuid.uuid4().hex}@{self.host}"
 
+    def prepare_message(
+        self,
+        subject: str,
+        html_body: str,
+        attachments: Optional[list[tuple[str, bytes]]] = None
+    ) -> PreparedMessage:
+        """
+        预先编码邮件正文和附件，供多个批次复用
+
+        Args:
+            subject: 邮件主题
+            html_body: HTML 正文
+            attachments: 附件列表
+
+        Returns:
+            PreparedMessage 邮件模板
+        """
+        msg = self._build_content(subject, html_body, attachments)
+        return PreparedMessage(content=msg.as_bytes(policy=_SMTP_POLICY))
+
     def _build_message(
         self,
         to: list[str],
@@ -158,19 +280,42 @@ class SMTPClient:
         Returns:
             MIMEMultipart 邮件对象
         """
-        # 创建邮件对象
-        msg = MIMEMultipart('mixed')
+        msg = self._build_content(subject, html_body, attachments)
 
-        # 设置基本字段
-        msg['From'] = formataddr((self.from_name, self.user))
+        # 设置批次相关字段
         msg['To'] = ', '.join(to)
-        msg['Subject'] = Header(subject, 'utf-8')
         msg['Message-ID'] = f"<{message_id}>"
-        msg['Date'] = get_local_now().strftime('%a, %d %b %Y %H:%M:%S +0800')
+        msg['Date'] = _format_date()
 
         # BCC 不写入邮件头（隐私保护）
         # 但在发送时会传递给 SMTP 服务器
 
+        return msg
+
+    def _build_content(
+        self,
+        subject: str,
+        html_body: str,
+        attachments: Optional[list[tuple[str, bytes]]]
+    ) -> MIMEMultipart:
+        """
+        构建与收件人无关的邮件部分（From/Subject、正文和附件）
+
+        Args:
+            subject: 邮件主题
+            html_body: HTML 正文
+            attachments: 附件列表
+
+        Returns:
+            MIMEMultipart 邮件对象（不含 To/Message-ID/Date）
+        """
+        # 创建邮件对象
+        msg = MIMEMultipart('mixed')
+
+        # 设置基本字段
+        msg['From'] = formataddr((self.from_name, self.user))
+        msg['Subject'] = Header(subject, 'utf-8')
+
         # 添加 HTML 正文
         html_part = MIMEText(html_body, 'html', 'utf-8')
         msg.attach(html_part)
@@ -187,11 +332,11 @@ class SMTPClient:
                         filename=('utf-8', '', filename)
                     )
                 else:
-                    # 其他类型附件（未来扩展）
+                    # 其他类型附件（gzip/zip 压缩附件等）
                     from email.mime.base import MIMEBase
                     from email import encoders
 
-                    attachment = MIMEBase('application', 'octet-stream')
+                    attachment = MIMEBase('application', _binary_subtype(filename))
                     attachment.set_payload(content)
                     encoders.encode_base64(attachment)
                     attachment.add_header(
@@ -206,37 +351,134 @@ class SMTPClient:
 
     async def _send_smtp(
         self,
-        msg: MIMEMultipart,
+        msg: Union[MIMEMultipart, bytes],
         to: list[str],
-        bcc: Optional[list[str]]
-    ):
+        bcc: Optional[list[str]],
+        recipients: Optional[list[str]] = None
+    ) -> dict[str, str]:
         """
         通过 SMTP 服务器发送邮件
 
         Args:
-            msg: MIME 邮件对象
+            msg: MIME 邮件对象或已序列化的邮件字节
             to: 收件人列表
             bcc: 密送列表
+            recipients: 信封收件人（None=To+BCC）
+
+        Returns:
+            被拒收的收件人 -> "应答码 信息"（全部送达时为空）
         """
         # 合并所有收件人（To + BCC）
-        all_recipients = to + (bcc if bcc else [])
+        all_recipients = recipients or to + (bcc if bcc else [])
 
-        # 连接并发送
-        async with aiosmtplib.SMTP(
-            hostname=self.host,
-            port=self.port,
-            use_tls=True,  # SSL 加密（465 端口）
-            timeout=30,
-        ) as smtp:
+        if self._session_active:
+            return await self._send_in_session(msg, all_recipients)
+
+        # 单次模式：每封邮件独立连接并登录
+        async with self._new_connection() as smtp:
             # 登录
             await smtp.login(self.user, self.password)
+            self.connect_count += 1
 
             # 发送邮件
-            await smtp.send_message(
-                msg,
-                sender=self.user,
-                recipients=all_recipients
-            )
+            return await self._deliver(smtp, msg, all_recipients)
+
+    async def _deliver(
+        self,
+        smtp: aiosmtplib.SMTP,
+        msg: Union[MIMEMultipart, bytes],
+        recipients: list[str]
+    ) -> dict[str, str]:
+        """在已登录的连接上发送一封邮件（字节直接 sendmail，避免重复序列化），返回被拒收的收件人"""
+        if isinstance(msg, bytes):
+            errors, _ = await smtp.sendmail(self.user, recipients, msg)
+        else:
+            errors, _ = await smtp.send_message(msg, sender=self.user, recipients=recipients)
+        return {address: f"{response.code} {response.message}" for address, response in errors.items()}
+
+    def _new_connection(self, timeout: int = 30) -> aiosmtplib.SMTP:
+        """创建（未连接的）SMTP 连接对象"""
+        return aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            use_tls=self.use_tls,  # SSL 加密（465 端口）
+            timeout=timeout,
+        )
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        会话模式：块内所有 send_email 复用同一个已认证连接
+
+        首次发送时建立连接并登录，退出时 QUIT。
+
+        Examples:
+            >>> async with client.session():
+            ...     for batch in batches:
+            ...         await client.send_email(...)
+        """
+        self._session_active = True
+        try:
+            yield self
+        finally:
+            self._session_active = False
+            await self._close_session()
+
+    async def _open_session(self) -> aiosmtplib.SMTP:
+        """建立会话连接并登录"""
+        smtp = self._new_connection()
+        await smtp.connect()
+        await smtp.login(self.user, self.password)
+        self.connect_count += 1
+        logger.info(f"🔌 SMTP 会话已建立: {self.host}:{self.port}（第 {self.connect_count} 次连接）")
+        return smtp
+
+    async def _close_session(self):
+        """关闭会话连接（忽略关闭时的错误）"""
+        smtp, self._session_smtp = self._session_smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def _send_in_session(self, msg: Union[MIMEMultipart, bytes], recipients: list[str]) -> dict[str, str]:
+        """
+        通过会话连接发送；连接断开或服务器返回 421 时重连并重发一次
+
+        Args:
+            msg: MIME 邮件对象或已序列化的邮件字节
+            recipients: 全部收件人（To + BCC）
+
+        Returns:
+            被拒收的收件人 -> "应答码 信息"
+        """
+        for attempt in range(2):
+            if self._session_smtp is None or not self._session_smtp.is_connected:
+                self._session_smtp = await self._open_session()
+
+            try:
+                return await self._deliver(self._session_smtp, msg, recipients)
+            except aiosmtplib.SMTPResponseException as e:
+                # 其他应答错误由 aiosmtplib 重置信封，连接可继续使用
+                if e.code != SMTP_SERVICE_NOT_AVAILABLE:
+                    raise
+                await self._close_session()
+                if attempt:
+                    raise
+                logger.warning(f"🔌 SMTP 服务器返回 421（{e.message}），重新连接后重发")
+            except ConnectionError as e:
+                await self._close_session()
+                if attempt:
+                    raise
+                logger.warning(f"🔌 SMTP 连接已断开（{e}），重新连接后重发")
+            except aiosmtplib.SMTPRecipientsRefused:
+                raise
+            except Exception:
+                # 超时等：连接状态未知，丢弃后由下一次发送重连
+                await self._close_session()
+                raise
 
     async def test_connection(self) -> bool:
         """
@@ -246,12 +488,7 @@ class SMTPClient:
             是否连接成功
         """
         try:
-            async with aiosmtplib.SMTP(
-                hostname=self.host,
-                port=self.port,
-                use_tls=True,
-                timeout=10,
-            ) as smtp:
+            async with self._new_connection(timeout=10) as smtp:
                 await smtp.login(self.user, self.password)
 
             logger.success(f"✅ SMTP 连接测试成功: {self.host}:{self.port}")
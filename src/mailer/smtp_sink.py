@@ -0,0 +1,161 @@
+"""
+本地 SMTP 接收端（压测/测试用）
+
+基于 aiosmtpd（开发依赖）启动一个只接收不投递的 SMTP 服务器，
+用于在没有真实邮箱服务的环境下测量发送吞吐和限速、重试行为：
+
+- 可配置 DATA 应答延迟（模拟慢速服务器）
+- 按概率注入 DATA 阶段 421（连接级临时失败）、RCPT 阶段 451（软退信）和 550（硬退信）
+- 统计连接数、登录数、收到的邮件数、收件人数和 DATA 字节数
+"""
+
+import asyncio
+import random
+import socket
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import SMTP, AuthResult
+
+
+@dataclass
+class SinkStats:
+    """接收端统计"""
+    connections: int = 0
+    logins: int = 0
+    messages: int = 0
+    recipients: int = 0
+    bytes_received: int = 0
+    data_failures: int = 0  # 注入的 421
+    soft_refusals: int = 0  # 注入的 451
+    hard_refusals: int = 0  # 注入的 550
+    latencies_ms: List[float] = field(default_factory=list)
+
+
+class SinkHandler:
+    """aiosmtpd 处理器：按配置注入延迟和失败，只统计不保存邮件正文"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        latency_jitter: float = 0.0,
+        data_fail_rate: float = 0.0,
+        soft_bounce_rate: float = 0.0,
+        hard_bounce_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        初始化处理器
+
+        Args:
+            latency_ms: DATA 应答的平均延迟（毫秒）
+            latency_jitter: 延迟抖动比例（0.5 表示在 ±50% 内均匀分布）
+            data_fail_rate: DATA 返回 421 的概率
+            soft_bounce_rate: 单个收件人 RCPT 返回 451 的概率
+            hard_bounce_rate: 单个收件人 RCPT 返回 550 的概率
+            seed: 随机种子
+        """
+        self.latency_ms = latency_ms
+        self.latency_jitter = latency_jitter
+        self.data_fail_rate = data_fail_rate
+        self.soft_bounce_rate = soft_bounce_rate
+        self.hard_bounce_rate = hard_bounce_rate
+        self.stats = SinkStats()
+        self._rng = random.Random(seed)
+
+    def sample_latency_ms(self) -> float:
+        """采样一次 DATA 应答延迟（毫秒）"""
+        if self.latency_ms <= 0:
+            return 0.0
+        jitter = self.latency_jitter * self.latency_ms
+        return max(0.0, self._rng.uniform(self.latency_ms - jitter, self.latency_ms + jitter))
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        roll = self._rng.random()
+        if roll < self.hard_bounce_rate:
+            self.stats.hard_refusals += 1
+            return "550 5.1.1 User unknown (sink)"
+        if roll < self.hard_bounce_rate + self.soft_bounce_rate:
+            self.stats.soft_refusals += 1
+            return "451 4.3.0 Try again later (sink)"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        latency = self.sample_latency_ms()
+        if latency:
+            await asyncio.sleep(latency / 1000)
+
+        if self._rng.random() < self.data_fail_rate:
+            self.stats.data_failures += 1
+            return "421 Service not available, closing transmission channel (sink)"
+
+        self.stats.messages += 1
+        self.stats.recipients += len(envelope.rcpt_tos)
+        self.stats.bytes_received += len(envelope.original_content or b"")
+        self.stats.latencies_ms.append(latency)
+        return "250 OK"
+
+    def authenticate(self, server, session, envelope, mechanism, auth_data):
+        """接受任意凭据（统计登录次数）"""
+        self.stats.logins += 1
+        return AuthResult(success=True)
+
+
+class SMTPSink(Controller):
+    """
+    本地 SMTP 接收端（在后台线程的事件循环中运行）
+
+    用法:
+        with SMTPSink(latency_ms=50, soft_bounce_rate=0.01) as sink:
+            client = SMTPClient(host=sink.hostname, port=sink.port, use_tls=False, ...)
+            ...
+            print(sink.stats.messages)
+    """
+
+    def __init__(self, hostname: str = "127.0.0.1", port: int = None, **handler_kwargs):
+        """
+        初始化接收端
+
+        Args:
+            hostname: 监听地址
+            port: 监听端口（None=自动选择空闲端口）
+            **handler_kwargs: 传给 SinkHandler 的延迟和失败注入参数
+        """
+        handler = SinkHandler(**handler_kwargs)
+        super().__init__(
+            handler,
+            hostname=hostname,
+            port=port or _free_port(hostname),
+            authenticator=handler.authenticate,
+            auth_require_tls=False,
+        )
+
+    @property
+    def stats(self) -> SinkStats:
+        return self.handler.stats
+
+    def start(self):
+        """启动接收端（丢弃启动自检连接产生的统计）"""
+        super().start()
+        self.handler.stats = SinkStats()
+
+    def factory(self):
+        """每个新连接创建一个 SMTP 协议实例（借此统计连接数）"""
+        self.handler.stats.connections += 1
+        return SMTP(self.handler, **self.SMTP_kwargs)
+
+    def __enter__(self) -> "SMTPSink":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _free_port(hostname: str) -> int:
+    """获取一个空闲端口"""
+    with socket.socket() as sock:
+        sock.bind((hostname, 0))
+        return sock.getsockname()[1]
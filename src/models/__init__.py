@@ -5,9 +5,9 @@
 from .base import Base, TimestampMixin
 from .source import Source, SourceType, RegionHint
 from .article import Article, ProcessingStatus
-from .extraction import ExtractionQueue, ExtractionItem, QueueStatus, Region, Layer
-from .report import Report
-from .delivery import ReportRecipient, DeliveryLog, ProviderUsage, RecipientType, DeliveryStatus
+from .extraction import ExtractionQueue, ExtractionItem, DailyItemScore, QueueStatus, Region, Layer
+from .report import Report, ReportSectionCache, FlashReport
+from .delivery import ReportRecipient, DeliveryLog, DeliverySummary, ProviderUsage, RecipientType, DeliveryStatus
 from .user import (
     User,
     UserRole,
@@ -31,12 +31,16 @@ __all__ = [
     "ProcessingStatus",
     "ExtractionQueue",
     "ExtractionItem",
+    "DailyItemScore",
     "QueueStatus",
     "Region",
     "Layer",
     "Report",
+    "ReportSectionCache",
+    "FlashReport",
     "ReportRecipient",
     "DeliveryLog",
+    "DeliverySummary",
     "ProviderUsage",
     "RecipientType",
     "DeliveryStatus",
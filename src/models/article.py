@@ -47,10 +47,11 @@ class Article(Base, TimestampMixin):
     # 关系
     source = relationship("Source", backref="articles")
 
+    # url 已有唯一约束索引；按状态+采集时间重建物化评分表，按入库时间过滤抽取队列
     __table_args__ = (
-        Index("idx_articles_url", "url"),
         Index("idx_articles_published_at", "published_at"),
-        Index("idx_articles_processing_status", "processing_status"),
+        Index("idx_articles_status_fetched_at", "processing_status", "fetched_at"),
+        Index("idx_articles_created_at", "created_at"),
         Index("idx_articles_simhash", "simhash"),
     )
 
@@ -2,7 +2,7 @@
 投递相关模型
 """
 from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum as SQLEnum, JSON, Float, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import backref, relationship
 import enum
 from .base import Base, TimestampMixin
 from src.utils.time_utils import get_local_now_naive
@@ -16,6 +16,7 @@ class RecipientType(str, enum.Enum):
 
 class DeliveryStatus(str, enum.Enum):
     """投递状态"""
+    PENDING = "pending"  # 已写入批次清单，尚未发送
     OK = "ok"
     FAILED = "failed"
     PARTIAL = "partial"
@@ -42,11 +43,17 @@ class ReportRecipient(Base, TimestampMixin):
 
 
 class DeliveryLog(Base):
-    """投递日志表"""
+    """
+    投递日志表
+
+    发送前为每个批次写入一行 pending（批次清单），发送后原地更新为 ok/failed；
+    重新投递的任务只发送本轮清单中尚未成功的批次。
+    """
     __tablename__ = "delivery_log"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     report_id = Column(Integer, ForeignKey("reports.id"), nullable=False, comment="报告ID")
+    send_round = Column(Integer, default=1, server_default="1", nullable=False, comment="发送轮次（强制重发时递增）")
     batch_no = Column(Integer, default=1, comment="批次号")
     recipients_snapshot = Column(JSON, nullable=True, comment="收件人快照")
     message_id = Column(String(200), nullable=True, comment="邮件消息ID")
@@ -62,6 +69,7 @@ class DeliveryLog(Base):
 
     __table_args__ = (
         Index("idx_delivery_log_report_id", "report_id"),
+        Index("idx_delivery_log_report_round", "report_id", "send_round", "batch_no"),
         Index("idx_delivery_log_sent_at", "sent_at"),
         Index("idx_delivery_log_status", "status"),
     )
@@ -70,6 +78,42 @@ class DeliveryLog(Base):
         return f"<DeliveryLog(id={self.id}, report_id={self.report_id}, status={self.status})>"
 
 
+class DeliverySummary(Base, TimestampMixin):
+    """
+    投递汇总表（每份报告一行）
+
+    发送结束时按最近一轮的投递日志物化，管理页面直接读取，不再实时聚合 delivery_log。
+    """
+    __tablename__ = "delivery_summary"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    report_id = Column(Integer, ForeignKey("reports.id"), nullable=False, unique=True, comment="报告ID")
+    send_round = Column(Integer, default=1, nullable=False, comment="汇总的发送轮次")
+    total_batches = Column(Integer, default=0, nullable=False, comment="批次数")
+    ok_batches = Column(Integer, default=0, nullable=False, comment="成功批次数")
+    partial_batches = Column(Integer, default=0, nullable=False, comment="部分送达批次数")
+    failed_batches = Column(Integer, default=0, nullable=False, comment="失败批次数")
+    pending_batches = Column(Integer, default=0, nullable=False, comment="未发送批次数")
+    total_recipients = Column(Integer, default=0, nullable=False, comment="收件人数")
+    refused_recipients = Column(Integer, default=0, nullable=False, comment="被拒收件人数")
+    total_duration_ms = Column(Integer, default=0, nullable=False, comment="批次耗时合计(毫秒)")
+    max_duration_ms = Column(Integer, default=0, nullable=False, comment="最慢批次耗时(毫秒)")
+    first_sent_at = Column(DateTime, nullable=True, comment="首个批次发送时间")
+    last_sent_at = Column(DateTime, nullable=True, comment="最后批次发送时间")
+    last_error = Column(Text, nullable=True, comment="最近一次失败信息")
+
+    # 关系
+    report = relationship("Report", backref=backref("delivery_summary", uselist=False))
+
+    @property
+    def delivered_recipients(self) -> int:
+        """送达的收件人数（不含失败和未发送批次、被拒收件人）"""
+        return max(0, self.total_recipients - self.refused_recipients)
+
+    def __repr__(self):
+        return f"<DeliverySummary(report_id={self.report_id}, ok={self.ok_batches}/{self.total_batches})>"
+
+
 class ProviderUsage(Base):
     """Provider使用统计表"""
     __tablename__ = "provider_usage"
@@ -78,6 +122,8 @@ class ProviderUsage(Base):
     provider_name = Column(String(50), nullable=False, comment="Provider名称")
     model_name = Column(String(50), nullable=False, comment="模型名称")
     article_id = Column(Integer, ForeignKey("articles.id"), nullable=True, comment="文章ID")
+    chunk_index = Column(Integer, nullable=True, comment="分块索引(从0开始)")
+    task_kind = Column(String(20), nullable=True, comment="任务类型:extract/report")
     prompt_tokens = Column(Integer, default=0, comment="输入Token数")
     completion_tokens = Column(Integer, default=0, comment="输出Token数")
     total_tokens = Column(Integer, default=0, comment="总Token数")
@@ -91,6 +137,7 @@ class ProviderUsage(Base):
         Index("idx_provider_usage_provider", "provider_name"),
         Index("idx_provider_usage_article_id", "article_id"),
         Index("idx_provider_usage_created_at", "created_at"),
+        Index("idx_provider_usage_task_kind", "task_kind"),
     )
 
     def __repr__(self):
@@ -1,7 +1,7 @@
 """
 抽取相关模型
 """
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey, Enum as SQLEnum, Index
+from sqlalchemy import Column, Integer, String, Text, Float, Date, DateTime, ForeignKey, Enum as SQLEnum, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -49,10 +49,14 @@ class ExtractionQueue(Base, TimestampMixin):
     # 关系
     article = relationship("Article", backref="extraction_queue")
 
+    # article_id 已有唯一约束索引；待处理项按优先级取用走部分索引（只含 queued 行）
     __table_args__ = (
-        Index("idx_extraction_queue_status", "status"),
-        Index("idx_extraction_queue_priority", "priority"),
-        Index("idx_extraction_queue_article_id", "article_id"),
+        Index(
+            "idx_extraction_queue_queued_priority", "priority",
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+        Index("idx_extraction_queue_status_finished_at", "status", "processing_finished_at"),
     )
 
     def __repr__(self):
@@ -85,3 +89,49 @@ class ExtractionItem(Base, TimestampMixin):
 
     def __repr__(self):
         return f"<ExtractionItem(id={self.id}, article_id={self.article_id}, region={self.region}, layer={self.layer})>"
+
+
+class DailyItemScore(Base, TimestampMixin):
+    """
+    每日评分物化表
+
+    抽取项写入时同步维护，只保存报告构建所需的评分、分区和展示字段，
+    报告构建按 report_date 单表查询，无需连表加载整篇文章。
+    """
+    __tablename__ = "daily_item_scores"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    item_id = Column(Integer, ForeignKey("extraction_items.id", ondelete="CASCADE"), nullable=False, unique=True, comment="抽取项ID")
+    article_id = Column(Integer, nullable=False, comment="文章ID")
+    source_id = Column(Integer, nullable=False, comment="信息源ID")
+    report_date = Column(Date, nullable=False, comment="归属日期(文章采集日期)")
+    region = Column(String(20), nullable=False, comment="区域")
+    layer = Column(String(50), nullable=False, comment="层级")
+    base_score = Column(Float, nullable=False, comment="静态评分(不含新近度)")
+    confidence = Column(Float, nullable=False, comment="置信度")
+    finance_relevance = Column(Float, nullable=False, default=1.0, comment="金融相关性评分(0-1)")
+    source_weight = Column(Float, nullable=False, default=1.0, comment="来源权重")
+    content_len = Column(Integer, nullable=False, default=0, comment="文章正文长度")
+    published_at = Column(DateTime, nullable=True, comment="文章发布时间")
+    fact = Column(Text, nullable=False, comment="事实描述")
+    opinion = Column(Text, nullable=True, comment="观点描述")
+    evidence_span = Column(Text, nullable=True, comment="证据片段")
+    article_title = Column(String(500), nullable=False, comment="文章标题")
+    article_url = Column(String(1000), nullable=False, comment="文章URL")
+    source_name = Column(String(200), nullable=False, comment="信息源名称")
+    flash_report_id = Column(Integer, nullable=True, comment="已包含该项的快讯ID(空=尚未进入快讯)")
+
+    __table_args__ = (
+        Index("idx_daily_item_scores_date_score", "report_date", "base_score"),
+        Index("idx_daily_item_scores_date_section", "report_date", "region", "layer"),
+        Index("idx_daily_item_scores_article_id", "article_id"),
+        # 快讯读取当天未覆盖的条目（只索引 flash_report_id 为空的行）
+        Index(
+            "idx_daily_item_scores_unflashed", "report_date",
+            postgresql_where=text("flash_report_id IS NULL"),
+            sqlite_where=text("flash_report_id IS NULL"),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<DailyItemScore(item_id={self.item_id}, report_date={self.report_date}, score={self.base_score})>"
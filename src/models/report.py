@@ -1,7 +1,7 @@
 """
 报告相关模型
 """
-from sqlalchemy import Column, Integer, String, Text, Date, JSON, DateTime, Index
+from sqlalchemy import Column, Integer, String, Text, Date, JSON, DateTime, Index, LargeBinary, UniqueConstraint
 from datetime import datetime
 from .base import Base, TimestampMixin
 
@@ -16,7 +16,10 @@ class Report(Base, TimestampMixin):
     overview_summary = Column(Text, nullable=True, comment="总览摘要")
     sections_json = Column(JSON, nullable=True, comment="分区统计JSON")
     html_body = Column(Text, nullable=False, comment="邮件正文HTML")
-    html_attachment = Column(Text, nullable=False, comment="附件HTML")
+    html_attachment = Column(Text, nullable=True, comment="附件HTML（html 格式）")
+    attachment_format = Column(String(10), nullable=False, default="html", server_default="html",
+                               comment="附件格式: html/gzip/zip")
+    attachment_data = Column(LargeBinary, nullable=True, comment="压缩附件字节（gzip/zip 格式）")
     build_meta = Column(JSON, nullable=True, comment="构建元数据")
     build_ms = Column(Integer, default=0, comment="构建耗时(毫秒)")
 
@@ -24,5 +27,65 @@ class Report(Base, TimestampMixin):
         Index("idx_reports_date", "report_date"),
     )
 
+    @property
+    def has_attachment(self) -> bool:
+        """是否有可下载的附件"""
+        return bool(self.html_attachment or self.attachment_data)
+
     def __repr__(self):
         return f"<Report(id={self.id}, date={self.report_date})>"
+
+
+class ReportSectionCache(Base, TimestampMixin):
+    """
+    报告分区缓存表
+
+    按 (日期, 区域, 层级) 保存分区输入指纹、LLM 分区报告和已渲染的正文/附件片段，
+    同一天重复构建报告时只重新生成指纹变化的分区。
+    """
+    __tablename__ = "report_section_cache"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    report_date = Column(Date, nullable=False, comment="报告日期")
+    region = Column(String(20), nullable=False, comment="区域")
+    layer = Column(String(50), nullable=False, comment="层级")
+    fingerprint = Column(String(64), nullable=False, comment="分区输入指纹(SHA-256)")
+    item_count = Column(Integer, default=0, comment="分区条目数")
+    llm_summary = Column(Text, nullable=True, comment="LLM 分区报告")
+    email_html = Column(Text, nullable=True, comment="邮件正文分区片段HTML")
+    attachment_html = Column(Text, nullable=True, comment="附件分区片段HTML")
+
+    __table_args__ = (
+        UniqueConstraint("report_date", "region", "layer", name="uq_report_section_cache_section"),
+    )
+
+    def __repr__(self):
+        return f"<ReportSectionCache(date={self.report_date}, region={self.region}, layer={self.layer})>"
+
+
+class FlashReport(Base, TimestampMixin):
+    """
+    快讯增量报告表
+
+    每次包含物化评分表中尚未被任何快讯覆盖的条目（daily_item_scores.flash_report_id 为空），
+    发送结果确定后才写入本表并标记覆盖；since_item_id / until_item_id 仅记录覆盖的 ID 范围。
+    """
+    __tablename__ = "flash_reports"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    report_date = Column(Date, nullable=False, comment="报告日期")
+    since_item_id = Column(Integer, nullable=False, comment="覆盖的最小抽取项ID(不含)")
+    until_item_id = Column(Integer, nullable=False, comment="覆盖的最大抽取项ID(含)")
+    item_count = Column(Integer, default=0, comment="新增条目数")
+    html_body = Column(Text, nullable=True, comment="快讯邮件HTML")
+    sent_batches = Column(Integer, default=0, comment="发送成功批次数")
+    failed_batches = Column(Integer, default=0, comment="发送失败批次数")
+    build_ms = Column(Integer, default=0, comment="构建耗时(毫秒)")
+
+    __table_args__ = (
+        Index("idx_flash_reports_until_item_id", "until_item_id"),
+        Index("idx_flash_reports_date", "report_date"),
+    )
+
+    def __repr__(self):
+        return f"<FlashReport(id={self.id}, items=({self.since_item_id}, {self.until_item_id}])>"
@@ -3,6 +3,7 @@
 NLP module - LLM extraction and processing
 """
 
+from .budget_guard import BudgetDecision, BudgetGuard, get_budget_guard
 from .chunking import (
     ChunkPlan,
     detect_language,
@@ -11,7 +12,14 @@ from .chunking import (
     plan_chunks,
     split_by_semantics,
 )
-from .extractor import EXTRACTION_PROMPT, ExtractResult, extract_article, extract_from_chunk
+from .extractor import (
+    EXTRACTION_PROMPT,
+    ExtractResult,
+    cascade_chunk_results,
+    extract_article,
+    extract_from_chunk,
+    needs_escalation,
+)
 from .merger import (
     deduplicate_facts,
     filter_low_quality_items,
@@ -27,9 +35,14 @@ from .provider_router import (
     QwenProvider,
     get_concurrency_controller,
     get_provider_router,
+    set_provider_router,
 )
 
 __all__ = [
+    # budget_guard
+    "BudgetDecision",
+    "BudgetGuard",
+    "get_budget_guard",
     # chunking
     "ChunkPlan",
     "detect_language",
@@ -40,8 +53,10 @@ __all__ = [
     # extractor
     "EXTRACTION_PROMPT",
     "ExtractResult",
+    "cascade_chunk_results",
     "extract_article",
     "extract_from_chunk",
+    "needs_escalation",
     # merger
     "deduplicate_facts",
     "filter_low_quality_items",
@@ -56,4 +71,5 @@ __all__ = [
     "QwenProvider",
     "get_concurrency_controller",
     "get_provider_router",
+    "set_provider_router",
 ]
@@ -0,0 +1,283 @@
+"""
+LLM 预算守卫模块
+
+在每次抽取调用前用 estimate_cost 预估费用，并在 Redis 中维护当日累计花费。
+达到软限制时降级（只用最便宜的模型、跳过低优先级队列项），达到硬限制时停止调用。
+每天每个级别只在首次进入时记录一次降级决策，超限期间的每次调用只做检查。
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import redis
+from loguru import logger
+
+from src.config.settings import settings
+from src.nlp.chunking import estimate_tokens
+from src.utils.cost_calculator import calculate_cost, estimate_cost
+from src.utils.time_utils import get_local_now
+
+# 预算级别
+LEVEL_OK = "ok"
+LEVEL_SOFT = "soft"
+LEVEL_HARD = "hard"
+
+# 降级动作
+ACTION_CHEAPEST_ONLY = "cheapest_only"
+ACTION_SKIP_LOW_PRIORITY = "skip_low_priority"
+ACTION_STOP = "stop"
+
+# Redis 键保留时间（秒），跨日后旧键自然过期
+KEY_TTL_SEC = 3 * 86400
+MAX_DECISIONS = 200
+
+
+@dataclass
+class BudgetDecision:
+    """单次预算检查结果"""
+    level: str  # ok | soft | hard
+    spent: float  # 当日已花费（元）
+    estimated_cost: float  # 本次调用预估费用（元）
+
+    @property
+    def allowed(self) -> bool:
+        """是否允许调用"""
+        return self.level != LEVEL_HARD
+
+    @property
+    def cheapest_only(self) -> bool:
+        """是否只允许使用最便宜的模型"""
+        return self.level == LEVEL_SOFT
+
+
+class BudgetGuard:
+    """LLM 日预算守卫"""
+
+    def __init__(
+        self,
+        soft_limit: float = None,
+        hard_limit: float = None,
+        redis_client=None,
+    ):
+        """
+        初始化预算守卫
+
+        Args:
+            soft_limit: 软限制（元），0 表示不启用
+            hard_limit: 硬限制（元），0 表示不启用
+            redis_client: Redis 客户端（默认按 REDIS_URL 创建）
+        """
+        self.soft_limit = settings.LLM_DAILY_BUDGET_SOFT if soft_limit is None else soft_limit
+        self.hard_limit = settings.LLM_DAILY_BUDGET_HARD if hard_limit is None else hard_limit
+        self._redis = redis_client
+        # 本进程已确认进入过的 (日期键, 级别)，避免超限期间每次调用都访问 Redis
+        self._reached_levels = set()
+
+    @property
+    def enabled(self) -> bool:
+        """是否配置了任一预算限制"""
+        return self.soft_limit > 0 or self.hard_limit > 0
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return self._redis
+
+    def _day_key(self, suffix: str) -> str:
+        return f"llm_budget:{suffix}:{get_local_now().strftime('%Y%m%d')}"
+
+    def get_spent(self) -> float:
+        """读取当日累计花费（Redis 不可用时返回 0，即放行）"""
+        try:
+            value = self.redis.get(self._day_key("spent"))
+            return float(value) if value else 0.0
+        except Exception as e:
+            logger.warning(f"读取 LLM 预算失败，按未超限处理: {e}")
+            return 0.0
+
+    def level_for(self, amount: float) -> str:
+        """根据金额判断预算级别"""
+        if self.hard_limit > 0 and amount >= self.hard_limit:
+            return LEVEL_HARD
+        if self.soft_limit > 0 and amount >= self.soft_limit:
+            return LEVEL_SOFT
+        return LEVEL_OK
+
+    def estimate_call_cost(self, provider: str, model: str, messages: List[Dict]) -> float:
+        """
+        预估一次聊天调用的费用
+
+        Args:
+            provider: Provider 名称
+            model: 模型名称
+            messages: 消息列表
+
+        Returns:
+            预估费用（元）
+        """
+        prompt_text = "\n".join(m.get("content", "") for m in messages)
+        input_tokens = estimate_tokens(prompt_text, "mixed")
+        input_ratio = 1 - settings.LLM_BUDGET_OUTPUT_RATIO
+        total_tokens = int(input_tokens / input_ratio) if input_ratio > 0 else input_tokens
+        return estimate_cost(provider, model, total_tokens, input_output_ratio=input_ratio)
+
+    def check_call(self, provider: str, model: str, messages: List[Dict]) -> BudgetDecision:
+        """
+        调用前检查：当日花费 + 本次预估 是否触及限制
+
+        Args:
+            provider: 计划使用的 Provider
+            model: 计划使用的模型
+            messages: 消息列表
+
+        Returns:
+            预算检查结果
+        """
+        if not self.enabled:
+            return BudgetDecision(level=LEVEL_OK, spent=0.0, estimated_cost=0.0)
+
+        estimated = self.estimate_call_cost(provider, model, messages)
+        spent = self.get_spent()
+        decision = BudgetDecision(
+            level=self.level_for(spent + estimated),
+            spent=spent,
+            estimated_cost=estimated,
+        )
+
+        if decision.level == LEVEL_HARD and self._enter_level(LEVEL_HARD):
+            self.record_decision(
+                ACTION_STOP,
+                f"已花费 ¥{spent:.4f} + 预估 ¥{estimated:.4f} ≥ 硬限制 ¥{self.hard_limit:.2f}",
+            )
+        elif decision.level == LEVEL_SOFT and self._enter_level(LEVEL_SOFT):
+            self.record_decision(
+                ACTION_CHEAPEST_ONLY,
+                f"已花费 ¥{spent:.4f} + 预估 ¥{estimated:.4f} ≥ 软限制 ¥{self.soft_limit:.2f}",
+            )
+
+        return decision
+
+    def _enter_level(self, level: str) -> bool:
+        """
+        标记当日已进入某预算级别
+
+        Redis 中每天每个级别一个 SET NX 键，多个 worker 中只有首次进入者返回 True。
+
+        Returns:
+            是否为当日首次进入该级别（Redis 不可用时返回 True，由 record_decision 记录日志）
+        """
+        key = self._day_key(f"level:{level}")
+        if key in self._reached_levels:
+            return False
+        try:
+            first = bool(self.redis.set(key, 1, nx=True, ex=KEY_TTL_SEC))
+        except Exception as e:
+            logger.warning(f"记录预算级别失败: {e}")
+            return True
+        self._reached_levels.add(key)
+        return first
+
+    def allow_queue_item(self, priority: int) -> bool:
+        """
+        判断队列项是否应在当前预算下处理
+
+        Args:
+            priority: 队列项优先级
+
+        Returns:
+            False 表示应跳过（保持 queued 状态，留待次日或预算恢复）
+        """
+        if not self.enabled:
+            return True
+
+        level = self.level_for(self.get_spent())
+        if level == LEVEL_HARD:
+            return False
+        if level == LEVEL_SOFT and (priority or 0) < settings.LLM_BUDGET_MIN_PRIORITY:
+            return False
+        return True
+
+    def add_spend(self, provider: str, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """
+        调用后累加实际花费
+
+        Returns:
+            累加后的当日花费（元）
+        """
+        cost = calculate_cost(provider, model, prompt_tokens or 0, completion_tokens or 0)
+        if not self.enabled or cost <= 0:
+            return cost
+
+        try:
+            key = self._day_key("spent")
+            pipe = self.redis.pipeline()
+            pipe.incrbyfloat(key, cost)
+            pipe.expire(key, KEY_TTL_SEC)
+            total, _ = pipe.execute()
+            return float(total)
+        except Exception as e:
+            logger.warning(f"累加 LLM 花费失败: {e}")
+            return cost
+
+    def record_decision(self, action: str, detail: str) -> None:
+        """记录一次降级决策（供 /admin/usage 展示）"""
+        logger.warning(f"💸 预算守卫: {action} - {detail}")
+        try:
+            entry = json.dumps(
+                {"time": get_local_now().strftime("%H:%M:%S"), "action": action, "detail": detail},
+                ensure_ascii=False,
+            )
+            decisions_key = self._day_key("decisions")
+            counts_key = self._day_key("actions")
+            pipe = self.redis.pipeline()
+            pipe.lpush(decisions_key, entry)
+            pipe.ltrim(decisions_key, 0, MAX_DECISIONS - 1)
+            pipe.expire(decisions_key, KEY_TTL_SEC)
+            pipe.hincrby(counts_key, action, 1)
+            pipe.expire(counts_key, KEY_TTL_SEC)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"记录预算决策失败: {e}")
+
+    def get_status(self, max_decisions: int = 20) -> Dict:
+        """
+        获取当日预算状态
+
+        Returns:
+            {"enabled", "spent", "soft_limit", "hard_limit", "level", "action_counts", "decisions"}
+        """
+        spent = self.get_spent()
+        status = {
+            "enabled": self.enabled,
+            "spent": spent,
+            "soft_limit": self.soft_limit,
+            "hard_limit": self.hard_limit,
+            "level": self.level_for(spent),
+            "action_counts": {},
+            "decisions": [],
+        }
+
+        try:
+            status["action_counts"] = {
+                k: int(v) for k, v in (self.redis.hgetall(self._day_key("actions")) or {}).items()
+            }
+            raw = self.redis.lrange(self._day_key("decisions"), 0, max_decisions - 1) or []
+            status["decisions"] = [json.loads(r) for r in raw]
+        except Exception as e:
+            logger.warning(f"读取预算决策失败: {e}")
+
+        return status
+
+
+# 全局单例
+_budget_guard: Optional[BudgetGuard] = None
+
+
+def get_budget_guard() -> BudgetGuard:
+    """获取全局预算守卫单例"""
+    global _budget_guard
+    if _budget_guard is None:
+        _budget_guard = BudgetGuard()
+    return _budget_guard
@@ -14,8 +14,19 @@ from sqlalchemy.orm import Session
 
 from src.config.settings import settings
 from src.models.article import Article
+from src.nlp.budget_guard import get_budget_guard
 from src.nlp.chunking import ChunkPlan, detect_language, plan_chunks
+from src.nlp.merger import merge_extraction_results
 from src.nlp.provider_router import get_provider_router
+from src.utils.usage_recorder import TASK_KIND_ESCALATE, TASK_KIND_EXTRACT, get_usage_recorder
+
+# 级联升级原因
+ESCALATE_BORDERLINE = "borderline"  # 置信度/金融相关性落在阈值附近
+ESCALATE_EMPTY_HIGH_WEIGHT = "empty_high_weight"  # 高权重源返回空结果
+
+# 金融相关性过滤阈值（与抽取 Prompt 中的过滤规则一致）
+RELEVANCE_THRESHOLD_DEFAULT = 0.4
+RELEVANCE_THRESHOLD_BY_LAYER = {"金融大模型技术": 0.2}
 
 
 def clean_json_string(content: str) -> str:
@@ -133,6 +144,8 @@ async def extract_from_chunk(
     chunk: str,
     chunk_index: int,
     total_chunks: int,
+    article_id: Optional[int] = None,
+    escalate: bool = False,
 ) -> Dict:
     """
     对单个分块调用 LLM 抽取
@@ -141,11 +154,14 @@ async def extract_from_chunk(
         chunk: 文本分块
         chunk_index: 分块索引（从0开始）
         total_chunks: 总分块数
+        article_id: 文章ID（用于用量归因）
+        escalate: 是否为级联升级调用（只使用质量最高的 Provider）
 
     Returns:
         抽取结果字典
     """
     router = get_provider_router()
+    label = "升级抽取分块" if escalate else "分块"
 
     # 构建消息
     prompt = EXTRACTION_PROMPT.format(content=chunk)
@@ -155,16 +171,67 @@ async def extract_from_chunk(
     ]
 
     try:
-        logger.info(f"开始抽取分块 {chunk_index + 1}/{total_chunks}，长度: {len(chunk)} 字符")
+        logger.info(f"开始抽取{label} {chunk_index + 1}/{total_chunks}，长度: {len(chunk)} 字符")
 
-        # 调用 LLM
+        # 预算检查：按本次将使用的首个 Provider 预估调用费用
+        budget_guard = get_budget_guard()
+        primary = router.providers[-1] if escalate else router.providers[0]
+        decision = budget_guard.check_call(primary.name, primary.model, messages)
+        if not decision.allowed:
+            logger.warning(
+                f"⛔ 分块 {chunk_index + 1}/{total_chunks} 因预算达到硬限制跳过 "
+                f"(已花费 ¥{decision.spent:.4f})"
+            )
+            return {
+                "chunk_index": chunk_index,
+                "items": [],
+                "keywords": [],
+                "error": "budget_exceeded",
+                "budget_stopped": True,
+                "status": "failed"
+            }
+        if escalate and decision.cheapest_only:
+            # 软限制下不升级到更贵的模型，保留便宜模型的结果
+            logger.info(f"💸 预算已达软限制，跳过{label} {chunk_index + 1}/{total_chunks}")
+            return {
+                "chunk_index": chunk_index,
+                "items": [],
+                "keywords": [],
+                "error": "budget_soft_limit",
+                "status": "skipped"
+            }
+
+        # 调用 LLM（达到软限制时只用最便宜的模型，升级调用只用最强模型）
         response, provider_name = await router.call_with_fallback(
             messages=messages,
             temperature=0.3,
             retries=settings.LLM_RETRIES,
             timeout=settings.LLM_TIMEOUT_SEC,
+            cheapest_only=decision.cheapest_only,
+            strongest_only=escalate,
         )
 
+        # 记录用量（仅写入内存缓冲，由记录器批量落库）
+        usage = response.get("usage", {}) or {}
+        try:
+            budget_guard.add_spend(
+                provider_name,
+                response.get("model") or primary.model,
+                usage.get("prompt_tokens", 0),
+                usage.get("completion_tokens", 0),
+            )
+            get_usage_recorder().record(
+                provider=provider_name,
+                model=response.get("model") or "unknown",
+                prompt_tokens=usage.get("prompt_tokens", 0),
+                completion_tokens=usage.get("completion_tokens", 0),
+                article_id=article_id,
+                chunk_index=chunk_index,
+                task_kind=TASK_KIND_ESCALATE if escalate else TASK_KIND_EXTRACT,
+            )
+        except Exception as log_error:
+            logger.error(f"记录 Provider 用量失败: {log_error}")
+
         content = response["content"].strip()
 
         # 解析 JSON
@@ -183,7 +250,7 @@ async def extract_from_chunk(
         keywords = result.get("keywords", [])
 
         logger.success(
-            f"✅ 分块 {chunk_index + 1}/{total_chunks} 抽取成功，"
+            f"✅ {label} {chunk_index + 1}/{total_chunks} 抽取成功，"
             f"抽取了 {len(items)} 条，{len(keywords)} 个关键词，使用 Provider: {provider_name}"
         )
 
@@ -194,6 +261,7 @@ async def extract_from_chunk(
             "provider": provider_name,
             "model": response.get("model"),  # 添加model信息
             "usage": response.get("usage", {}),
+            "escalated": escalate,
             "status": "success"
         }
 
@@ -219,6 +287,107 @@ async def extract_from_chunk(
         }
 
 
+def _is_borderline(value, threshold: float, margin: float) -> bool:
+    """判断评分是否落在阈值 ±margin 的模糊区间"""
+    try:
+        return abs(float(value) - threshold) <= margin
+    except (TypeError, ValueError):
+        return False
+
+
+def needs_escalation(result: Dict, source_weight: float = 1.0) -> Optional[str]:
+    """
+    判断便宜模型的分块结果是否需要升级到最强模型重跑
+
+    Args:
+        result: extract_from_chunk 返回的分块结果
+        source_weight: 文章所属信息源的权重
+
+    Returns:
+        升级原因，None 表示无需升级
+    """
+    if result.get("status") != "success":
+        return None
+
+    items = result.get("items") or []
+    if not items:
+        if source_weight >= settings.LLM_CASCADE_EMPTY_SOURCE_WEIGHT:
+            return ESCALATE_EMPTY_HIGH_WEIGHT
+        return None
+
+    margin = settings.LLM_CASCADE_MARGIN
+    for item in items:
+        if _is_borderline(item.get("confidence"), settings.CONFIDENCE_THRESHOLD, margin):
+            return ESCALATE_BORDERLINE
+        relevance_threshold = RELEVANCE_THRESHOLD_BY_LAYER.get(
+            item.get("layer"), RELEVANCE_THRESHOLD_DEFAULT
+        )
+        if _is_borderline(item.get("finance_relevance"), relevance_threshold, margin):
+            return ESCALATE_BORDERLINE
+
+    return None
+
+
+async def cascade_chunk_results(
+    chunks: List[str],
+    chunk_results: List[Dict],
+    article_id: int,
+    source_weight: float = 1.0,
+) -> Dict:
+    """
+    级联抽取：对模糊分块用最强模型重跑，并与便宜模型结果合并
+
+    会原地更新 chunk_results 中被升级分块的 items/keywords。
+
+    Args:
+        chunks: 文本分块
+        chunk_results: 便宜模型的分块结果
+        article_id: 文章ID
+        source_weight: 文章所属信息源的权重
+
+    Returns:
+        级联统计 {"escalated_chunks", "escalation_rate", "reasons", "usage_results"}
+    """
+    router = get_provider_router()
+    strongest_model = router.providers[-1].model
+    total_chunks = len(chunks)
+    reasons: Dict[str, int] = {}
+    usage_results: List[Dict] = []
+
+    for i, cheap in enumerate(chunk_results):
+        # 便宜模型已回退到最强模型时无需再升级
+        if str(cheap.get("model") or "").startswith(strongest_model):
+            continue
+
+        reason = needs_escalation(cheap, source_weight)
+        if not reason:
+            continue
+
+        logger.info(f"🔼 分块 {i + 1}/{total_chunks} 结果模糊({reason})，升级到 {strongest_model}")
+        strong = await extract_from_chunk(
+            chunks[i], i, total_chunks, article_id=article_id, escalate=True
+        )
+        if strong.get("status") != "success":
+            continue
+
+        reasons[reason] = reasons.get(reason, 0) + 1
+        usage_results.append(strong)
+
+        merged = merge_extraction_results([cheap, strong])
+        cheap["items"] = merged["items"]
+        if strong.get("keywords"):
+            cheap["keywords"] = strong["keywords"]
+        cheap["escalated"] = True
+
+    escalated = sum(reasons.values())
+    return {
+        "escalated_chunks": escalated,
+        "escalation_rate": round(escalated / total_chunks, 4) if total_chunks else 0.0,
+        "reasons": reasons,
+        "usage_results": usage_results,
+    }
+
+
 async def extract_article(
     article_id: int,
     db: Session,
@@ -312,15 +481,23 @@ async def extract_article(
         logger.info(f"共 {total_chunks} 个分块")
 
         # 逐块抽取
-        all_items = []
-        all_keywords = []
         chunk_results = []
-        failed_chunks = 0
-
         for i, chunk in enumerate(chunks):
-            result = await extract_from_chunk(chunk, i, total_chunks)
+            result = await extract_from_chunk(chunk, i, total_chunks, article_id=article_id)
             chunk_results.append(result)
 
+        # 级联：仅对模糊分块升级到最强模型
+        cascade_stats = None
+        if settings.LLM_CASCADE_ENABLED and len(get_provider_router().providers) > 1:
+            source_weight = float(getattr(article.source, "weight", 1.0) or 1.0)
+            cascade_stats = await cascade_chunk_results(
+                chunks, chunk_results, article_id, source_weight=source_weight
+            )
+
+        all_items = []
+        all_keywords = []
+        failed_chunks = 0
+        for i, result in enumerate(chunk_results):
             if result["status"] == "success":
                 all_items.extend(result["items"])
                 # 收集关键词(如果有多个分块，取第一个分块的关键词作为文章关键词)
@@ -329,11 +506,12 @@ async def extract_article(
             else:
                 failed_chunks += 1
 
-        # 计算总 usage
+        # 计算总 usage（含升级调用）
+        usage_results = chunk_results + (cascade_stats["usage_results"] if cascade_stats else [])
         total_usage = {
-            "prompt_tokens": sum(r.get("usage", {}).get("prompt_tokens", 0) for r in chunk_results),
-            "completion_tokens": sum(r.get("usage", {}).get("completion_tokens", 0) for r in chunk_results),
-            "total_tokens": sum(r.get("usage", {}).get("total_tokens", 0) for r in chunk_results),
+            "prompt_tokens": sum(r.get("usage", {}).get("prompt_tokens", 0) for r in usage_results),
+            "completion_tokens": sum(r.get("usage", {}).get("completion_tokens", 0) for r in usage_results),
+            "total_tokens": sum(r.get("usage", {}).get("total_tokens", 0) for r in usage_results),
         }
 
         # 获取使用的provider (取第一个成功的chunk的provider)
@@ -357,12 +535,19 @@ async def extract_article(
         metadata.update({
             "total_chunks": total_chunks,
             "failed_chunks": failed_chunks,
+            "budget_stopped": any(r.get("budget_stopped") for r in chunk_results),
             "total_items": len(all_items),
             "usage": total_usage,
             "article_length": len(content),
             "provider": provider_used,  # 添加provider信息
             "model": model_used,  # 添加model信息
         })
+        if cascade_stats is not None:
+            metadata["cascade"] = {
+                "escalated_chunks": cascade_stats["escalated_chunks"],
+                "escalation_rate": cascade_stats["escalation_rate"],
+                "reasons": cascade_stats["reasons"],
+            }
 
         logger.info(
             f"文章 {article_id} 抽取完成: 状态={status}, "
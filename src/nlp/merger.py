@@ -9,7 +9,36 @@ from collections import Counter
 from typing import Dict, List
 
 from loguru import logger
-from simhash import Simhash
+
+from src.nlp.simhash_index import SimhashBandIndex, compute_simhashes, hamming_distance
+
+# 可选的 C 实现编辑距离
+try:
+    from rapidfuzz.distance.Levenshtein import distance as _levenshtein_distance
+    from rapidfuzz.distance.Levenshtein import normalized_similarity as _levenshtein_similarity
+except ImportError:
+    _levenshtein_similarity = None
+    try:
+        from Levenshtein import distance as _levenshtein_distance
+    except ImportError:
+        _levenshtein_distance = None
+
+# 指纹相近的候选还需满足的归一化编辑相似度（1 - 编辑距离 / 较长文本长度）
+MIN_TEXT_SIMILARITY = 0.85
+
+
+# 字符级替换：全角标点转半角、中文数字转阿拉伯数字（简化版）
+_CHAR_MAP = {
+    '。': '.', '，': ',', '！': '!', '？': '?', '：': ':', '；': ';',
+    '（': '(', '）': ')',
+    '一': '1', '二': '2', '三': '3', '四': '4', '五': '5',
+    '六': '6', '七': '7', '八': '8', '九': '9', '十': '10',
+    '零': '0', '〇': '0'
+}
+_CHAR_MAP_RE = re.compile('[' + ''.join(_CHAR_MAP) + ']')
+_WHITESPACE_RE = re.compile(r'\s+')
+_TENS_RE = re.compile(r'(\d)\s+10')
+_DIGIT_GAP_RE = re.compile(r'(?<=\d)\s+(?=\d)')
 
 
 def normalize_fact(fact: str) -> str:
@@ -25,31 +54,15 @@ def normalize_fact(fact: str) -> str:
     if not fact:
         return ""
 
-    # 去除首尾空白
-    text = fact.strip()
-
-    # 全角转半角
-    text = text.replace('。', '.').replace('，', ',').replace('！', '!') \
-               .replace('？', '?').replace('：', ':').replace('；', ';') \
-               .replace('"', '"').replace('"', '"').replace(''', "'") \
-               .replace(''', "'").replace('（', '(').replace('）', ')')
+    # 去除首尾空白，全角转半角，中文数字转阿拉伯数字
+    text = _CHAR_MAP_RE.sub(lambda m: _CHAR_MAP[m.group()], fact.strip())
 
     # 去除多余空白
-    text = re.sub(r'\s+', ' ', text)
-
-    # 中文数字转阿拉伯数字（简化版）
-    chinese_num_map = {
-        '一': '1', '二': '2', '三': '3', '四': '4', '五': '5',
-        '六': '6', '七': '7', '八': '8', '九': '9', '十': '10',
-        '零': '0', '〇': '0'
-    }
-
-    for cn, num in chinese_num_map.items():
-        text = text.replace(cn, num)
+    text = _WHITESPACE_RE.sub(' ', text)
 
     # 合并数字之间的空格，例如 "3 10" -> "30"
-    text = re.sub(r'(\d)\s+10', lambda m: str(int(m.group(1)) * 10), text)
-    text = re.sub(r'(?<=\d)\s+(?=\d)', '', text)
+    text = _TENS_RE.sub(lambda m: str(int(m.group(1)) * 10), text)
+    text = _DIGIT_GAP_RE.sub('', text)
 
     return text
 
@@ -58,6 +71,8 @@ def calculate_edit_distance(s1: str, s2: str) -> int:
     """
     计算编辑距离（Levenshtein距离）
 
+    安装了 rapidfuzz / python-Levenshtein 时使用其 C 实现，否则使用纯 Python DP。
+
     Args:
         s1: 字符串1
         s2: 字符串2
@@ -68,36 +83,66 @@ def calculate_edit_distance(s1: str, s2: str) -> int:
     if s1 == s2:
         return 0
 
-    len1, len2 = len(s1), len(s2)
-
-    # 创建 DP 表
-    dp = [[0] * (len2 + 1) for _ in range(len1 + 1)]
+    if _levenshtein_distance is not None:
+        return _levenshtein_distance(s1, s2)
 
-    # 初始化
-    for i in range(len1 + 1):
-        dp[i][0] = i
-    for j in range(len2 + 1):
-        dp[0][j] = j
+    len1, len2 = len(s1), len(s2)
 
-    # 填表
+    # 滚动数组 DP，只保留上一行
+    previous = list(range(len2 + 1))
     for i in range(1, len1 + 1):
+        current = [i] + [0] * len2
         for j in range(1, len2 + 1):
             if s1[i - 1] == s2[j - 1]:
-                dp[i][j] = dp[i - 1][j - 1]
+                current[j] = previous[j - 1]
             else:
-                dp[i][j] = min(
-                    dp[i - 1][j] + 1,      # 删除
-                    dp[i][j - 1] + 1,      # 插入
-                    dp[i - 1][j - 1] + 1   # 替换
+                current[j] = min(
+                    previous[j] + 1,      # 删除
+                    current[j - 1] + 1,   # 插入
+                    previous[j - 1] + 1   # 替换
                 )
+        previous = current
+
+    return previous[len2]
+
+
+def text_similarity(s1: str, s2: str, score_cutoff: float = 0.0) -> float:
+    """
+    归一化编辑相似度：1 - 编辑距离 / 较长文本长度
+
+    Args:
+        s1: 字符串1
+        s2: 字符串2
+        score_cutoff: 低于该值时可直接返回 0（rapidfuzz 据此提前结束计算）
+
+    Returns:
+        0~1 的相似度
+    """
+    if s1 == s2:
+        return 1.0
+
+    if _levenshtein_similarity is not None:
+        return _levenshtein_similarity(s1, s2, score_cutoff=score_cutoff)
+
+    max_len = max(len(s1), len(s2))
+    # 长度差本身就超出允许的编辑距离时无需计算
+    if max_len - min(len(s1), len(s2)) > (1 - score_cutoff) * max_len:
+        return 0.0
+    return 1 - calculate_edit_distance(s1, s2) / max_len
+
 
-    return dp[len1][len2]
+def _is_near_duplicate(norm1: str, norm2: str) -> bool:
+    """对指纹相近的两条归一化事实做文本级的精确判断"""
+    return text_similarity(norm1, norm2, score_cutoff=MIN_TEXT_SIMILARITY) >= MIN_TEXT_SIMILARITY
 
 
 def is_similar_fact(fact1: str, fact2: str, threshold: int = 3) -> bool:
     """
     判断两个事实是否相似
 
+    与 deduplicate_facts 判定一致：SimHash 汉明距离 <= threshold 且编辑相似度 >= MIN_TEXT_SIMILARITY。
+    单对比较时先做开销低的编辑相似度判断，多数不相似的调用不会构造 NumPy 数组计算指纹。
+
     Args:
         fact1: 事实1
         fact2: 事实2
@@ -117,70 +162,98 @@ def is_similar_fact(fact1: str, fact2: str, threshold: int = 3) -> bool:
     if norm1 == norm2:
         return True
 
-    # 使用 SimHash 计算相似度
-    try:
-        hash1 = Simhash(norm1)
-        hash2 = Simhash(norm2)
-        distance = hash1.distance(hash2)
+    if not _is_near_duplicate(norm1, norm2):
+        return False
 
-        return distance <= threshold
+    # 使用 SimHash 计算相似度（与 deduplicate_facts 使用同一指纹）
+    try:
+        hash1, hash2 = compute_simhashes([norm1, norm2])
+        return hamming_distance(hash1, hash2) <= threshold
 
     except Exception as e:
         logger.warning(f"SimHash 计算失败，回退到编辑距离: {e}")
 
-        # 回退到编辑距离（适用于短文本）
-        if len(norm1) < 50 and len(norm2) < 50:
-            edit_dist = calculate_edit_distance(norm1, norm2)
-            max_len = max(len(norm1), len(norm2))
-            similarity = 1 - (edit_dist / max_len) if max_len > 0 else 0
-            return similarity > 0.85
-
-        return False
+        # 回退到编辑相似度（已在上面判断通过）
+        return True
 
 
-def deduplicate_facts(items: List[Dict]) -> List[Dict]:
+def deduplicate_facts(items: List[Dict], threshold: int = 3) -> List[Dict]:
     """
     对事实进行去重
 
+    每条事实只归一化、计算 SimHash 一次；分段索引给出汉明距离 <= threshold 的候选，
+    再对候选做编辑相似度的精确判断（与 is_similar_fact 一致），整体近似线性，
+    可直接用于全天的抽取结果。
+
     Args:
         items: 抽取项列表
+        threshold: SimHash 汉明距离阈值（与 is_similar_fact 一致）
 
     Returns:
-        去重后的列表
+        去重后的列表（重复项保留置信度更高者，位置与首次出现一致）
     """
     if not items:
         return []
 
-    deduped = []
-    seen_facts = []
+    candidates = [item for item in items if item.get("fact", "")]
+    norms = [normalize_fact(item["fact"]) for item in candidates]
 
-    for item in items:
-        fact = item.get("fact", "")
-        if not fact:
+    try:
+        fingerprints = compute_simhashes(norms)
+    except Exception as e:
+        logger.warning(f"SimHash 批量计算失败，回退到逐对比较: {e}")
+        return _deduplicate_pairwise(candidates, len(items))
+
+    index = SimhashBandIndex(max_distance=threshold)
+    slot_by_norm: Dict[str, int] = {}
+    slot_norms: List[str] = []
+    deduped: List[Dict] = []
+
+    for item, norm, fingerprint in zip(candidates, norms, fingerprints):
+        slot = slot_by_norm.get(norm)
+        if slot is None:
+            slot = next(
+                (candidate for candidate in index.iter_similar(fingerprint)
+                 if _is_near_duplicate(norm, slot_norms[candidate])),
+                None,
+            )
+
+        if slot is None:
+            slot = len(deduped)
+            deduped.append(item)
+            slot_norms.append(norm)
+            slot_by_norm[norm] = slot
+            index.add(slot, fingerprint)
             continue
 
-        # 检查是否与已有事实相似
-        is_duplicate = False
-        for existing_fact, existing_item in seen_facts:
-            if is_similar_fact(fact, existing_fact):
-                is_duplicate = True
-
-                # 保留置信度更高的
-                if item.get("confidence", 0) > existing_item.get("confidence", 0):
-                    # 替换为置信度更高的
-                    deduped.remove(existing_item)
-                    deduped.append(item)
-                    seen_facts.remove((existing_fact, existing_item))
-                    seen_facts.append((fact, item))
-                    logger.debug(f"替换重复事实（置信度更高）: {fact[:50]}...")
+        # 保留置信度更高的，后续比较以新的代表事实为准
+        if item.get("confidence", 0) > deduped[slot].get("confidence", 0):
+            deduped[slot] = item
+            slot_by_norm.pop(slot_norms[slot], None)
+            slot_norms[slot] = norm
+            slot_by_norm[norm] = slot
+            index.add(slot, fingerprint)
+            logger.debug(f"替换重复事实（置信度更高）: {item['fact'][:50]}...")
 
-                break
+    logger.info(f"去重完成: {len(items)} -> {len(deduped)}")
+    return deduped
+
+
+def _deduplicate_pairwise(items: List[Dict], original_count: int) -> List[Dict]:
+    """逐对比较去重（SimHash 批量计算失败时的兜底）"""
+    deduped: List[Dict] = []
 
-        if not is_duplicate:
+    for item in items:
+        fact = item["fact"]
+        for slot, existing in enumerate(deduped):
+            if is_similar_fact(fact, existing["fact"]):
+                if item.get("confidence", 0) > existing.get("confidence", 0):
+                    deduped[slot] = item
+                break
+        else:
             deduped.append(item)
-            seen_facts.append((fact, item))
 
-    logger.info(f"去重完成: {len(items)} -> {len(deduped)}")
+    logger.info(f"去重完成: {original_count} -> {len(deduped)}")
     return deduped
 
 
@@ -0,0 +1,337 @@
+"""
+离线 Mock LLM Provider 模块
+
+实现 LLMProvider 接口的本地替身，用于在无网络/无 API Key 的环境下
+压测抽取链路（extract_article / ProviderRouter）：
+
+- 回放模式：循环回放 JSONL 文件中录制的响应
+- 合成模式：根据 Prompt 中的文章内容生成合法的抽取 JSON
+- 可配置延迟分布、普通错误率、429 限流率和 token 数
+- 可按模型档位配置输出质量：置信度/金融相关性区间、低置信度条目比例、非法 JSON 比例
+"""
+
+import asyncio
+import json
+import math
+import random
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from src.nlp.chunking import estimate_tokens
+from src.nlp.provider_router import LLMProvider, ProviderRouter
+
+# 支持的延迟分布
+LATENCY_FIXED = "fixed"
+LATENCY_UNIFORM = "uniform"
+LATENCY_LOGNORMAL = "lognormal"
+LATENCY_EXPONENTIAL = "exponential"
+
+_LAYERS = ["金融政策监管", "金融经济", "金融大模型技术", "金融科技应用"]
+_REGIONS = ["国内", "国外"]
+_CONTENT_MARKER = "**文章内容**："
+
+# build_mock_router 各档位的默认输出质量：便宜模型偶尔给出低置信度条目或残缺 JSON，
+# 强模型几乎总是给出明确的结果（级联压测的升级率由便宜档的 low_confidence_rate 主导）
+MOCK_TIER_PROFILES: Dict[str, Dict] = {
+    "qwen-plus": {
+        "confidence_range": (0.72, 0.98),
+        "relevance_range": (0.55, 1.0),
+        "low_confidence_rate": 0.05,
+        "invalid_rate": 0.01,
+    },
+    "deepseek-chat": {
+        "confidence_range": (0.74, 0.98),
+        "relevance_range": (0.55, 1.0),
+        "low_confidence_rate": 0.03,
+        "invalid_rate": 0.01,
+    },
+    "qwen-max": {
+        "confidence_range": (0.8, 0.99),
+        "relevance_range": (0.6, 1.0),
+        "low_confidence_rate": 0.01,
+        "invalid_rate": 0.0,
+    },
+}
+
+
+@dataclass
+class MockStats:
+    """Mock Provider 调用统计"""
+    calls: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    invalid: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latencies_ms: List[float] = field(default_factory=list)
+
+
+def load_replay_file(path: str) -> List[Dict]:
+    """
+    读取录制的响应（JSONL，每行一条）
+
+    每行可以是标准化响应 {"content", "model", "usage", ...}，
+    也可以直接是抽取结果 {"items": [...], "keywords": [...]}。
+
+    Args:
+        path: JSONL 文件路径
+
+    Returns:
+        响应列表
+    """
+    records = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if "content" not in record:
+            record = {"content": json.dumps(record, ensure_ascii=False)}
+        records.append(record)
+
+    if not records:
+        raise ValueError(f"回放文件为空: {path}")
+
+    logger.info(f"已加载 {len(records)} 条录制响应: {path}")
+    return records
+
+
+class MockProvider(LLMProvider):
+    """本地 Mock Provider（不发起任何网络请求）"""
+
+    def __init__(
+        self,
+        name: str = "qwen",
+        model: str = "qwen-plus",
+        latency_ms: float = 800.0,
+        latency_dist: str = LATENCY_LOGNORMAL,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        items_per_response: int = 3,
+        confidence_range: Tuple[float, float] = (0.5, 0.98),
+        relevance_range: Tuple[float, float] = (0.3, 1.0),
+        low_confidence_rate: float = 0.0,
+        low_confidence_range: Tuple[float, float] = (0.45, 0.7),
+        invalid_rate: float = 0.0,
+        completion_tokens: Optional[int] = None,
+        replay_path: Optional[str] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        初始化 Mock Provider
+
+        Args:
+            name: Provider 名称（用于费用计算，建议与真实 Provider 一致）
+            model: 模型名称
+            latency_ms: 平均延迟（毫秒）
+            latency_dist: 延迟分布 fixed | uniform | lognormal | exponential
+            latency_sigma: lognormal 分布的 sigma
+            error_rate: 超时错误概率（0-1）
+            rate_limit_rate: 429 限流概率（0-1）
+            items_per_response: 合成模式下每次返回的条目数
+            confidence_range: 合成条目的置信度区间（均匀分布）
+            relevance_range: 合成条目的金融相关性区间（均匀分布）
+            low_confidence_rate: 单个条目改用 low_confidence_range 置信度的概率
+            low_confidence_range: 低置信度条目的置信度区间
+            invalid_rate: 合成模式下返回残缺（无法解析）JSON 的概率（0-1）
+            completion_tokens: 固定输出 token 数，None 表示按生成内容估算
+            replay_path: 录制响应文件，指定后进入回放模式
+            seed: 随机种子（便于复现）
+        """
+        # 不调用父类构造，避免创建 HTTP 客户端
+        self.name = name
+        self.api_key = ""
+        self.base_url = "mock://local"
+        self.model = model
+        self.client = None
+
+        self.latency_ms = latency_ms
+        self.latency_dist = latency_dist
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.items_per_response = items_per_response
+        self.confidence_range = confidence_range
+        self.relevance_range = relevance_range
+        self.low_confidence_rate = low_confidence_rate
+        self.low_confidence_range = low_confidence_range
+        self.invalid_rate = invalid_rate
+        self.fixed_completion_tokens = completion_tokens
+
+        self._rng = random.Random(seed)
+        self._replay = load_replay_file(replay_path) if replay_path else []
+        self._replay_index = 0
+        self.stats = MockStats()
+
+    def sample_latency_ms(self) -> float:
+        """按配置的分布采样一次延迟（毫秒）"""
+        mean = max(self.latency_ms, 0.0)
+        if mean == 0 or self.latency_dist == LATENCY_FIXED:
+            return mean
+        if self.latency_dist == LATENCY_UNIFORM:
+            return self._rng.uniform(0.5 * mean, 1.5 * mean)
+        if self.latency_dist == LATENCY_EXPONENTIAL:
+            return self._rng.expovariate(1.0 / mean)
+        # lognormal：保持期望值为 mean
+        mu = math.log(mean) - self.latency_sigma ** 2 / 2
+        return self._rng.lognormvariate(mu, self.latency_sigma)
+
+    def _raise_injected_error(self) -> None:
+        """按配置的概率注入 429 或超时错误"""
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            self.stats.rate_limited += 1
+            request = httpx.Request("POST", f"{self.base_url}/chat/completions")
+            response = httpx.Response(429, request=request)
+            raise httpx.HTTPStatusError("429 Too Many Requests (mock)", request=request, response=response)
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.stats.errors += 1
+            raise httpx.TimeoutException("mock timeout")
+
+    def _next_replay(self) -> Dict:
+        record = self._replay[self._replay_index % len(self._replay)]
+        self._replay_index += 1
+        return record
+
+    def _synthesize_content(self, messages: List[Dict]) -> str:
+        """根据 Prompt 中的文章内容合成抽取 JSON"""
+        prompt = messages[-1].get("content", "") if messages else ""
+        article = prompt.split(_CONTENT_MARKER, 1)[-1]
+        sentences = [s.strip() for s in re.split(r"[。！？.!?\n]", article) if len(s.strip()) >= 10]
+
+        items = []
+        for i in range(self.items_per_response):
+            fact = sentences[i % len(sentences)] if sentences else f"合成事实 {i + 1}：某金融机构发布新产品"
+            low_confidence = self._rng.random() < self.low_confidence_rate
+            confidence_range = self.low_confidence_range if low_confidence else self.confidence_range
+            items.append({
+                "fact": fact[:200],
+                "opinion": "",
+                "region": self._rng.choice(_REGIONS),
+                "layer": self._rng.choice(_LAYERS),
+                "evidence_span": fact[:80],
+                "confidence": round(self._rng.uniform(*confidence_range), 2),
+                "finance_relevance": round(self._rng.uniform(*self.relevance_range), 2),
+            })
+
+        body = json.dumps({"items": items, "keywords": ["金融科技", "央行政策", "资本市场"]}, ensure_ascii=False)
+        if self._rng.random() < self.invalid_rate:
+            # 模拟输出被截断
+            self.stats.invalid += 1
+            body = body[:len(body) // 2]
+        return "```json\n" + body + "\n```"
+
+    async def chat_completion(
+        self,
+        messages: List[Dict],
+        temperature: float = 0.3,
+        timeout: Optional[int] = None,
+    ) -> Dict:
+        """模拟一次聊天补全"""
+        self.stats.calls += 1
+        latency = self.sample_latency_ms()
+        self.stats.latencies_ms.append(latency)
+        await asyncio.sleep(latency / 1000)
+
+        self._raise_injected_error()
+
+        if self._replay:
+            record = self._next_replay()
+            content = record["content"]
+            usage = record.get("usage") or {}
+        else:
+            content = self._synthesize_content(messages)
+            usage = {}
+
+        prompt_text = "\n".join(m.get("content", "") for m in messages)
+        prompt_tokens = usage.get("prompt_tokens") or estimate_tokens(prompt_text, "mixed")
+        completion_tokens = (
+            self.fixed_completion_tokens
+            or usage.get("completion_tokens")
+            or estimate_tokens(content, "mixed")
+        )
+        self.stats.prompt_tokens += prompt_tokens
+        self.stats.completion_tokens += completion_tokens
+
+        return {
+            "content": content,
+            "model": self.model,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+            "finish_reason": "stop",
+        }
+
+
+class RecordingProvider(LLMProvider):
+    """包装真实 Provider，将每次响应追加写入 JSONL，供 MockProvider 回放"""
+
+    def __init__(self, inner: LLMProvider, path: str):
+        """
+        Args:
+            inner: 被包装的真实 Provider
+            path: 录制文件路径（追加写入）
+        """
+        self.inner = inner
+        self.path = Path(path)
+        self.name = inner.name
+        self.api_key = inner.api_key
+        self.base_url = inner.base_url
+        self.model = inner.model
+        self.client = inner.client
+
+    async def chat_completion(
+        self,
+        messages: List[Dict],
+        temperature: float = 0.3,
+        timeout: Optional[int] = None,
+    ) -> Dict:
+        """调用真实 Provider 并录制响应"""
+        response = await self.inner.chat_completion(messages, temperature=temperature, timeout=timeout)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(response, ensure_ascii=False) + "\n")
+        return response
+
+
+def build_mock_router(tier_options: Optional[Dict[str, Dict]] = None, **kwargs) -> ProviderRouter:
+    """
+    构建与生产环境同构的 Mock 路由器（qwen-plus → deepseek → qwen-max）
+
+    Provider 名称和模型与真实配置一致，费用可直接按 LLM_PRICING 计算。
+    强模型默认延迟更高、输出质量按 MOCK_TIER_PROFILES 逐档提高；
+    kwargs 统一覆盖所有档位，tier_options 按模型名覆盖单个档位。
+
+    Args:
+        tier_options: {模型名: MockProvider 参数}，优先级最高
+        **kwargs: 传给每个 MockProvider 的参数（不含 name/model）
+
+    Returns:
+        使用 Mock Provider 的 ProviderRouter
+    """
+    seed = kwargs.pop("seed", None)
+    specs = [
+        ("qwen", "qwen-plus", 1.0),
+        ("deepseek", "deepseek-chat", 1.5),
+        ("qwen", "qwen-max", 2.0),
+    ]
+    providers = []
+    for index, (name, model, latency_factor) in enumerate(specs):
+        options = {**MOCK_TIER_PROFILES.get(model, {}), **kwargs, **(tier_options or {}).get(model, {})}
+        options.setdefault("latency_ms", 800.0 * latency_factor)
+        providers.append(
+            MockProvider(
+                name=name,
+                model=model,
+                seed=None if seed is None else seed + index,
+                **options,
+            )
+        )
+    return ProviderRouter(providers=providers)
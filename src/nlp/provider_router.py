@@ -161,8 +161,22 @@ class QwenProvider(LLMProvider):
 class ProviderRouter:
     """Provider 路由器，支持自动回退"""
 
-    def __init__(self):
-        """初始化所有可用的 Provider，按成本优先级排序"""
+    def __init__(self, providers: Optional[List[LLMProvider]] = None):
+        """
+        初始化所有可用的 Provider，按成本优先级排序
+
+        Args:
+            providers: 指定 Provider 列表（按成本从低到高，用于离线压测/测试），
+                为 None 时按配置加载真实 Provider
+        """
+        if providers:
+            self.providers: List[LLMProvider] = list(providers)
+            logger.info(
+                f"Provider 路由器使用指定 Provider: "
+                f"{[f'{p.name}/{p.model}' for p in self.providers]}"
+            )
+            return
+
         self.providers: List[LLMProvider] = []
 
         # 按优先级顺序初始化 Provider (从低成本到高成本)
@@ -201,6 +215,8 @@ class ProviderRouter:
         temperature: float = 0.3,
         retries: int = 2,
         timeout: Optional[int] = None,
+        cheapest_only: bool = False,
+        strongest_only: bool = False,
     ) -> Tuple[Dict, str]:
         """
         调用 LLM，支持自动回退
@@ -210,6 +226,8 @@ class ProviderRouter:
             temperature: 温度参数
             retries: 每个 Provider 的重试次数
             timeout: 超时时间（秒）
+            cheapest_only: 仅使用最便宜的 Provider，不回退到更贵的模型（预算降级）
+            strongest_only: 仅使用质量最高的 Provider（级联抽取的升级调用）
 
         Returns:
             (响应字典, provider_name)
@@ -218,8 +236,14 @@ class ProviderRouter:
             RuntimeError: 所有 Provider 都失败时抛出
         """
         last_error = None
-
-        for provider in self.providers:
+        if cheapest_only:
+            providers = self.providers[:1]
+        elif strongest_only:
+            providers = self.providers[-1:]
+        else:
+            providers = self.providers
+
+        for provider in providers:
             try:
                 logger.info(f"尝试使用 Provider: {provider.name}")
 
@@ -309,6 +333,12 @@ def get_provider_router() -> ProviderRouter:
     return _provider_router
 
 
+def set_provider_router(router: Optional[ProviderRouter]) -> None:
+    """替换全局 Provider 路由器（离线压测时注入 Mock Provider，传 None 重置）"""
+    global _provider_router
+    _provider_router = router
+
+
 def get_concurrency_controller() -> ConcurrencyController:
     """获取全局并发控制器单例"""
     global _concurrency_controller
@@ -0,0 +1,219 @@
+"""
+SimHash 批量指纹与分段索引模块
+
+- compute_simhashes: 批量计算 64 位 SimHash 指纹。算法与 simhash 库相同
+  （小写、只保留字母数字和汉字、4-gram 特征、按位多数表决），但特征哈希使用
+  向量化的 splitmix64 代替逐个 md5，整批文本的分窗、哈希和位统计都在 NumPy 中完成。
+  指纹数值与 simhash.Simhash 不同，汉明距离阈值的含义不变。
+- SimhashBandIndex: 按鸽巢原理将 64 位指纹分块建倒排（多表），
+  只对至少一个键完全相同的候选做汉明距离精确比较
+"""
+
+import re
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+FINGERPRINT_BITS = 64
+
+# 与 simhash.Simhash 默认分词规则保持一致
+_TOKEN_RE = re.compile(r"[\w\u4e00-\u9fcc]+")
+_SHINGLE_WIDTH = 4
+
+# 按字节并行求和时单个计数器的上限（uint8）
+_LANE_MAX = 255
+
+# 每批处理的窗口数上限（控制 窗口数 × 64 字节的中间矩阵大小）
+_WINDOW_BATCH = 1 << 20
+
+_SPLITMIX_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_SPLITMIX_M1 = np.uint64(0xBF58476D1CE4E5B9)
+_SPLITMIX_M2 = np.uint64(0x94D049BB133111EB)
+
+
+def _tokenize(text: str) -> str:
+    """与 Simhash._tokenize 相同的预处理：小写并只保留字母数字和汉字"""
+    return "".join(_TOKEN_RE.findall(text.lower()))
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """splitmix64 混淆函数（uint64 数组，溢出按模 2^64 回绕）"""
+    x = x + _SPLITMIX_GAMMA
+    x = (x ^ (x >> np.uint64(30))) * _SPLITMIX_M1
+    x = (x ^ (x >> np.uint64(27))) * _SPLITMIX_M2
+    return x ^ (x >> np.uint64(31))
+
+
+def _window_hashes(windows: np.ndarray) -> np.ndarray:
+    """将 4-gram 码点窗口（N × 4，uint32）哈希为 uint64"""
+    columns = windows.astype(np.uint64)
+    # 码点最大 21 位：前两个码点拼成一个 uint64，后两个拼成另一个，再级联混淆
+    high = (columns[:, 0] << np.uint64(32)) | columns[:, 1]
+    low = (columns[:, 2] << np.uint64(32)) | columns[:, 3]
+    return _splitmix64(_splitmix64(high) ^ low)
+
+
+def _sum_bits(hashes: np.ndarray, window_counts: np.ndarray) -> np.ndarray:
+    """
+    按文本统计每一位为 1 的窗口数
+
+    每个哈希展开成 64 个 0/1 字节，视为 8 个 uint64，一次加法同时累加 8 个字节计数器。
+    为避免字节计数器溢出，每个文本的窗口按 255 个一段先分段求和，再按文本合并各段。
+    """
+    text_count = len(window_counts)
+    window_starts = np.concatenate(([0], np.cumsum(window_counts)[:-1]))
+    segment_counts = (window_counts + _LANE_MAX - 1) // _LANE_MAX
+    segment_first = np.concatenate(([0], np.cumsum(segment_counts)[:-1]))
+    segment_text = np.repeat(np.arange(text_count), segment_counts)
+    segment_starts = (
+        window_starts[segment_text]
+        + (np.arange(len(segment_text)) - segment_first[segment_text]) * _LANE_MAX
+    )
+
+    bits = np.unpackbits(hashes.astype(">u8").view(np.uint8)).reshape(-1, FINGERPRINT_BITS)
+    segment_sums = (
+        np.add.reduceat(bits.view(np.uint64), segment_starts, axis=0)
+        .view(np.uint8)
+        .reshape(-1, FINGERPRINT_BITS)
+        .astype(np.int32)
+    )
+    return np.add.reduceat(segment_sums, segment_first, axis=0)
+
+
+def _simhash_batch(contents: List[str]) -> List[int]:
+    """对一批已分词文本计算指纹"""
+    width = _SHINGLE_WIDTH
+    pad = "\0" * width
+
+    # 每个文本后补 width 个 0，短文本（含空文本）的唯一窗口由原文加填充构成
+    lengths = np.fromiter((len(c) for c in contents), dtype=np.int64, count=len(contents))
+    codepoints = np.frombuffer(
+        (pad.join(contents) + pad).encode("utf-32-le", "surrogatepass"), dtype="<u4"
+    )
+    offsets = np.concatenate(([0], np.cumsum(lengths + width)[:-1]))
+    window_counts = np.maximum(lengths - width + 1, 1)
+
+    text_of_window = np.repeat(np.arange(len(contents)), window_counts)
+    window_starts = np.concatenate(([0], np.cumsum(window_counts)[:-1]))
+    starts = offsets[text_of_window] + (np.arange(len(text_of_window)) - window_starts[text_of_window])
+
+    windows = np.lib.stride_tricks.sliding_window_view(codepoints, width)[starts]
+    sums = _sum_bits(_window_hashes(windows), window_counts)
+
+    packed = np.packbits(sums > (window_counts[:, None] / 2), axis=1)
+    return [int(v) for v in packed.view(">u8").ravel()]
+
+
+def compute_simhashes(texts: List[str]) -> List[int]:
+    """
+    批量计算 SimHash 指纹
+
+    Args:
+        texts: 文本列表（调用方负责归一化）
+
+    Returns:
+        与 texts 一一对应的 64 位无符号整数指纹
+    """
+    contents = [_tokenize(text) for text in texts]
+    results: List[int] = []
+
+    # 按窗口总数分批，控制内存
+    batch: List[str] = []
+    batch_windows = 0
+    for content in contents:
+        batch.append(content)
+        batch_windows += max(len(content) - _SHINGLE_WIDTH + 1, 1)
+        if batch_windows >= _WINDOW_BATCH:
+            results.extend(_simhash_batch(batch))
+            batch, batch_windows = [], 0
+    if batch:
+        results.extend(_simhash_batch(batch))
+
+    return results
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个指纹的汉明距离"""
+    return (a ^ b).bit_count()
+
+
+class SimhashBandIndex:
+    """
+    SimHash 分段倒排索引
+
+    将 64 位指纹切成 max_distance + key_blocks 块，每 key_blocks 块的组合建一张倒排表。
+    汉明距离 <= max_distance 时至多 max_distance 块不同，至少 key_blocks 块完全相同，
+    因此相似指纹必然在某张表中命中同一个键；查询只对命中的候选做汉明距离精确判断。
+    key_blocks 越大，每个键位数越多、候选越少，但表的数量越多。
+    """
+
+    def __init__(self, max_distance: int = 3, key_blocks: int = 2):
+        """
+        Args:
+            max_distance: 判定为相似的最大汉明距离
+            key_blocks: 每张倒排表的键由几块组成
+        """
+        self.max_distance = max_distance
+        blocks = max_distance + key_blocks
+        block_width = FINGERPRINT_BITS // blocks
+        # 每块的掩码（最后一块吸收除不尽的位）
+        block_masks = []
+        for i in range(blocks):
+            width = block_width if i < blocks - 1 else FINGERPRINT_BITS - block_width * i
+            block_masks.append(((1 << width) - 1) << (i * block_width))
+        # 每张表：(组合掩码, 表标签)；表标签让所有表共用一个字典
+        self._tables = [
+            (sum(block_masks[i] for i in combo), table << FINGERPRINT_BITS)
+            for table, combo in enumerate(combinations(range(blocks), key_blocks))
+        ]
+        self._buckets: Dict[int, List[int]] = defaultdict(list)
+        self._fingerprints: Dict[int, int] = {}
+
+    def band_keys(self, fingerprint: int) -> List[int]:
+        """指纹在各倒排表中的键"""
+        return [tag | (fingerprint & mask) for mask, tag in self._tables]
+
+    def add(self, item_id: int, fingerprint: int) -> None:
+        """
+        加入（或更新）条目指纹
+
+        更新后旧指纹所在的桶中仍保留该条目，查询时按最新指纹精确判断，结果不受影响。
+        """
+        previous = self._fingerprints.get(item_id)
+        self._fingerprints[item_id] = fingerprint
+        previous_keys = self.band_keys(previous) if previous is not None else ()
+        for key in self.band_keys(fingerprint):
+            if key not in previous_keys:
+                self._buckets[key].append(item_id)
+
+    def iter_similar(self, fingerprint: int) -> Iterator[int]:
+        """
+        依次给出汉明距离 <= max_distance 的条目（每个条目只给出一次，按命中顺序，不保证最相似）
+
+        调用方可在指纹相近的候选上再做文本级的精确判断。
+        """
+        fingerprints = self._fingerprints
+        max_distance = self.max_distance
+        buckets = self._buckets
+        seen = set()
+        for key in self.band_keys(fingerprint):
+            for item_id in buckets.get(key, ()):
+                if item_id in seen:
+                    continue
+                seen.add(item_id)
+                if (fingerprints[item_id] ^ fingerprint).bit_count() <= max_distance:
+                    yield item_id
+
+    def find_similar(self, fingerprint: int) -> Optional[int]:
+        """
+        查找一个汉明距离 <= max_distance 的条目（找到即返回，不保证最相似）
+
+        Returns:
+            条目ID，没有则返回 None
+        """
+        return next(self.iter_similar(fingerprint), None)
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
@@ -4,6 +4,7 @@ Celery 应用配置
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init
 
 from src.config.settings import settings
 
@@ -30,6 +31,7 @@ celery_app.conf.update(
         "src.tasks.crawl_tasks.*": {"queue": "crawl"},
         "src.tasks.extract_tasks.*": {"queue": "extract"},
         "src.tasks.report_tasks.*": {"queue": "report"},
+        "src.tasks.flash_tasks.*": {"queue": "report"},
         "src.tasks.mail_tasks.*": {"queue": "mail"},
     },
 
@@ -49,6 +51,15 @@ celery_app.conf.update(
     worker_max_tasks_per_child=100,
 )
 
+
+@worker_process_init.connect
+def _reset_db_pool_after_fork(**kwargs):
+    """prefork 子进程启动时丢弃继承的数据库连接池，各子进程使用自己的连接"""
+    from src.db.session import reset_engine_pool
+
+    reset_engine_pool()
+
+
 # 定时任务配置
 celery_app.conf.beat_schedule = {
     "daily-report-05:30": {
@@ -58,12 +69,21 @@ celery_app.conf.beat_schedule = {
     },
 }
 
+# 日内快讯（默认关闭）
+if settings.FLASH_REPORT_ENABLED:
+    celery_app.conf.beat_schedule["flash-report"] = {
+        "task": "src.tasks.flash_tasks.run_flash_report_task",
+        "schedule": settings.FLASH_REPORT_INTERVAL_MIN * 60,
+        "args": (),
+    }
+
 # 自动发现任务模块
 celery_app.autodiscover_tasks(
     [
         "src.tasks.crawl_tasks",
         "src.tasks.extract_tasks",
         "src.tasks.report_tasks",
+        "src.tasks.flash_tasks",
         "src.tasks.mail_tasks",
         "src.tasks.orchestrator",
     ]
@@ -3,16 +3,16 @@
 """
 
 import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 
 from loguru import logger
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session, defer
 
+from src.composer.scorer import sync_item_scores
 from src.config.settings import settings
 from src.db.session import get_db
 from src.models.article import Article, ProcessingStatus
-from src.models.delivery import ProviderUsage
 from src.models.extraction import (
     ExtractionItem,
     ExtractionQueue,
@@ -20,72 +20,19 @@ from src.models.extraction import (
     QueueStatus,
     Region,
 )
+from src.nlp.budget_guard import (
+    ACTION_SKIP_LOW_PRIORITY,
+    ACTION_STOP,
+    LEVEL_HARD,
+    LEVEL_OK,
+    LEVEL_SOFT,
+    get_budget_guard,
+)
 from src.nlp.extractor import extract_article
 from src.nlp.merger import filter_low_quality_items
 from src.tasks.celery_app import celery_app
 from src.utils.time_utils import get_local_now_naive
-
-
-def calculate_llm_cost(
-    provider: str,
-    model: str,
-    prompt_tokens: int,
-    completion_tokens: int,
-) -> float:
-    """
-    计算LLM使用费用(使用配置化的定价)
-
-    Args:
-        provider: Provider名称 (deepseek, qwen等)
-        model: 模型名称 (deepseek-chat, qwen-max等)
-        prompt_tokens: 输入Token数
-        completion_tokens: 输出Token数
-
-    Returns:
-        费用（人民币元）
-    """
-    from src.utils.cost_calculator import calculate_cost
-
-    return calculate_cost(provider, model, prompt_tokens, completion_tokens)
-
-
-def log_provider_usage(
-    db: Session,
-    provider: str,
-    model: str,
-    prompt_tokens: int,
-    completion_tokens: int,
-    cost: float = 0.0,
-) -> None:
-    """
-    记录 Provider 使用情况
-
-    Args:
-        db: 数据库会话
-        provider: Provider 名称
-        model: 模型名称
-        prompt_tokens: Prompt tokens
-        completion_tokens: Completion tokens
-        cost: 费用（元）
-    """
-    try:
-        usage = ProviderUsage(
-            provider_name=provider,
-            model_name=model,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            total_tokens=prompt_tokens + completion_tokens,
-            cost=cost,
-        )
-        db.add(usage)
-        db.commit()
-        logger.debug(
-            f"记录 Provider 使用: {provider}/{model}, "
-            f"tokens={prompt_tokens + completion_tokens}, cost={cost}"
-        )
-    except Exception as e:
-        logger.error(f"记录 Provider 使用失败: {e}")
-        db.rollback()
+from src.utils.usage_recorder import flush_usage
 
 
 @celery_app.task(name="src.tasks.extract_tasks.extract_article_task", bind=True)
@@ -115,6 +62,15 @@ def extract_article_task(self, article_id: int) -> dict:
             logger.error(f"队列项不存在: article_id={article_id}")
             return {"status": "error", "message": "队列项不存在"}
 
+        # 预算检查：并行批次中各任务开始时才检查，保证批次中途触及限制后不再调用 LLM
+        if not get_budget_guard().allow_queue_item(queue_item.priority):
+            logger.warning(f"⛔ 文章 {article_id} 因预算限制未处理，保持 queued")
+            return {
+                "status": "skipped",
+                "article_id": article_id,
+                "reason": "budget_exceeded",
+            }
+
         # 更新为运行中
         queue_item.status = QueueStatus.RUNNING
         queue_item.attempts += 1
@@ -125,7 +81,24 @@ def extract_article_task(self, article_id: int) -> dict:
         result = asyncio.run(extract_article(article_id, db))
 
         # 3. 处理结果
-        if result.status == "success" or result.status == "partial":
+        if result.metadata.get("budget_stopped"):
+            # 预算达到硬限制（含部分分块已成功的情况）：丢弃不完整的结果并放回队列，
+            # 等预算恢复后整篇重新抽取，不计为失败，也不标记为已完成
+            queue_item.status = QueueStatus.QUEUED
+            queue_item.attempts = max(0, queue_item.attempts - 1)
+            queue_item.processing_started_at = None
+            queue_item.last_error = "budget_exceeded"
+            db.commit()
+
+            logger.warning(f"⛔ 文章 {article_id} 因预算限制未处理完，已放回队列")
+
+            return {
+                "status": "skipped",
+                "article_id": article_id,
+                "reason": "budget_exceeded",
+            }
+
+        elif result.status == "success" or result.status == "partial":
             # 过滤低质量项
             filtered_items = filter_low_quality_items(
                 result.items,
@@ -139,6 +112,7 @@ def extract_article_task(self, article_id: int) -> dict:
             )
 
             # 4. 写入 extraction_items
+            created_items = []
             for item in filtered_items:
                 try:
                     # 映射枚举值
@@ -170,6 +144,7 @@ def extract_article_task(self, article_id: int) -> dict:
                         finance_relevance=item.get("finance_relevance", 1.0),
                     )
                     db.add(extraction_item)
+                    created_items.append(extraction_item)
 
                 except Exception as e:
                     logger.error(f"写入 extraction_item 失败: {e}")
@@ -180,8 +155,13 @@ def extract_article_task(self, article_id: int) -> dict:
             queue_item.processing_finished_at = get_local_now_naive()
             queue_item.last_error = None
 
-            # 6. 更新文章处理状态和关键词
-            article = db.query(Article).filter(Article.id == article_id).first()
+            # 6. 更新文章处理状态和关键词（不加载正文）
+            article = (
+                db.query(Article)
+                .options(defer(Article.content_text))
+                .filter(Article.id == article_id)
+                .first()
+            )
             if article:
                 article.processing_status = ProcessingStatus.DONE
                 # 保存关键词(如果有)
@@ -189,44 +169,13 @@ def extract_article_task(self, article_id: int) -> dict:
                     article.keywords = result.keywords
                     logger.info(f"保存文章关键词: {result.keywords}")
 
-            db.commit()
+                # 7. 增量维护每日评分物化表（与抽取项同一事务提交）
+                db.flush()
+                sync_item_scores(db, article, created_items)
 
-            # 7. 记录 Provider 使用情况
-            usage = result.metadata.get("usage", {})
-            if usage:
-                prompt_tokens = usage.get("prompt_tokens", 0)
-                completion_tokens = usage.get("completion_tokens", 0)
-
-                # 获取实际使用的provider (从metadata获取,如果没有则默认为deepseek)
-                provider_used = result.metadata.get("provider", "deepseek")
-
-                # 获取模型名称，根据provider设置默认值
-                model_used = result.metadata.get("model")
-                if not model_used:
-                    # 根据provider选择默认模型
-                    if provider_used.lower() == "deepseek":
-                        model_used = settings.PROVIDER_DEEPSEEK_MODEL
-                    elif provider_used.lower() == "qwen":
-                        model_used = settings.PROVIDER_QWEN_MODEL
-                    else:
-                        model_used = settings.PROVIDER_DEEPSEEK_MODEL  # 最终兜底
-
-                # 使用统一的费用计算函数
-                cost = calculate_llm_cost(
-                    provider=provider_used,
-                    model=model_used,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                )
+            db.commit()
 
-                log_provider_usage(
-                    db=db,
-                    provider=provider_used,
-                    model=model_used,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                    cost=cost,
-                )
+            # Provider 用量已在 extract_from_chunk 中按分块记录，由用量记录器批量落库
 
             logger.success(
                 f"✅ 文章 {article_id} 抽取成功，"
@@ -295,6 +244,34 @@ def extract_article_task(self, article_id: int) -> dict:
         db.close()
 
 
+def queued_items_query(db: Session, date_filter: Optional[str] = None) -> Query:
+    """
+    待处理队列项查询（按优先级从高到低）
+
+    status = 'queued' 且按 priority 排序命中 idx_extraction_queue_queued_priority
+    部分索引（无需额外排序）；日期过滤使用半开区间，可走 idx_articles_created_at。
+
+    Args:
+        db: 数据库会话
+        date_filter: 日期过滤（YYYY-MM-DD），None 表示所有待处理项
+
+    Returns:
+        查询对象
+    """
+    query = db.query(ExtractionQueue).filter(
+        ExtractionQueue.status == QueueStatus.QUEUED
+    )
+
+    if date_filter:
+        day_start = datetime.strptime(date_filter, "%Y-%m-%d")
+        query = query.join(Article).filter(
+            Article.created_at >= day_start,
+            Article.created_at < day_start + timedelta(days=1),
+        )
+
+    return query.order_by(ExtractionQueue.priority.desc())
+
+
 @celery_app.task(name="src.tasks.extract_tasks.run_extraction_batch")
 def run_extraction_batch(date_filter: Optional[str] = None) -> dict:
     """
@@ -311,25 +288,8 @@ def run_extraction_batch(date_filter: Optional[str] = None) -> dict:
     try:
         logger.info("开始批量抽取任务")
 
-        # 查询待处理的队列项
-        query = db.query(ExtractionQueue).filter(
-            ExtractionQueue.status == QueueStatus.QUEUED
-        )
-
-        # 如果指定了日期，过滤
-        if date_filter:
-            from datetime import datetime
-
-            target_date = datetime.strptime(date_filter, "%Y-%m-%d").date()
-            query = query.join(Article).filter(
-                Article.created_at >= target_date,
-                Article.created_at < datetime.combine(
-                    target_date, datetime.max.time()
-                ),
-            )
-
-        # 按优先级排序
-        queue_items = query.order_by(ExtractionQueue.priority.desc()).all()
+        # 查询待处理的队列项（按优先级排序，可按日期过滤）
+        queue_items = queued_items_query(db, date_filter).all()
 
         total = len(queue_items)
         logger.info(f"找到 {total} 个待处理队列项")
@@ -341,6 +301,17 @@ def run_extraction_batch(date_filter: Optional[str] = None) -> dict:
                 "total": 0,
             }
 
+        # 预算检查：达到软限制时跳过低优先级项，达到硬限制时不再处理
+        budget_guard = get_budget_guard()
+        allowed_items = [item for item in queue_items if budget_guard.allow_queue_item(item.priority)]
+        skipped = total - len(allowed_items)
+        if skipped:
+            budget_guard.record_decision(
+                ACTION_STOP if not allowed_items else ACTION_SKIP_LOW_PRIORITY,
+                f"跳过 {skipped}/{total} 个队列项（保持 queued）",
+            )
+        queue_items = allowed_items
+
         # 决定是串行还是并行处理
         if settings.LLM_ALLOW_PARALLEL_ARTICLE_PROCESSING:
             logger.info("并行处理模式")
@@ -351,23 +322,56 @@ def run_extraction_batch(date_filter: Optional[str] = None) -> dict:
                 extract_article_task.s(item.article_id) for item in queue_items
             )
             result = job.apply_async()
-            result.get()  # 等待所有任务完成
+            results = result.get()  # 等待所有任务完成
+
+            # 批次中途触及限制时，尚未开始的任务会自行跳过并保持 queued
+            budget_skipped = sum(
+                1 for r in results if isinstance(r, dict) and r.get("reason") == "budget_exceeded"
+            )
+            if budget_skipped:
+                skipped += budget_skipped
+                budget_guard.record_decision(
+                    ACTION_STOP, f"并行批次中 {budget_skipped} 个队列项因预算保持 queued"
+                )
 
         else:
             logger.info("串行处理模式")
             # 串行处理
-            for item in queue_items:
+            low_priority_skipped = 0
+            for index, item in enumerate(queue_items):
+                # 处理过程中可能触及限制：硬限制中止批次，软限制只跳过低优先级项，后续项留在队列中
+                level = budget_guard.level_for(budget_guard.get_spent()) if budget_guard.enabled else LEVEL_OK
+                if level == LEVEL_HARD:
+                    remaining = len(queue_items) - index
+                    skipped += remaining
+                    budget_guard.record_decision(ACTION_STOP, f"批次中止，剩余 {remaining} 个队列项保持 queued")
+                    break
+                if level == LEVEL_SOFT and (item.priority or 0) < settings.LLM_BUDGET_MIN_PRIORITY:
+                    low_priority_skipped += 1
+                    continue
                 try:
-                    extract_article_task.apply(args=[item.article_id])
+                    task_result = extract_article_task.apply(args=[item.article_id]).result
+                    if isinstance(task_result, dict) and task_result.get("reason") == "budget_exceeded":
+                        skipped += 1
                 except Exception as e:
                     logger.error(f"处理队列项 {item.id} 失败: {e}")
                     continue
 
-        logger.success(f"✅ 批量抽取任务完成，处理了 {total} 个队列项")
+            if low_priority_skipped:
+                skipped += low_priority_skipped
+                budget_guard.record_decision(
+                    ACTION_SKIP_LOW_PRIORITY, f"批次中途触及软限制，跳过 {low_priority_skipped} 个低优先级队列项（保持 queued）"
+                )
+
+        # 批次结束时刷写用量缓冲，保证 /admin/usage 能及时看到本批费用
+        flush_usage()
+
+        logger.success(f"✅ 批量抽取任务完成，处理了 {total - skipped} 个队列项，因预算跳过 {skipped} 个")
 
         return {
             "status": "success",
             "total": total,
+            "skipped_by_budget": skipped,
         }
 
     except Exception as e:
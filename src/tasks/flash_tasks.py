@@ -0,0 +1,165 @@
+"""
+快讯任务模块
+
+按固定间隔（FLASH_REPORT_INTERVAL_MIN）生成并发送日内快讯：
+只包含尚未进入任何快讯的抽取项，复用评分、构建和邮件发送路径。
+"""
+
+import asyncio
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from src.composer.builder import build_flash_body
+from src.composer.clusterer import cluster_items
+from src.composer.flash import get_unflashed_item_ids, mark_items_flashed, select_flash_items
+from src.composer.scorer import filter_items_by_ids
+from src.composer.vector_scorer import load_score_weights
+from src.config.settings import settings
+from src.db.session import get_db
+from src.mailer.batcher import batch_recipients
+from src.models.report import FlashReport
+from src.tasks.celery_app import celery_app
+from src.tasks.mail_tasks import _send_batches_async, load_recipient_emails
+from src.utils.time_utils import get_local_now
+
+
+def _run_flash_report_core_logic(send: bool = True) -> dict:
+    """
+    快讯生成与发送核心逻辑（可独立测试）
+
+    Args:
+        send: 是否发送邮件（False 时只生成并保存）
+
+    Returns:
+        任务结果字典
+    """
+    db: Session = next(get_db())
+
+    try:
+        start_time = get_local_now()
+        report_date = start_time.date()
+
+        # 1. 读取当天尚未进入快讯的抽取项
+        item_ids = get_unflashed_item_ids(db, report_date)
+        if not item_ids:
+            logger.info("⏩ 没有尚未进入快讯的抽取项，跳过快讯")
+            return {
+                "status": "skipped",
+                "reason": "no_new_items",
+            }
+
+        since_item_id, until_item_id = item_ids[0] - 1, item_ids[-1]
+        logger.info(f"⚡ 开始生成快讯: {len(item_ids)} 条新增抽取项 ({since_item_id}, {until_item_id}]")
+
+        # 2. 读取新增项、聚类、评分并选取
+        items = filter_items_by_ids(db, item_ids)
+        sections, shown_count = {}, 0
+        if items:
+            weights = load_score_weights(db)
+            if settings.REPORT_CLUSTER_ENABLED:
+                items = cluster_items(items, weights=weights)
+            sections, shown_count = select_flash_items(items, weights=weights)
+
+        # 3. 渲染快讯（无展示条目时只标记覆盖）
+        html_body = build_flash_body(start_time, sections, len(items)) if shown_count else None
+
+        flash = FlashReport(
+            report_date=report_date,
+            since_item_id=since_item_id,
+            until_item_id=until_item_id,
+            item_count=len(items),
+            html_body=html_body,
+            build_ms=int((get_local_now() - start_time).total_seconds() * 1000),
+            sent_batches=0,
+            failed_batches=0,
+        )
+
+        result = {
+            "status": "success",
+            "since_item_id": since_item_id,
+            "until_item_id": until_item_id,
+            "total_items": len(items),
+            "shown_items": shown_count,
+            "build_ms": flash.build_ms,
+        }
+
+        # 4. 发送（复用日报的收件人和分批发送路径，无附件，不写投递日志）
+        #    发送结果确定后才保存快讯并标记覆盖：发送中途异常时不写入任何记录，下次快讯重新包含这些条目
+        recipient_emails = load_recipient_emails(db) if (html_body and send) else []
+        if html_body and send and not recipient_emails:
+            logger.warning("⚠️ 没有启用的收件人，快讯仅保存不发送")
+
+        if recipient_emails:
+            subject = f"金融快讯 - {start_time.strftime('%m月%d日 %H:%M')}（新增 {len(items)} 条）"
+            batches = batch_recipients(recipient_emails)
+            results = asyncio.run(
+                _send_batches_async(
+                    db=db,
+                    batches=batches,
+                    subject=subject,
+                    html_body=html_body,
+                    attachment_filename=None,
+                    attachment_content=None,
+                    report_id=None,
+                    report_date=report_date,
+                )
+            )
+            flash.sent_batches = sum(1 for r in results if r["status"] != "failed")
+            flash.failed_batches = len(results) - flash.sent_batches
+            result.update(sent_batches=flash.sent_batches, failed_batches=flash.failed_batches)
+
+        db.add(flash)
+        db.flush()
+        result["flash_id"] = flash.id
+
+        if recipient_emails and flash.sent_batches == 0:
+            # 全部批次失败：记录本次快讯，但条目保持未覆盖，下次快讯重试
+            db.commit()
+            logger.error(f"❌ 快讯全部 {flash.failed_batches} 批发送失败，条目留待下次快讯")
+            result["status"] = "failed"
+            return result
+
+        mark_items_flashed(db, item_ids, flash.id)
+        db.commit()
+
+        if not html_body:
+            logger.info("⏩ 新增抽取项均未达到快讯展示条件，仅标记覆盖")
+            return {
+                "status": "skipped",
+                "reason": "no_items_to_show",
+                "flash_id": flash.id,
+            }
+
+        if recipient_emails:
+            logger.success(
+                f"✅ 快讯发送完成: {flash.sent_batches}/{flash.sent_batches + flash.failed_batches} 批成功, "
+                f"展示 {shown_count} 条"
+            )
+        return result
+
+    except Exception as e:
+        logger.error(f"生成快讯失败: {e}", exc_info=True)
+        db.rollback()
+
+        return {
+            "status": "error",
+            "error": str(e),
+        }
+
+    finally:
+        db.close()
+
+
+@celery_app.task(name="src.tasks.flash_tasks.run_flash_report_task", bind=True)
+def run_flash_report_task(self, send: bool = True) -> dict:
+    """
+    快讯任务（Celery 包装器）
+
+    Args:
+        send: 是否发送邮件
+
+    Returns:
+        任务结果字典
+    """
+    return _run_flash_report_core_logic(send=send)
@@ -5,33 +5,71 @@
 """
 
 import asyncio
+import time
+from collections import deque
+from contextlib import nullcontext
 from datetime import date, datetime
+from typing import Optional
 
 from loguru import logger
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from src.composer.attachment import get_report_attachment
 from src.config.settings import settings
 from src.db.session import get_db
 from src.mailer.batcher import (
-    RateLimiter,
     batch_recipients,
     filter_valid_recipients,
+    get_rate_limiter,
     remove_duplicates,
 )
+from src.mailer.delivery_recorder import DeliveryRecorder
 from src.mailer.retry_handler import handle_send_failure, send_with_retry
 from src.mailer.smtp_client import SMTPClient
-from src.models.delivery import DeliveryLog, ReportRecipient
+from src.models.delivery import DeliveryLog, DeliveryStatus, ReportRecipient
 from src.models.report import Report
 from src.tasks.celery_app import celery_app
-from src.utils.time_utils import get_local_now, get_local_now_naive, to_local_naive
+from src.utils.time_utils import get_local_now, get_local_now_naive
+
+
+def load_recipient_emails(db: Session) -> list:
+    """
+    读取启用的收件人邮箱（已验证格式并去重）
+
+    Args:
+        db: 数据库会话
+
+    Returns:
+        邮箱列表
+    """
+    recipients = (
+        db.query(ReportRecipient.email)
+        .filter(
+            ReportRecipient.type == "recipient",
+            ReportRecipient.enabled == True
+        )
+        .all()
+    )
+
+    recipient_emails = [email for (email,) in recipients]
+    if not recipient_emails:
+        return []
+
+    recipient_emails = filter_valid_recipients(recipient_emails)
+    return remove_duplicates(recipient_emails)
 
 
 def _send_report_core_logic(report_date_str: str = None, force_send: bool = False) -> dict:
     """
     发送报告邮件核心逻辑（可独立测试）
 
+    发送前写入批次清单；任务被重新投递时只发送清单中尚未成功的批次，
+    本轮全部成功后再次执行直接跳过（force_send=True 时开始新一轮全量发送）。
+
     Args:
         report_date_str: 报告日期字符串 (YYYY-MM-DD)，None 表示今天
+        force_send: 强制重新发送给全部收件人
 
     Returns:
         发送结果字典
@@ -66,17 +104,8 @@ def _send_report_core_logic(report_date_str: str = None, force_send: bool = Fals
                 "report_date": report_date.isoformat(),
             }
 
-        # 3. 读取收件人（启用的）
-        recipients = (
-            db.query(ReportRecipient.email)
-            .filter(
-                ReportRecipient.type == "recipient",
-                ReportRecipient.enabled == True
-            )
-            .all()
-        )
-
-        recipient_emails = [email for (email,) in recipients]
+        # 3. 读取收件人（启用的），验证和去重
+        recipient_emails = load_recipient_emails(db)
 
         if not recipient_emails:
             logger.warning("⚠️ 没有启用的收件人，跳过发送")
@@ -86,43 +115,63 @@ def _send_report_core_logic(report_date_str: str = None, force_send: bool = Fals
                 "report_date": report_date.isoformat(),
             }
 
-        # 4. 验证和去重
-        recipient_emails = filter_valid_recipients(recipient_emails)
-        recipient_emails = remove_duplicates(recipient_emails)
-
         logger.info(f"有效收件人数量: {len(recipient_emails)}")
 
         # 5. 组装邮件内容
         subject = f"金融情报日报 - {report_date.strftime('%Y年%m月%d日')}"
         html_body = report.html_body
-        attachment_filename = f"daily-report-{report_date.isoformat()}.html"
-        attachment_content = report.html_attachment.encode('utf-8')
-
-        # 6. 分批
+        # 压缩格式直接使用构建时保存的压缩字节；报告没有附件时只发正文
+        attachment = get_report_attachment(report)
+        attachment_filename = attachment.filename if attachment else None
+        attachment_content = attachment.content if attachment else None
+        if attachment is None:
+            logger.warning(f"⚠️ 报告 {report_date} 没有附件，仅发送正文")
+
+        # 6. 分批，写入（或读取已有的）批次清单
         batches = batch_recipients(recipient_emails)
-        logger.info(f"邮件分为 {len(batches)} 批")
+        manifest = _plan_delivery(db, report.id, batches, force_send=force_send)
+        # 部分送达（partial）的批次不整批重发，被拒收件人已在发送时单独重试和处理
+        pending = [log for log in manifest if log.status in (DeliveryStatus.PENDING, DeliveryStatus.FAILED)]
+        done_count = len(manifest) - len(pending)
+
+        if not pending:
+            logger.info(f"⏩ 报告 {report_date} 本轮 {len(manifest)} 批均已发送成功，跳过")
+            return {
+                "status": "skipped",
+                "reason": "already_sent",
+                "report_date": report_date.isoformat(),
+                "report_id": report.id,
+                "total_batches": len(manifest),
+            }
 
-        # 7. 异步发送
+        if done_count:
+            logger.info(f"🔁 续发: 跳过已成功的 {done_count} 批，发送剩余 {len(pending)} 批")
+        else:
+            logger.info(f"邮件分为 {len(pending)} 批")
+
+        # 7. 异步发送（只发送未成功的批次，按清单的收件人快照）
         results = asyncio.run(
             _send_batches_async(
                 db=db,
-                batches=batches,
+                batches=[log.recipients_snapshot for log in pending],
                 subject=subject,
                 html_body=html_body,
                 attachment_filename=attachment_filename,
                 attachment_content=attachment_content,
                 report_id=report.id,
-                report_date=report_date
+                report_date=report_date,
+                manifest=pending,
             )
         )
 
-        # 8. 统计结果
-        success_count = sum(1 for r in results if r['status'] == 'ok')
-        failed_count = len(results) - success_count
+        # 8. 统计结果（含之前已成功的批次）
+        success_count = done_count + sum(1 for r in results if r['status'] != 'failed')
+        failed_count = len(manifest) - success_count
+        refused_count = sum(len(r.get('refused') or {}) for r in results)
 
         logger.success(
-            f"✅ 邮件发送完成: {success_count}/{len(results)} 成功, "
-            f"{failed_count} 失败"
+            f"✅ 邮件发送完成: {success_count}/{len(manifest)} 成功, "
+            f"{failed_count} 失败, {refused_count} 个收件人被拒收"
         )
 
         return {
@@ -130,9 +179,11 @@ def _send_report_core_logic(report_date_str: str = None, force_send: bool = Fals
             "report_date": report_date.isoformat(),
             "report_id": report.id,
             "total_recipients": len(recipient_emails),
-            "total_batches": len(batches),
+            "total_batches": len(manifest),
+            "resumed_batches": done_count,
             "success_batches": success_count,
             "failed_batches": failed_count,
+            "refused_recipients": refused_count,
             "results": results,
         }
 
@@ -155,10 +206,11 @@ async def _send_batches_async(
     batches: list,
     subject: str,
     html_body: str,
-    attachment_filename: str,
-    attachment_content: bytes,
+    attachment_filename: Optional[str],
+    attachment_content: Optional[bytes],
     report_id: int,
-    report_date: date
+    report_date: date,
+    manifest: list = None,
 ) -> list:
     """
     异步发送所有批次
@@ -168,110 +220,158 @@ async def _send_batches_async(
         batches: 批次列表
         subject: 邮件主题
         html_body: 邮件正文
-        attachment_filename: 附件文件名
+        attachment_filename: 附件文件名（None=无附件）
         attachment_content: 附件内容
-        report_id: 报告ID
+        report_id: 报告ID（None=不写投递日志，如快讯）
         report_date: 报告日期
+        manifest: 与 batches 一一对应的批次清单行（发送后原地更新状态；None=新增日志行）
 
     Returns:
-        发送结果列表
+        发送结果列表（按批次顺序，每项带 batch_no 和 elapsed_ms）
     """
-    # 创建 SMTP 客户端
-    smtp_client = SMTPClient()
-
-    # 创建频率限制器
-    rate_limiter = RateLimiter()
-
-    # 发送结果
-    results = []
-
-    for i, batch in enumerate(batches, start=1):
-        logger.info(f"发送批次 {i}/{len(batches)}: To={batch['to']}, BCC={len(batch['bcc'])} 个")
-
-        # 等待（频率限制）
-        await rate_limiter.throttle()
-
-        # 组装邮件数据
-        email_data = {
-            "to": batch['to'],
-            "bcc": batch['bcc'],
-            "subject": subject,
-            "html_body": html_body,
-            "attachments": [(attachment_filename, attachment_content)]
-        }
-
-        # 发送（带重试）
-        result = await send_with_retry(smtp_client, email_data, max_retries=2)
-
-        # 记录发送日志
-        _log_delivery(
-            db=db,
-            report_id=report_id,
-            batch_num=i,
-            batch_data=batch,
-            result=result
-        )
-
-        # 处理失败
-        if result['status'] == 'failed':
-            await handle_send_failure(db, batch, result.get('error', 'Unknown'))
-
-        results.append(result)
+    if not batches:
+        return []
+
+    # 每个并发会话一个 SMTP 客户端
+    concurrency = max(1, min(settings.MAIL_SMTP_CONCURRENCY, len(batches)))
+    smtp_clients = [SMTPClient() for _ in range(concurrency)]
+
+    # 所有会话共享同一个频率限制器（全局发送上限不随并发数增加）
+    rate_limiter = get_rate_limiter()
+
+    # 正文和附件只编码一次，各批次只替换 To/Message-ID/Date
+    attachments = [(attachment_filename, attachment_content)] if attachment_filename else None
+    prepared = smtp_clients[0].prepare_message(subject, html_body, attachments)
+
+    # 发送结果（按批次编号回填）
+    results = [None] * len(batches)
+    pending = deque(enumerate(batches, start=1))
+    start_time = time.monotonic()
+
+    async def deliver(worker_no: int, smtp_client: SMTPClient):
+        """单个发送会话：从队列依次取批次发送"""
+        # 会话模式：该会话的所有批次复用同一个已认证连接（频率限制仍按批次生效）
+        session = smtp_client.session() if settings.MAIL_SMTP_REUSE_CONNECTION else nullcontext()
+
+        async with session:
+            while pending:
+                i, batch = pending.popleft()
+                log = manifest[i - 1] if manifest else None
+                batch_no = log.batch_no if log else i
+                logger.info(
+                    f"发送批次 {i}/{len(batches)} [会话 {worker_no}]: "
+                    f"To={batch['to']}, BCC={len(batch['bcc'])} 个"
+                )
+
+                # 等待（频率限制）
+                await rate_limiter.throttle()
+
+                # 组装邮件数据
+                email_data = {
+                    "to": batch['to'],
+                    "bcc": batch['bcc'],
+                    "subject": subject,
+                    "html_body": html_body,
+                    "attachments": attachments,
+                    "prepared": prepared,
+                }
+
+                # 发送（带重试）
+                batch_start = time.monotonic()
+                result = await send_with_retry(smtp_client, email_data, max_retries=2)
+                result['batch_no'] = batch_no
+                result['elapsed_ms'] = int((time.monotonic() - batch_start) * 1000)
+
+                # 记录发送日志（缓冲，按刷新粒度批量写入）
+                if recorder is not None:
+                    recorder.record(batch_no, batch, result, log=log)
+
+                # 处理失败（只对被拒收的收件人逐个处理；有日志写入器时黑名单随日志批量写入）
+                if result['status'] != 'ok':
+                    hard_bounced = await handle_send_failure(
+                        db,
+                        batch,
+                        result.get('error') or 'Unknown',
+                        refused=result.get('refused'),
+                        apply_blacklist=recorder is None,
+                    )
+                    if recorder is not None:
+                        recorder.blacklist(hard_bounced)
+
+                results[i - 1] = result
+
+    # 投递日志写入器（None=不写投递日志）
+    recorder = DeliveryRecorder(db, report_id) if report_id is not None else None
+    try:
+        await asyncio.gather(*(deliver(n, client) for n, client in enumerate(smtp_clients, start=1)))
+    finally:
+        # 中途异常时也写入已完成批次的结果，续发时不会重复发送
+        if recorder is not None:
+            recorder.close()
+    logger.info(
+        f"📬 {len(batches)} 批发送结束: {concurrency} 个并发会话, "
+        f"耗时 {time.monotonic() - start_time:.1f} 秒"
+    )
 
     return results
 
 
-def _log_delivery(
+def _plan_delivery(
     db: Session,
     report_id: int,
-    batch_num: int,
-    batch_data: dict,
-    result: dict
-):
+    batches: list,
+    force_send: bool = False
+) -> list:
     """
-    记录发送日志
+    写入或读取批次清单
+
+    已有发送记录时沿用最近一轮的清单（同一批次有多行时以最新一行为准）；
+    没有记录或强制重发时，为每个批次写入一行 pending 并提交，开始新一轮。
 
     Args:
         db: 数据库会话
         report_id: 报告ID
-        report_date: 报告日期
-        batch_num: 批次编号
-        batch_data: 批次数据（to, bcc）
-        result: 发送结果
-    """
-    try:
-        recipients_snapshot = {
-            "to": batch_data.get("to", []),
-            "bcc": batch_data.get("bcc", []),
-        }
+        batches: 本次分批结果
+        force_send: 是否开始新一轮全量发送
 
-        sent_at = None
-        sent_at_str = result.get("sent_at")
-        if sent_at_str:
-            try:
-                sent_at = datetime.fromisoformat(sent_at_str)
-                sent_at = to_local_naive(sent_at)
-            except ValueError:
-                sent_at = None
-        if result.get("status") == "ok" and sent_at is None:
-            sent_at = get_local_now_naive()
-
-        log = DeliveryLog(
+    Returns:
+        本轮清单行列表（按批次号排序）
+    """
+    latest_round = (
+        db.query(func.max(DeliveryLog.send_round))
+        .filter(DeliveryLog.report_id == report_id)
+        .scalar()
+    )
+
+    if latest_round is not None and not force_send:
+        rows = (
+            db.query(DeliveryLog)
+            .filter(DeliveryLog.report_id == report_id, DeliveryLog.send_round == latest_round)
+            .order_by(DeliveryLog.batch_no, DeliveryLog.id)
+            .all()
+        )
+        manifest = {row.batch_no: row for row in rows}
+        if manifest:
+            return [manifest[batch_no] for batch_no in sorted(manifest)]
+
+    send_round = (latest_round or 0) + 1
+    planned_at = get_local_now_naive()
+    manifest = [
+        DeliveryLog(
             report_id=report_id,
-            batch_no=batch_num,
-            recipients_snapshot=recipients_snapshot,
-            status=result.get("status", "failed"),
-            message_id=result.get("message_id"),
-            error_message=result.get("error"),
-            sent_at=sent_at or get_local_now_naive(),
+            send_round=send_round,
+            batch_no=i,
+            recipients_snapshot={"to": batch.get("to", []), "bcc": batch.get("bcc", [])},
+            status=DeliveryStatus.PENDING,
+            sent_at=planned_at,
         )
+        for i, batch in enumerate(batches, start=1)
+    ]
+    db.add_all(manifest)
+    db.commit()
 
-        db.add(log)
-        db.commit()
-
-    except Exception as e:
-        logger.error(f"记录发送日志失败: {e}")
-        db.rollback()
+    logger.info(f"📝 写入批次清单: 报告 {report_id} 第 {send_round} 轮, {len(manifest)} 批")
+    return manifest
 
 
 def check_time_window(
@@ -11,30 +11,35 @@ from loguru import logger
 from sqlalchemy.orm import Session
 
 from src.composer.builder import (
-    build_attachment,
+    build_attachment_file,
     build_email_body,
     build_metadata,
     generate_section_reports,
 )
+from src.composer.clusterer import cluster_items
+from src.composer.section_cache import build_sections_incremental
 from src.composer.scorer import (
     filter_items,
     get_sections_statistics,
     section_and_sort,
     select_topn,
 )
+from src.composer.vector_scorer import load_score_weights
 from src.config.settings import settings
 from src.db.session import get_db
 from src.models.report import Report
 from src.tasks.celery_app import celery_app
 from src.utils.time_utils import get_local_now, get_local_now_naive
+from src.utils.usage_recorder import flush_usage
 
 
-def _build_report_core_logic(report_date_str: str = None) -> dict:
+def _build_report_core_logic(report_date_str: str = None, full_rebuild: bool = False) -> dict:
     """
     报告构建核心逻辑（可独立测试）
 
     Args:
         report_date_str: 报告日期字符串 (YYYY-MM-DD)，None 表示今天
+        full_rebuild: 忽略分区缓存，全部分区重新生成
 
     Returns:
         任务结果字典
@@ -56,6 +61,7 @@ def _build_report_core_logic(report_date_str: str = None) -> dict:
         # 1. 过滤抽取项
         logger.info("步骤 1/6: 过滤抽取项")
         items = filter_items(db, report_date)
+        section_build = None
 
         if not items:
             logger.warning(f"没有找到 {report_date} 的抽取项，生成空报告")
@@ -64,17 +70,27 @@ def _build_report_core_logic(report_date_str: str = None) -> dict:
             sections_topn = {}
             overview = "今日暂无重要金融情报。"
         else:
-            # 2. 分区排序
+            # 2. 跨文章聚类 + 分区排序（评分权重来自系统设置）
+            weights = load_score_weights(db)
+            if settings.REPORT_CLUSTER_ENABLED:
+                items = cluster_items(items, weights=weights)
             logger.info(f"步骤 2/6: 分区排序 ({len(items)} 条)")
-            sections = section_and_sort(items)
+            sections = section_and_sort(items, weights=weights)
 
             # 3. 选取 TopN
             logger.info(f"步骤 3/6: 选取 TopN (N={settings.REPORT_TOPN})")
             sections_topn = select_topn(sections, settings.REPORT_TOPN)
 
-            # 4. 生成分区报告（可选，LLM）
+            # 4. 生成分区报告（可选，LLM）；增量模式下只重新生成输入变化的分区
             logger.info("步骤 4/6: 生成分区报告")
-            section_reports = generate_section_reports(sections)  # 使用全量数据
+            if settings.REPORT_INCREMENTAL_ENABLED:
+                section_build = build_sections_incremental(
+                    db, report_date, sections, sections_topn, full_rebuild=full_rebuild
+                )
+                section_reports = section_build.section_reports
+            else:
+                section_reports = generate_section_reports(sections)  # 使用全量数据
+            flush_usage()
 
         # 5. 生成 HTML
         logger.info("步骤 5/6: 生成 HTML")
@@ -82,12 +98,19 @@ def _build_report_core_logic(report_date_str: str = None) -> dict:
             report_date=report_date,
             sections_topn=sections_topn,
             section_reports=section_reports if items else {},
+            section_html=section_build.email_html if section_build else None,
         )
 
-        html_attachment = build_attachment(
+        # 附件流式渲染；压缩格式只保存压缩字节，html 格式仍保存原文
+        attachment = build_attachment_file(
             report_date=report_date,
             sections_full=sections,
+            section_html=section_build.attachment_html if section_build else None,
         )
+        if attachment.compressed:
+            html_attachment, attachment_data = None, attachment.content
+        else:
+            html_attachment, attachment_data = attachment.content.decode("utf-8"), None
 
         # 6. 生成元数据
         build_time_ms = int((get_local_now() - start_time).total_seconds() * 1000)
@@ -98,6 +121,9 @@ def _build_report_core_logic(report_date_str: str = None) -> dict:
             topn_sections=sections_topn,
             build_time_ms=build_time_ms,
         )
+        if section_build is not None:
+            metadata["sections_reused"] = len(section_build.reused)
+            metadata["sections_rebuilt"] = len(section_build.rebuilt)
 
         # 获取统计信息
         sections_json = get_sections_statistics(sections)
@@ -116,6 +142,8 @@ def _build_report_core_logic(report_date_str: str = None) -> dict:
             logger.info(f"更新已存在的报告: {existing_report.id}")
             existing_report.html_body = html_body
             existing_report.html_attachment = html_attachment
+            existing_report.attachment_format = attachment.format
+            existing_report.attachment_data = attachment_data
             existing_report.sections_json = json.dumps(sections_json, ensure_ascii=False)
             existing_report.build_meta = json.dumps(metadata, ensure_ascii=False)
             existing_report.build_ms = build_time_ms
@@ -128,6 +156,8 @@ def _build_report_core_logic(report_date_str: str = None) -> dict:
                 report_date=report_date,
                 html_body=html_body,
                 html_attachment=html_attachment,
+                attachment_format=attachment.format,
+                attachment_data=attachment_data,
                 sections_json=json.dumps(sections_json, ensure_ascii=False),
                 build_meta=json.dumps(metadata, ensure_ascii=False),
                 build_ms=build_time_ms,
@@ -168,17 +198,18 @@ def _build_report_core_logic(report_date_str: str = None) -> dict:
 
 
 @celery_app.task(name="src.tasks.report_tasks.build_report_task", bind=True)
-def build_report_task(self, report_date_str: str = None) -> dict:
+def build_report_task(self, report_date_str: str = None, full_rebuild: bool = False) -> dict:
     """
     构建报告任务（Celery 包装器）
 
     Args:
         report_date_str: 报告日期字符串 (YYYY-MM-DD)，None 表示今天
+        full_rebuild: 忽略分区缓存，全部分区重新生成
 
     Returns:
         任务结果字典
     """
-    return _build_report_core_logic(report_date_str)
+    return _build_report_core_logic(report_date_str, full_rebuild=full_rebuild)
 
 
 def _build_report_batch_core_logic(start_date_str: str = None, end_date_str: str = None) -> dict:
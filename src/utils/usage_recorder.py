@@ -0,0 +1,241 @@
+"""
+LLM 用量记录器模块
+
+将 Provider 用量记录先缓存在内存中，按条数或定时批量写入 provider_usage 表，
+避免在 LLM 调用热路径上逐条打开会话、提交事务。
+"""
+
+import atexit
+import os
+import threading
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from src.config.settings import settings
+from src.utils.cost_calculator import calculate_cost
+from src.utils.time_utils import get_local_now_naive
+
+# 任务类型
+TASK_KIND_EXTRACT = "extract"
+TASK_KIND_REPORT = "report"
+TASK_KIND_ESCALATE = "escalate"  # 级联抽取中升级到最强模型的调用
+
+# 刷写失败时最多保留的记录数，防止数据库长时间不可用导致内存无限增长
+MAX_PENDING_ROWS = 10000
+
+
+class UsageRecorder:
+    """
+    缓冲式用量记录器
+
+    - record() 只做内存追加，不访问数据库
+    - 缓冲达到 batch_size 条时唤醒后台线程写入，后台线程另每 flush_interval 秒定时写入；
+      调用方（包括事件循环中的协程）不会被数据库写入阻塞
+    - 进程退出 / Celery worker 关闭时自动刷写剩余记录
+    """
+
+    def __init__(self, batch_size: int = None, flush_interval: float = None):
+        """
+        初始化用量记录器
+
+        Args:
+            batch_size: 触发批量写入的缓冲条数
+            flush_interval: 后台定时刷写间隔（秒），<=0 表示不定时刷写，仅在缓冲满 batch_size 时写入
+        """
+        self.batch_size = batch_size or settings.USAGE_FLUSH_BATCH_SIZE
+        self.flush_interval = (
+            settings.USAGE_FLUSH_INTERVAL_SEC if flush_interval is None else flush_interval
+        )
+        self._reset_state()
+
+    def _reset_state(self):
+        """初始化（或在 fork 后重建）锁、缓冲区和后台线程状态"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer: List[Dict] = []
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _ensure_process_state(self):
+        """Celery prefork 子进程继承的锁/线程不可用，检测到 fork 后重建"""
+        if self._pid != os.getpid():
+            self._reset_state()
+
+    def _ensure_flusher(self):
+        """按需启动后台刷写线程"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run_flusher,
+            name="usage-recorder-flusher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def _run_flusher(self):
+        """后台线程：定时或被 record() 唤醒时刷写缓冲区"""
+        timeout = self.flush_interval if self.flush_interval > 0 else None
+        while not self._stop_event.is_set():
+            self._wake_event.wait(timeout)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                break
+            self.flush()
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        article_id: Optional[int] = None,
+        chunk_index: Optional[int] = None,
+        task_kind: str = TASK_KIND_EXTRACT,
+        cost: Optional[float] = None,
+    ) -> None:
+        """
+        记录一次 LLM 调用的用量（仅写入内存缓冲）
+
+        Args:
+            provider: Provider 名称
+            model: 模型名称
+            prompt_tokens: 输入 token 数
+            completion_tokens: 输出 token 数
+            article_id: 关联文章ID（报告生成时为 None）
+            chunk_index: 分块索引
+            task_kind: 任务类型（extract/report）
+            cost: 费用（元），None 表示按配置定价计算
+        """
+        prompt_tokens = prompt_tokens or 0
+        completion_tokens = completion_tokens or 0
+
+        if cost is None:
+            cost = calculate_cost(provider, model, prompt_tokens, completion_tokens)
+
+        row = {
+            "provider_name": provider,
+            "model_name": model,
+            "article_id": article_id,
+            "chunk_index": chunk_index,
+            "task_kind": task_kind,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cost": cost,
+            "created_at": get_local_now_naive(),
+        }
+
+        self._ensure_process_state()
+        with self._lock:
+            self._buffer.append(row)
+            pending = len(self._buffer)
+            self._ensure_flusher()
+
+        logger.debug(
+            f"缓存 Provider 用量: {provider}/{model}, kind={task_kind}, "
+            f"article={article_id}, chunk={chunk_index}, "
+            f"tokens={prompt_tokens + completion_tokens}, cost={cost}"
+        )
+
+        if pending >= self.batch_size:
+            self._wake_event.set()
+
+    def pending_count(self) -> int:
+        """当前缓冲中的记录数"""
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self) -> int:
+        """
+        将缓冲区中的记录批量写入数据库
+
+        Returns:
+            成功写入的记录数
+        """
+        self._ensure_process_state()
+
+        # 同一时刻只允许一个刷写，避免后台线程与显式 flush 重复写入
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                rows, self._buffer = self._buffer, []
+
+            try:
+                self._write_rows(rows)
+            except Exception as e:
+                logger.error(f"批量写入 Provider 用量失败({len(rows)} 条)，将在下次刷写时重试: {e}")
+                with self._lock:
+                    self._buffer = (rows + self._buffer)[-MAX_PENDING_ROWS:]
+                return 0
+
+        logger.debug(f"批量写入 Provider 用量: {len(rows)} 条")
+        return len(rows)
+
+    def _write_rows(self, rows: List[Dict]) -> None:
+        """使用独立会话一次性插入多行"""
+        from sqlalchemy import insert
+
+        from src.db.session import SessionLocal
+        from src.models.delivery import ProviderUsage
+
+        db = SessionLocal()
+        try:
+            db.execute(insert(ProviderUsage), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def shutdown(self) -> None:
+        """停止后台线程并刷写剩余记录"""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self._thread is not None and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=max(self.flush_interval, 0) + 1)
+        self.flush()
+
+
+# 全局单例
+_usage_recorder: Optional[UsageRecorder] = None
+
+
+def get_usage_recorder() -> UsageRecorder:
+    """获取全局用量记录器单例"""
+    global _usage_recorder
+    if _usage_recorder is None:
+        _usage_recorder = UsageRecorder()
+    return _usage_recorder
+
+
+def flush_usage() -> int:
+    """刷写全局记录器的缓冲（未初始化时为空操作）"""
+    if _usage_recorder is None:
+        return 0
+    return _usage_recorder.flush()
+
+
+def _shutdown_usage_recorder(*args, **kwargs):
+    """进程/worker 退出钩子"""
+    if _usage_recorder is not None:
+        try:
+            _usage_recorder.shutdown()
+        except Exception as e:
+            logger.error(f"关闭用量记录器失败: {e}")
+
+
+atexit.register(_shutdown_usage_recorder)
+
+try:
+    from celery.signals import worker_process_shutdown, worker_shutdown
+
+    worker_process_shutdown.connect(_shutdown_usage_recorder, weak=False)
+    worker_shutdown.connect(_shutdown_usage_recorder, weak=False)
+except ImportError:  # pragma: no cover - celery 为必选依赖，这里仅做防御
+    pass
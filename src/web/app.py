@@ -13,6 +13,7 @@ from fastapi.templating import Jinja2Templates
 from loguru import logger
 
 from src.config.settings import settings
+from src.db.async_session import dispose_async_engine
 from .routes import assets, auth as auth_routes
 from .routes import home, preferences, reports, stats
 from .routes.admin import router as admin_router
@@ -64,6 +65,9 @@ def create_app() -> FastAPI:
     app.include_router(assets.router)
     app.include_router(admin_router)
 
+    # 退出时关闭异步引擎连接池
+    app.add_event_handler("shutdown", dispose_async_engine)
+
     @app.get("/healthz", tags=["Health"])
     async def healthz():
         return {"status": "ok"}
@@ -6,15 +6,16 @@ from __future__ import annotations
 from typing import Optional
 
 from fastapi import Cookie, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.session import get_db
+from src.db.async_session import get_async_db
 from src.models.user import User, UserRole
 from .security import decode_access_token
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     access_token: Optional[str] = Cookie(default=None, alias="access_token"),
 ) -> User:
     """获取当前登录用户"""
@@ -37,15 +38,15 @@ def get_current_user(
     if not email:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token 无效")
 
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if user is None or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="用户不存在或已禁用")
 
     return user
 
 
-def get_current_user_optional(
-    db: Session = Depends(get_db),
+async def get_current_user_optional(
+    db: AsyncSession = Depends(get_async_db),
     access_token: Optional[str] = Cookie(default=None, alias="access_token"),
 ) -> Optional[User]:
     """可选获取当前用户"""
@@ -57,11 +58,11 @@ def get_current_user_optional(
     email = payload.get("sub")
     if not email:
         return None
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     return user if user and user.is_active else None
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: User = Depends(get_current_user)) -> User:
     """确保管理员身份"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="需要管理员权限")
@@ -6,8 +6,12 @@ from __future__ import annotations
 import os
 from fastapi import APIRouter, Depends, Form, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from src.composer.vector_scorer import SCORE_WEIGHTS_KEY, ScoreWeights
+from src.db.async_session import get_async_db
 from src.db.session import get_db
 from src.models.user import User
 from src.web.deps import require_admin
@@ -40,15 +44,8 @@ async def admin_home(request: Request, current_user: User = Depends(require_admi
     )
 
 
-# 以下为占位路由,待后续实现
-
-@router.get("/settings", response_class=HTMLResponse)
-async def admin_settings(
-    request: Request,
-    current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
-):
-    """系统设置页面 - 加载当前配置"""
+def _load_settings(db: Session) -> dict:
+    """读取系统设置（缺项补默认值）"""
     from src.models.system import SystemSetting
 
     # 读取所有设置
@@ -73,7 +70,8 @@ async def admin_settings(
         "secondary_color": "#1e4976",
         "accent_color": "#f59e0b",
         "provider_deepseek": "deepseek",
-        "provider_qwen": "qwen"
+        "provider_qwen": "qwen",
+        "score_weights": ScoreWeights().to_dict(),
     }
 
     # 合并设置 (数据库优先)
@@ -81,16 +79,32 @@ async def admin_settings(
         if key not in settings_dict:
             settings_dict[key] = default_value
 
+    # 评分权重缺项时补默认值
+    settings_dict["score_weights"] = ScoreWeights.from_dict(settings_dict.get("score_weights")).to_dict()
+
     # 为模板添加小时格式的缓存时长 (方便表单显示)
     settings_dict["wordcloud_cache_ttl_hours"] = settings_dict.get("wordcloud_cache_ttl", 86400) // 3600
 
+    return settings_dict
+
+
+# 以下为占位路由,待后续实现
+
+@router.get("/settings", response_class=HTMLResponse)
+async def admin_settings(
+    request: Request,
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """系统设置页面 - 加载当前配置"""
     return _templates(request).TemplateResponse(
         "admin/settings.html",
         {
             "request": request,
             "current_user": current_user,
             "page_title": "系统设置",
-            "settings": settings_dict
+            "settings": _load_settings(db),
+            "error": None,
         }
     )
 
@@ -115,12 +129,42 @@ async def save_settings(
     accent_color: str = Form(...),
     provider_deepseek: str = Form(...),
     provider_qwen: str = Form(...),
+    score_weight_confidence: float = Form(0.4),
+    score_weight_recency: float = Form(0.1),
+    score_weight_authority: float = Form(0.2),
+    score_weight_finance_relevance: float = Form(0.3),
+    score_weight_corroboration: float = Form(0.1),
     current_user: User = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """保存系统设置"""
     from src.models.system import SystemSetting, AdminAuditLog
 
+    score_weights = ScoreWeights(
+        confidence=score_weight_confidence,
+        recency=score_weight_recency,
+        authority=score_weight_authority,
+        finance_relevance=score_weight_finance_relevance,
+        corroboration=score_weight_corroboration,
+    )
+    try:
+        score_weights.validate()
+    except ValueError as e:
+        # 不保存任何设置，回显提交的权重
+        settings_dict = _load_settings(db)
+        settings_dict["score_weights"] = score_weights.to_dict()
+        return _templates(request).TemplateResponse(
+            "admin/settings.html",
+            {
+                "request": request,
+                "current_user": current_user,
+                "page_title": "系统设置",
+                "settings": settings_dict,
+                "error": str(e),
+            },
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
     # 定义所有设置项 (注意: wordcloud_cache_ttl需要转换为秒)
     settings_to_save = {
         "report_topn": report_topn,
@@ -139,7 +183,8 @@ async def save_settings(
         "secondary_color": secondary_color,
         "accent_color": accent_color,
         "provider_deepseek": provider_deepseek,
-        "provider_qwen": provider_qwen
+        "provider_qwen": provider_qwen,
+        SCORE_WEIGHTS_KEY: score_weights.to_dict(),
     }
 
     # 记录修改前的值
@@ -185,7 +230,7 @@ async def save_settings(
 async def admin_audit(
     request: Request,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """操作审计日志页面"""
     from src.models.system import AdminAuditLog
@@ -196,22 +241,22 @@ async def admin_audit(
     days = int(request.query_params.get("days", "7"))  # 默认显示最近7天
 
     # 构建查询
-    query = db.query(AdminAuditLog)
+    query = select(AdminAuditLog)
 
     # 时间过滤
     since_date = datetime.now() - timedelta(days=days)
-    query = query.filter(AdminAuditLog.created_at >= since_date)
+    query = query.where(AdminAuditLog.created_at >= since_date)
 
     # 操作类型过滤
     if action_filter:
-        query = query.filter(AdminAuditLog.action == action_filter)
+        query = query.where(AdminAuditLog.action == action_filter)
 
     # 按时间倒序，限制数量
-    logs = query.order_by(AdminAuditLog.created_at.desc()).limit(200).all()
+    logs = (await db.scalars(query.order_by(AdminAuditLog.created_at.desc()).limit(200))).all()
 
     # 获取所有操作类型用于筛选器
-    all_actions = db.query(AdminAuditLog.action).distinct().all()
-    action_types = sorted([a[0] for a in all_actions if a[0]])
+    all_actions = await db.scalars(select(AdminAuditLog.action).distinct())
+    action_types = sorted([a for a in all_actions if a])
 
     return _templates(request).TemplateResponse(
         "admin/audit.html",
@@ -301,44 +346,61 @@ async def status_metrics(
 async def admin_status(
     request: Request,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """系统状态监控页面"""
     import redis
-    from sqlalchemy import text
+    from sqlalchemy import func, text
     import os
 
     status_data = {
         "database": {"status": "unknown", "message": "", "details": {}},
         "redis": {"status": "unknown", "message": "", "details": {}},
         "celery": {"status": "unknown", "message": "", "details": {}},
-        "web": {"status": "healthy", "message": "Web服务运行正常", "details": {}}
+        "web": {"status": "healthy", "message": "Web服务运行正常", "details": {}},
+        "mail": {"status": "unknown", "message": "", "details": {}}
     }
 
     # 检查数据库
     try:
-        result = db.execute(text("SELECT 1")).scalar()
+        result = await db.scalar(text("SELECT 1"))
         if result == 1:
             # 获取数据库统计
             from src.models.article import Article
             from src.models.report import Report
             from src.models.extraction import ExtractionItem
 
-            article_count = db.query(Article).count()
-            report_count = db.query(Report).count()
-            extraction_count = db.query(ExtractionItem).count()
+            article_count = await db.scalar(select(func.count(Article.id)))
+            report_count = await db.scalar(select(func.count(Report.id)))
+            extraction_count = await db.scalar(select(func.count(ExtractionItem.id)))
 
             # 获取数据库连接数
             try:
-                conn_result = db.execute(text("SELECT count(*) FROM pg_stat_activity")).scalar()
+                conn_result = await db.scalar(text("SELECT count(*) FROM pg_stat_activity"))
                 connection_count = conn_result or 0
             except:
                 connection_count = 0
 
+            # 按进程类型统计连接数（application_name 由连接池按进程类型设置）
+            from src.config.settings import settings
+            from src.db.async_session import async_engine
+            from src.db.pool import get_pool_status
+
+            try:
+                rows = (await db.execute(text(
+                    "SELECT application_name, count(*) FROM pg_stat_activity "
+                    "WHERE datname = current_database() AND application_name LIKE :prefix "
+                    "GROUP BY application_name ORDER BY application_name"
+                ), {"prefix": f"{settings.DB_APPLICATION_NAME}-%"})).all()
+                prefix_len = len(settings.DB_APPLICATION_NAME) + 1
+                connections_by_role = {name[prefix_len:]: count for name, count in rows}
+            except:
+                connections_by_role = {}
+
             # 获取数据库大小
             try:
-                db_name = db.execute(text("SELECT current_database()")).scalar()
-                size_result = db.execute(text(f"SELECT pg_database_size('{db_name}')")).scalar()
+                db_name = await db.scalar(text("SELECT current_database()"))
+                size_result = await db.scalar(text(f"SELECT pg_database_size('{db_name}')"))
                 # 转换为MB
                 db_size_mb = round(size_result / 1024 / 1024, 2) if size_result else 0
             except:
@@ -347,7 +409,7 @@ async def admin_status(
             # 估算响应时间(通过简单查询)
             import time
             start = time.time()
-            db.execute(text("SELECT 1"))
+            await db.execute(text("SELECT 1"))
             response_time_ms = round((time.time() - start) * 1000, 1)
 
             status_data["database"]["status"] = "healthy"
@@ -359,6 +421,9 @@ async def admin_status(
                 "connections": connection_count,
                 "size_mb": db_size_mb,
                 "response_time_ms": response_time_ms,
+                "connections_by_role": connections_by_role,
+                # 本进程（Web）异步引擎连接池：取连接等待时间和饱和度
+                "pool": get_pool_status(async_engine.sync_engine),
             }
     except Exception as e:
         status_data["database"]["status"] = "error"
@@ -441,10 +506,12 @@ async def admin_status(
                 from src.models.article import ProcessingStatus
 
                 today_start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                completed_today = db.query(ExtractionQueueItem).filter(
-                    ExtractionQueueItem.processing_finished_at >= today_start,
-                    ExtractionQueueItem.status == "done"
-                ).count()
+                completed_today = await db.scalar(
+                    select(func.count(ExtractionQueueItem.id)).where(
+                        ExtractionQueueItem.processing_finished_at >= today_start,
+                        ExtractionQueueItem.status == "done"
+                    )
+                )
             except:
                 completed_today = 0
 
@@ -464,6 +531,35 @@ async def admin_status(
         status_data["celery"]["status"] = "error"
         status_data["celery"]["message"] = f"Celery检查失败: {str(e)}"
 
+    # 今日邮件投递（读取物化的投递汇总，不扫描投递日志）
+    try:
+        from src.models.delivery import DeliverySummary
+        from src.models.report import Report
+        from src.utils.time_utils import get_local_now
+
+        summary = await db.scalar(
+            select(DeliverySummary)
+            .join(Report, Report.id == DeliverySummary.report_id)
+            .where(Report.report_date == get_local_now().date())
+        )
+        if summary is None:
+            status_data["mail"]["status"] = "unknown"
+            status_data["mail"]["message"] = "今日尚未发送"
+        else:
+            status_data["mail"]["status"] = "healthy" if summary.failed_batches == 0 else "warning"
+            status_data["mail"]["message"] = f"第 {summary.send_round} 轮发送"
+            status_data["mail"]["details"] = {
+                "delivered": summary.delivered_recipients,
+                "refused": summary.refused_recipients,
+                "ok_batches": summary.ok_batches + summary.partial_batches,
+                "failed_batches": summary.failed_batches,
+                "total_batches": summary.total_batches,
+                "last_error": summary.last_error,
+            }
+    except Exception as e:
+        status_data["mail"]["status"] = "error"
+        status_data["mail"]["message"] = f"投递汇总读取失败: {str(e)}"
+
     return _templates(request).TemplateResponse(
         "admin/status.html",
         {
@@ -479,10 +575,12 @@ async def admin_status(
 async def admin_usage(
     request: Request,
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Token费用统计"""
     from src.models.delivery import ProviderUsage
+    from src.models.article import Article
+    from src.models.source import Source
     from sqlalchemy import func
     from datetime import datetime, timedelta
 
@@ -494,34 +592,98 @@ async def admin_usage(
 
     # 按Provider聚合统计
     provider_stats = (
-        db.query(
-            ProviderUsage.provider_name,
-            func.sum(ProviderUsage.prompt_tokens).label("total_prompt_tokens"),
-            func.sum(ProviderUsage.completion_tokens).label("total_completion_tokens"),
-            func.sum(ProviderUsage.total_tokens).label("total_tokens"),
-            func.sum(ProviderUsage.cost).label("total_cost"),
-            func.count(ProviderUsage.id).label("call_count")
+        await db.execute(
+            select(
+                ProviderUsage.provider_name,
+                func.sum(ProviderUsage.prompt_tokens).label("total_prompt_tokens"),
+                func.sum(ProviderUsage.completion_tokens).label("total_completion_tokens"),
+                func.sum(ProviderUsage.total_tokens).label("total_tokens"),
+                func.sum(ProviderUsage.cost).label("total_cost"),
+                func.count(ProviderUsage.id).label("call_count")
+            )
+            .where(ProviderUsage.created_at >= since_date)
+            .group_by(ProviderUsage.provider_name)
         )
-        .filter(ProviderUsage.created_at >= since_date)
-        .group_by(ProviderUsage.provider_name)
-        .all()
-    )
+    ).all()
 
     # 按Provider和模型聚合统计
     model_stats = (
-        db.query(
-            ProviderUsage.provider_name,
-            ProviderUsage.model_name,
-            func.sum(ProviderUsage.prompt_tokens).label("total_prompt_tokens"),
-            func.sum(ProviderUsage.completion_tokens).label("total_completion_tokens"),
-            func.sum(ProviderUsage.total_tokens).label("total_tokens"),
-            func.sum(ProviderUsage.cost).label("total_cost"),
-            func.count(ProviderUsage.id).label("call_count")
+        await db.execute(
+            select(
+                ProviderUsage.provider_name,
+                ProviderUsage.model_name,
+                func.sum(ProviderUsage.prompt_tokens).label("total_prompt_tokens"),
+                func.sum(ProviderUsage.completion_tokens).label("total_completion_tokens"),
+                func.sum(ProviderUsage.total_tokens).label("total_tokens"),
+                func.sum(ProviderUsage.cost).label("total_cost"),
+                func.count(ProviderUsage.id).label("call_count")
+            )
+            .where(ProviderUsage.created_at >= since_date)
+            .group_by(ProviderUsage.provider_name, ProviderUsage.model_name)
         )
-        .filter(ProviderUsage.created_at >= since_date)
-        .group_by(ProviderUsage.provider_name, ProviderUsage.model_name)
-        .all()
-    )
+    ).all()
+
+    # 按任务类型聚合（extract/report，历史数据无类型）
+    kind_stats = (
+        await db.execute(
+            select(
+                ProviderUsage.task_kind,
+                func.sum(ProviderUsage.total_tokens).label("total_tokens"),
+                func.sum(ProviderUsage.cost).label("total_cost"),
+                func.count(ProviderUsage.id).label("call_count")
+            )
+            .where(ProviderUsage.created_at >= since_date)
+            .group_by(ProviderUsage.task_kind)
+        )
+    ).all()
+
+    # 按信息源聚合（通过 article_id 归因）
+    source_stats = (
+        await db.execute(
+            select(
+                Source.name.label("source_name"),
+                func.count(func.distinct(ProviderUsage.article_id)).label("article_count"),
+                func.sum(ProviderUsage.total_tokens).label("total_tokens"),
+                func.sum(ProviderUsage.cost).label("total_cost"),
+                func.count(ProviderUsage.id).label("call_count")
+            )
+            .join(Article, ProviderUsage.article_id == Article.id)
+            .join(Source, Article.source_id == Source.id)
+            .where(ProviderUsage.created_at >= since_date)
+            .group_by(Source.name)
+            .order_by(func.sum(ProviderUsage.cost).desc())
+            .limit(20)
+        )
+    ).all()
+
+    # 费用最高的文章
+    article_stats = (
+        await db.execute(
+            select(
+                Article.id.label("article_id"),
+                Article.title.label("title"),
+                Source.name.label("source_name"),
+                func.count(func.distinct(ProviderUsage.chunk_index)).label("chunk_count"),
+                func.sum(ProviderUsage.total_tokens).label("total_tokens"),
+                func.sum(ProviderUsage.cost).label("total_cost"),
+                func.count(ProviderUsage.id).label("call_count")
+            )
+            .join(Article, ProviderUsage.article_id == Article.id)
+            .join(Source, Article.source_id == Source.id)
+            .where(ProviderUsage.created_at >= since_date)
+            .group_by(Article.id, Article.title, Source.name)
+            .order_by(func.sum(ProviderUsage.cost).desc())
+            .limit(20)
+        )
+    ).all()
+
+    # 当日预算状态与降级决策（Redis 不可用时不影响页面）
+    try:
+        from src.nlp.budget_guard import get_budget_guard
+
+        budget_status = get_budget_guard().get_status()
+    except Exception:
+        budget_status = None
 
     # 计算总计
     total_stats = {
@@ -565,6 +727,38 @@ async def admin_usage(
             "page_title": "费用统计",
             "providers": providers_data,
             "total_stats": total_stats,
+            "kinds": [
+                {
+                    "name": k.task_kind or "unknown",
+                    "total_tokens": k.total_tokens or 0,
+                    "cost": k.total_cost or 0,
+                    "call_count": k.call_count or 0,
+                }
+                for k in kind_stats
+            ],
+            "sources": [
+                {
+                    "name": s.source_name,
+                    "article_count": s.article_count or 0,
+                    "total_tokens": s.total_tokens or 0,
+                    "cost": s.total_cost or 0,
+                    "call_count": s.call_count or 0,
+                }
+                for s in source_stats
+            ],
+            "top_articles": [
+                {
+                    "id": a.article_id,
+                    "title": a.title,
+                    "source_name": a.source_name,
+                    "chunk_count": a.chunk_count or 0,
+                    "total_tokens": a.total_tokens or 0,
+                    "cost": a.total_cost or 0,
+                    "call_count": a.call_count or 0,
+                }
+                for a in article_stats
+            ],
+            "budget": budget_status,
             "current_days": days
         }
     )
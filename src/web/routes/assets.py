@@ -7,9 +7,11 @@ from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import Response
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.session import get_db
+from src.composer.attachment import get_report_attachment_html
+from src.db.async_session import get_async_db
 from src.models.report import Report
 from src.models.user import User
 from src.web.deps import get_current_user
@@ -21,12 +23,12 @@ router = APIRouter(prefix="/assets", tags=["Assets"])
 async def download_report_attachment(
     report_date: date,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """下载报告附件（HTML格式）"""
 
     # 查询报告
-    report = db.query(Report).filter(Report.report_date == report_date).first()
+    report = await db.scalar(select(Report).where(Report.report_date == report_date))
 
     if report is None:
         raise HTTPException(
@@ -34,7 +36,9 @@ async def download_report_attachment(
             detail=f"Report not found for date {report_date}"
         )
 
-    if not report.html_attachment:
+    # 压缩格式的附件在此解压，浏览器下载的始终是 HTML
+    html_attachment = get_report_attachment_html(report)
+    if not html_attachment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Report attachment not available for date {report_date}"
@@ -44,7 +48,7 @@ async def download_report_attachment(
     filename = f"daily-report-{report_date.isoformat()}.html"
 
     return Response(
-        content=report.html_attachment,
+        content=html_attachment,
         media_type="text/html",
         headers={
             "Content-Disposition": f'attachment; filename="{filename}"',
@@ -7,8 +7,11 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, Form, Path, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from src.db.async_session import get_async_db
 from src.db.session import get_db
 from src.models.user import PreferenceScope, User, UserPreference
 from src.web.deps import get_current_user
@@ -22,23 +25,26 @@ def _templates(request: Request):
     return request.app.state.templates
 
 
-def _load_prefs(db: Session, user: User):
+def _prefs_query(user: User):
     return (
-        db.query(UserPreference)
-        .filter(UserPreference.user_email == user.email)
+        select(UserPreference)
+        .where(UserPreference.user_email == user.email)
         .order_by(UserPreference.created_at.desc())
-        .all()
     )
 
 
+def _load_prefs(db: Session, user: User):
+    return db.scalars(_prefs_query(user)).all()
+
+
 @router.get("", response_class=HTMLResponse)
 async def preferences_page(
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """展示偏好列表"""
-    prefs = _load_prefs(db, current_user)
+    prefs = (await db.scalars(_prefs_query(current_user))).all()
     return _templates(request).TemplateResponse(
         "preferences/index.html",
         {
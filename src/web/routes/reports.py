@@ -9,9 +9,10 @@ from typing import List, Optional
 import bleach
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.session import get_db
+from src.db.async_session import get_async_db
 from src.models.report import Report
 from src.models.user import User
 from src.web.deps import get_current_user
@@ -45,13 +46,13 @@ async def report_list(
     request: Request,
     current_user: User = Depends(get_current_user),
     report_date: Optional[date] = Query(default=None, description="指定日期"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """报告列表页面"""
-    query = db.query(Report).order_by(Report.report_date.desc())
+    query = select(Report).order_by(Report.report_date.desc())
     if report_date:
-        query = query.filter(Report.report_date == report_date)
-    reports: List[Report] = query.limit(30).all()
+        query = query.where(Report.report_date == report_date)
+    reports: List[Report] = list(await db.scalars(query.limit(30)))
 
     return request.app.state.templates.TemplateResponse(
         "reports/list.html",
@@ -69,10 +70,10 @@ async def report_detail(
     report_date: date,
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """报告详情页面"""
-    report = db.query(Report).filter(Report.report_date == report_date).first()
+    report = await db.scalar(select(Report).where(Report.report_date == report_date))
     if report is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="未找到指定日期的报告")
 
@@ -93,7 +94,6 @@ async def report_detail(
 async def trigger_all_tasks_user(
     request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
 ):
     """用户端手动触发所有任务（采集→抽取→成稿→发送）"""
     from src.tasks.orchestrator import run_daily_report
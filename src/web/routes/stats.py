@@ -5,7 +5,7 @@ from __future__ import annotations
 
 import platform
 from collections import Counter
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from difflib import SequenceMatcher
 from io import BytesIO
 from pathlib import Path
@@ -13,14 +13,15 @@ from typing import Optional
 
 import redis
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse, JSONResponse, Response
 from loguru import logger
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from wordcloud import WordCloud
 
 from src.config.settings import settings
-from src.db.session import get_db
+from src.db.async_session import get_async_db
 from src.models.article import Article
 from src.models.extraction import ExtractionItem
 from src.models.report import Report
@@ -42,14 +43,18 @@ redis_client = redis.from_url(settings.REDIS_URL, decode_responses=False)
 async def stats_summary(
     current_user: User = Depends(get_current_user),
     target_date: Optional[date] = Query(default=None, description="统计日期（可选）"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """提供基础统计数据（占位实现）"""
-    total_reports = db.query(func.count(Report.id)).scalar() or 0
-    total_items = db.query(func.count(ExtractionItem.id)).scalar() or 0
+    total_reports = await db.scalar(select(func.count(Report.id))) or 0
+    total_items = await db.scalar(select(func.count(ExtractionItem.id))) or 0
 
-    region_rows = db.query(ExtractionItem.region, func.count(ExtractionItem.id)).group_by(ExtractionItem.region).all()
-    layer_rows = db.query(ExtractionItem.layer, func.count(ExtractionItem.id)).group_by(ExtractionItem.layer).all()
+    region_rows = await db.execute(
+        select(ExtractionItem.region, func.count(ExtractionItem.id)).group_by(ExtractionItem.region)
+    )
+    layer_rows = await db.execute(
+        select(ExtractionItem.layer, func.count(ExtractionItem.id)).group_by(ExtractionItem.layer)
+    )
 
     region_counts = {region: count for region, count in region_rows}
     layer_counts = {layer: count for layer, count in layer_rows}
@@ -178,6 +183,49 @@ async def wordcloud_view(request: Request, current_user: User = Depends(get_curr
     )
 
 
+def _keywords_query(start_date: date, end_date: date):
+    """
+    日期范围内文章关键词查询
+
+    发布时间按半开区间 [start_date, end_date + 1 天) 比较，
+    不对列套 date()，可走 idx_articles_published_at 索引。
+    """
+    return select(Article.keywords).where(
+        Article.published_at >= datetime.combine(start_date, datetime.min.time()),
+        Article.published_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+        Article.keywords.isnot(None)
+    )
+
+
+def _render_wordcloud(keyword_freq: dict[str, int], width: int, height: int) -> bytes:
+    """按词频生成词云 PNG"""
+    # 查找中文字体
+    font_path = _find_chinese_font()
+
+    # 配置词云参数
+    wc_kwargs = {
+        "width": width,
+        "height": height,
+        "background_color": "white",
+        "max_words": getattr(settings, 'WORDCLOUD_MAX_WORDS', 100),
+        "relative_scaling": 0.5,
+        "min_font_size": 10,
+    }
+
+    if font_path:
+        wc_kwargs["font_path"] = font_path
+
+    # 生成词云(使用词频字典)
+    wc = WordCloud(**wc_kwargs)
+    wc.generate_from_frequencies(keyword_freq)
+
+    # 转换为 PNG
+    image = wc.to_image()
+    img_buffer = BytesIO()
+    image.save(img_buffer, format="PNG")
+    return img_buffer.getvalue()
+
+
 @router.get("/wordcloud/image")
 async def generate_wordcloud(
     current_user: User = Depends(get_current_user),
@@ -185,7 +233,7 @@ async def generate_wordcloud(
     target_date: Optional[date] = Query(default=None, description="基准日期"),
     width: int = Query(default=800, ge=400, le=2000),
     height: int = Query(default=600, ge=300, le=1500),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """生成词云图片（基于文章关键词，PNG格式）"""
 
@@ -214,15 +262,7 @@ async def generate_wordcloud(
     logger.info(f"生成词云: 范围={scope}, 日期={start_date} 至 {end_date}")
 
     # 查询关键词(仅查询需要的字段)
-    articles = (
-        db.query(Article.keywords)
-        .filter(
-            func.date(Article.published_at) >= start_date,
-            func.date(Article.published_at) <= end_date,
-            Article.keywords.isnot(None)
-        )
-        .all()
-    )
+    articles = (await db.execute(_keywords_query(start_date, end_date))).all()
 
     if not articles:
         raise HTTPException(
@@ -269,31 +309,8 @@ async def generate_wordcloud(
 
     # 生成词云
     try:
-        # 查找中文字体
-        font_path = _find_chinese_font()
-
-        # 配置词云参数
-        wc_kwargs = {
-            "width": width,
-            "height": height,
-            "background_color": "white",
-            "max_words": getattr(settings, 'WORDCLOUD_MAX_WORDS', 100),
-            "relative_scaling": 0.5,
-            "min_font_size": 10,
-        }
-
-        if font_path:
-            wc_kwargs["font_path"] = font_path
-
-        # 生成词云(使用词频字典)
-        wc = WordCloud(**wc_kwargs)
-        wc.generate_from_frequencies(keyword_freq)
-
-        # 转换为 PNG
-        image = wc.to_image()
-        img_buffer = BytesIO()
-        image.save(img_buffer, format="PNG")
-        img_bytes = img_buffer.getvalue()
+        # 词云渲染是 CPU 密集操作，放到线程池执行，避免阻塞事件循环
+        img_bytes = await run_in_threadpool(_render_wordcloud, keyword_freq, width, height)
 
         # 缓存到 Redis
         try:
@@ -0,0 +1,82 @@
+"""
+管理后台系统设置保存测试（SQLite）
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.composer.vector_scorer import SCORE_WEIGHTS_KEY
+from src.db.session import get_db
+from src.models.system import AdminAuditLog, SystemSetting
+from src.models.user import User, UserRole
+from src.web.app import app
+from src.web.deps import require_admin
+
+FORM = {
+    "report_topn": 5,
+    "confidence_threshold": 0.6,
+    "min_content_len": 120,
+    "crawl_concurrency_rss": 10,
+    "crawl_concurrency_web": 2,
+    "llm_timeout_sec": 90,
+    "llm_retries": 2,
+    "smtp_host": "smtp.163.com",
+    "smtp_port": 465,
+    "mail_batch_limit": 50,
+    "mail_rate_limit_per_sec": 1,
+    "wordcloud_cache_ttl_hours": 24,
+    "primary_color": "#2563eb",
+    "secondary_color": "#1e4976",
+    "accent_color": "#f59e0b",
+    "provider_deepseek": "deepseek",
+    "provider_qwen": "qwen",
+    "score_weight_confidence": 0.5,
+    "score_weight_recency": 0.1,
+    "score_weight_authority": 0.2,
+    "score_weight_finance_relevance": 0.2,
+    "score_weight_corroboration": 0.1,
+}
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'settings.db'}")
+    for model in (SystemSetting, AdminAuditLog):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db):
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[require_admin] = lambda: User(email="admin@test.com", role=UserRole.ADMIN)
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+def test_valid_score_weights_are_saved(client, db):
+    response = client.post("/admin/settings", data=FORM, follow_redirects=False)
+
+    assert response.status_code == 303
+    saved = db.query(SystemSetting).filter(SystemSetting.key == SCORE_WEIGHTS_KEY).one()
+    assert saved.value_json["confidence"] == 0.5
+
+
+@pytest.mark.parametrize("weights", [
+    {"score_weight_authority": -0.2},
+    {"score_weight_confidence": 0, "score_weight_recency": 0, "score_weight_authority": 0,
+     "score_weight_finance_relevance": 0},
+])
+def test_invalid_score_weights_show_form_error(client, db, weights):
+    """测试负数或全零权重不保存，页面提示错误"""
+    response = client.post("/admin/settings", data={**FORM, **weights}, follow_redirects=False)
+
+    assert response.status_code == 400
+    assert "评分权重" in response.text or "权重不能全为 0" in response.text
+    assert db.query(SystemSetting).count() == 0
+    assert db.query(AdminAuditLog).count() == 0
@@ -0,0 +1,114 @@
+"""
+Web 异步数据库层测试（sqlite+aiosqlite 代替 asyncpg）
+"""
+
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from src.config.settings import settings
+from src.db.async_session import get_async_db, to_async_url
+from src.db.pool import InstrumentedAsyncQueuePool, build_engine_kwargs
+from src.models.report import Report
+from src.models.user import PreferenceScope, User, UserPreference
+from src.web.app import app
+from src.web.security import create_access_token
+
+REPORT_DATE = date(2025, 1, 2)
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://u:p@db:5432/finrep", "postgresql+asyncpg://u:p@db:5432/finrep"),
+    ("postgresql+psycopg2://u:p@db/finrep", "postgresql+asyncpg://u:p@db/finrep"),
+    ("sqlite:///data/test.db", "sqlite+aiosqlite:///data/test.db"),
+])
+def test_to_async_url(url, expected, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_CLASS", "queue")
+    assert to_async_url(url).render_as_string(hide_password=False) == expected
+
+
+def test_async_engine_kwargs_for_pgbouncer(monkeypatch):
+    """测试经 PgBouncer 连接时关闭 asyncpg 预处理语句缓存"""
+    monkeypatch.setattr(settings, "DB_POOL_CLASS", "null")
+    url = "postgresql://u:p@pgbouncer:6432/finrep"
+
+    kwargs = build_engine_kwargs(url, role="web", is_async=True)
+
+    assert kwargs["poolclass"] is NullPool
+    assert kwargs["connect_args"]["statement_cache_size"] == 0
+    assert kwargs["connect_args"]["server_settings"] == {"application_name": f"{settings.DB_APPLICATION_NAME}-web"}
+    assert to_async_url(url).query == {"prepared_statement_cache_size": "0"}
+
+
+def test_async_engine_uses_instrumented_pool(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_CLASS", "queue")
+    assert build_engine_kwargs("postgresql://u:p@db/finrep", role="web", is_async=True)["poolclass"] \
+        is InstrumentedAsyncQueuePool
+
+
+def test_unsupported_async_backend():
+    with pytest.raises(ValueError):
+        to_async_url("mysql://u:p@db/finrep")
+
+
+@pytest.fixture
+def client(tmp_path):
+    """读路由使用 aiosqlite 文件库"""
+    url = f"sqlite:///{tmp_path / 'web.db'}"
+    sync_engine = create_engine(url)
+    for table in (User.__table__, UserPreference.__table__, Report.__table__):
+        table.create(sync_engine)
+    db = sessionmaker(bind=sync_engine)()
+    db.add(User(email="reader@test.com"))
+    db.add(UserPreference(user_email="reader@test.com", name="宏观", scope=PreferenceScope.DAILY, prompt_text="关注宏观政策"))
+    db.add(Report(report_date=REPORT_DATE, html_body="<p>正文</p>", html_attachment="<p>附件</p>"))
+    db.commit()
+    db.close()
+
+    async_engine = create_async_engine(to_async_url(url), poolclass=NullPool)
+    session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as test_client:
+        test_client.cookies.set("access_token", create_access_token({"sub": "reader@test.com"}))
+        yield test_client
+    app.dependency_overrides.clear()
+    sync_engine.dispose()
+
+
+def test_report_routes_read_through_async_session(client):
+    """测试报告列表、详情和附件下载经异步会话读取"""
+    assert client.get("/reports").status_code == 200
+
+    detail = client.get(f"/reports/{REPORT_DATE.isoformat()}")
+    assert detail.status_code == 200
+    assert "正文" in detail.text
+
+    attachment = client.get(f"/assets/attachment/{REPORT_DATE.isoformat()}.html")
+    assert attachment.status_code == 200
+    assert attachment.text == "<p>附件</p>"
+
+    assert client.get("/reports/2024-01-01").status_code == 404
+
+
+def test_preferences_page_reads_through_async_session(client):
+    response = client.get("/preferences")
+
+    assert response.status_code == 200
+    assert "关注宏观政策" in response.text
+
+
+def test_unknown_user_rejected(client):
+    """测试 get_current_user 经异步会话查询用户"""
+    client.cookies.set("access_token", create_access_token({"sub": "nobody@test.com"}))
+
+    assert client.get(f"/reports/{REPORT_DATE.isoformat()}").status_code == 401
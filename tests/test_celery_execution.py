@@ -6,6 +6,8 @@ import pytest
 from unittest.mock import patch, MagicMock
 from datetime import date
 
+from src.composer.attachment import AttachmentFile
+
 
 def test_celery_task_execution_in_eager_mode():
     """测试 Celery 任务在 eager 模式下的执行"""
@@ -23,7 +25,7 @@ def test_celery_task_execution_in_eager_mode():
          patch("src.tasks.report_tasks.select_topn") as mock_topn, \
          patch("src.tasks.report_tasks.generate_overview") as mock_overview, \
          patch("src.tasks.report_tasks.build_email_body") as mock_body, \
-         patch("src.tasks.report_tasks.build_attachment") as mock_attach, \
+         patch("src.tasks.report_tasks.build_attachment_file") as mock_attach, \
          patch("src.tasks.report_tasks.build_metadata") as mock_meta, \
          patch("src.tasks.report_tasks.get_sections_statistics") as mock_stats:
 
@@ -37,7 +39,7 @@ def test_celery_task_execution_in_eager_mode():
         mock_topn.return_value = {"国内": {"政治": [{"id": 1}]}}
         mock_overview.return_value = "测试摘要"
         mock_body.return_value = "<html>正文</html>"
-        mock_attach.return_value = "<html>附件</html>"
+        mock_attach.return_value = AttachmentFile("daily-report-2025-11-05.html", "<html>附件</html>".encode("utf-8"))
         mock_meta.return_value = {"total_items": 1, "build_time_ms": 100}
         mock_stats.return_value = {"total_items": 1}
 
@@ -64,7 +66,7 @@ def test_celery_task_with_default_date():
     with patch("src.tasks.report_tasks.get_db") as mock_get_db, \
          patch("src.tasks.report_tasks.filter_items") as mock_filter_items, \
          patch("src.tasks.report_tasks.build_email_body") as mock_body, \
-         patch("src.tasks.report_tasks.build_attachment") as mock_attach, \
+         patch("src.tasks.report_tasks.build_attachment_file") as mock_attach, \
          patch("src.tasks.report_tasks.build_metadata") as mock_meta, \
          patch("src.tasks.report_tasks.get_sections_statistics") as mock_stats:
 
@@ -74,7 +76,7 @@ def test_celery_task_with_default_date():
 
         mock_filter_items.return_value = []
         mock_body.return_value = "<html>空报告</html>"
-        mock_attach.return_value = "<html>空附件</html>"
+        mock_attach.return_value = AttachmentFile("daily-report.html", "<html>空附件</html>".encode("utf-8"))
         mock_meta.return_value = {"total_items": 0, "build_time_ms": 50}
         mock_stats.return_value = {"total_items": 0}
 
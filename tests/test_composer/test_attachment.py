@@ -0,0 +1,137 @@
+"""
+报告附件打包测试（流式渲染 + gzip/zip 压缩）
+"""
+
+import gzip
+import io
+import zipfile
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from src.composer.attachment import (
+    get_report_attachment,
+    get_report_attachment_html,
+    pack_attachment,
+    resolve_format,
+    unpack_attachment,
+)
+from src.composer.builder import build_attachment, build_attachment_file
+
+REPORT_DATE = date(2025, 11, 21)
+
+
+def _sections(total):
+    sections = {}
+    now = datetime.now()
+    for i in range(total):
+        region = ["国内", "国外"][i % 2]
+        layer = ["金融政策监管", "金融经济", "金融大模型技术", "金融科技应用"][i % 4]
+        sections.setdefault(region, {}).setdefault(layer, []).append({
+            "article_url": f"https://example.com/{i}",
+            "article_title": f"文章标题 {i}",
+            "fact": f"某机构发布第{i}号公告，涉及金额{i}亿元。",
+            "opinion": "市场预计影响有限。",
+            "region": region,
+            "layer": layer,
+            "confidence": 0.85,
+            "score": 0.8,
+            "source_name": f"来源{i % 20}",
+            "published_at": now - timedelta(minutes=i),
+        })
+    return sections
+
+
+class TestPackAttachment:
+    """测试附件打包"""
+
+    def test_html(self):
+        attachment = pack_attachment(iter(["<html>", "附件", "</html>"]), REPORT_DATE, "html")
+
+        assert attachment.filename == "daily-report-2025-11-21.html"
+        assert attachment.content == "<html>附件</html>".encode("utf-8")
+        assert not attachment.compressed
+
+    def test_gzip(self):
+        attachment = pack_attachment(iter(["<html>", "附件" * 1000, "</html>"]), REPORT_DATE, "gzip")
+
+        assert attachment.filename == "daily-report-2025-11-21.html.gz"
+        assert attachment.compressed
+        assert gzip.decompress(attachment.content).decode("utf-8") == "<html>" + "附件" * 1000 + "</html>"
+
+    def test_zip(self):
+        attachment = pack_attachment(iter(["<html>", "附件", "</html>"]), REPORT_DATE, "zip")
+
+        assert attachment.filename == "daily-report-2025-11-21.zip"
+        with zipfile.ZipFile(io.BytesIO(attachment.content)) as zf:
+            assert zf.namelist() == ["daily-report-2025-11-21.html"]
+        assert unpack_attachment(attachment.content, "zip") == "<html>附件</html>"
+
+    def test_gzip_is_deterministic(self):
+        first = pack_attachment(iter(["<html>附件</html>"]), REPORT_DATE, "gzip")
+        second = pack_attachment(iter(["<html>附件</html>"]), REPORT_DATE, "gzip")
+
+        assert first.content == second.content
+
+    def test_resolve_format(self, monkeypatch):
+        monkeypatch.setattr("src.composer.attachment.settings.ATTACHMENT_FORMAT", "GZIP")
+
+        assert resolve_format() == "gzip"
+        assert resolve_format("zip") == "zip"
+        assert resolve_format("rar") == "html"
+
+
+@pytest.mark.parametrize("fmt", ["html", "gzip", "zip"])
+def test_build_attachment_file_matches_rendered_html(fmt):
+    """测试流式打包的附件与一次性渲染的 HTML 内容一致"""
+    sections = _sections(200)
+
+    attachment = build_attachment_file(REPORT_DATE, sections, fmt=fmt)
+
+    assert attachment.format == fmt
+    assert unpack_attachment(attachment.content, fmt) == build_attachment(REPORT_DATE, sections)
+
+
+def test_compressed_attachment_is_smaller():
+    """500 条附件：输出各格式体积，压缩后应明显小于原文"""
+    sections = _sections(500)
+
+    sizes = {fmt: len(build_attachment_file(REPORT_DATE, sections, fmt=fmt).content)
+             for fmt in ("html", "gzip", "zip")}
+
+    print(f"\n500 条附件体积: " + ", ".join(f"{fmt} {size / 1024:.1f}KB" for fmt, size in sizes.items()))
+    assert sizes["gzip"] < sizes["html"] / 4
+    assert sizes["zip"] < sizes["html"] / 4
+
+
+class TestReportAttachment:
+    """测试从报告读取附件"""
+
+    def test_html_report(self):
+        report = SimpleNamespace(report_date=REPORT_DATE, html_attachment="<html>附件</html>",
+                                 attachment_format="html", attachment_data=None)
+
+        attachment = get_report_attachment(report)
+
+        assert attachment.filename == "daily-report-2025-11-21.html"
+        assert attachment.content == "<html>附件</html>".encode("utf-8")
+        assert get_report_attachment_html(report) == "<html>附件</html>"
+
+    def test_gzip_report(self):
+        packed = pack_attachment(iter(["<html>附件</html>"]), REPORT_DATE, "gzip")
+        report = SimpleNamespace(report_date=REPORT_DATE, html_attachment=None,
+                                 attachment_format="gzip", attachment_data=packed.content)
+
+        attachment = get_report_attachment(report)
+
+        assert attachment.filename == "daily-report-2025-11-21.html.gz"
+        assert attachment.content == packed.content
+        assert get_report_attachment_html(report) == "<html>附件</html>"
+
+    def test_missing_attachment(self):
+        report = SimpleNamespace(report_date=REPORT_DATE, html_attachment=None,
+                                 attachment_format="html", attachment_data=None)
+
+        assert get_report_attachment(report) is None
+        assert get_report_attachment_html(report) is None
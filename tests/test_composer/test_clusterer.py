@@ -0,0 +1,89 @@
+"""
+跨文章事实聚类测试
+"""
+
+from datetime import datetime, timedelta
+
+from src.composer.clusterer import cluster_items
+from src.composer.scorer import calculate_score, section_and_sort
+
+
+def _item(item_id, fact, source_id, confidence=0.8, layer="金融政策监管"):
+    return {
+        "id": item_id,
+        "fact": fact,
+        "region": "国内",
+        "layer": layer,
+        "confidence": confidence,
+        "finance_relevance": 0.9,
+        "source_id": source_id,
+        "source_name": f"来源{source_id}",
+        "source_weight": 1.0,
+        "published_at": datetime.now() - timedelta(hours=2),
+    }
+
+
+ANNOUNCEMENT = "中国人民银行宣布下调金融机构存款准备金率0.5个百分点，释放长期资金约1万亿元"
+
+
+class TestClusterItems:
+    """测试聚类函数"""
+
+    def test_same_fact_from_many_sources_collapses(self):
+        """测试多家来源报道同一事实时只保留一个代表项"""
+        items = [_item(i, ANNOUNCEMENT + ("。" if i % 2 else ""), source_id=i, confidence=0.7) for i in range(10)]
+        items.append(_item(100, ANNOUNCEMENT, source_id=100, confidence=0.95))
+        items.append(_item(200, "某金融科技公司完成新一轮融资，估值超过50亿元", source_id=1))
+
+        result = cluster_items(items)
+
+        assert len(result) == 2
+        representative = next(r for r in result if r["cluster_size"] > 1)
+        assert representative["id"] == 100
+        assert representative["cluster_size"] == 11
+        assert representative["corroboration_count"] == 11
+        assert len(representative["corroborating_sources"]) == 10
+        assert sorted(representative["cluster_item_ids"]) == list(range(10))
+
+        single = next(r for r in result if r["id"] == 200)
+        assert single["corroboration_count"] == 1
+        assert single["corroborating_sources"] == []
+
+    def test_same_source_counts_once(self):
+        """测试同一来源的重复条目不计入佐证来源数"""
+        items = [_item(1, ANNOUNCEMENT, source_id=5), _item(2, ANNOUNCEMENT + "。", source_id=5)]
+
+        result = cluster_items(items)
+
+        assert len(result) == 1
+        assert result[0]["cluster_size"] == 2
+        assert result[0]["corroboration_count"] == 1
+
+    def test_empty(self):
+        assert cluster_items([]) == []
+
+    def test_corroborated_item_outranks_single_report(self):
+        """测试佐证数参与评分，使多来源事实排在单来源事实之前"""
+        items = [_item(i, ANNOUNCEMENT, source_id=i, confidence=0.8) for i in range(4)]
+        items.append(_item(99, "某银行发布季度财报，净利润同比增长6.2%，不良贷款率降至1.3%", source_id=9, confidence=0.82))
+
+        sections = section_and_sort(cluster_items(items))
+        ranked = sections["国内"]["金融政策监管"]
+
+        assert [item["id"] for item in ranked][0] != 99
+        assert ranked[0]["corroboration_count"] == 4
+        assert ranked[0]["score"] > calculate_score({**ranked[0], "corroboration_count": 1})
+        assert ranked[0]["score"] <= 1.0
+
+    def test_scales_to_a_day_of_items(self):
+        """测试数千条事实的聚类（近似线性）"""
+        items = []
+        for i in range(3000):
+            fact = f"第{i}号公告：某机构发布关于{i * 7919 % 10007}项业务的通知，涉及金额{i}亿元"
+            items.append(_item(i * 2, fact, source_id=i % 50))
+            items.append(_item(i * 2 + 1, fact + "。", source_id=(i + 1) % 50))
+
+        result = cluster_items(items)
+
+        assert len(result) == 3000
+        assert all(r["corroboration_count"] == 2 for r in result)
@@ -0,0 +1,172 @@
+"""
+日内快讯测试（SQLite 内存库）
+"""
+
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.composer.flash import get_unflashed_item_ids, select_flash_items
+from src.models.extraction import DailyItemScore
+from src.models.report import FlashReport
+from src.tasks.flash_tasks import _run_flash_report_core_logic
+from src.utils.time_utils import get_local_now_naive
+
+
+@pytest.fixture
+def db():
+    """只包含物化评分表和快讯表的 SQLite 内存库"""
+    engine = create_engine("sqlite://")
+    DailyItemScore.__table__.create(engine)
+    FlashReport.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def run_flash(db, monkeypatch):
+    """以内存库运行快讯核心逻辑（不读取系统设置中的评分权重）"""
+    monkeypatch.setattr("src.tasks.flash_tasks.get_db", lambda: iter([db]))
+    monkeypatch.setattr("src.tasks.flash_tasks.load_score_weights", lambda db: None)
+    return _run_flash_report_core_logic
+
+
+def _add_items(db, start_id, count, confidence=0.9, report_date=None):
+    now = get_local_now_naive()
+    for item_id in range(start_id, start_id + count):
+        db.add(DailyItemScore(
+            item_id=item_id,
+            article_id=item_id,
+            source_id=item_id % 3,
+            report_date=report_date or now.date(),
+            region="国内" if item_id % 2 else "国外",
+            layer="金融经济",
+            base_score=0.8,
+            confidence=confidence,
+            finance_relevance=0.9,
+            source_weight=1.0,
+            content_len=500,
+            published_at=now,
+            fact=f"快讯事实 {item_id} 第{item_id}号公告",
+            article_title=f"标题 {item_id}",
+            article_url=f"https://example.com/{item_id}",
+            source_name=f"来源{item_id % 3}",
+            created_at=now,
+            updated_at=now,
+        ))
+    db.commit()
+
+
+def test_flash_only_reads_today(db):
+    """测试快讯只读取当天的条目"""
+    today = get_local_now_naive().date()
+    _add_items(db, 1, 3, report_date=today - timedelta(days=1))
+    _add_items(db, 10, 2, report_date=today)
+
+    assert get_unflashed_item_ids(db, today) == [10, 11]
+
+
+def test_flash_only_includes_uncovered_items(db, run_flash):
+    """测试快讯只包含尚未进入快讯的新增项"""
+    _add_items(db, 1, 5)
+
+    first = run_flash(send=False)
+    assert first["status"] == "success"
+    assert (first["since_item_id"], first["until_item_id"]) == (0, 5)
+    assert first["total_items"] == 5
+
+    # 没有新增：跳过
+    assert run_flash(send=False)["reason"] == "no_new_items"
+
+    # 新增 2 条：只包含这 2 条
+    _add_items(db, 6, 2)
+    second = run_flash(send=False)
+    assert (second["since_item_id"], second["until_item_id"]) == (5, 7)
+    assert second["total_items"] == 2
+
+    flash = db.get(FlashReport, second["flash_id"])
+    assert "标题 6" in flash.html_body
+    assert "标题 1" not in flash.html_body
+
+
+def test_late_committed_lower_id_is_not_skipped(db, run_flash):
+    """测试并行抽取时 ID 较小但提交较晚的条目仍进入下一次快讯"""
+    _add_items(db, 1, 3)
+    _add_items(db, 5, 1)
+    assert run_flash(send=False)["total_items"] == 4
+
+    # ID 4 在 ID 5 之后才提交
+    _add_items(db, 4, 1)
+    late = run_flash(send=False)
+
+    assert late["total_items"] == 1
+    assert "标题 4" in db.get(FlashReport, late["flash_id"]).html_body
+
+
+def test_low_confidence_items_only_marked_covered(db, run_flash):
+    """测试新增项均被过滤时只标记覆盖，不生成快讯"""
+    _add_items(db, 1, 3, confidence=0.1)
+
+    result = run_flash(send=False)
+
+    assert result["reason"] == "no_items_to_show"
+    assert get_unflashed_item_ids(db, get_local_now_naive().date()) == []
+
+
+def test_send_exception_keeps_items_for_next_flash(db, run_flash):
+    """测试发送中途异常时不保存快讯，条目留给下一次快讯"""
+    _add_items(db, 1, 2)
+
+    with patch("src.tasks.flash_tasks.load_recipient_emails", return_value=["a@example.com"]), \
+         patch("src.tasks.flash_tasks._send_batches_async", new_callable=AsyncMock) as mock_send:
+        mock_send.side_effect = RuntimeError("SMTP 断开")
+        assert run_flash()["status"] == "error"
+
+    assert db.query(FlashReport).count() == 0
+    assert get_unflashed_item_ids(db, get_local_now_naive().date()) == [1, 2]
+
+
+def test_all_batches_failed_keeps_items_uncovered(db, run_flash):
+    """测试全部批次发送失败时记录快讯，但条目保持未覆盖"""
+    _add_items(db, 1, 2)
+
+    with patch("src.tasks.flash_tasks.load_recipient_emails", return_value=["a@example.com"]), \
+         patch("src.tasks.flash_tasks._send_batches_async", new_callable=AsyncMock) as mock_send:
+        mock_send.return_value = [{"status": "failed"}]
+        result = run_flash()
+
+    assert result["status"] == "failed"
+    assert db.get(FlashReport, result["flash_id"]).failed_batches == 1
+    assert get_unflashed_item_ids(db, get_local_now_naive().date()) == [1, 2]
+
+
+def test_flash_sends_without_attachment_or_delivery_log(db, run_flash):
+    """测试快讯复用分批发送路径，无附件且不写日报投递日志"""
+    _add_items(db, 1, 2)
+
+    with patch("src.tasks.flash_tasks.load_recipient_emails", return_value=["a@example.com"]), \
+         patch("src.tasks.flash_tasks._send_batches_async", new_callable=AsyncMock) as mock_send:
+        mock_send.return_value = [{"status": "ok"}]
+        result = run_flash()
+
+    assert result["sent_batches"] == 1
+    kwargs = mock_send.await_args.kwargs
+    assert kwargs["attachment_filename"] is None
+    assert kwargs["report_id"] is None
+    assert kwargs["subject"].startswith("金融快讯")
+
+
+def test_select_flash_items_caps_by_score():
+    items = [
+        {"region": "国内", "layer": "金融经济", "confidence": c, "finance_relevance": 1.0, "published_at": None}
+        for c in (0.6, 0.9, 0.7, 0.95)
+    ]
+
+    sections, shown = select_flash_items(items, max_items=2)
+
+    assert shown == 2
+    assert [i["confidence"] for i in sections["国内"]["金融经济"]] == [0.95, 0.9]
@@ -0,0 +1,65 @@
+"""
+报告模板渲染测试
+"""
+
+from datetime import date, datetime, timedelta
+
+from src.composer.builder import build_attachment, build_email_body, get_template_env
+
+REGIONS = ["国内", "国外"]
+LAYERS = ["金融政策监管", "金融经济", "金融大模型技术", "金融科技应用"]
+
+
+def _sections(total):
+    sections = {}
+    now = datetime.now()
+    for i in range(total):
+        region = REGIONS[i % 2]
+        layer = LAYERS[i % 4]
+        sections.setdefault(region, {}).setdefault(layer, []).append({
+            "article_url": f"https://example.com/{i}",
+            "article_title": f"文章标题 {i}",
+            "fact": f"某机构发布第{i}号公告，涉及金额{i}亿元。" * 3,
+            "opinion": "市场预计影响有限。" if i % 3 else "",
+            "region": region,
+            "layer": layer,
+            "confidence": 0.85,
+            "score": 0.8,
+            "source_name": f"来源{i % 20}",
+            "published_at": now - timedelta(minutes=i) if i % 50 else None,
+        })
+    return sections
+
+
+def test_template_env_is_cached_with_filters():
+    """测试 Jinja2 环境只创建一次，且已注册自定义过滤器"""
+    env = get_template_env()
+
+    assert get_template_env() is env
+    assert "format_datetime" in env.filters
+    assert env.bytecode_cache is not None
+    assert env.get_template("attachment.html") is env.get_template("attachment.html")
+
+
+def test_cached_env_renders_500_item_attachment_consistently():
+    """测试清空模板缓存后的首次渲染与复用环境的重复渲染结果一致（耗时见 scripts/bench_rendering.py）"""
+    sections = _sections(500)
+    report_date = date(2025, 11, 21)
+    env = get_template_env()
+
+    env.cache.clear()
+    first_html = build_attachment(report_date, sections)
+    html = build_attachment(report_date, sections)
+
+    assert get_template_env() is env
+    assert html == first_html
+    assert html.count("文章标题") == 500
+
+
+def test_email_body_renders_missing_published_at():
+    """测试缺少发布时间的条目也能渲染（format_datetime 过滤器）"""
+    sections = _sections(3)
+
+    html = build_email_body(date(2025, 11, 21), sections)
+
+    assert "文章标题 0" in html
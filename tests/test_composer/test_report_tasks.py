@@ -7,6 +7,8 @@ import pytest
 from datetime import date, datetime, timedelta
 from unittest.mock import patch, MagicMock, call
 
+from src.composer.attachment import AttachmentFile
+
 # 直接导入核心逻辑函数（不是Celery任务包装的版本）
 from src.tasks.report_tasks import (
     _build_report_core_logic,
@@ -23,7 +25,7 @@ class TestBuildReportTaskLogic:
     @patch("src.tasks.report_tasks.select_topn")
     @patch("src.tasks.report_tasks.generate_overview")
     @patch("src.tasks.report_tasks.build_email_body")
-    @patch("src.tasks.report_tasks.build_attachment")
+    @patch("src.tasks.report_tasks.build_attachment_file")
     @patch("src.tasks.report_tasks.build_metadata")
     @patch("src.tasks.report_tasks.get_sections_statistics")
     def test_build_report_with_items(
@@ -65,7 +67,7 @@ class TestBuildReportTaskLogic:
 
         mock_generate_overview.return_value = "测试摘要"
         mock_build_email_body.return_value = "<html>正文</html>"
-        mock_build_attachment.return_value = "<html>附件</html>"
+        mock_build_attachment.return_value = AttachmentFile("daily-report-2025-11-05.html", "<html>附件</html>".encode("utf-8"))
 
         mock_metadata = {
             "total_items": 2,
@@ -107,7 +109,7 @@ class TestBuildReportTaskLogic:
     @patch("src.tasks.report_tasks.get_db")
     @patch("src.tasks.report_tasks.filter_items")
     @patch("src.tasks.report_tasks.build_email_body")
-    @patch("src.tasks.report_tasks.build_attachment")
+    @patch("src.tasks.report_tasks.build_attachment_file")
     @patch("src.tasks.report_tasks.build_metadata")
     @patch("src.tasks.report_tasks.get_sections_statistics")
     def test_build_report_empty_items(
@@ -128,7 +130,7 @@ class TestBuildReportTaskLogic:
         mock_filter_items.return_value = []
 
         mock_build_email_body.return_value = "<html>空报告</html>"
-        mock_build_attachment.return_value = "<html>空附件</html>"
+        mock_build_attachment.return_value = AttachmentFile("daily-report.html", "<html>空附件</html>".encode("utf-8"))
 
         mock_metadata = {
             "total_items": 0,
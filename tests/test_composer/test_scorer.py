@@ -4,16 +4,27 @@
 
 import pytest
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
 from src.composer.scorer import (
+    build_score_row,
     calculate_score,
     filter_items,
     section_and_sort,
     select_topn,
     get_all_items_sorted,
     get_sections_statistics,
+    sync_item_scores,
 )
+from src.composer.vector_scorer import ScoreWeights
+from src.models.article import Article, ProcessingStatus
+from src.models.extraction import DailyItemScore, ExtractionItem, Layer, Region
+from src.models.source import Source
+from src.utils.time_utils import to_local
 
 
 class TestCalculateScore:
@@ -194,6 +205,37 @@ class TestSectionAndSort:
 
         assert sections == {}
 
+    def test_section_and_sort_keeps_global_order(self):
+        """测试一次排序同时给出分区内顺序和全局顺序，且区域顺序与输入一致"""
+        items = [
+            {"region": "国外", "layer": "金融经济", "confidence": conf, "published_at": None, "source_weight": 1.0}
+            for conf in (0.5, 0.9)
+        ] + [
+            {"region": "国内", "layer": "金融经济", "confidence": conf, "published_at": None, "source_weight": 1.0}
+            for conf in (0.7, 1.0, 0.6)
+        ]
+
+        sections = section_and_sort(items)
+
+        assert list(sections) == ["国外", "国内"]
+        assert [i["confidence"] for i in sections["国内"]["金融经济"]] == [1.0, 0.7, 0.6]
+        assert [i["confidence"] for i in get_all_items_sorted(sections)] == [1.0, 0.9, 0.7, 0.6, 0.5]
+
+    def test_limit_attachment_items_uses_global_order(self):
+        """测试附件截断直接取全局顺序前缀"""
+        from src.composer.builder import _limit_attachment_items
+
+        items = [
+            {"region": region, "layer": "金融经济", "confidence": conf, "published_at": None, "source_weight": 1.0}
+            for region, conf in (("国内", 0.6), ("国外", 0.9), ("国内", 0.8), ("国外", 0.5))
+        ]
+        sections = section_and_sort(items)
+
+        limited = _limit_attachment_items(sections, 2)
+
+        assert [i["confidence"] for i in limited["国外"]["金融经济"]] == [0.9]
+        assert [i["confidence"] for i in limited["国内"]["金融经济"]] == [0.8]
+
 
 class TestSelectTopN:
     """测试 TopN 筛选"""
@@ -341,6 +383,140 @@ class TestFilterItems:
         # 实际测试需要使用 pytest fixtures 和测试数据库
         pass
 
+    def test_filter_items_reads_materialized_rows(self):
+        """测试从物化表读取窄行并转换为项字典"""
+        row = MagicMock()
+        row._mapping = dict(
+            id=7, article_id=3, article_title="标题", article_url="https://example.com/a",
+            fact="事实", opinion=None, region="国内", layer="金融经济", evidence_span=None,
+            confidence=0.9, finance_relevance=0.8, source_id=2, source_name="来源",
+            source_weight=1.0, published_at=datetime.now(), content_len=500, base_score=0.8,
+        )
+        db = MagicMock()
+        db.query.return_value.filter.return_value.scalar.return_value = 1
+        db.query.return_value.select_from.return_value.join.return_value.join.return_value \
+            .filter.return_value.scalar.return_value = 1
+        db.query.return_value.filter.return_value.order_by.return_value.yield_per.return_value = [row]
+
+        with patch("src.composer.scorer.refresh_daily_scores") as mock_refresh:
+            items = filter_items(db, datetime(2025, 11, 21).date())
+
+        mock_refresh.assert_not_called()
+        assert items[0]["id"] == 7
+        assert items[0]["opinion"] == ""
+        assert items[0]["base_score"] == 0.8
+
+    def test_filter_items_rebuilds_empty_day(self):
+        """测试当日物化表为空时从源表重建"""
+        db = MagicMock()
+        db.query.return_value.filter.return_value.scalar.return_value = 0
+        db.query.return_value.select_from.return_value.join.return_value.join.return_value \
+            .filter.return_value.scalar.return_value = 2
+        db.query.return_value.filter.return_value.order_by.return_value.yield_per.return_value = []
+
+        with patch("src.composer.scorer.refresh_daily_scores") as mock_refresh:
+            assert filter_items(db, datetime(2025, 11, 21).date()) == []
+
+        mock_refresh.assert_called_once()
+
+    def test_filter_items_backfills_partially_populated_day(self):
+        """测试上线当天只有部分文章写入了物化行时，从源表重建后包含全部抽取项"""
+        engine = create_engine("sqlite://")
+        for model in (Source, Article, ExtractionItem, DailyItemScore):
+            model.__table__.create(engine)
+        db = sessionmaker(bind=engine)()
+        source = Source(id=1, name="来源", type="rss", url="https://example.com/rss")
+        db.add(source)
+        items = []
+        for article_id in (1, 2):
+            article = Article(
+                id=article_id, source_id=1, title=f"标题{article_id}", url=f"https://example.com/{article_id}",
+                fetched_at=datetime(2025, 11, 21, 8 + article_id), content_len=500,
+                processing_status=ProcessingStatus.DONE,
+            )
+            item = ExtractionItem(
+                article_id=article_id, fact=f"事实{article_id}", region=Region.DOMESTIC,
+                layer=Layer.FINANCIAL_ECONOMY, confidence=0.9, finance_relevance=0.9,
+            )
+            db.add_all([article, item])
+            db.flush()
+            items.append((article, item))
+        # 上线前抽取的文章 1 没有物化行，上线后抽取的文章 2 由 sync_item_scores 写入
+        article, item = items[1]
+        sync_item_scores(db, article, [item], source=source, weights=ScoreWeights())
+        db.commit()
+
+        with patch("src.composer.scorer.load_score_weights", return_value=ScoreWeights()):
+            filtered = filter_items(db, datetime(2025, 11, 21).date())
+
+        assert sorted(i["fact"] for i in filtered) == ["事实1", "事实2"]
+        assert db.query(DailyItemScore).count() == 2
+        db.close()
+
+
+class TestMaterializedScores:
+    """测试每日评分物化表的行构造与增量维护"""
+
+    def _objects(self):
+        item = SimpleNamespace(
+            id=11, fact="央行宣布降准", opinion=None, region=SimpleNamespace(value="国内"),
+            layer=SimpleNamespace(value="金融政策监管"), evidence_span=None,
+            confidence=0.8, finance_relevance=None,
+        )
+        article = SimpleNamespace(
+            id=5, title="标题", url="https://example.com/a", published_at=datetime(2025, 11, 21, 8),
+            fetched_at=datetime(2025, 11, 21, 9, 30), content_len=800,
+        )
+        source = SimpleNamespace(id=2, name="来源")
+        return item, article, source
+
+    def test_build_score_row(self):
+        """测试行字段与静态评分"""
+        item, article, source = self._objects()
+
+        row = build_score_row(item, article, source)
+
+        assert row["report_date"] == datetime(2025, 11, 21).date()
+        assert row["region"] == "国内"
+        assert row["finance_relevance"] == 1.0
+        assert row["base_score"] == pytest.approx(0.4 * 0.8 + 0.2 + 0.3)
+
+    def test_base_score_matches_full_score(self):
+        """测试使用物化 base_score 与现场计算的综合评分一致"""
+        item, article, source = self._objects()
+        row = build_score_row(item, article, source)
+        now = to_local(datetime(2025, 11, 21, 12))
+
+        materialized = calculate_score(row, now)
+        row.pop("base_score")
+
+        assert materialized == pytest.approx(calculate_score(row, now))
+
+    def test_base_score_follows_score_weights(self):
+        """测试静态评分和综合评分按配置的评分权重计算"""
+        item, article, source = self._objects()
+        weights = ScoreWeights(confidence=1.0, recency=0.0, authority=0.0, finance_relevance=0.0)
+
+        row = build_score_row(item, article, source, weights)
+
+        assert row["base_score"] == pytest.approx(0.8)
+        assert calculate_score(row, to_local(datetime(2025, 11, 21, 12)), weights) == pytest.approx(0.8)
+
+    def test_sync_item_scores_inserts_and_updates(self):
+        """测试增量写入：新项插入，已有项原地更新"""
+        item, article, source = self._objects()
+        other = SimpleNamespace(**{**vars(item), "id": 12, "confidence": 0.6})
+        existing = SimpleNamespace(item_id=12, base_score=0.0)
+        db = MagicMock()
+        db.query.return_value.filter.return_value = [existing]
+
+        count = sync_item_scores(db, article, [item, other], source=source)
+
+        assert count == 2
+        db.add.assert_called_once()
+        assert db.add.call_args[0][0].item_id == 11
+        assert existing.base_score == pytest.approx(0.4 * 0.6 + 0.2 + 0.3)
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
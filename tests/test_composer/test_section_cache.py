@@ -0,0 +1,173 @@
+"""
+报告分区增量构建测试（SQLite 内存库 + 离线 Mock Provider）
+"""
+
+import copy
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.composer.builder import build_attachment, build_email_body
+from src.composer.scorer import select_topn
+from src.composer.section_cache import build_sections_incremental, section_fingerprint
+from src.models.report import ReportSectionCache
+from src.nlp.mock_provider import LATENCY_FIXED, build_mock_router
+from src.nlp.provider_router import set_provider_router
+
+REPORT_DATE = date(2025, 11, 21)
+REGIONS = ["国内", "国外"]
+LAYERS = ["金融政策监管", "金融经济", "金融大模型技术", "金融科技应用"]
+
+
+def _sections(items_per_section=3):
+    published_at = datetime(2025, 11, 21, 8, 0)
+    return {
+        region: {
+            layer: [
+                {
+                    "id": f"{region}{layer}{i}",
+                    "article_url": f"https://example.com/{region}/{layer}/{i}",
+                    "article_title": f"{region}{layer}标题{i}",
+                    "fact": f"{region}{layer}事实{i}",
+                    "opinion": "",
+                    "region": region,
+                    "layer": layer,
+                    "confidence": 0.9,
+                    "score": 0.8,
+                    "source_name": "来源",
+                    "published_at": published_at - timedelta(minutes=i),
+                }
+                for i in range(items_per_section)
+            ]
+            for layer in LAYERS
+        }
+        for region in REGIONS
+    }
+
+
+@pytest.fixture
+def db():
+    """只包含分区缓存表的 SQLite 内存库"""
+    engine = create_engine("sqlite://")
+    ReportSectionCache.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def router(monkeypatch):
+    """注入 Mock 路由器，并屏蔽用量落库"""
+    router = build_mock_router(latency_ms=0, latency_dist=LATENCY_FIXED, seed=1)
+    set_provider_router(router)
+    monkeypatch.setattr(
+        "src.composer.llm_report_generator.get_usage_recorder",
+        lambda: SimpleNamespace(record=lambda **kw: None),
+    )
+    yield router
+    set_provider_router(None)
+
+
+def _build(db, sections, **kwargs):
+    result = build_sections_incremental(db, REPORT_DATE, sections, select_topn(sections, 2), use_llm=True, **kwargs)
+    db.commit()
+    return result
+
+
+def test_rebuild_only_regenerates_changed_sections(db, router):
+    """测试重复构建只对输入变化的分区调用 LLM"""
+    sections = _sections()
+
+    first = _build(db, sections)
+    assert len(first.rebuilt) == 8
+    assert router.providers[0].stats.calls == 8
+    assert db.query(ReportSectionCache).count() == 8
+
+    # 输入不变：全部复用，不再调用 LLM
+    second = _build(db, copy.deepcopy(sections))
+    assert second.rebuilt == []
+    assert len(second.reused) == 8
+    assert router.providers[0].stats.calls == 8
+    assert second.section_reports == first.section_reports
+
+    # 补充一条抽取：只有该分区重新生成
+    updated = copy.deepcopy(sections)
+    updated["国内"]["金融经济"].append(dict(updated["国内"]["金融经济"][0], id="late", fact="新增事实"))
+    third = _build(db, updated)
+    assert third.rebuilt == ["国内-金融经济"]
+    assert router.providers[0].stats.calls == 9
+
+
+def test_score_change_keeps_cache(db, router):
+    """测试仅评分（新近度）变化时不重新生成"""
+    sections = _sections()
+    _build(db, sections)
+
+    rescored = copy.deepcopy(sections)
+    for layers in rescored.values():
+        for items in layers.values():
+            for item in items:
+                item["score"] -= 0.01
+
+    assert _build(db, rescored).rebuilt == []
+
+
+def test_full_rebuild_and_removed_sections(db, router):
+    """测试强制全量重建，以及已不存在的分区缓存被清理"""
+    sections = _sections()
+    _build(db, sections)
+
+    assert len(_build(db, sections, full_rebuild=True).rebuilt) == 8
+    assert router.providers[0].stats.calls == 16
+
+    del sections["国外"]
+    _build(db, sections)
+    assert db.query(ReportSectionCache).count() == 4
+
+
+def test_cached_fragments_render_same_html(db, router):
+    """测试复用缓存片段拼出的正文/附件与整体渲染一致"""
+    sections = _sections()
+    sections_topn = select_topn(sections, 2)
+    _build(db, sections)
+
+    cached = _build(db, sections)
+
+    assert build_email_body(REPORT_DATE, sections_topn, cached.section_reports, section_html=cached.email_html) == \
+        build_email_body(REPORT_DATE, sections_topn, cached.section_reports)
+    assert build_attachment(REPORT_DATE, sections, section_html=cached.attachment_html) == \
+        build_attachment(REPORT_DATE, sections)
+
+
+def test_changed_attachment_sections_render_lazily(db, router):
+    """测试重新生成的分区不预先渲染附件片段（附件中流式生成），但片段写入缓存供下次复用"""
+    sections = _sections()
+
+    first = _build(db, sections)
+
+    assert first.attachment_html == {}
+    assert all(row.attachment_html for row in db.query(ReportSectionCache))
+    assert build_attachment(REPORT_DATE, sections, section_html=first.attachment_html) == \
+        build_attachment(REPORT_DATE, sections)
+
+    updated = copy.deepcopy(sections)
+    updated["国内"]["金融经济"].append(dict(updated["国内"]["金融经济"][0], id="late", fact="新增事实"))
+    second = _build(db, updated)
+
+    assert "金融经济" not in second.attachment_html["国内"]
+    assert sum(len(layers) for layers in second.attachment_html.values()) == 7
+    assert "新增事实" in build_attachment(REPORT_DATE, updated, section_html=second.attachment_html)
+
+
+def test_fingerprint_depends_on_content_and_order():
+    items = _sections()["国内"]["金融经济"]
+
+    base = section_fingerprint(items, 2, 3, True)
+
+    assert section_fingerprint(copy.deepcopy(items), 2, 3, True) == base
+    assert section_fingerprint(list(reversed(items)), 2, 3, True) != base
+    assert section_fingerprint(items, 2, 3, False) != base
+    assert section_fingerprint(items, 3, 3, True) != base
@@ -0,0 +1,94 @@
+"""
+分区报告并发生成测试（使用离线 Mock Provider）
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.composer import builder
+from src.nlp.mock_provider import LATENCY_FIXED, build_mock_router
+from src.nlp.provider_router import set_provider_router
+
+REGIONS = ["国内", "国外"]
+LAYERS = ["金融政策监管", "金融经济", "金融大模型技术", "金融科技应用"]
+
+
+def _sections(items_per_section=3):
+    return {
+        region: {
+            layer: [
+                {"region": region, "layer": layer, "fact": f"{region}{layer}事实{i}", "opinion": "",
+                 "confidence": 0.9, "score": 0.8}
+                for i in range(items_per_section)
+            ]
+            for layer in LAYERS
+        }
+        for region in REGIONS
+    }
+
+
+@pytest.fixture
+def mock_llm(monkeypatch):
+    """注入固定延迟的 Mock 路由器，并屏蔽用量落库"""
+    def install(latency_ms):
+        router = build_mock_router(latency_ms=latency_ms, latency_dist=LATENCY_FIXED, seed=1)
+        set_provider_router(router)
+        return router
+
+    monkeypatch.setattr(
+        "src.composer.llm_report_generator.get_usage_recorder",
+        lambda: SimpleNamespace(record=lambda **kw: None),
+    )
+    yield install
+    set_provider_router(None)
+
+
+def test_sections_are_generated_concurrently(mock_llm, monkeypatch):
+    """测试 8 个分区在同一事件循环中并发生成"""
+    router = mock_llm(latency_ms=200)
+    monkeypatch.setattr(builder.settings, "REPORT_LLM_MAX_INFLIGHT", 8)
+    monkeypatch.setattr(builder.settings, "REPORT_LLM_DEADLINE_SEC", 30)
+
+    start = time.perf_counter()
+    reports = builder._generate_section_reports_with_llm(_sections())
+    elapsed = time.perf_counter() - start
+
+    assert sum(len(layers) for layers in reports.values()) == 8
+    assert router.providers[0].stats.calls == 8
+    # 串行需要约 1.6 秒
+    assert elapsed < 1.0
+
+
+def test_chunked_section_runs_sub_reports_concurrently(mock_llm, monkeypatch):
+    """测试超长分区的子报告并发生成后再汇总"""
+    router = mock_llm(latency_ms=200)
+    monkeypatch.setattr(builder.settings, "REPORT_LLM_MAX_INFLIGHT", 8)
+    monkeypatch.setattr(builder.settings, "REPORT_SECTION_MAX_ITEMS_PER_CHUNK", 2)
+    monkeypatch.setattr(builder.settings, "REPORT_LLM_MODEL_LIMIT", 10)
+
+    sections = {"国内": {"金融经济": _sections(items_per_section=8)["国内"]["金融经济"]}}
+
+    start = time.perf_counter()
+    reports = builder._generate_section_reports_with_llm(sections)
+    elapsed = time.perf_counter() - start
+
+    assert reports["国内"]["金融经济"]
+    # 4 个子报告 + 1 次汇总
+    assert router.providers[0].stats.calls == 5
+    # 子报告并发（约 0.2s）+ 汇总（约 0.2s），串行约 1.0s
+    assert elapsed < 0.8
+
+
+def test_deadline_falls_back_to_cards(mock_llm, monkeypatch):
+    """测试超过总时限的分区被取消，不生成报告"""
+    mock_llm(latency_ms=2000)
+    monkeypatch.setattr(builder.settings, "REPORT_LLM_DEADLINE_SEC", 0.2)
+
+    start = time.perf_counter()
+    reports = builder._generate_section_reports_with_llm(_sections())
+    elapsed = time.perf_counter() - start
+
+    assert reports == {"国内": {}, "国外": {}}
+    assert elapsed < 1.0
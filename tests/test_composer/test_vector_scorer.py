@@ -0,0 +1,115 @@
+"""
+向量化评分器测试
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.composer.scorer import calculate_score
+from src.composer.vector_scorer import ScoreWeights, load_score_weights, score_items
+from src.utils.time_utils import get_local_now
+
+
+def _random_items(count, seed=0):
+    rng = random.Random(seed)
+    now = datetime.now()
+    items = []
+    for _ in range(count):
+        item = {
+            "confidence": rng.uniform(0.3, 1.0),
+            "source_weight": rng.choice([0.5, 1.0, 1.5]),
+            "finance_relevance": rng.uniform(0.2, 1.0),
+        }
+        roll = rng.random()
+        if roll < 0.1:
+            item["published_at"] = None
+        elif roll < 0.2:
+            item["published_at"] = datetime.now(timezone.utc) - timedelta(hours=rng.uniform(0, 30))
+        else:
+            item["published_at"] = now - timedelta(hours=rng.uniform(0, 30))
+        if rng.random() < 0.2:
+            item["corroboration_count"] = rng.randint(2, 12)
+        items.append(item)
+    return items
+
+
+class TestScoreItems:
+    """测试向量化评分"""
+
+    def test_matches_calculate_score_with_default_weights(self):
+        """测试默认权重下与逐项 calculate_score 结果一致"""
+        items = _random_items(500)
+        current_time = get_local_now()
+
+        result = score_items(items, current_time=current_time)
+
+        expected = [calculate_score(item, current_time) for item in items]
+        assert result.total.tolist() == pytest.approx(expected)
+
+    def test_custom_weights(self):
+        """测试自定义权重"""
+        items = [{"confidence": 0.8, "source_weight": 1.0, "finance_relevance": 0.5, "published_at": None}]
+        weights = ScoreWeights(confidence=1.0, recency=0.0, authority=0.0, finance_relevance=0.0)
+
+        result = score_items(items, weights)
+
+        assert result.total[0] == pytest.approx(0.8)
+
+    def test_breakdown(self):
+        """测试单项评分分解"""
+        items = [{"confidence": 0.5, "source_weight": 2.0, "finance_relevance": 1.0,
+                  "published_at": None, "corroboration_count": 8}]
+
+        breakdown = score_items(items).breakdown(0)
+
+        assert breakdown["authority"] == 1.0
+        assert breakdown["recency"] == 0.5
+        assert breakdown["corroboration"] == pytest.approx(1.0)
+        assert breakdown["confidence_weighted"] == pytest.approx(0.2)
+        assert breakdown["total"] == pytest.approx(min(1.0, 0.2 + 0.05 + 0.2 + 0.3 + 0.1))
+
+    def test_empty(self):
+        assert len(score_items([])) == 0
+
+
+class TestScoreWeights:
+    """测试评分权重加载"""
+
+    def test_from_dict_ignores_invalid_values(self):
+        weights = ScoreWeights.from_dict({"confidence": "0.5", "recency": -1, "authority": "abc", "unknown": 1})
+
+        assert weights.confidence == 0.5
+        assert weights.recency == 0.1
+        assert weights.authority == 0.2
+
+    def test_validate_rejects_negative_and_all_zero(self):
+        with pytest.raises(ValueError):
+            ScoreWeights(confidence=-0.1).validate()
+        with pytest.raises(ValueError):
+            ScoreWeights(confidence=0, recency=0, authority=0, finance_relevance=0, corroboration=0.1).validate()
+        ScoreWeights(confidence=0, recency=0, authority=0, finance_relevance=1.0).validate()
+
+    def test_from_dict_all_zero_uses_defaults(self):
+        weights = ScoreWeights.from_dict({"confidence": 0, "recency": 0, "authority": 0, "finance_relevance": 0})
+
+        assert weights == ScoreWeights()
+
+    def test_load_score_weights_from_system_setting(self):
+        db = MagicMock()
+        db.query.return_value.filter.return_value.first.return_value = MagicMock(
+            value_json={"finance_relevance": 0.6}
+        )
+
+        weights = load_score_weights(db)
+
+        assert weights.finance_relevance == 0.6
+        assert weights.confidence == 0.4
+
+    def test_load_score_weights_defaults_when_missing(self):
+        db = MagicMock()
+        db.query.return_value.filter.return_value.first.return_value = None
+
+        assert load_score_weights(db) == ScoreWeights()
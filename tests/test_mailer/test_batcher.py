@@ -4,11 +4,14 @@
 
 import pytest
 import asyncio
+import threading
 import time
+from unittest.mock import MagicMock
 
 from src.mailer.batcher import (
     batch_recipients,
     RateLimiter,
+    RedisRateLimiter,
     validate_email,
     filter_valid_recipients,
     remove_duplicates,
@@ -136,6 +139,88 @@ class TestRateLimiter:
         # 重置后不应该等待
         assert elapsed < 0.1
 
+    @pytest.mark.asyncio
+    async def test_rate_limiter_shared_by_concurrent_senders(self):
+        """测试多个并发协程共享限速器时总速率不超限"""
+        limiter = RateLimiter(rate_per_sec=10.0)  # 0.1秒间隔
+        grants = []
+
+        async def sender():
+            for _ in range(2):
+                await limiter.throttle()
+                grants.append(time.monotonic())
+
+        await asyncio.gather(*(sender() for _ in range(3)))
+
+        # 6 次放行应该至少花费 5 * 0.1 秒，且相邻放行间隔不小于间隔
+        grants.sort()
+        assert grants[-1] - grants[0] >= 0.49
+        assert min(b - a for a, b in zip(grants, grants[1:])) >= 0.09
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_burst(self):
+        """测试桶容量内的突发不等待"""
+        limiter = RateLimiter(rate_per_sec=1.0, burst=3)
+
+        start_time = time.time()
+        for _ in range(3):
+            await limiter.throttle()
+
+        assert time.time() - start_time < 0.1
+
+
+class TestRedisRateLimiter:
+    """测试跨 worker 共享的频率限制器"""
+
+    @pytest.mark.asyncio
+    async def test_waits_for_reserved_slot(self, monkeypatch):
+        """测试按 Redis 预约的时隙等待"""
+        script = MagicMock(side_effect=[0, 250])
+        redis_client = MagicMock()
+        redis_client.register_script.return_value = script
+        sleeps = []
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+
+        monkeypatch.setattr("src.mailer.batcher.asyncio.sleep", fake_sleep)
+        limiter = RedisRateLimiter(rate_per_sec=4.0, redis_client=redis_client)
+
+        await limiter.throttle()
+        await limiter.throttle()
+
+        assert sleeps == [0.25]
+        assert script.call_args.kwargs["args"][0] == 250
+        redis_client.register_script.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_reservation_does_not_block_event_loop(self):
+        """测试 Redis 预约在线程池中执行，不占用事件循环线程"""
+        loop_thread = threading.get_ident()
+        script_threads = []
+        redis_client = MagicMock()
+        redis_client.register_script.return_value = MagicMock(
+            side_effect=lambda **kwargs: script_threads.append(threading.get_ident()) or 0
+        )
+        limiter = RedisRateLimiter(rate_per_sec=10.0, redis_client=redis_client)
+
+        await limiter.throttle()
+
+        assert script_threads and script_threads[0] != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_local_bucket(self):
+        """测试 Redis 不可用时退回进程内限速"""
+        redis_client = MagicMock()
+        redis_client.register_script.side_effect = ConnectionError("redis down")
+        limiter = RedisRateLimiter(rate_per_sec=10.0, redis_client=redis_client)
+
+        start_time = time.time()
+        await limiter.throttle()
+        await limiter.throttle()
+
+        assert time.time() - start_time >= 0.09
+
 
 class TestValidateEmail:
     """测试邮箱验证"""
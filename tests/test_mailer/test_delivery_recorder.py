@@ -0,0 +1,176 @@
+"""
+投递日志缓冲写入测试（SQLite 内存库）
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.mailer.delivery_recorder import DeliveryRecorder, refresh_delivery_summary
+from src.models.delivery import DeliveryLog, DeliveryStatus, DeliverySummary, ReportRecipient
+from src.models.report import Report
+
+
+@pytest.fixture
+def db():
+    """包含报告、收件人、投递日志和投递汇总表的 SQLite 内存库"""
+    engine = create_engine("sqlite://")
+    for model in (Report, ReportRecipient, DeliveryLog, DeliverySummary):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Report(id=1, report_date=date(2025, 11, 26), html_body="<p>正文</p>"))
+    session.commit()
+
+    # 统计提交次数
+    session.commits = 0
+    event.listen(session, "after_commit", lambda s: setattr(s, "commits", s.commits + 1))
+    yield session
+    session.close()
+
+
+def _manifest(db, count):
+    logs = [
+        DeliveryLog(
+            report_id=1,
+            batch_no=i,
+            recipients_snapshot={"to": [f"user{i}@test.com"], "bcc": []},
+            status=DeliveryStatus.PENDING,
+        )
+        for i in range(1, count + 1)
+    ]
+    db.add_all(logs)
+    db.commit()
+    return logs
+
+
+def _batch(log):
+    return {"to": log.recipients_snapshot["to"], "bcc": [f"bcc{log.batch_no}@test.com"]}
+
+
+def test_records_are_flushed_in_bulk(db):
+    """测试批次结果按刷新粒度批量写入，而不是逐批提交"""
+    logs = _manifest(db, 5)
+    db.commits = 0
+    recorder = DeliveryRecorder(db, report_id=1, flush_batches=2, flush_interval_sec=3600)
+
+    for log in logs:
+        recorder.record(log.batch_no, _batch(log), {"status": "ok", "elapsed_ms": 10}, log=log)
+
+    assert recorder.flush_count == 2
+    assert recorder.pending == 1
+
+    recorder.close()
+
+    assert recorder.flush_count == 3
+    # 3 次批量写入 + 1 次物化汇总
+    assert db.commits == 4
+    statuses = [row.status for row in db.query(DeliveryLog).order_by(DeliveryLog.batch_no)]
+    assert statuses == [DeliveryStatus.OK] * 5
+    assert db.query(DeliveryLog).count() == 5
+
+
+def test_record_without_manifest_inserts_rows(db):
+    """测试没有批次清单行时新增日志行"""
+    recorder = DeliveryRecorder(db, report_id=1, flush_batches=10)
+
+    recorder.record(1, {"to": ["a@test.com"], "bcc": []}, {"status": "failed", "error": "554 rejected"})
+    recorder.close()
+
+    log = db.query(DeliveryLog).one()
+    assert (log.batch_no, log.status, log.error_message) == (1, DeliveryStatus.FAILED, "554 rejected")
+
+
+def test_blacklist_is_applied_with_flush(db):
+    """测试硬退信邮箱随日志一起批量加入黑名单"""
+    db.add_all([ReportRecipient(email=f"user{i}@test.com") for i in range(3)])
+    db.commit()
+    recorder = DeliveryRecorder(db, report_id=1, flush_batches=10)
+
+    recorder.blacklist(["user0@test.com", "user2@test.com"])
+    recorder.blacklist(["user0@test.com"])
+    assert db.query(ReportRecipient).filter(ReportRecipient.enabled.is_(False)).count() == 0
+
+    recorder.close()
+
+    disabled = db.query(ReportRecipient.email).filter(ReportRecipient.enabled.is_(False)).order_by(ReportRecipient.email)
+    assert [email for (email,) in disabled] == ["user0@test.com", "user2@test.com"]
+
+
+def test_close_materializes_summary(db):
+    """测试发送结束后物化投递汇总"""
+    logs = _manifest(db, 4)
+    recorder = DeliveryRecorder(db, report_id=1)
+    recorder.record(1, _batch(logs[0]), {"status": "ok", "elapsed_ms": 100}, log=logs[0])
+    recorder.record(2, _batch(logs[1]), {
+        "status": "partial",
+        "elapsed_ms": 300,
+        "refused": {"bcc2@test.com": "550 5.1.1 User unknown"},
+    }, log=logs[1])
+    recorder.record(3, _batch(logs[2]), {"status": "failed", "elapsed_ms": 50, "error": "421 busy"}, log=logs[2])
+
+    summary = recorder.close()
+
+    assert summary.send_round == 1
+    assert (summary.total_batches, summary.ok_batches, summary.partial_batches) == (4, 1, 1)
+    assert (summary.failed_batches, summary.pending_batches) == (1, 1)
+    assert (summary.total_recipients, summary.refused_recipients) == (4, 1)
+    assert summary.delivered_recipients == 3
+    assert (summary.total_duration_ms, summary.max_duration_ms) == (450, 300)
+    assert summary.last_error == "421 busy"
+
+    # 再次物化时更新同一行
+    refresh_delivery_summary(db, 1)
+    db.commit()
+    assert db.query(DeliverySummary).count() == 1
+
+
+def test_failed_flush_keeps_rows_for_next_flush(db, monkeypatch):
+    """测试提交失败时缓冲的批次结果和黑名单保留，下一次刷新时写入"""
+    logs = _manifest(db, 3)
+    db.add(ReportRecipient(email="user1@test.com"))
+    db.commit()
+    recorder = DeliveryRecorder(db, report_id=1, flush_batches=2, flush_interval_sec=3600)
+
+    real_commit = db.commit
+    failures = iter([RuntimeError("db down")])
+
+    def flaky_commit():
+        error = next(failures, None)
+        if error is not None:
+            raise error
+        real_commit()
+
+    monkeypatch.setattr(db, "commit", flaky_commit)
+
+    recorder.blacklist(["user1@test.com"])
+    recorder.record(1, _batch(logs[0]), {"status": "ok"}, log=logs[0])
+    recorder.record(2, _batch(logs[1]), {"status": "ok"}, log=logs[1])
+
+    assert recorder.flush_count == 0
+    assert recorder.pending == 2
+    assert db.query(DeliveryLog).filter(DeliveryLog.status == DeliveryStatus.PENDING).count() == 3
+
+    recorder.record(3, _batch(logs[2]), {"status": "ok"}, log=logs[2])
+    recorder.close()
+
+    statuses = [row.status for row in db.query(DeliveryLog).order_by(DeliveryLog.batch_no)]
+    assert statuses == [DeliveryStatus.OK] * 3
+    assert db.query(ReportRecipient).one().enabled is False
+
+
+def test_close_raises_when_results_cannot_be_written(db, monkeypatch):
+    """测试发送结束时仍无法写入，不把发送当作完成"""
+    logs = _manifest(db, 1)
+    recorder = DeliveryRecorder(db, report_id=1, flush_batches=10)
+    recorder.record(1, _batch(logs[0]), {"status": "ok"}, log=logs[0])
+
+    def failing_commit():
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(db, "commit", failing_commit)
+
+    with pytest.raises(RuntimeError):
+        recorder.close()
+    assert recorder.pending == 1
@@ -0,0 +1,146 @@
+"""
+可续发的邮件发送测试（SQLite 内存库）
+"""
+
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.config.settings import settings
+from src.models.delivery import DeliveryLog, DeliveryStatus, DeliverySummary
+from src.models.report import Report
+from src.tasks.mail_tasks import _send_report_core_logic
+
+REPORT_DATE = date(2025, 11, 25)
+RECIPIENTS = [f"user{i}@test.com" for i in range(10)]
+
+
+class WorkerKilled(Exception):
+    """模拟发送途中 worker 被终止"""
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """包含报告、投递日志和投递汇总表的 SQLite 内存库"""
+    engine = create_engine("sqlite://")
+    Report.__table__.create(engine)
+    DeliveryLog.__table__.create(engine)
+    DeliverySummary.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Report(report_date=REPORT_DATE, html_body="<p>正文</p>", html_attachment="<html>附件</html>"))
+    session.commit()
+
+    monkeypatch.setattr("src.tasks.mail_tasks.get_db", lambda: iter([session]))
+    monkeypatch.setattr("src.tasks.mail_tasks.load_recipient_emails", lambda db: list(RECIPIENTS))
+    monkeypatch.setattr("src.tasks.mail_tasks.SMTPClient", MagicMock)
+    monkeypatch.setattr(settings, "MAIL_BATCH_LIMIT", 2)
+    monkeypatch.setattr(settings, "MAIL_SMTP_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "MAIL_SMTP_REUSE_CONNECTION", False)
+    monkeypatch.setattr(settings, "MAIL_RATE_LIMIT_PER_SEC", 1000.0)
+    # 核心逻辑结束时会关闭会话，测试中保持可用
+    monkeypatch.setattr(session, "close", lambda: None)
+    yield session
+    session.rollback()
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """记录实际发送的批次（按 To 收件人），fail_on 中的批次第一次发送时中断"""
+    record = {"to": [], "fail_on": set()}
+
+    async def fake_send_with_retry(smtp_client, email_data, max_retries=2):
+        to = email_data["to"][0]
+        if to in record["fail_on"]:
+            record["fail_on"].discard(to)
+            raise WorkerKilled(to)
+        record["to"].append(to)
+        return {"status": "ok", "message_id": f"id-{to}", "sent_at": None}
+
+    monkeypatch.setattr("src.tasks.mail_tasks.send_with_retry", fake_send_with_retry)
+    return record
+
+
+def _statuses(db):
+    logs = db.query(DeliveryLog).order_by(DeliveryLog.send_round, DeliveryLog.batch_no).all()
+    return [(log.send_round, log.batch_no, log.status) for log in logs]
+
+
+def test_redelivered_task_resumes_after_last_sent_batch(db, sent):
+    """测试任务中断后重新投递只发送未成功的批次"""
+    sent["fail_on"].add("user6@test.com")
+
+    first = _send_report_core_logic(REPORT_DATE.isoformat())
+
+    assert first["status"] == "error"
+    assert sent["to"] == ["user0@test.com", "user2@test.com", "user4@test.com"]
+    assert [s for _, _, s in _statuses(db)] == [DeliveryStatus.OK] * 3 + [DeliveryStatus.PENDING] * 2
+
+    second = _send_report_core_logic(REPORT_DATE.isoformat())
+
+    assert second["status"] == "success"
+    assert second["resumed_batches"] == 3
+    assert second["success_batches"] == 5
+    assert sent["to"][3:] == ["user6@test.com", "user8@test.com"]
+    # 清单原地更新，不产生重复日志行
+    assert [s for _, _, s in _statuses(db)] == [DeliveryStatus.OK] * 5
+    summary = db.query(DeliverySummary).one()
+    assert (summary.ok_batches, summary.pending_batches, summary.delivered_recipients) == (5, 0, 10)
+
+
+def test_completed_round_is_not_resent(db, sent):
+    """测试本轮全部成功后再次执行直接跳过"""
+    _send_report_core_logic(REPORT_DATE.isoformat())
+    again = _send_report_core_logic(REPORT_DATE.isoformat())
+
+    assert again["reason"] == "already_sent"
+    assert len(sent["to"]) == 5
+
+
+def test_force_send_starts_new_round(db, sent):
+    """测试强制重发开始新一轮并发送全部批次"""
+    _send_report_core_logic(REPORT_DATE.isoformat())
+    forced = _send_report_core_logic(REPORT_DATE.isoformat(), force_send=True)
+
+    assert forced["success_batches"] == 5
+    assert len(sent["to"]) == 10
+    assert {r for r, _, _ in _statuses(db)} == {1, 2}
+
+
+def test_failed_batches_are_retried(db, monkeypatch):
+    """测试发送失败的批次在下次执行时重试"""
+    outcomes = iter(["ok", "failed", "ok", "ok", "ok", "ok"])
+
+    async def fake_send_with_retry(smtp_client, email_data, max_retries=2):
+        return {"status": next(outcomes), "message_id": None, "error": "451 temporary"}
+
+    monkeypatch.setattr("src.tasks.mail_tasks.send_with_retry", fake_send_with_retry)
+    monkeypatch.setattr("src.tasks.mail_tasks.handle_send_failure", AsyncMock())
+
+    first = _send_report_core_logic(REPORT_DATE.isoformat())
+    assert first["failed_batches"] == 1
+
+    second = _send_report_core_logic(REPORT_DATE.isoformat())
+    assert second["resumed_batches"] == 4
+    assert second["failed_batches"] == 0
+    assert [r["batch_no"] for r in second["results"]] == [2]
+
+
+def test_report_without_attachment_sends_body_only(db, monkeypatch):
+    """测试报告没有附件时仍发送正文，不带附件"""
+    db.query(Report).one().html_attachment = None
+    db.commit()
+    sent_attachments = []
+
+    async def fake_send_with_retry(smtp_client, email_data, max_retries=2):
+        sent_attachments.append(email_data["attachments"])
+        return {"status": "ok", "message_id": None, "sent_at": None}
+
+    monkeypatch.setattr("src.tasks.mail_tasks.send_with_retry", fake_send_with_retry)
+
+    result = _send_report_core_logic(REPORT_DATE.isoformat())
+
+    assert result["status"] == "success"
+    assert sent_attachments == [None] * 5
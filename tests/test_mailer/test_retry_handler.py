@@ -6,7 +6,10 @@ import pytest
 from unittest.mock import MagicMock, patch
 
 from src.mailer.retry_handler import (
+    handle_send_failure,
     is_hard_bounce,
+    is_hard_refusal,
+    is_soft_refusal,
     send_with_retry,
 )
 
@@ -78,6 +81,43 @@ class TestIsHardBounce:
         assert not is_hard_bounce(None)
 
 
+class TestRecipientRefusal:
+    """测试单个收件人拒收原因的分类"""
+
+    def test_hard_refusal(self):
+        """测试地址无效的拒收"""
+        reasons = [
+            "550 5.1.1 User unknown",
+            "553 5.1.3 Invalid address",
+            "550 5.2.1 Mailbox disabled",
+            "550 No such user",
+        ]
+
+        for reason in reasons:
+            assert is_hard_refusal(reason), f"应该识别为硬退信: {reason}"
+
+    def test_not_hard_refusal(self):
+        """测试策略类、临时性和非地址类拒绝"""
+        reasons = [
+            "550 5.7.1 Relaying denied",
+            "535 5.7.8 Authentication failed",
+            "554 Transaction failed",
+            "550 Message rejected as spam",
+            "452 4.2.2 Mailbox full",
+            "",
+            None,
+        ]
+
+        for reason in reasons:
+            assert not is_hard_refusal(reason), f"不应该识别为硬退信: {reason}"
+
+    def test_soft_refusal(self):
+        """测试临时拒收"""
+        assert is_soft_refusal("451 4.3.0 Try again later")
+        assert not is_soft_refusal("550 5.1.1 User unknown")
+        assert not is_soft_refusal("Connection timeout")
+
+
 class TestSendWithRetry:
     """测试重试发送"""
 
@@ -187,6 +227,92 @@ class TestSendWithRetry:
         # 应该至少等待：0.1 + 0.2 = 0.3 秒
         assert elapsed >= 0.3, f"耗时 {elapsed:.2f}s，应该 >= 0.3s"
 
+    @pytest.mark.asyncio
+    async def test_send_with_retry_resends_only_soft_refused(self):
+        """测试部分收件人被拒时只重发临时拒收的收件人"""
+        mock_client = MagicMock()
+        calls = []
+
+        async def mock_send_email(*args, **kwargs):
+            calls.append(kwargs["recipients"])
+            if len(calls) == 1:
+                return {
+                    "status": "partial",
+                    "message_id": "m1",
+                    "refused": {"busy@test.com": "451 4.3.0 Try later", "bad@test.com": "550 5.1.1 User unknown"},
+                }
+            return {"status": "ok", "message_id": "m2"}
+
+        mock_client.send_email = mock_send_email
+
+        email_data = {
+            "to": ["a@test.com"],
+            "bcc": ["busy@test.com", "bad@test.com", "c@test.com"],
+            "subject": "Test",
+            "html_body": "<p>Test</p>",
+        }
+
+        result = await send_with_retry(mock_client, email_data, max_retries=2, base_delay=0.01)
+
+        # 第一次整批，第二次只发临时拒收的收件人；永久拒收的不重发
+        assert calls == [None, ["busy@test.com"]]
+        assert result["status"] == "partial"
+        assert result["message_id"] == "m2"
+        assert result["refused"] == {"bad@test.com": "550 5.1.1 User unknown"}
+
+    @pytest.mark.asyncio
+    async def test_send_with_retry_soft_refused_recovers(self):
+        """测试临时拒收的收件人重发成功后结果为 ok"""
+        mock_client = MagicMock()
+        responses = iter([
+            {"status": "partial", "message_id": "m1", "refused": {"busy@test.com": "421 4.7.0 Slow down"}},
+            {"status": "ok", "message_id": "m2"},
+        ])
+
+        async def mock_send_email(*args, **kwargs):
+            return next(responses)
+
+        mock_client.send_email = mock_send_email
+
+        email_data = {
+            "to": ["a@test.com"],
+            "bcc": ["busy@test.com"],
+            "subject": "Test",
+            "html_body": "<p>Test</p>",
+        }
+
+        result = await send_with_retry(mock_client, email_data, max_retries=2, base_delay=0.01)
+
+        assert result["status"] == "ok"
+        assert "refused" not in result
+
+
+class TestHandleSendFailure:
+    """测试发送失败处理"""
+
+    @pytest.mark.asyncio
+    @patch("src.mailer.retry_handler.add_to_blacklist")
+    async def test_only_refused_addresses_are_blacklisted(self, mock_blacklist):
+        """测试只将地址无效而被拒收的收件人加入黑名单"""
+        batch = {"to": ["a@test.com"], "bcc": ["bad@test.com", "busy@test.com", "c@test.com"]}
+        refused = {"bad@test.com": "550 5.1.1 User unknown", "busy@test.com": "451 4.3.0 Try later"}
+
+        blacklisted = await handle_send_failure(MagicMock(), batch, "partial", refused=refused)
+
+        assert blacklisted == ["bad@test.com"]
+        assert [c.args[1] for c in mock_blacklist.call_args_list] == ["bad@test.com"]
+
+    @pytest.mark.asyncio
+    @patch("src.mailer.retry_handler.add_to_blacklist")
+    async def test_batch_level_error_blacklists_nobody(self, mock_blacklist):
+        """测试整批失败（如认证失败）不拉黑任何收件人"""
+        batch = {"to": ["a@test.com"], "bcc": [f"user{i}@test.com" for i in range(49)]}
+
+        blacklisted = await handle_send_failure(MagicMock(), batch, "(535, '5.7.8 Authentication failed')")
+
+        assert blacklisted == []
+        mock_blacklist.assert_not_called()
+
 
 class TestAddToBlacklist:
     """测试黑名单管理"""
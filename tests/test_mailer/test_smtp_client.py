@@ -2,10 +2,11 @@
 SMTP 客户端测试
 """
 
+from email import message_from_bytes
 from email.mime.multipart import MIMEMultipart
 
 import pytest
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 from src.mailer.smtp_client import SMTPClient
 
@@ -19,7 +20,7 @@ async def test_send_email_success(monkeypatch):
         password="secret",
     )
 
-    send_mock = AsyncMock()
+    send_mock = AsyncMock(return_value={})
     monkeypatch.setattr(client, "_send_smtp", send_mock)
     monkeypatch.setattr(SMTPClient, "_generate_message_id", lambda self: "msg-id")
 
@@ -90,3 +91,83 @@ def test_build_message_excludes_bcc_header(monkeypatch):
 
     payload = msg.get_payload()
     assert any(part.get_content_subtype() == "html" for part in payload)
+
+
+def test_build_message_gzip_attachment_content_type():
+    client = SMTPClient(
+        host="smtp.test",
+        port=465,
+        user="sender@test.com",
+        password="secret",
+    )
+
+    msg = client._build_message(
+        to=["user@test.com"],
+        subject="测试",
+        html_body="<p>正文</p>",
+        bcc=None,
+        attachments=[("daily-report-2025-11-21.html.gz", b"\x1f\x8b\x08\x00")],
+        message_id="msg-id",
+    )
+
+    attachment = msg.get_payload()[1]
+    assert attachment.get_content_type() == "application/gzip"
+    assert attachment.get_filename() == "daily-report-2025-11-21.html.gz"
+    assert attachment.get_payload(decode=True) == b"\x1f\x8b\x08\x00"
+
+
+def test_prepared_message_matches_built_message():
+    """测试预编码模板只替换批次邮件头，主体与逐封构建一致"""
+    client = SMTPClient(
+        host="smtp.test",
+        port=465,
+        user="sender@test.com",
+        password="secret",
+    )
+    attachments = [("report.html", "<html>附件</html>".encode("utf-8"))]
+
+    prepared = client.prepare_message("测试", "<p>正文</p>", attachments)
+    first = message_from_bytes(prepared.render(["a@test.com"], "id-1"))
+    second = message_from_bytes(prepared.render(["b@test.com", "c@test.com"], "id-2"))
+    built = client._build_message(
+        to=["a@test.com"],
+        subject="测试",
+        html_body="<p>正文</p>",
+        bcc=None,
+        attachments=attachments,
+        message_id="id-1",
+    )
+
+    assert (first["To"], first["Message-ID"]) == ("a@test.com", "<id-1>")
+    assert (second["To"], second["Message-ID"]) == ("b@test.com, c@test.com", "<id-2>")
+    assert first["Date"] and first["Bcc"] is None
+    assert first["Subject"] == built["Subject"].encode()
+    assert [part.get_payload(decode=True) for part in first.get_payload()] == \
+        [part.get_payload(decode=True) for part in built.get_payload()]
+    # 两个批次共享同一份已编码主体
+    assert first.get_payload()[1].get_payload() == second.get_payload()[1].get_payload()
+
+
+@pytest.mark.asyncio
+async def test_send_email_with_prepared_sends_bytes(monkeypatch):
+    client = SMTPClient(
+        host="smtp.test",
+        port=465,
+        user="sender@test.com",
+        password="secret",
+    )
+    send_mock = AsyncMock(return_value={})
+    monkeypatch.setattr(client, "_send_smtp", send_mock)
+    build_spy = MagicMock()
+    monkeypatch.setattr(client, "_build_message", build_spy)
+
+    prepared = client.prepare_message("测试", "<p>正文</p>")
+    result = await client.send_email(
+        to=["user@test.com"], subject="测试", html_body="<p>正文</p>", prepared=prepared
+    )
+
+    assert result["status"] == "ok"
+    build_spy.assert_not_called()
+    msg_arg = send_mock.await_args.args[0]
+    assert isinstance(msg_arg, bytes)
+    assert msg_arg.startswith(b"To: user@test.com\r\n")
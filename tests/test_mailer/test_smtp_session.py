@@ -0,0 +1,226 @@
+"""
+SMTP 会话复用测试（本地 aiosmtpd 服务器）
+"""
+
+import asyncio
+import socket
+from email import message_from_bytes
+from unittest.mock import MagicMock
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.smtp import AuthResult
+
+from src.config.settings import settings
+from src.mailer.retry_handler import send_with_retry
+from src.mailer.smtp_client import SMTPClient
+from src.tasks.mail_tasks import _send_batches_async
+
+
+class RecordingHandler:
+    """记录投递的邮件；fail_data 次 DATA 返回 421"""
+
+    def __init__(self):
+        self.messages = []
+        self.fail_data = 0
+        self.server = None
+        self.rcpt_replies = {}  # 地址 -> 待返回的 RCPT 应答列表（依次使用）
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        replies = self.rcpt_replies.get(address)
+        if replies:
+            return replies.pop(0)
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.server = server
+        if self.fail_data:
+            self.fail_data -= 1
+            return "421 Service not available, closing transmission channel"
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+class CountingAuthenticator:
+    """接受任意凭据，并统计登录次数"""
+
+    def __init__(self):
+        self.logins = 0
+
+    def __call__(self, server, session, envelope, mechanism, auth_data):
+        self.logins += 1
+        return AuthResult(success=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    auth = CountingAuthenticator()
+    controller = Controller(
+        handler,
+        hostname="127.0.0.1",
+        port=_free_port(),
+        authenticator=auth,
+        auth_require_tls=False,
+    )
+    controller.start()
+    controller.auth = auth
+    yield controller
+    controller.stop()
+
+
+def _client(server) -> SMTPClient:
+    return SMTPClient(
+        host=server.hostname,
+        port=server.port,
+        user="sender@test.com",
+        password="secret",
+        use_tls=False,
+    )
+
+
+async def _send(client, to):
+    return await client.send_email(to=[to], subject="测试", html_body="<p>正文</p>")
+
+
+@pytest.mark.asyncio
+async def test_session_reuses_one_connection(smtp_server):
+    client = _client(smtp_server)
+
+    async with client.session():
+        for i in range(5):
+            assert (await _send(client, f"user{i}@test.com"))["status"] == "ok"
+
+    assert len(smtp_server.handler.messages) == 5
+    assert smtp_server.auth.logins == 1
+    assert client.connect_count == 1
+
+
+@pytest.mark.asyncio
+async def test_without_session_connects_per_message(smtp_server):
+    client = _client(smtp_server)
+
+    for i in range(3):
+        await _send(client, f"user{i}@test.com")
+
+    assert smtp_server.auth.logins == 3
+
+
+@pytest.mark.asyncio
+async def test_session_reconnects_after_421(smtp_server):
+    """测试服务器返回 421 时重连并重发，邮件只投递一次"""
+    client = _client(smtp_server)
+
+    async with client.session():
+        await _send(client, "first@test.com")
+        smtp_server.handler.fail_data = 1
+        result = await _send(client, "second@test.com")
+
+    assert result["status"] == "ok"
+    assert [e.rcpt_tos for e in smtp_server.handler.messages] == [["first@test.com"], ["second@test.com"]]
+    assert client.connect_count == 2
+
+
+@pytest.mark.asyncio
+async def test_session_reconnects_after_server_disconnect(smtp_server):
+    """测试连接被服务器断开后透明重连"""
+    client = _client(smtp_server)
+
+    async with client.session():
+        await _send(client, "first@test.com")
+        smtp_server.loop.call_soon_threadsafe(smtp_server.handler.server.transport.close)
+        await asyncio.sleep(0.1)
+        result = await _send(client, "second@test.com")
+
+    assert result["status"] == "ok"
+    assert client.connect_count == 2
+
+
+@pytest.mark.asyncio
+async def test_send_batches_share_connection(smtp_server, monkeypatch):
+    """测试分批发送的所有批次复用同一个连接"""
+    monkeypatch.setattr(settings, "MAIL_RATE_LIMIT_PER_SEC", 1000.0)
+    monkeypatch.setattr(settings, "MAIL_SMTP_CONCURRENCY", 1)
+    monkeypatch.setattr("src.tasks.mail_tasks.SMTPClient", lambda: _client(smtp_server))
+    batches = [{"to": [f"user{i}@test.com"], "bcc": [f"bcc{i}@test.com"]} for i in range(4)]
+
+    results = await _send_batches_async(
+        db=MagicMock(),
+        batches=batches,
+        subject="测试",
+        html_body="<p>正文</p>",
+        attachment_filename=None,
+        attachment_content=None,
+        report_id=None,
+        report_date=None,
+    )
+
+    assert [r["status"] for r in results] == ["ok"] * 4
+    assert smtp_server.auth.logins == 1
+    assert smtp_server.handler.messages[0].rcpt_tos == ["user0@test.com", "bcc0@test.com"]
+
+    # 各批次共享预编码主体，只有 To/Message-ID 不同
+    delivered = [message_from_bytes(e.original_content) for e in smtp_server.handler.messages]
+    assert [m["To"] for m in delivered] == [f"user{i}@test.com" for i in range(4)]
+    assert len({m["Message-ID"] for m in delivered}) == 4
+    assert "Bcc" not in delivered[0]
+    assert delivered[0].get_payload(0).get_payload(decode=True) == "<p>正文</p>".encode("utf-8")
+
+
+@pytest.mark.asyncio
+async def test_send_batches_in_parallel_sessions(smtp_server, monkeypatch):
+    """测试多个并发会话分担批次，结果按批次顺序返回"""
+    monkeypatch.setattr(settings, "MAIL_RATE_LIMIT_PER_SEC", 1000.0)
+    monkeypatch.setattr(settings, "MAIL_SMTP_CONCURRENCY", 3)
+    monkeypatch.setattr("src.tasks.mail_tasks.SMTPClient", lambda: _client(smtp_server))
+    batches = [{"to": [f"user{i}@test.com"], "bcc": []} for i in range(7)]
+
+    results = await _send_batches_async(
+        db=MagicMock(),
+        batches=batches,
+        subject="测试",
+        html_body="<p>正文</p>",
+        attachment_filename=None,
+        attachment_content=None,
+        report_id=None,
+        report_date=None,
+    )
+
+    assert [r["batch_no"] for r in results] == list(range(1, 8))
+    assert all(r["status"] == "ok" for r in results)
+    assert smtp_server.auth.logins == 3
+    assert sorted(e.rcpt_tos[0] for e in smtp_server.handler.messages) == sorted(b["to"][0] for b in batches)
+
+
+@pytest.mark.asyncio
+async def test_refused_recipients_are_isolated(smtp_server):
+    """测试服务器拒收部分收件人时其他收件人正常送达，只对临时拒收的收件人重发"""
+    smtp_server.handler.rcpt_replies = {
+        "bad@test.com": ["550 5.1.1 User unknown"],
+        "busy@test.com": ["451 4.3.0 Try again later"],
+    }
+    email_data = {
+        "to": ["a@test.com"],
+        "bcc": ["bad@test.com", "busy@test.com", "c@test.com"],
+        "subject": "测试",
+        "html_body": "<p>正文</p>",
+    }
+
+    result = await send_with_retry(_client(smtp_server), email_data, max_retries=2, base_delay=0.01)
+
+    assert result["status"] == "partial"
+    assert list(result["refused"]) == ["bad@test.com"]
+    assert [e.rcpt_tos for e in smtp_server.handler.messages] == [
+        ["a@test.com", "c@test.com"],
+        ["busy@test.com"],
+    ]
+    # 重发的邮件头不变（BCC 不出现在邮件头中）
+    resent = message_from_bytes(smtp_server.handler.messages[1].original_content)
+    assert resent["To"] == "a@test.com"
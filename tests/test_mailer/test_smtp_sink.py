@@ -0,0 +1,60 @@
+"""
+本地 SMTP 接收端测试
+"""
+
+import pytest
+
+from src.mailer.retry_handler import send_with_retry
+from src.mailer.smtp_client import SMTPClient
+from src.mailer.smtp_sink import SMTPSink
+
+
+def _client(sink) -> SMTPClient:
+    return SMTPClient(
+        host=sink.hostname,
+        port=sink.port,
+        user="sender@test.com",
+        password="secret",
+        use_tls=False,
+    )
+
+
+def _email(to, bcc=()):
+    return {"to": [to], "bcc": list(bcc), "subject": "测试", "html_body": "<p>正文</p>"}
+
+
+@pytest.mark.asyncio
+async def test_sink_counts_connections_and_bytes():
+    """测试接收端统计连接数、邮件数、收件人数和字节数"""
+    with SMTPSink() as sink:
+        client = _client(sink)
+        async with client.session():
+            for i in range(3):
+                await send_with_retry(client, _email(f"user{i}@test.com", [f"bcc{i}@test.com"]))
+
+    assert (sink.stats.connections, sink.stats.logins) == (1, 1)
+    assert (sink.stats.messages, sink.stats.recipients) == (3, 6)
+    assert sink.stats.bytes_received > 0
+
+
+@pytest.mark.asyncio
+async def test_sink_injects_hard_bounces():
+    """测试注入的 550 被客户端识别为逐个收件人的拒收"""
+    with SMTPSink(hard_bounce_rate=1.0) as sink:
+        result = await send_with_retry(_client(sink), _email("a@test.com", ["b@test.com"]), base_delay=0.01)
+
+    assert result["status"] == "failed"
+    assert sorted(result["refused"]) == ["a@test.com", "b@test.com"]
+    # 硬退信不重试
+    assert sink.stats.hard_refusals == 2
+    assert sink.stats.messages == 0
+
+
+@pytest.mark.asyncio
+async def test_sink_injected_421_is_retried():
+    """测试注入的 421 由发送方重试（每次失败都计入统计）"""
+    with SMTPSink(data_fail_rate=1.0) as sink:
+        result = await send_with_retry(_client(sink), _email("a@test.com"), max_retries=2, base_delay=0.01)
+
+    assert result["status"] == "failed"
+    assert sink.stats.data_failures == 3
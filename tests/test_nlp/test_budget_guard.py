@@ -0,0 +1,313 @@
+"""
+LLM 预算守卫测试
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.article import Article, ProcessingStatus
+from src.models.extraction import ExtractionItem, ExtractionQueue, QueueStatus
+from src.models.source import Source
+from src.nlp.budget_guard import (
+    ACTION_CHEAPEST_ONLY,
+    ACTION_SKIP_LOW_PRIORITY,
+    ACTION_STOP,
+    LEVEL_HARD,
+    LEVEL_OK,
+    LEVEL_SOFT,
+    BudgetGuard,
+)
+from src.nlp.extractor import ExtractResult
+from src.tasks.extract_tasks import extract_article_task, run_extraction_batch
+
+
+class FakePipeline:
+    """只实现预算守卫用到的 Redis 管道命令"""
+
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self.ops.append((name, args))
+            return self
+        return queue
+
+    def execute(self):
+        return [getattr(self.store, name)(*args) for name, args in self.ops]
+
+
+class FakeRedis:
+    """基于字典的最小 Redis 替身"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def incrbyfloat(self, key, amount):
+        self.data[key] = float(self.data.get(key) or 0) + amount
+        return self.data[key]
+
+    def expire(self, key, ttl):
+        return True
+
+    def lpush(self, key, value):
+        self.data.setdefault(key, []).insert(0, value)
+
+    def ltrim(self, key, start, end):
+        self.data[key] = self.data.get(key, [])[start:end + 1]
+
+    def lrange(self, key, start, end):
+        return self.data.get(key, [])[start:end + 1]
+
+    def hincrby(self, key, field, amount):
+        h = self.data.setdefault(key, {})
+        h[field] = h.get(field, 0) + amount
+
+    def hgetall(self, key):
+        return self.data.get(key, {})
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+MESSAGES = [{"role": "user", "content": "测试内容" * 100}]
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+def make_guard(fake_redis, spent=0.0, soft=1.0, hard=2.0):
+    guard = BudgetGuard(soft_limit=soft, hard_limit=hard, redis_client=fake_redis)
+    if spent:
+        fake_redis.data[guard._day_key("spent")] = str(spent)
+    return guard
+
+
+class TestBudgetGuard:
+    """测试预算级别判断与降级"""
+
+    def test_disabled_guard_always_allows(self, fake_redis):
+        """测试未配置预算时不访问 Redis 且始终放行"""
+        redis_client = MagicMock()
+        guard = BudgetGuard(soft_limit=0, hard_limit=0, redis_client=redis_client)
+
+        decision = guard.check_call("qwen", "qwen-plus", MESSAGES)
+
+        assert decision.level == LEVEL_OK
+        assert guard.allow_queue_item(0) is True
+        redis_client.get.assert_not_called()
+
+    def test_under_budget(self, fake_redis):
+        """测试预算充足时正常调用"""
+        guard = make_guard(fake_redis, spent=0.1)
+
+        decision = guard.check_call("qwen", "qwen-plus", MESSAGES)
+
+        assert decision.level == LEVEL_OK
+        assert decision.allowed and not decision.cheapest_only
+        assert decision.estimated_cost > 0
+
+    def test_soft_limit_degrades_to_cheapest(self, fake_redis):
+        """测试触及软限制时只用最便宜的模型，并记录决策"""
+        guard = make_guard(fake_redis, spent=1.5)
+
+        decision = guard.check_call("qwen", "qwen-plus", MESSAGES)
+
+        assert decision.level == LEVEL_SOFT
+        assert decision.allowed and decision.cheapest_only
+        status = guard.get_status()
+        assert status["action_counts"] == {ACTION_CHEAPEST_ONLY: 1}
+        assert status["decisions"][0]["action"] == ACTION_CHEAPEST_ONLY
+
+    def test_hard_limit_stops(self, fake_redis):
+        """测试触及硬限制时停止调用"""
+        guard = make_guard(fake_redis, spent=2.5)
+
+        decision = guard.check_call("qwen", "qwen-plus", MESSAGES)
+
+        assert decision.level == LEVEL_HARD
+        assert not decision.allowed
+        assert guard.get_status()["action_counts"] == {ACTION_STOP: 1}
+
+    def test_decision_recorded_once_per_level(self, fake_redis):
+        """测试超限期间的重复调用只在首次进入级别时记录决策（多个 worker 共享 Redis）"""
+        guard = make_guard(fake_redis, spent=1.5)
+        other_worker = BudgetGuard(soft_limit=1.0, hard_limit=2.0, redis_client=fake_redis)
+
+        with patch.object(fake_redis, "lpush", wraps=fake_redis.lpush) as lpush:
+            for _ in range(5):
+                guard.check_call("qwen", "qwen-plus", MESSAGES)
+                other_worker.check_call("qwen", "qwen-plus", MESSAGES)
+            assert lpush.call_count == 1
+
+            fake_redis.data[guard._day_key("spent")] = "2.5"
+            for _ in range(5):
+                assert not guard.check_call("qwen", "qwen-plus", MESSAGES).allowed
+            assert lpush.call_count == 2
+
+        assert guard.get_status()["action_counts"] == {ACTION_CHEAPEST_ONLY: 1, ACTION_STOP: 1}
+
+    def test_allow_queue_item_by_priority(self, fake_redis):
+        """测试软限制下跳过低优先级队列项"""
+        guard = make_guard(fake_redis, spent=1.5)
+
+        with patch("src.nlp.budget_guard.settings.LLM_BUDGET_MIN_PRIORITY", 5):
+            assert guard.allow_queue_item(0) is False
+            assert guard.allow_queue_item(5) is True
+
+        fake_redis.data[guard._day_key("spent")] = "3"
+        assert guard.allow_queue_item(100) is False
+
+    def test_add_spend_accumulates(self, fake_redis):
+        """测试调用后按实际 token 累加花费"""
+        guard = make_guard(fake_redis)
+
+        guard.add_spend("qwen", "qwen-plus", 1000, 500)
+        total = guard.add_spend("qwen", "qwen-plus", 1000, 500)
+
+        # qwen-plus: 1000/1M*0.8 + 500/1M*2.0 = 0.0018，两次
+        assert total == pytest.approx(0.0036)
+        assert guard.get_spent() == pytest.approx(0.0036)
+
+    def test_redis_failure_fails_open(self):
+        """测试 Redis 不可用时按未超限处理"""
+        redis_client = MagicMock()
+        redis_client.get.side_effect = ConnectionError("redis down")
+        guard = BudgetGuard(soft_limit=1.0, hard_limit=2.0, redis_client=redis_client)
+
+        assert guard.get_spent() == 0.0
+        assert guard.allow_queue_item(0) is True
+
+
+@pytest.fixture
+def task_db(tmp_path):
+    """包含一篇待抽取文章的 SQLite 库"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'extract.db'}")
+    for model in (Source, Article, ExtractionQueue, ExtractionItem):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Source(id=1, name="测试源", type="rss", url="https://example.com/rss"))
+    session.add(Article(id=1, source_id=1, title="文章", url="https://example.com/1"))
+    session.add(ExtractionQueue(article_id=1, priority=0, status=QueueStatus.QUEUED))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _run_task(task_db, extract_result=None, allowed=True):
+    guard = MagicMock()
+    guard.allow_queue_item.return_value = allowed
+    extract = AsyncMock(return_value=extract_result)
+    with patch("src.tasks.extract_tasks.get_db", return_value=iter([task_db])), \
+            patch("src.tasks.extract_tasks.get_budget_guard", return_value=guard), \
+            patch("src.tasks.extract_tasks.extract_article", new=extract), \
+            patch.object(task_db, "close"):
+        result = extract_article_task.apply(args=[1]).result
+    return result, extract
+
+
+class TestExtractTaskBudget:
+    """测试抽取任务的预算处理"""
+
+    def test_task_skips_when_budget_exhausted(self, task_db):
+        """测试并行批次中任务开始时已触及限制：不调用 LLM，队列项保持 queued"""
+        result, extract = _run_task(task_db, allowed=False)
+
+        assert result["reason"] == "budget_exceeded"
+        extract.assert_not_called()
+        queue_item = task_db.query(ExtractionQueue).one()
+        assert (queue_item.status, queue_item.attempts) == (QueueStatus.QUEUED, 0)
+
+    def test_budget_stopped_partial_article_is_requeued(self, task_db):
+        """测试部分分块因预算停止时不保存不完整结果，文章不标记为完成"""
+        partial = ExtractResult(
+            status="partial",
+            items=[{"fact": "央行宣布下调存款准备金率0.5个百分点，释放长期资金约1万亿元", "confidence": 0.9}],
+            keywords=["降准"],
+            metadata={"budget_stopped": True},
+        )
+
+        result, _ = _run_task(task_db, partial)
+
+        assert result["reason"] == "budget_exceeded"
+        queue_item = task_db.query(ExtractionQueue).one()
+        assert (queue_item.status, queue_item.attempts) == (QueueStatus.QUEUED, 0)
+        assert task_db.query(ExtractionItem).count() == 0
+        assert task_db.get(Article, 1).processing_status != ProcessingStatus.DONE
+
+
+@pytest.fixture
+def batch_db(tmp_path):
+    """包含四个待抽取队列项的 SQLite 库（优先级 9、8、2、1）"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'batch.db'}")
+    for model in (Source, Article, ExtractionQueue, ExtractionItem):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Source(id=1, name="测试源", type="rss", url="https://example.com/rss"))
+    for article_id, priority in enumerate([9, 8, 2, 1], start=1):
+        session.add(Article(id=article_id, source_id=1, title=f"文章{article_id}", url=f"https://example.com/{article_id}"))
+        session.add(ExtractionQueue(article_id=article_id, priority=priority, status=QueueStatus.QUEUED))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _run_serial_batch(batch_db, guard, spent_after_first):
+    """串行执行批次，第一个队列项处理后当日花费变为 spent_after_first，返回 (结果, 已处理的文章 ID)"""
+    processed = []
+
+    def apply(args):
+        processed.append(args[0])
+        guard.redis.data[guard._day_key("spent")] = str(spent_after_first)
+        return MagicMock(result={"status": "success"})
+
+    task = MagicMock()
+    task.apply.side_effect = apply
+    with patch("src.tasks.extract_tasks.get_db", return_value=iter([batch_db])), \
+            patch("src.tasks.extract_tasks.get_budget_guard", return_value=guard), \
+            patch("src.tasks.extract_tasks.extract_article_task", task), \
+            patch("src.tasks.extract_tasks.flush_usage"), \
+            patch("src.tasks.extract_tasks.settings.LLM_ALLOW_PARALLEL_ARTICLE_PROCESSING", False), \
+            patch("src.tasks.extract_tasks.settings.LLM_BUDGET_MIN_PRIORITY", 5), \
+            patch.object(batch_db, "close"):
+        result = run_extraction_batch.apply().result
+    return result, processed
+
+
+class TestExtractionBatchBudget:
+    """测试串行批次中途触及预算限制"""
+
+    def test_soft_limit_mid_batch_skips_only_low_priority(self, fake_redis, batch_db):
+        """测试批次中途触及软限制：高优先级项继续处理，低优先级项跳过，不记录停止"""
+        guard = make_guard(fake_redis)
+
+        result, processed = _run_serial_batch(batch_db, guard, spent_after_first=1.5)
+
+        assert processed == [1, 2]
+        assert result["skipped_by_budget"] == 2
+        assert guard.get_status()["action_counts"] == {ACTION_SKIP_LOW_PRIORITY: 1}
+
+    def test_hard_limit_mid_batch_stops(self, fake_redis, batch_db):
+        """测试批次中途触及硬限制：剩余项全部保持 queued，记录停止"""
+        guard = make_guard(fake_redis)
+
+        result, processed = _run_serial_batch(batch_db, guard, spent_after_first=2.5)
+
+        assert processed == [1]
+        assert result["skipped_by_budget"] == 3
+        assert guard.get_status()["action_counts"] == {ACTION_STOP: 1}
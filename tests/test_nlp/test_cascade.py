@@ -0,0 +1,137 @@
+"""
+级联抽取测试
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+import src.nlp.extractor as extractor
+from src.nlp.extractor import (
+    ESCALATE_BORDERLINE,
+    ESCALATE_EMPTY_HIGH_WEIGHT,
+    cascade_chunk_results,
+    needs_escalation,
+)
+
+
+def _item(fact, confidence=0.9, relevance=0.9, layer="金融经济"):
+    return {
+        "fact": fact,
+        "opinion": "",
+        "region": "国内",
+        "layer": layer,
+        "confidence": confidence,
+        "finance_relevance": relevance,
+    }
+
+
+def _result(items, model="qwen-plus", keywords=None, status="success"):
+    return {
+        "items": items,
+        "keywords": keywords or [],
+        "model": model,
+        "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150},
+        "status": status,
+    }
+
+
+@pytest.fixture
+def router():
+    providers = [
+        SimpleNamespace(name="qwen", model="qwen-plus"),
+        SimpleNamespace(name="deepseek", model="deepseek-chat"),
+        SimpleNamespace(name="qwen", model="qwen-max"),
+    ]
+    with patch.object(extractor, "get_provider_router", return_value=SimpleNamespace(providers=providers)):
+        yield
+
+
+class TestNeedsEscalation:
+    """测试模糊结果判断"""
+
+    def test_confident_result_not_escalated(self):
+        assert needs_escalation(_result([_item("央行宣布降准0.5个百分点")])) is None
+
+    def test_borderline_confidence(self):
+        result = _result([_item("某银行发布季度财报", confidence=0.62)])
+        assert needs_escalation(result) == ESCALATE_BORDERLINE
+
+    def test_borderline_relevance_uses_layer_threshold(self):
+        # 金融大模型技术层级的相关性阈值为 0.2，0.45 不在其模糊区间内
+        tech = _result([_item("某模型发布", relevance=0.45, layer="金融大模型技术")])
+        assert needs_escalation(tech) is None
+
+        economy = _result([_item("某公司完成融资", relevance=0.45)])
+        assert needs_escalation(economy) == ESCALATE_BORDERLINE
+
+    def test_empty_result_depends_on_source_weight(self):
+        empty = _result([])
+        assert needs_escalation(empty, source_weight=1.0) is None
+        assert needs_escalation(empty, source_weight=2.0) == ESCALATE_EMPTY_HIGH_WEIGHT
+
+    def test_failed_result_not_escalated(self):
+        assert needs_escalation(_result([], status="failed"), source_weight=2.0) is None
+
+
+class TestCascadeChunkResults:
+    """测试级联升级与合并"""
+
+    @pytest.mark.asyncio
+    async def test_only_ambiguous_chunks_escalated(self, router):
+        chunk_results = [
+            _result([_item("央行宣布降准0.5个百分点，释放长期资金约1万亿元")]),
+            _result([_item("某银行发布季度财报，净利润同比增长", confidence=0.6)]),
+        ]
+        strong = _result(
+            [
+                _item("某银行发布季度财报，净利润同比增长", confidence=0.85),
+                _item("该银行不良贷款率下降至1.2%", confidence=0.8),
+            ],
+            model="qwen-max",
+            keywords=["银行财报"],
+        )
+        mock_extract = AsyncMock(return_value=strong)
+
+        with patch.object(extractor, "extract_from_chunk", mock_extract):
+            stats = await cascade_chunk_results(["c0", "c1"], chunk_results, article_id=1)
+
+        mock_extract.assert_awaited_once()
+        assert mock_extract.call_args.args[1] == 1
+        assert mock_extract.call_args.kwargs["escalate"] is True
+
+        assert stats["escalated_chunks"] == 1
+        assert stats["escalation_rate"] == 0.5
+        assert stats["reasons"] == {ESCALATE_BORDERLINE: 1}
+
+        # 重复事实保留置信度更高的版本，新事实被合并进来
+        merged = chunk_results[1]["items"]
+        assert len(merged) == 2
+        assert max(i["confidence"] for i in merged) == 0.85
+        assert chunk_results[1]["keywords"] == ["银行财报"]
+
+    @pytest.mark.asyncio
+    async def test_skipped_escalation_keeps_cheap_result(self, router):
+        """测试预算软限制下升级被跳过时保留便宜模型结果"""
+        cheap_items = [_item("某银行发布季度财报，净利润同比增长", confidence=0.6)]
+        chunk_results = [_result(list(cheap_items))]
+        skipped = {"items": [], "keywords": [], "error": "budget_soft_limit", "status": "skipped"}
+
+        with patch.object(extractor, "extract_from_chunk", AsyncMock(return_value=skipped)):
+            stats = await cascade_chunk_results(["c0"], chunk_results, article_id=1)
+
+        assert stats["escalated_chunks"] == 0
+        assert chunk_results[0]["items"] == cheap_items
+
+    @pytest.mark.asyncio
+    async def test_result_from_strongest_model_not_escalated(self, router):
+        """测试已回退到最强模型的分块不重复升级"""
+        chunk_results = [_result([_item("事实", confidence=0.6)], model="qwen-max")]
+        mock_extract = AsyncMock()
+
+        with patch.object(extractor, "extract_from_chunk", mock_extract):
+            stats = await cascade_chunk_results(["c0"], chunk_results, article_id=1)
+
+        mock_extract.assert_not_awaited()
+        assert stats["escalated_chunks"] == 0
@@ -0,0 +1,132 @@
+"""
+离线 Mock LLM Provider 测试
+"""
+
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import src.nlp.provider_router as router_module
+from src.nlp.extractor import extract_article
+from src.nlp.mock_provider import (
+    LATENCY_FIXED,
+    LATENCY_LOGNORMAL,
+    MOCK_TIER_PROFILES,
+    MockProvider,
+    RecordingProvider,
+    build_mock_router,
+)
+
+MESSAGES = [
+    {"role": "system", "content": "你是一个专业的金融情报分析师"},
+    {"role": "user", "content": "**文章内容**：\n\n中国人民银行宣布下调存款准备金率0.5个百分点。某银行发布季度财报。"},
+]
+
+
+@pytest.mark.asyncio
+async def test_synthetic_response_is_valid_extraction_json():
+    provider = MockProvider(latency_ms=0, items_per_response=2, seed=1)
+
+    response = await provider.chat_completion(MESSAGES)
+
+    content = response["content"].split("```json")[1].split("```")[0]
+    body = json.loads(content)
+    assert len(body["items"]) == 2
+    assert body["items"][0]["fact"].startswith("中国人民银行")
+    assert response["usage"]["total_tokens"] == (
+        response["usage"]["prompt_tokens"] + response["usage"]["completion_tokens"]
+    )
+    assert provider.stats.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_confidence_ranges_and_invalid_rate():
+    """测试置信度区间、低置信度比例和残缺 JSON 比例可配置"""
+    provider = MockProvider(
+        latency_ms=0, items_per_response=50, seed=2,
+        confidence_range=(0.8, 0.9), low_confidence_rate=0.2, low_confidence_range=(0.4, 0.5),
+    )
+    response = await provider.chat_completion(MESSAGES)
+    confidences = [item["confidence"] for item in json.loads(response["content"].split("```json")[1].split("```")[0])["items"]]
+
+    assert all(0.8 <= c <= 0.9 or 0.4 <= c <= 0.5 for c in confidences)
+    assert 0 < sum(c <= 0.5 for c in confidences) < len(confidences)
+
+    broken = MockProvider(latency_ms=0, invalid_rate=1.0)
+    response = await broken.chat_completion(MESSAGES)
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(response["content"].split("```json")[1].split("```")[0])
+    assert broken.stats.invalid == 1
+
+
+def test_router_applies_tier_profiles():
+    router = build_mock_router(latency_ms=0, tier_options={"qwen-max": {"low_confidence_rate": 0.5}})
+    cheap, _, strong = router.providers
+
+    assert cheap.confidence_range == MOCK_TIER_PROFILES["qwen-plus"]["confidence_range"]
+    assert strong.confidence_range == MOCK_TIER_PROFILES["qwen-max"]["confidence_range"]
+    assert strong.low_confidence_rate == 0.5
+    assert all(provider.latency_ms == 0 for provider in router.providers)
+
+
+@pytest.mark.asyncio
+async def test_injected_rate_limit_and_timeout():
+    limited = MockProvider(latency_ms=0, rate_limit_rate=1.0)
+    with pytest.raises(httpx.HTTPStatusError) as exc_info:
+        await limited.chat_completion(MESSAGES)
+    assert exc_info.value.response.status_code == 429
+    assert limited.stats.rate_limited == 1
+
+    flaky = MockProvider(latency_ms=0, error_rate=1.0)
+    with pytest.raises(httpx.TimeoutException):
+        await flaky.chat_completion(MESSAGES)
+    assert flaky.stats.errors == 1
+
+
+def test_latency_distribution_mean():
+    fixed = MockProvider(latency_ms=100, latency_dist=LATENCY_FIXED)
+    assert fixed.sample_latency_ms() == 100
+
+    lognormal = MockProvider(latency_ms=100, latency_dist=LATENCY_LOGNORMAL, seed=7)
+    samples = [lognormal.sample_latency_ms() for _ in range(5000)]
+    assert sum(samples) / len(samples) == pytest.approx(100, rel=0.05)
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay(tmp_path):
+    path = tmp_path / "responses.jsonl"
+    recorder = RecordingProvider(MockProvider(latency_ms=0, seed=3), str(path))
+    recorded = await recorder.chat_completion(MESSAGES)
+
+    replay = MockProvider(latency_ms=0, replay_path=str(path))
+    replayed = await replay.chat_completion(MESSAGES)
+
+    assert replayed["content"] == recorded["content"]
+    assert replayed["usage"] == recorded["usage"]
+
+
+@pytest.mark.asyncio
+async def test_extract_article_runs_offline(monkeypatch):
+    """测试 Mock 路由器可驱动完整的 extract_article 流程"""
+    router = build_mock_router(latency_ms=0, seed=5)
+    monkeypatch.setattr(router_module, "_provider_router", router)
+    monkeypatch.setattr("src.nlp.extractor.get_usage_recorder", lambda: SimpleNamespace(record=lambda **kw: None))
+
+    article = SimpleNamespace(
+        id=1,
+        title="合成文章",
+        content_text="中国人民银行宣布下调存款准备金率0.5个百分点，释放长期资金约1万亿元。" * 20,
+        source=SimpleNamespace(weight=1.0),
+    )
+    db = SimpleNamespace(query=lambda model: SimpleNamespace(
+        filter=lambda cond: SimpleNamespace(first=lambda: article)
+    ))
+
+    result = await extract_article(1, db)
+
+    assert result.status == "success"
+    assert len(result.items) == 3
+    assert result.metadata["provider"] == "qwen"
+    assert router.providers[0].stats.calls == 1
@@ -108,6 +108,31 @@ async def test_call_with_fallback_all_fail(monkeypatch):
         )
 
 
+@pytest.mark.asyncio
+async def test_cheapest_only_does_not_fallback(monkeypatch):
+    async def fail(self, *args, **kwargs):
+        raise httpx.HTTPError("boom")
+
+    success = AsyncMock(return_value=_success_response())
+    monkeypatch.setattr(DeepSeekProvider, "chat_completion", fail)
+    monkeypatch.setattr(QwenProvider, "chat_completion", fail)
+
+    router = ProviderRouter()
+    cheapest = router.providers[0]
+    for provider in router.providers[1:]:
+        monkeypatch.setattr(provider, "chat_completion", success)
+
+    with pytest.raises(RuntimeError):
+        await router.call_with_fallback(
+            messages=[{"role": "user", "content": "hi"}],
+            retries=0,
+            cheapest_only=True,
+        )
+
+    assert cheapest is router.providers[0]
+    success.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_concurrency_controller_limits_parallel_calls():
     controller = ConcurrencyController(max_inflight=1)
@@ -0,0 +1,133 @@
+"""
+SimHash 批量指纹与分段索引测试
+"""
+
+import random
+
+from src.nlp import merger
+from src.nlp.merger import calculate_edit_distance, deduplicate_facts, is_similar_fact, normalize_fact, text_similarity
+from src.nlp.simhash_index import SimhashBandIndex, compute_simhashes, hamming_distance
+
+
+def test_compute_simhashes_is_deterministic_and_batch_independent():
+    texts = ["央行宣布降准0.5个百分点", "", "ab", "Fed keeps rates unchanged", "长" * 1000]
+
+    batch = compute_simhashes(texts)
+    single = [compute_simhashes([text])[0] for text in texts]
+
+    assert batch == single
+    assert all(0 <= value < 2 ** 64 for value in batch)
+
+
+def test_near_duplicates_have_small_distance():
+    a, b, c = compute_simhashes([
+        "中国人民银行宣布下调存款准备金率0.5个百分点，释放长期资金约1万亿元",
+        "中国人民银行宣布下调存款准备金率0.5个百分点，释放长期资金约1万亿",
+        "某金融科技公司完成新一轮融资，估值超过50亿元",
+    ])
+
+    assert hamming_distance(a, b) <= 3
+    assert hamming_distance(a, c) > 3
+
+
+def test_band_index_finds_every_match_within_distance():
+    """测试分段索引与暴力比较结果一致（不漏召回）"""
+    rng = random.Random(0)
+    base = [rng.getrandbits(64) for _ in range(200)]
+    stored = []
+    for value in base:
+        stored.append(value)
+        # 为每个指纹构造若干距离 1-5 的变体
+        for _ in range(3):
+            variant = value
+            for bit in rng.sample(range(64), rng.randint(1, 5)):
+                variant ^= 1 << bit
+            stored.append(variant)
+
+    index = SimhashBandIndex(max_distance=3)
+    for item_id, value in enumerate(stored[::2]):
+        index.add(item_id, value)
+    indexed = stored[::2]
+
+    for query in stored[1::2]:
+        found = index.find_similar(query)
+        expected = any(hamming_distance(query, value) <= 3 for value in indexed)
+        assert (found is not None) == expected
+        if found is not None:
+            assert hamming_distance(query, indexed[found]) <= 3
+
+
+def test_iter_similar_yields_each_candidate_once():
+    index = SimhashBandIndex(max_distance=3)
+    index.add(0, 0)
+    index.add(1, 0b11)
+    index.add(2, (1 << 64) - 1)
+
+    assert sorted(index.iter_similar(0)) == [0, 1]
+
+
+def test_band_index_update_uses_latest_fingerprint():
+    index = SimhashBandIndex(max_distance=3)
+    index.add(0, 0)
+    index.add(0, (1 << 64) - 1)
+
+    assert index.find_similar(0) is None
+    assert index.find_similar((1 << 64) - 1) == 0
+
+
+def test_deduplicate_facts_scales_to_a_full_day():
+    rng = random.Random(1)
+    chars = [chr(code) for code in range(0x4E00, 0x4E00 + 3000)]
+    items = []
+    for _ in range(5000):
+        fact = "".join(rng.choice(chars) for _ in range(rng.randint(20, 60)))
+        items.append({"fact": fact, "confidence": 0.7})
+        items.append({"fact": fact + "。", "confidence": 0.9})
+
+    result = deduplicate_facts(items)
+
+    assert len(result) == 5000
+    assert all(item["confidence"] == 0.9 for item in result)
+
+
+def test_close_fingerprints_need_similar_text(monkeypatch):
+    """测试指纹命中只作为候选，文本差异大的事实不会被合并"""
+    monkeypatch.setattr(merger, "compute_simhashes", lambda texts: [0] * len(texts))
+    items = [
+        {"fact": "央行宣布降准0.5个百分点", "confidence": 0.8},
+        {"fact": "某银行一季度净利润同比增长12%", "confidence": 0.9},
+        {"fact": "央行宣布降准0.5个百分点。", "confidence": 0.9},
+    ]
+
+    result = deduplicate_facts(items)
+
+    assert [item["fact"] for item in result] == ["央行宣布降准0.5个百分点。", "某银行一季度净利润同比增长12%"]
+
+
+def test_is_similar_fact_matches_deduplicate_facts():
+    near = ("中国人民银行宣布下调存款准备金率0.5个百分点，释放长期资金约1万亿元",
+            "中国人民银行宣布下调存款准备金率0.5个百分点，释放长期资金约1万亿")
+    far = ("中国人民银行宣布下调存款准备金率0.5个百分点", "某金融科技公司完成新一轮融资，估值超过50亿元")
+
+    assert is_similar_fact(*near)
+    assert not is_similar_fact(*far)
+    assert len(deduplicate_facts([{"fact": fact} for fact in near])) == 1
+    assert len(deduplicate_facts([{"fact": fact} for fact in far])) == 2
+
+
+def test_text_similarity_without_rapidfuzz(monkeypatch):
+    monkeypatch.setattr(merger, "_levenshtein_similarity", None)
+
+    assert text_similarity("央行降准", "央行降息") == 0.75
+    assert text_similarity("abc", "abcdefghij", score_cutoff=0.85) == 0.0
+    assert text_similarity("", "") == 1.0
+
+
+def test_normalize_fact_maps_fullwidth_and_numerals():
+    assert normalize_fact(" 增长三 十（同比）。 ") == "增长30(同比)."
+
+
+def test_calculate_edit_distance():
+    assert calculate_edit_distance("kitten", "sitting") == 3
+    assert calculate_edit_distance("央行降准", "央行降息") == 1
+    assert calculate_edit_distance("", "abc") == 3
@@ -0,0 +1,80 @@
+"""
+数据库连接池配置与统计测试
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool
+
+from src.config.settings import settings
+from src.db.pool import (
+    DEFAULT_POOL_SIZE,
+    InstrumentedQueuePool,
+    build_engine_kwargs,
+    detect_process_role,
+    get_pool_status,
+)
+
+
+@pytest.mark.parametrize("argv, role", [
+    (["uvicorn", "src.web.app:app"], "web"),
+    (["celery", "-A", "src.tasks.celery_app", "worker", "-Q", "crawl"], "crawl"),
+    (["celery", "-A", "src.tasks.celery_app", "worker", "--queues=extract"], "extract"),
+    (["celery", "-A", "src.tasks.celery_app", "worker", "-Qmail"], "mail"),
+    (["celery", "-A", "src.tasks.celery_app", "worker", "-Q", "crawl,extract"], "worker"),
+    (["celery", "-A", "src.tasks.celery_app", "worker", "--concurrency=1"], "worker"),
+    (["celery", "-A", "src.tasks.celery_app", "beat"], "beat"),
+])
+def test_detect_process_role(argv, role):
+    assert detect_process_role(argv) == role
+
+
+def test_queue_pool_sized_by_role(monkeypatch):
+    """测试按进程类型取连接池大小，PostgreSQL 连接带 application_name"""
+    monkeypatch.setattr(settings, "DB_POOL_CLASS", "queue")
+    monkeypatch.setattr(settings, "DB_POOL_SIZES", {"web": 8, "crawl": 4})
+
+    kwargs = build_engine_kwargs("postgresql://u:p@localhost/db", role="crawl")
+
+    assert kwargs["poolclass"] is InstrumentedQueuePool
+    assert kwargs["pool_size"] == 4
+    assert kwargs["pool_recycle"] == settings.DB_POOL_RECYCLE
+    assert kwargs["connect_args"] == {"application_name": f"{settings.DB_APPLICATION_NAME}-crawl"}
+    assert build_engine_kwargs("postgresql://u:p@localhost/db", role="other")["pool_size"] == DEFAULT_POOL_SIZE
+
+
+def test_null_pool_for_pgbouncer(monkeypatch):
+    """测试 DB_POOL_CLASS=null 时不在进程内保留连接"""
+    monkeypatch.setattr(settings, "DB_POOL_CLASS", "null")
+
+    kwargs = build_engine_kwargs("postgresql://u:p@localhost/db", role="web")
+
+    assert kwargs["poolclass"] is NullPool
+    assert "pool_size" not in kwargs
+
+
+def test_pool_status_reports_saturation_and_timeouts(tmp_path, monkeypatch):
+    """测试连接池状态包含使用中连接数、饱和度、等待时间和超时次数"""
+    monkeypatch.setattr(settings, "DB_POOL_CLASS", "queue")
+    monkeypatch.setattr(settings, "DB_POOL_SIZES", {"web": 1})
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 0.05)
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **build_engine_kwargs(url, role="web"))
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        busy = get_pool_status(engine)
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+
+    status = get_pool_status(engine)
+    assert (busy["checked_out"], busy["saturation"]) == (1, 100.0)
+    assert (status["checked_out"], status["checked_in"]) == (0, 1)
+    assert (status["checkouts"], status["timeouts"]) == (1, 1)
+    assert status["wait_max_ms"] >= 50
+
+    # dispose 重建连接池后保留统计
+    engine.dispose()
+    assert get_pool_status(engine)["timeouts"] == 1
@@ -0,0 +1,162 @@
+"""
+热点查询执行计划回归测试
+
+在 SQLite 上建表（含模型声明的复合 / 部分索引），捕获业务代码实际发出的 SQL 和参数，
+用 EXPLAIN QUERY PLAN 断言命中预期索引、没有全表扫描。
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from src.composer.scorer import refresh_daily_scores
+from src.composer.vector_scorer import ScoreWeights
+from src.db.async_session import to_async_url
+from src.models.article import Article
+from src.models.extraction import DailyItemScore, ExtractionItem, ExtractionQueue, QueueStatus
+from src.models.source import Source
+from src.tasks.extract_tasks import queued_items_query
+from src.web.routes.stats import _keywords_query
+
+_ROWS = 2000
+_TABLES = [Source.__table__, Article.__table__, ExtractionQueue.__table__,
+           ExtractionItem.__table__, DailyItemScore.__table__]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """按生产数据分布造数（队列绝大多数已完成、文章跨多日）并 ANALYZE，让规划器有统计信息"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'plans.db'}")
+    for table in _TABLES:
+        table.create(engine)
+
+    with engine.begin() as conn:
+        conn.execute(Source.__table__.insert(), [{"name": "测试源", "type": "rss", "url": "https://example.com/rss"}])
+        now = datetime(2025, 1, 1)
+        conn.execute(Article.__table__.insert(), [
+            {
+                "source_id": 1, "title": f"文章{i}", "url": f"https://example.com/{i}",
+                "published_at": now + timedelta(hours=i), "fetched_at": now + timedelta(hours=i),
+                "created_at": now + timedelta(hours=i), "updated_at": now + timedelta(hours=i),
+                "processing_status": "done" if i % 50 else "raw",
+            }
+            for i in range(_ROWS)
+        ])
+        conn.execute(ExtractionQueue.__table__.insert(), [
+            {
+                "article_id": i + 1, "priority": i % 10,
+                "status": QueueStatus.QUEUED.value if i % 100 == 0 else QueueStatus.DONE.value,
+                "processing_finished_at": now + timedelta(hours=i),
+                "created_at": now, "updated_at": now,
+            }
+            for i in range(_ROWS)
+        ])
+        conn.exec_driver_sql("ANALYZE")
+
+    yield engine
+    engine.dispose()
+
+
+def _query_plans(engine, run):
+    """执行 run(session)，返回其中每条 SELECT 的执行计划（detail 列表）"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with Session(engine) as db:
+            run(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    with engine.connect() as conn:
+        return [
+            [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            for statement, parameters in statements
+        ]
+
+
+def _assert_uses_index(plan, table, index):
+    assert any(f"{table} USING INDEX {index}" in step or f"{table} USING COVERING INDEX {index}" in step
+               for step in plan), plan
+    assert not any(step == f"SCAN {table}" for step in plan), plan
+
+
+def test_queued_items_use_partial_index(engine):
+    """测试待处理队列项按优先级读取部分索引，不再额外排序"""
+    [plan] = _query_plans(engine, lambda db: queued_items_query(db).all())
+
+    _assert_uses_index(plan, "extraction_queue", "idx_extraction_queue_queued_priority")
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+
+
+def test_queued_items_by_date_avoid_full_scan(engine):
+    """测试按日期过滤的批处理查询走部分索引或 created_at 索引，两张表都不全表扫描"""
+    [plan] = _query_plans(engine, lambda db: queued_items_query(db, "2025-01-02").all())
+
+    assert any("idx_articles_created_at" in step or "idx_extraction_queue_queued_priority" in step
+               for step in plan), plan
+    assert not any(step in ("SCAN extraction_queue", "SCAN articles") for step in plan), plan
+
+
+def test_refresh_daily_scores_uses_status_fetched_at_index(engine):
+    """测试物化评分表重建按 (processing_status, fetched_at) 范围读取文章"""
+    plans = _query_plans(engine, lambda db: refresh_daily_scores(db, date(2025, 1, 2), ScoreWeights()))
+
+    _assert_uses_index(plans[0], "articles", "idx_articles_status_fetched_at")
+
+
+def test_completed_today_uses_status_finished_at_index(engine):
+    """测试今日完成抽取数（/admin/status）走 (status, processing_finished_at) 索引"""
+    stmt = select(func.count(ExtractionQueue.id)).where(
+        ExtractionQueue.processing_finished_at >= datetime(2025, 1, 2),
+        ExtractionQueue.status == "done",
+    )
+    [plan] = _query_plans(engine, lambda db: db.execute(stmt).scalar())
+
+    _assert_uses_index(plan, "extraction_queue", "idx_extraction_queue_status_finished_at")
+
+
+def test_wordcloud_keywords_query_is_sargable(engine):
+    """测试词云关键词查询按发布时间区间走索引（不对列套 date()）"""
+    stmt = _keywords_query(date(2025, 1, 1), date(2025, 1, 7))
+    [plan] = _query_plans(engine, lambda db: db.execute(stmt).all())
+
+    _assert_uses_index(plan, "articles", "idx_articles_published_at")
+    assert "date(" not in str(stmt.compile(engine)).lower()
+
+
+def test_wordcloud_keywords_query_includes_whole_end_day(tmp_path):
+    """测试半开区间改写后仍包含结束日当天全部文章"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'keywords.db'}")
+    for table in (Source.__table__, Article.__table__):
+        table.create(engine)
+    with Session(engine) as db:
+        db.add(Source(name="测试源", type="rss", url="https://example.com/rss"))
+        db.flush()
+        for i, published_at in enumerate([
+            datetime(2024, 12, 31, 23, 59, 59),
+            datetime(2025, 1, 1, 0, 0),
+            datetime(2025, 1, 7, 23, 59, 59),
+            datetime(2025, 1, 8, 0, 0),
+        ]):
+            db.add(Article(source_id=1, title=f"文章{i}", url=f"https://example.com/{i}",
+                           published_at=published_at, keywords=[f"关键词{i}"]))
+        db.commit()
+
+    async def load():
+        async_engine = create_async_engine(to_async_url(str(engine.url)), poolclass=NullPool)
+        async with async_engine.connect() as conn:
+            rows = (await conn.execute(_keywords_query(date(2025, 1, 1), date(2025, 1, 7)))).all()
+        await async_engine.dispose()
+        return sorted(row.keywords[0] for row in rows)
+
+    assert asyncio.run(load()) == ["关键词1", "关键词2"]
@@ -0,0 +1,96 @@
+"""
+LLM 用量记录器测试
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.utils.usage_recorder import TASK_KIND_EXTRACT, TASK_KIND_REPORT, UsageRecorder
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    """不定时刷写、不访问数据库的记录器"""
+    rec = UsageRecorder(batch_size=3, flush_interval=0)
+    write_mock = MagicMock()
+    monkeypatch.setattr(rec, "_write_rows", write_mock)
+    rec.write_mock = write_mock
+    yield rec
+    rec.shutdown()
+
+
+class TestUsageRecorder:
+    """测试缓冲式用量记录"""
+
+    def test_record_only_buffers(self, recorder):
+        """测试记录时只写入内存缓冲"""
+        recorder.record("qwen", "qwen-plus", 1000, 500, article_id=7, chunk_index=0)
+
+        assert recorder.pending_count() == 1
+        recorder.write_mock.assert_not_called()
+
+    def test_flush_writes_rows_in_bulk(self, recorder):
+        """测试刷写时一次性写入全部记录，并带上归因字段"""
+        recorder.record("qwen", "qwen-plus", 1000, 500, article_id=7, chunk_index=0)
+        recorder.record("qwen", "qwen-plus", 800, 200, article_id=7, chunk_index=1)
+
+        written = recorder.flush()
+
+        assert written == 2
+        recorder.write_mock.assert_called_once()
+        rows = recorder.write_mock.call_args.args[0]
+        assert [r["chunk_index"] for r in rows] == [0, 1]
+        assert all(r["article_id"] == 7 for r in rows)
+        assert all(r["task_kind"] == TASK_KIND_EXTRACT for r in rows)
+        assert rows[0]["total_tokens"] == 1500
+        # qwen-plus: 1000/1M*0.8 + 500/1M*2.0
+        assert rows[0]["cost"] == pytest.approx(0.0018)
+        assert recorder.pending_count() == 0
+
+    def test_batch_size_triggers_background_flush(self, recorder):
+        """测试缓冲达到批量阈值时由后台线程刷写，record() 调用方不执行写库"""
+        written = threading.Event()
+        writer_threads = []
+
+        def write_rows(rows):
+            writer_threads.append(threading.current_thread())
+            written.set()
+
+        recorder.write_mock.side_effect = write_rows
+        for i in range(3):
+            recorder.record("deepseek", "deepseek-chat", 10, 10, task_kind=TASK_KIND_REPORT)
+
+        assert written.wait(timeout=5)
+        assert writer_threads == [recorder._thread]
+        assert writer_threads[0] is not threading.current_thread()
+        assert recorder.pending_count() == 0
+
+    def test_failed_flush_keeps_rows(self, recorder):
+        """测试写库失败时记录保留到下次刷写"""
+        recorder.write_mock.side_effect = [RuntimeError("db down"), None]
+        recorder.record("qwen", "qwen-max", 100, 100)
+
+        assert recorder.flush() == 0
+        assert recorder.pending_count() == 1
+
+        assert recorder.flush() == 1
+        assert recorder.pending_count() == 0
+
+    def test_explicit_cost_is_kept(self, recorder):
+        """测试显式传入的费用不会被重新计算"""
+        recorder.record("qwen", "qwen-plus", 1000, 1000, cost=1.23)
+        recorder.flush()
+
+        rows = recorder.write_mock.call_args.args[0]
+        assert rows[0]["cost"] == 1.23
+
+    def test_shutdown_flushes_remaining(self, recorder):
+        """测试关闭时刷写剩余记录"""
+        recorder.record("qwen", "qwen-plus", 10, 10)
+
+        recorder.shutdown()
+
+        recorder.write_mock.assert_called_once()
+        assert recorder.pending_count() == 0